@@ -0,0 +1,78 @@
+"""Measure the time and allocations per element of fiber iteration
+
+For iteration over the occupancy of a fiber (with and without reusing
+the CoordPayload, see `Fiber.iterOccupancy()`) and for the `&`, `|`
+and `<<` operators, report the time per element and the number of
+memory blocks and bytes that are still allocated per element when
+the consumer keeps every element (i.e., `list()` of the iterator), as
+measured by `tracemalloc`.
+
+Usage:
+
+    python3 bench_alloc.py [--shape N] [--density D]
+
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from fibertree import Fiber
+
+
+def measure_time(make_iter, count):
+    """Time consuming the iterator (without keeping the elements)"""
+
+    start = time.perf_counter()
+    for _ in make_iter():
+        pass
+
+    return (time.perf_counter() - start) / count
+
+
+def measure_allocs(make_iter, count):
+    """Count the blocks/bytes kept alive by a list of the elements"""
+
+    tracemalloc.start()
+
+    before = tracemalloc.take_snapshot()
+    elements = list(make_iter())
+    after = tracemalloc.take_snapshot()
+
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+
+    del elements
+
+    return blocks / count, size / count
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, default=200000)
+    parser.add_argument("--density", type=float, default=0.5)
+    args = parser.parse_args()
+
+    a = Fiber.fromRandom([args.shape], args.density, seed=1)
+    b = Fiber.fromRandom([args.shape], args.density, seed=2)
+
+    cases = [("iterOccupancy", lambda: a.iterOccupancy(), len(a)),
+             ("reuse=True", lambda: a.iterOccupancy(reuse=True), len(a)),
+             ("&", lambda: a & b, len(list(a & b))),
+             ("|", lambda: a | b, len(list(a | b))),
+             ("<<", lambda: Fiber() << a, len(a))]
+
+    print(f"{args.shape} coordinates, density {args.density}")
+    print("")
+    print(f"{'operation':>14}{'ns/elem':>10}{'blocks/elem':>14}{'bytes/elem':>12}")
+
+    for name, make_iter, count in cases:
+        elem_time = measure_time(make_iter, count)
+        blocks, size = measure_allocs(make_iter, count)
+
+        print(f"{name:>14}{elem_time*1e9:>10.0f}{blocks:>14.2f}{size:>12.1f}")
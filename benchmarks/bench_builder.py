@@ -0,0 +1,70 @@
+"""Time filling an output tensor out of order
+
+Computes an outer-product SpGEMM, Z[m, n] = sum_k A[k, m] * B[k, n],
+whose output elements are produced out of order, writing the output
+with `getPayloadRef()` and with a `TensorBuilder`.
+
+Usage:
+
+    python3 bench_builder.py [--shape M K N] [--density D]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Tensor
+from fibertree import TensorBuilder
+
+
+def outer_payload_ref(a_km, b_kn):
+    """Write each partial product into the output with getPayloadRef()"""
+
+    z = Tensor(rank_ids=["M", "N"])
+    z_m = z.getRoot()
+
+    for k, (a_m, b_n) in a_km.getRoot() & b_kn.getRoot():
+        for m, a_val in a_m:
+            for n, b_val in b_n:
+                z_ref = z_m.getPayloadRef(m, n)
+                z_ref += a_val * b_val
+
+    return z
+
+
+def outer_builder(a_km, b_kn):
+    """Add each partial product to a TensorBuilder"""
+
+    z = TensorBuilder(["M", "N"], combine="sum")
+
+    for k, (a_m, b_n) in a_km.getRoot() & b_kn.getRoot():
+        for m, a_val in a_m:
+            for n, b_val in b_n:
+                z.add((m, n), a_val * b_val)
+
+    return z.build()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, nargs=3, default=[2000, 200, 2000])
+    parser.add_argument("--density", type=float, default=0.02)
+    args = parser.parse_args()
+
+    M, K, N = args.shape
+
+    a_km = Tensor.fromRandom(["K", "M"], [K, M], [1.0, args.density], seed=1)
+    b_kn = Tensor.fromRandom(["K", "N"], [K, N], [1.0, args.density], seed=2)
+
+    print(f"outer-product SpGEMM M={M} K={K} N={N} density={args.density}")
+
+    start = time.perf_counter()
+    z_ref = outer_payload_ref(a_km, b_kn)
+    print(f"  getPayloadRef: {time.perf_counter() - start:8.3f} s")
+
+    start = time.perf_counter()
+    z = outer_builder(a_km, b_kn)
+    print(f"  TensorBuilder: {time.perf_counter() - start:8.3f} s")
+
+    assert z == z_ref
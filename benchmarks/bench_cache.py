@@ -0,0 +1,123 @@
+"""Measure simulating caches with `Traffic`
+
+Traces Gustavson's sparse matrix multiply (Z[m,n] += A[m,k] * B[k,n])
+in memory, and computes the read traffic of B through an optimal
+(Belady) cache (`Traffic.cacheTraffic()`), and fully associative LRU
+and FIFO caches and a 4-way set-associative LRU cache
+(`Traffic.lruTraffic()` and `Traffic.fifoTraffic()`), of increasing
+capacities, from a few lines to all of the lines of B.
+
+Usage:
+
+    python3 bench_cache.py [--size N] [--density D] [--line N]
+
+"""
+
+import argparse
+import gc
+import time
+
+import yaml
+
+from fibertree import Metrics
+from fibertree import Tensor
+from fibertree.model import Format, Traffic
+
+
+def timeit(function, *args, **kwargs):
+    """Return the time of a call and its result"""
+
+    gc.collect()
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def collect(a, b):
+    """Trace Gustavson's matrix multiply in memory"""
+
+    z = Tensor(rank_ids=["M", "N"], shape=[a.getShape()[0], b.getShape()[1]])
+
+    z_m = z.getRoot()
+    a_m = a.getRoot()
+    b_k = b.getRoot()
+
+    Metrics.beginCollect("bench_cache")
+    Metrics.setTraceFormat("memory")
+
+    Metrics.trace("K", type_="intersect_1")
+    Metrics.trace("N", type_="populate_1")
+    Metrics.trace("N", type_="populate_read_0")
+    Metrics.trace("N", type_="populate_write_0")
+
+    for m, (z_n, a_k) in z_m << a_m:
+        for k, (a_val, b_n) in a_k & b_k:
+            for n, (z_ref, b_val) in z_n << b_n:
+                z_ref += a_val * b_val
+
+    Metrics.endCollect()
+
+    return z, Metrics.dumpTraces()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--size", type=int, default=300)
+    parser.add_argument("--density", type=float, default=0.1)
+    parser.add_argument("--line", type=int, default=4)
+    args = parser.parse_args()
+
+    size = args.size
+
+    a = Tensor.fromRandom(["M", "K"], [size, size], [1.0, args.density], seed=1)
+    b = Tensor.fromRandom(["K", "N"], [size, size], [1.0, args.density], seed=2)
+
+    (z, traces) = collect(a, b)
+
+    specs = yaml.safe_load("""
+    K:
+        format: U
+        pbits: 32
+    M:
+        format: U
+        pbits: 32
+    N:
+        format: C
+        cbits: 32
+        pbits: 32
+    """)
+    formats = {"B": Format(b, specs), "Z": Format(z, specs)}
+
+    bindings = yaml.safe_load("""
+    - tensor: B
+      rank: K
+      type: payload
+
+    - tensor: B
+      rank: N
+      type: payload
+    """)
+
+    trace_fns = {("B", "K", "payload", "read"): traces["K", "intersect_1"],
+                 ("B", "N", "payload", "read"): traces["N", "populate_1"]}
+
+    line_sz = args.line * 32
+    num_accesses = sum(len(trace) for trace in trace_fns.values())
+
+    print(f"{num_accesses} accesses, lines of {args.line} elements")
+    print("")
+    print(f"{'lines':>10}{'model':>14}{'time (s)':>10}{'read (bits)':>14}")
+
+    models = [("optimal", Traffic.cacheTraffic, {}),
+              ("LRU", Traffic.lruTraffic, {}),
+              ("FIFO", Traffic.fifoTraffic, {}),
+              ("LRU, 4-way", Traffic.lruTraffic, {"ways": 4})]
+
+    for lines in [16, 256, 4096, 65536]:
+        for name, model, kwargs in models:
+            (elapsed, (bits, _)) = timeit(model, bindings, formats, trace_fns,
+                                          lines * line_sz, line_sz, **kwargs)
+
+            print(f"{lines:>10}{name:>14}{elapsed:>10.3f}{bits['B']['read']:>14}")
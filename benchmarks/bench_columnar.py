@@ -0,0 +1,74 @@
+"""Compare list-backed and columnar (array-backed) leaf fibers
+
+Builds the same random tensor with `Tensor.fromRandom()` with and
+without `columnar=True` and reports the build time, the memory
+allocated for the tensor and the time to traverse it.
+
+Usage:
+
+    python3 bench_columnar.py [--shape M K] [--density D]
+
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from fibertree import Tensor
+
+
+def build(shape, density, columnar):
+    """Build a random tensor returning (tensor, seconds, bytes)"""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    t = Tensor.fromRandom(rank_ids=["M", "K"],
+                          shape=shape,
+                          density=[1.0, density],
+                          seed=10,
+                          columnar=columnar)
+
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return t, elapsed, size
+
+
+def traverse(t):
+    """Sum all the values in the tensor returning (sum, seconds)"""
+
+    start = time.perf_counter()
+
+    total = 0
+    for _, a_k in t.getRoot():
+        for _, a_val in a_k:
+            total += a_val
+
+    return total, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, nargs=2, default=[1000, 1000])
+    parser.add_argument("--density", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"Tensor.fromRandom shape={args.shape} density={args.density}")
+    print("")
+    print(f"{'storage':>10} {'build (s)':>10} {'memory (MB)':>12} {'traverse (s)':>13}")
+
+    results = {}
+
+    for columnar in [False, True]:
+        t, build_time, size = build(args.shape, args.density, columnar)
+        total, traverse_time = traverse(t)
+
+        name = "columnar" if columnar else "list"
+        results[name] = total
+
+        print(f"{name:>10} {build_time:>10.3f} {size/2**20:>12.1f} {traverse_time:>13.3f}")
+
+    assert results["list"] == results["columnar"]
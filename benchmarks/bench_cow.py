@@ -0,0 +1,66 @@
+"""Measure the cost of tiling a tensor with and without copy-on-write
+
+Splits the top rank of a 4-rank tensor (see `Tensor.splitUniform()`)
+and flattens its top two ranks (see `Tensor.flattenRanks()`), with
+deep copies and with copy-on-write (see `Fiber.setCopyOnWrite()`),
+and reports the time, the peak memory allocated during the transform
+and the memory still held by the result, as measured by
+`tracemalloc`.
+
+Usage:
+
+    python3 bench_cow.py [--shape N] [--density D]
+
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+def measure(transform, tensor):
+    """Return the time, peak and retained memory of a transform"""
+
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    result = transform(tensor)
+    elapsed = time.perf_counter() - start
+
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del result
+
+    return elapsed, peak, retained
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, default=24)
+    parser.add_argument("--density", type=float, default=0.5)
+    args = parser.parse_args()
+
+    shape = [args.shape] * 4
+    t = Tensor.fromRandom(["A", "B", "C", "D"], shape, [args.density] * 4, seed=1)
+
+    print(f"shape {shape}, {t.countValues()} values")
+    print("")
+    print(f"{'transform':>10}{'copy':>6}{'time (s)':>10}{'peak (MB)':>11}{'held (MB)':>11}")
+
+    transforms = [("split", lambda t: t.splitUniform(4)),
+                  ("flatten", lambda t: t.flattenRanks())]
+
+    for name, transform in transforms:
+        for mode, cow in [("deep", False), ("cow", True)]:
+            Fiber.setCopyOnWrite(cow)
+
+            elapsed, peak, retained = measure(transform, t)
+
+            print(f"{name:>10}{mode:>6}{elapsed:>10.3f}{peak / 1e6:>11.2f}{retained / 1e6:>11.2f}")
+
+    Fiber.setCopyOnWrite(False)
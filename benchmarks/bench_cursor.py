@@ -0,0 +1,57 @@
+"""Time monotone coordinate lookups with and without a cursor
+
+Looks up every coordinate of a random fiber (and the coordinates in
+between) in increasing order with `Fiber.getPayload()` (a binary
+search per lookup) and with a `Fiber.getCursor()` cursor (a galloping
+search from the previous position), and times populating a fiber with
+the `<<` operator (which inserts into an existing fiber).
+
+Usage:
+
+    python3 bench_cursor.py [--shape N] [--density D]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Fiber
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, default=100000)
+    parser.add_argument("--density", type=float, default=0.5)
+    args = parser.parse_args()
+
+    a = Fiber.fromRandom([args.shape], args.density, seed=1)
+    lookups = range(0, args.shape, 2)
+
+    start = time.perf_counter()
+    ref = [a.getPayload(c, allocate=False) for c in lookups]
+    bisect_time = time.perf_counter() - start
+
+    cursor = a.getCursor()
+
+    start = time.perf_counter()
+    result = [cursor.getPayload(c) for c in lookups]
+    cursor_time = time.perf_counter() - start
+
+    assert result == ref
+
+    hits, misses = a.getSavedPosStats(hints=True)[2:]
+
+    print(f"{len(lookups)} lookups in a fiber of {len(a)} elements")
+    print(f"  binary search: {bisect_time*1000:8.1f} ms")
+    print(f"  cursor:        {cursor_time*1000:8.1f} ms  (hint hits={hits} misses={misses})")
+
+    z = Fiber.fromRandom([args.shape], args.density, seed=2)
+    z_len = len(z)
+
+    start = time.perf_counter()
+    for _, (z_ref, a_val) in z << a:
+        z_ref += a_val
+    populate_time = time.perf_counter() - start
+
+    print(f"populate (<<) {len(a)} elements into {z_len}: {populate_time*1000:8.1f} ms")
@@ -0,0 +1,76 @@
+"""Time dense ("U") rank access
+
+Times the accesses made to a dense activation rank by a 1-D
+convolution (see examples/scripts/conv-1d): iterating over the shape
+of the fiber, point lookups and uncompress(), for a rank with format
+"C" and with format "U" (which gives the leaf fibers dense storage).
+
+Usage:
+
+    python3 bench_dense.py [--shape W] [--density D] [--filter S]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Tensor
+
+
+def conv1d(i_w, f_s, q):
+    """O[q] = sum_s I[q+s] * F[s] with a point lookup per input"""
+
+    filter_ = [(s, f_val.value) for s, f_val in f_s]
+
+    total = 0
+
+    for q_coord in range(q):
+        for s_coord, f_val in filter_:
+            total += i_w.getPayload(q_coord + s_coord).value * f_val
+
+    return total
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, default=20000)
+    parser.add_argument("--density", type=float, default=0.9)
+    parser.add_argument("--filter", type=int, default=5)
+    args = parser.parse_args()
+
+    W, S = args.shape, args.filter
+    Q = W - S + 1
+
+    f = Tensor.fromRandom(["S"], [S], [1.0], seed=2)
+
+    print(f"1-D conv W={W} S={S} input density={args.density}")
+    print("")
+    print(f"{'format':>8}{'iterShape':>12}{'lookups':>12}{'uncompress':>12}")
+
+    results = []
+
+    for fmt in ["C", "U"]:
+        i = Tensor.fromRandom(["W"], [W], [args.density], seed=1)
+        i.setFormat("W", fmt)
+
+        i_w = i.getRoot()
+        f_s = f.getRoot()
+
+        start = time.perf_counter()
+        shape_sum = sum(p for _, p in i_w.iterShape())
+        iter_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        conv = conv1d(i_w, f_s, Q)
+        lookup_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        dense = i_w.uncompress()
+        uncompress_time = time.perf_counter() - start
+
+        results.append((shape_sum, conv, dense))
+
+        print(f"{fmt:>8}{iter_time:>12.3f}{lookup_time:>12.3f}{uncompress_time:>12.3f}")
+
+    assert results[0] == results[1]
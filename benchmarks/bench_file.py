@@ -0,0 +1,69 @@
+"""Measure writing and reading a tensor in the YAML and binary formats
+
+Dumps a random 3-rank tensor with `Tensor.dump()` in the YAML and
+binary formats, reads it back with `Tensor.fromFile()` and reports
+the time to write and read and the size on disk of each format.
+
+Usage:
+
+    python3 bench_file.py [--shape N] [--density D]
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from fibertree import Tensor
+
+
+def diskSize(path):
+    """Return the size in bytes of a file or directory"""
+
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def measure(t, path, fmt, **kwargs):
+    """Return the time to write and read a tensor, and its size on disk"""
+
+    start = time.perf_counter()
+    t.dump(path, fmt=fmt)
+    write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    t2 = Tensor.fromFile(path, **kwargs)
+    read = time.perf_counter() - start
+
+    assert t2 == t
+
+    return write, read, diskSize(path)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, default=100)
+    parser.add_argument("--density", type=float, default=0.3)
+    args = parser.parse_args()
+
+    shape = [args.shape] * 3
+    t = Tensor.fromRandom(["M", "N", "K"], shape, [1.0, 1.0, args.density], seed=1)
+
+    print(f"shape {shape}, {t.countValues()} values")
+    print("")
+    print(f"{'format':>16}{'write (s)':>11}{'read (s)':>10}{'size (MB)':>11}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cases = [("yaml", "yaml", {}),
+                 ("binary", "binary", {}),
+                 ("binary columnar", "binary", {"columnar": True})]
+
+        for name, fmt, kwargs in cases:
+            path = os.path.join(tmpdir, name.replace(" ", "-"))
+            write, read, size = measure(t, path, fmt, **kwargs)
+
+            print(f"{name:>16}{write:>11.3f}{read:>10.3f}{size / 2**20:>11.2f}")
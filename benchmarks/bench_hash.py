@@ -0,0 +1,63 @@
+"""Time random point lookups in compressed ("C") and hashed ("H") fibers
+
+Looks up random coordinates (half of them present) with
+`Fiber.getPayload()` in fibers of increasing length, for a rank with
+format "C" (binary search) and "H" (hash index), and reports the
+time to build and the memory used by the hash index (which is built
+on the first lookup, outside the timed loop).
+
+Usage:
+
+    python3 bench_hash.py [--lengths N ...] [--lookups L]
+
+"""
+
+import argparse
+import random
+import time
+
+from fibertree import Fiber
+
+
+def time_lookups(fiber, coords):
+    """Time looking up each of `coords` in `fiber`"""
+
+    start = time.perf_counter()
+    for c in coords:
+        fiber.getPayload(c, allocate=False)
+
+    return (time.perf_counter() - start) / len(coords)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--lengths", type=int, nargs="+",
+                        default=[10, 100, 1000, 10000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'length':>10}{'C (us)':>10}{'H (us)':>10}{'build (ms)':>12}{'index (bytes/elem)':>20}")
+
+    for length in args.lengths:
+        random.seed(length)
+
+        coords = list(range(0, 2 * length, 2))
+        fiber = Fiber(coords, [1] * length)
+
+        lookups = [random.randrange(2 * length) for _ in range(args.lookups)]
+
+        fiber.getRankAttrs().setFormat("C")
+        c_time = time_lookups(fiber, lookups)
+
+        fiber.getRankAttrs().setFormat("H")
+
+        start = time.perf_counter()
+        fiber.getPayload(0)
+        build_time = time.perf_counter() - start
+
+        h_time = time_lookups(fiber, lookups)
+
+        index_bytes = fiber.getIndexBytes() / length
+
+        print(f"{length:>10}{c_time*1e6:>10.2f}{h_time*1e6:>10.2f}{build_time*1e3:>12.2f}{index_bytes:>20.1f}")
@@ -0,0 +1,72 @@
+"""Time two-fiber intersection for each merge strategy and skew
+
+Intersects a short fiber with a fiber that is `ratio` times longer
+for each merge strategy (see `Fiber.setMergeStrategy()`) and reports
+the time to iterate over the result.
+
+Usage:
+
+    python3 bench_intersect.py [--short N] [--ratios R ...]
+
+"""
+
+import argparse
+import random
+import time
+
+from fibertree import Fiber
+from fibertree.core import merge_kernels
+
+
+def random_fiber(length, shape, seed):
+    """Create a fiber with `length` random coordinates in [0, shape)"""
+
+    random.seed(seed)
+    coords = sorted(random.sample(range(shape), length))
+
+    return Fiber(coords, [1] * length)
+
+
+def time_intersect(a, b, strategy, reps):
+    """Time iterating over a & b"""
+
+    Fiber.setMergeStrategy(strategy)
+
+    start = time.perf_counter()
+
+    for _ in range(reps):
+        count = sum(1 for _ in a & b)
+
+    return (time.perf_counter() - start) / reps, count
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--short", type=int, default=1000)
+    parser.add_argument("--ratios", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--reps", type=int, default=5)
+    args = parser.parse_args()
+
+    strategies = [s for s in merge_kernels.STRATEGIES if s != "auto"] + ["auto"]
+
+    print(f"Intersection of {args.short} elements with {args.short}*ratio elements (ms)")
+    print("")
+    print(f"{'ratio':>6}" + "".join(f"{s:>10}" for s in strategies))
+
+    saved = Fiber.getMergeStrategy()
+
+    for ratio in args.ratios:
+        long_len = args.short * ratio
+        shape = 2 * long_len
+
+        a = random_fiber(args.short, shape, seed=1)
+        b = random_fiber(long_len, shape, seed=2)
+
+        results = [time_intersect(a, b, s, args.reps) for s in strategies]
+
+        assert len(set(count for _, count in results)) == 1
+
+        print(f"{ratio:>6}" + "".join(f"{t*1000:>10.2f}" for t, _ in results))
+
+    Fiber.setMergeStrategy(saved)
@@ -0,0 +1,78 @@
+"""Measure the time to iterate over the elements of a fiber
+
+Reports the time per element of `for c, p in fiber` over an eager
+fiber (with list and columnar storage), over a sub-range with
+`Fiber.iterRange()` and with metrics collection turned on.
+
+Usage:
+
+    python3 bench_iter.py [--size N]
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from fibertree import Fiber
+from fibertree import Metrics
+
+
+def measure(make_iter, repeat=3):
+    """Return the best time to consume the iterator"""
+
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for c, p in make_iter():
+            pass
+        elapsed = time.perf_counter() - start
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def with_metrics(fiber):
+    """Iterate over the fiber with metrics collection turned on"""
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Metrics.beginCollect(os.path.join(tmpdir, "bench_iter"))
+        Metrics.trace("K")
+
+        try:
+            yield from fiber
+        finally:
+            Metrics.endCollect()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--size", type=int, default=1000000)
+    args = parser.parse_args()
+
+    n = args.size
+
+    coords = list(range(n))
+    payloads = [c % 7 + 1 for c in coords]
+
+    a = Fiber(coords, payloads)
+    a.getRankAttrs().setId("K")
+
+    columnar = Fiber.fromColumnar(coords, payloads)
+
+    cases = [("for c, p in fiber", lambda: a, n),
+             ("columnar", lambda: columnar, n),
+             ("iterRange(n/4, 3n/4)", lambda: a.iterRange(n // 4, 3 * n // 4), n // 2),
+             ("metrics on", lambda: with_metrics(a), n)]
+
+    print(f"{n} elements")
+    print("")
+    print(f"{'iteration':>22}{'total (s)':>12}{'ns/elem':>10}")
+
+    for name, make_iter, count in cases:
+        elapsed = measure(make_iter, repeat=1 if name == "metrics on" else 3)
+        print(f"{name:>22}{elapsed:>12.3f}{elapsed / count * 1e9:>10.0f}")
@@ -0,0 +1,70 @@
+"""Measure merging stationary operands with the merge position cache
+
+Repeats a loop nest that merges each row of a random sparse matrix
+with the same sparse vector (`a_k & b_k`, `a_k | b_k` and `a_k - b_k`),
+as in a stationary dataflow or an iterative solver, with the cache of
+merge positions (see `Fiber.setMergeCache()`) disabled and enabled.
+The values of the vector are updated between the repetitions, which
+does not invalidate the cache.
+
+Usage:
+
+    python3 bench_merge_cache.py [--rows N] [--cols N] [--repeat N]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+def merge(a_m, b_k, op):
+    """Merge every row of a matrix with a vector"""
+
+    count = 0
+    for m, a_k in a_m:
+        for k, ab in op(a_k, b_k):
+            count += 1
+
+    return count
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--cols", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    a = Tensor.fromRandomSparse(["M", "K"], [args.rows, args.cols],
+                                density=[1.0, 0.05], seed=1)
+    b = Tensor.fromRandomSparse(["K"], [args.cols], density=0.2, seed=2)
+
+    a_m = a.getRoot()
+    b_k = b.getRoot()
+
+    print(f"{a.countValues()} matrix values, {b.countValues()} vector values,"
+          f" {args.repeat} repetitions")
+    print("")
+    print(f"{'operator':>10}{'no cache (s)':>14}{'cache (s)':>11}{'cache (MB)':>12}")
+
+    for name, op in [("&", Fiber.__and__),
+                     ("|", Fiber.__or__),
+                     ("-", Fiber.__sub__)]:
+        times = []
+        for max_bytes in [None, 1 << 30]:
+            Fiber.setMergeCache(max_bytes)
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                merge(a_m, b_k, op)
+                b_k.updatePayloads(lambda i, c, p: p + 1)
+            times.append(time.perf_counter() - start)
+
+        nbytes = Fiber.getMergeCache().nbytes / 1e6
+        print(f"{name:>10}{times[0]:>14.3f}{times[1]:>11.3f}{nbytes:>12.1f}")
+
+    Fiber.setMergeCache(None)
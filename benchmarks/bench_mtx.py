@@ -0,0 +1,98 @@
+"""Measure importing and exporting a sparse matrix
+
+Writes a random sparse matrix in Matrix Market format and loads it
+into a tensor by going through a YAML file (as
+`fibertree/codec/tiling_preproc.py` used to), with a `TensorBuilder`,
+and with the bulk importers (`Tensor.fromMatrixMarket()`,
+`Tensor.fromCOO()` and `Tensor.fromCSR()`). Also reports the time of
+the exporters.
+
+Usage:
+
+    python3 bench_mtx.py [--size N] [--nnz NNZ] [--yaml-nnz NNZ]
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from fibertree import Tensor
+from fibertree import TensorBuilder
+
+
+def timeit(function, *args, **kwargs):
+    """Return the time of a call and its result"""
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def viaYAML(filename, yamlfile):
+    """Load a matrix by converting it to a YAML file"""
+
+    Tensor.fromMatrixMarket(filename).dump(yamlfile)
+    return Tensor.fromYAMLfile(yamlfile)
+
+
+def viaBuilder(rows, cols, values):
+    """Load a matrix with a TensorBuilder"""
+
+    builder = TensorBuilder(["M", "K"])
+    builder.extend(zip(zip(rows.tolist(), cols.tolist()), values.tolist()))
+    return builder.build()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--nnz", type=int, default=1000000)
+    parser.add_argument("--yaml-nnz", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for nnz in [args.yaml_nnz, args.nnz]:
+            rows = rng.integers(0, args.size, nnz)
+            cols = rng.integers(0, args.size, nnz)
+            values = rng.integers(1, 100, nnz)
+
+            ref = Tensor.fromCOO(["M", "K"], [rows, cols], values)
+
+            filename = os.path.join(tmpdir, "a.mtx")
+            yamlfile = os.path.join(tmpdir, "a.yaml")
+
+            write, _ = timeit(ref.toMatrixMarket, filename)
+
+            print(f"{args.size}x{args.size}, {ref.countValues()} values")
+            print("")
+            print(f"{'case':>18}{'time (s)':>10}")
+
+            cases = [("fromMatrixMarket", Tensor.fromMatrixMarket, (filename,)),
+                     ("fromCOO", Tensor.fromCOO, (["M", "K"], [rows, cols], values)),
+                     ("fromCSR", Tensor.fromCSR, ref.toCSR()),
+                     ("TensorBuilder", viaBuilder, (rows, cols, values))]
+
+            if nnz <= args.yaml_nnz:
+                cases.insert(0, ("mtx -> yaml", viaYAML, (filename, yamlfile)))
+
+            for name, function, fargs in cases:
+                elapsed, t = timeit(function, *fargs)
+                assert t == ref
+
+                print(f"{name:>18}{elapsed:>10.3f}")
+
+            for name, function in [("toMatrixMarket", None),
+                                   ("toCOO", ref.toCOO),
+                                   ("toCSR", ref.toCSR)]:
+                elapsed = write if function is None else timeit(function)[0]
+
+                print(f"{name:>18}{elapsed:>10.3f}")
+
+            print("")
@@ -0,0 +1,89 @@
+"""Measure finding the next use of each access of a trace
+
+Builds the combined (read) trace of the output of a sparse loop nest
+Z[m,n] += A[m,k] * B[k,n], with a random fiber of N for each (m, k),
+and finds the next use of each access to Z (the step of `Traffic`
+before simulating a buffer) in memory, and with the combined and
+next-use traces in CSV files on a smaller trace.
+
+Usage:
+
+    python3 bench_next_use.py [--accesses N] [--file-accesses N] [--line N]
+
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from fibertree.core.trace_file import Trace, writeTrace
+from fibertree.model import Traffic
+
+
+def timeit(function, *args, **kwargs):
+    """Return the time of a call and its result"""
+
+    gc.collect()
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def buildTrace(num_accesses, fiber_len=1000, shape=10000, seed=1):
+    """Build the combined trace of the accesses to Z"""
+
+    rng = np.random.default_rng(seed)
+
+    num_k = 100
+    num_fibers = num_accesses // fiber_len
+    num_m = -(-num_fibers // num_k)
+
+    m_k = np.arange(num_fibers)
+    n = np.sort(rng.integers(0, shape, size=(num_fibers, fiber_len)), axis=1)
+
+    names = ["M_pos", "K_pos", "N_pos", "M", "K", "N", "fiber_pos", "is_write"]
+    rows = np.empty((num_fibers, fiber_len, len(names)), dtype=np.int64)
+
+    rows[:, :, 0] = (m_k // num_k)[:, None]
+    rows[:, :, 1] = (m_k % num_k)[:, None]
+    rows[:, :, 2] = np.arange(fiber_len)
+    rows[:, :, 3] = rows[:, :, 0]
+    rows[:, :, 4] = rows[:, :, 1]
+    rows[:, :, 5] = n
+    rows[:, :, 6] = n
+    rows[:, :, 7] = 0
+
+    print(f"{num_fibers * fiber_len} accesses ({num_m} x {num_k} fibers of {fiber_len})")
+
+    return Trace(names, rows.reshape(-1, len(names)))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--accesses", type=int, default=10000000)
+    parser.add_argument("--file-accesses", type=int, default=1000000)
+    parser.add_argument("--line", type=int, default=4)
+    args = parser.parse_args()
+
+    comb = buildTrace(args.accesses)
+
+    (elapsed, next_use) = timeit(Traffic._buildNextUseTrace, ["M", "N"], args.line, comb)
+    print(f"{'in memory':>12}{elapsed:>10.3f} s  ({np.count_nonzero(next_use >= 0)} reuses)")
+
+    del comb, next_use
+
+    comb = buildTrace(args.file_accesses)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        comb_fn = os.path.join(tmp, "comb.csv")
+        writeTrace(comb_fn, comb.names, comb.rows)
+
+        (elapsed, _) = timeit(Traffic._buildNextUseTrace, ["M", "N"], args.line,
+                              comb_fn, os.path.join(tmp, "next.csv"))
+        print(f"{'in files':>12}{elapsed:>10.3f} s")
@@ -0,0 +1,75 @@
+"""Measure converting between tensors and numpy arrays
+
+Converts a random (dense) numpy array into a tensor via nested
+lists (`Tensor.fromUncompressed()`) and with `Tensor.fromNumpy()`,
+and back via `Fiber.uncompress()` and with `Tensor.toNumpy()`.
+
+Usage:
+
+    python3 bench_numpy.py [--shape N] [--density D]
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from fibertree import Tensor
+
+
+def timeit(function, *args, **kwargs):
+    """Return the time of a call and its result"""
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def viaLists(a):
+    """Convert an array into a tensor via nested lists"""
+
+    return Tensor.fromUncompressed(["M", "N", "K"], a.tolist())
+
+
+def toLists(t):
+    """Convert a tensor into an array via nested lists"""
+
+    return np.array(t.getRoot().uncompress(shape=t.getShape()))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, default=100)
+    parser.add_argument("--density", type=float, default=0.1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+
+    shape = [args.shape] * 3
+    a = rng.integers(1, 100, shape) * (rng.random(shape) < args.density)
+
+    print(f"shape {shape}, {np.count_nonzero(a)} values")
+    print("")
+    print(f"{'case':>24}{'time (s)':>10}")
+
+    cases = [("fromUncompressed", viaLists, (a,)),
+             ("fromNumpy", Tensor.fromNumpy, (a, ["M", "N", "K"])),
+             ("fromNumpy columnar", lambda a: Tensor.fromNumpy(a, columnar=True), (a,))]
+
+    tensors = []
+
+    for name, function, fargs in cases:
+        elapsed, t = timeit(function, *fargs)
+        tensors.append(t)
+
+        print(f"{name:>24}{elapsed:>10.3f}")
+
+    for name, function, t in [("uncompress", toLists, tensors[0]),
+                              ("toNumpy", Tensor.toNumpy, tensors[0]),
+                              ("toNumpy columnar", Tensor.toNumpy, tensors[2])]:
+        elapsed, b = timeit(function, t)
+        assert np.array_equal(a, b)
+
+        print(f"{name:>24}{elapsed:>10.3f}")
@@ -0,0 +1,53 @@
+"""Time n-way intersection and union of k fibers
+
+Runs `Fiber.intersection()` and `Fiber.union()` on k = 2..16 random
+fibers with the "lazy" strategy (a nest of two-operand merges) and
+with the single-pass n-way kernels (see `Fiber.setMergeStrategy()`),
+and checks they compute the same result.
+
+Usage:
+
+    python3 bench_nway.py [--shape N] [--density D] [--max-k K]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Fiber
+
+
+def time_op(op, fibers, strategy):
+    """Time iterating over op(*fibers)"""
+
+    start = time.perf_counter()
+    result = list(op(*fibers, strategy=strategy))
+
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, default=5000)
+    parser.add_argument("--density", type=float, default=0.5)
+    parser.add_argument("--max-k", type=int, default=16)
+    args = parser.parse_args()
+
+    fibers = [Fiber.fromRandom([args.shape], args.density, seed=s)
+              for s in range(args.max_k)]
+
+    strategies = ["lazy", "merge", "gallop", "hash", "vector"]
+
+    print(f"n-way merge of k fibers, shape={args.shape} density={args.density} (ms)")
+
+    for op in [Fiber.intersection, Fiber.union]:
+        print("")
+        print(f"{op.__name__:>12}" + "".join(f"{s:>10}" for s in strategies))
+
+        for k in range(2, args.max_k + 1):
+            results = [time_op(op, fibers[:k], s) for s in strategies]
+
+            assert all(r == results[0][1] for _, r in results)
+
+            print(f"{k:>12}" + "".join(f"{t*1000:>10.1f}" for t, _ in results))
@@ -0,0 +1,67 @@
+"""Measure generating random sparse matrices
+
+Generates random square matrices with `Tensor.fromRandom()` (a
+random number per point of the shape) and with
+`Tensor.fromRandomSparse()` (sampling the elements directly) for a
+range of sizes at a fixed number of elements per row, and for each
+pattern of `Tensor.fromRandomSparse()` at the largest size.
+
+Usage:
+
+    python3 bench_random.py [--per-row N] [--max-dense-size N]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Tensor
+
+
+def timeit(function, *args, **kwargs):
+    """Return the time of a call and its result"""
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--per-row", type=int, default=10)
+    parser.add_argument("--max-dense-size", type=int, default=4000)
+    args = parser.parse_args()
+
+    print(f"{'size':>8}{'values':>10}{'fromRandom (s)':>16}{'fromRandomSparse (s)':>22}")
+
+    for size in [1000, 4000, 10000, 100000]:
+        density = [1.0, args.per_row / size]
+
+        if size <= args.max_dense_size:
+            dense, _ = timeit(Tensor.fromRandom, ["M", "K"], [size, size], density, seed=1)
+            dense = f"{dense:.3f}"
+        else:
+            dense = "-"
+
+        sparse, t = timeit(Tensor.fromRandomSparse, ["M", "K"], [size, size],
+                           density=density, seed=1)
+
+        print(f"{size:>8}{t.countValues():>10}{dense:>16}{sparse:>22.3f}")
+
+    size = 100000
+    nnz = size * args.per_row
+
+    print("")
+    print(f"{size}x{size}, {nnz} values")
+    print("")
+    print(f"{'pattern':>10}{'time (s)':>10}")
+
+    for pattern, kwargs in [("uniform", {}),
+                            ("powerlaw", {"alpha": 1.0}),
+                            ("banded", {"bandwidth": args.per_row}),
+                            ("block", {"block": [4, 4]})]:
+        elapsed, t = timeit(Tensor.fromRandomSparse, ["M", "K"], [size, size],
+                            nnz=nnz, pattern=pattern, seed=1, **kwargs)
+
+        print(f"{pattern:>10}{elapsed:>10.3f}")
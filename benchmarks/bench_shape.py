@@ -0,0 +1,116 @@
+"""Measure finding the shape of a fibertree
+
+Builds a random 3-rank fibertree whose fibers have no owning rank
+(so the shape is found from the fibers themselves) and measures the
+time per call of `Fiber.getShape()` and `Fiber.estimateShape()`,
+alone and after each of a series of updates of the leaf fibers that
+do or do not change the shape.
+
+It also measures the total time of a workload that starts with no
+cached shapes and gets the shape after each of `--updates` random
+updates (inserts inside leaf fibers, appends to leaf fibers and new
+leaf fibers).
+
+Usage:
+
+    python3 bench_shape.py [--nnz N] [--calls N] [--updates N]
+
+"""
+
+import argparse
+import gc
+import random
+import time
+
+from fibertree import Fiber, Tensor
+
+
+def perCall(function, calls):
+    """Return the time per call of a function in microseconds"""
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nnz", type=int, default=1000000)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=100)
+    args = parser.parse_args()
+
+    shape = [100, 1000, 10000]
+
+    def detached():
+        """Build the fibertree and detach its fibers from their ranks"""
+
+        t = Tensor.fromRandomSparse(["M", "N", "K"], shape, nnz=args.nnz, seed=1)
+
+        for rank in t.ranks:
+            for fiber in rank.getFibers():
+                fiber.setOwner(None)
+
+        return t
+
+    t = detached()
+
+    root = t.getRoot()
+    middles = t.ranks[-2].getFibers()
+    leaves = t.ranks[-1].getFibers()
+
+    rng = random.Random(1)
+
+    def insertInside():
+        """Insert an element before the last one of a leaf fiber"""
+
+        fiber = rng.choice(leaves)
+        coord = rng.randrange(fiber.coords[-1])
+        ref = fiber.getPayloadRef(coord)
+        ref <<= 1
+
+    def appendLast():
+        """Append an element after the last one of a leaf fiber"""
+
+        fiber = rng.choice(leaves)
+        fiber.append(fiber.coords[-1] + 1, 1)
+
+    def appendLeaf():
+        """Append a new leaf fiber after the last one of a middle fiber"""
+
+        fiber = rng.choice(middles)
+        fiber.append(fiber.coords[-1] + 1, Fiber([rng.randrange(shape[-1])], [1]))
+
+    print(f"{t.countValues()} values, {len(leaves)} leaf fibers")
+
+    #
+    # The workload starts with no cached shapes
+    #
+    gc.collect()
+
+    start = time.perf_counter()
+    for _ in range(args.updates):
+        rng.choice([insertInside, appendLast, appendLeaf])()
+        root.getShape()
+    workload = time.perf_counter() - start
+
+    print("")
+    print(f"{args.updates} updates + getShape(), total: {workload:.3f} s")
+
+    t = detached()
+
+    root = t.getRoot()
+    middles = t.ranks[-2].getFibers()
+    leaves = t.ranks[-1].getFibers()
+    print("")
+    print(f"{'case':>28}{'time (us)':>12}")
+
+    cases = [("getShape()", root.getShape),
+             ("estimateShape()", root.estimateShape),
+             ("insert inside + getShape()", lambda: (insertInside(), root.getShape())),
+             ("append + getShape()", lambda: (appendLast(), root.getShape()))]
+
+    for name, function in cases:
+        print(f"{name:>28}{perCall(function, args.calls):>12.1f}")
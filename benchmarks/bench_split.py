@@ -0,0 +1,86 @@
+"""Measure splitting the ranks of a tensor
+
+Splits a random 3-rank tensor with each of the `Fiber.splitXXX()`
+methods, at the top and the bottom rank and with a halo, and tiles
+it by splitting all three ranks in turn with `Tensor.splitUniform()`,
+with and without copy-on-write. The fiber splits are also timed
+with a traversal of the result, which uses every partition.
+
+Usage:
+
+    python3 bench_split.py [--nnz N]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+def timeit(function, *args, **kwargs):
+    """Return the time of a call and its result"""
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def traverse(fiber):
+    """Visit every leaf payload of a fibertree"""
+
+    count = 0
+    for _, payload in fiber:
+        if isinstance(payload, Fiber):
+            count += traverse(payload)
+        else:
+            count += 1
+
+    return count
+
+
+def tile(t):
+    """Split every rank of a 3-rank tensor"""
+
+    t = t.splitUniform(2, depth=0)
+    t = t.splitUniform(10, depth=2)
+    return t.splitUniform(1000, depth=4)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nnz", type=int, default=300000)
+    args = parser.parse_args()
+
+    t = Tensor.fromRandomSparse(["M", "N", "K"], [10, 100, 10000],
+                                nnz=args.nnz, seed=1)
+    root = t.getRoot()
+
+    print(f"{t.countValues()} values")
+    print("")
+    print(f"{'case':>36}{'deep copy (s)':>15}{'copy-on-write (s)':>19}")
+
+    cases = [("splitUniform(2)", lambda: root.splitUniform(2)),
+             ("splitUniform(1000, depth=2)", lambda: root.splitUniform(1000, depth=2)),
+             ("splitUniform(1000, depth=2, halo=5)",
+              lambda: root.splitUniform(1000, depth=2, halo=5)),
+             ("splitNonUniform(depth=2)",
+              lambda: root.splitNonUniform([0, 3000, 7000], depth=2)),
+             ("splitEqual(30, depth=2)", lambda: root.splitEqual(30, depth=2)),
+             ("splitUnEqual(depth=2)",
+              lambda: root.splitUnEqual([10, 20, 40], depth=2)),
+             ("splitEqual(30, depth=2) + traverse",
+              lambda: traverse(root.splitEqual(30, depth=2))),
+             ("Tensor tiling (3 splits)", lambda: tile(t))]
+
+    for name, function in cases:
+        times = []
+        for cow in [False, True]:
+            Fiber.setCopyOnWrite(cow)
+            times.append(timeit(function)[0])
+
+        print(f"{name:>36}{times[0]:>15.3f}{times[1]:>19.3f}")
+
+    Fiber.setCopyOnWrite(False)
@@ -0,0 +1,94 @@
+"""Time the spMspV dataflows with different fiber merge strategies
+
+Runs the C-stationary and B-stationary sparse matrix-sparse vector
+multiplies from examples/scripts/spMspV on random tensors, once for
+each merge strategy (see `Fiber.setMergeStrategy()`), and checks they
+all compute the same result.
+
+Usage:
+
+    python3 bench_spmspv.py [--shape M K] [--density A_DENSITY B_DENSITY]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Fiber
+from fibertree import Tensor
+from fibertree.core import merge_kernels
+
+
+def c_stationary(a, b):
+    """Z[m] = A[m, k] * B[k] - output-stationary"""
+
+    z = Tensor(rank_ids=["M"])
+
+    a_m = a.getRoot()
+    b_k = b.getRoot()
+    z_m = z.getRoot()
+
+    for m_coord, (z_ref, a_k) in (z_m << a_m):
+        for k_coord, (a_val, b_val) in (a_k & b_k):
+            z_ref += a_val * b_val
+
+    return z
+
+
+def b_stationary(a, b):
+    """Z[m] = A[k, m] * B[k] - outer-product style"""
+
+    z = Tensor(rank_ids=["M"])
+
+    a_k = a.getRoot()
+    b_k = b.getRoot()
+    z_m = z.getRoot()
+
+    for k_coord, (a_m, b_val) in (a_k & b_k):
+        for m_coord, (z_ref, a_val) in (z_m << a_m):
+            z_ref += a_val * b_val
+
+    return z
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, nargs=2, default=[200, 20000])
+    parser.add_argument("--density", type=float, nargs=2, default=[0.05, 0.5])
+    args = parser.parse_args()
+
+    M, K = args.shape
+
+    a_mk = Tensor.fromRandom(["M", "K"], [M, K], [1.0, args.density[0]], seed=1)
+    a_km = a_mk.swapRanks()
+    b_k = Tensor.fromRandom(["K"], [K], args.density[1], seed=2)
+
+    print(f"spMspV M={M} K={K} A density={args.density[0]} B density={args.density[1]}")
+    print("")
+
+    dataflows = [("C-stationary", c_stationary, a_mk),
+                 ("B-stationary", b_stationary, a_km)]
+
+    strategies = [s for s in merge_kernels.STRATEGIES]
+
+    print(f"{'dataflow':>14}" + "".join(f"{s:>10}" for s in strategies))
+
+    saved = Fiber.getMergeStrategy()
+
+    for name, dataflow, a in dataflows:
+        times = []
+        results = []
+
+        for strategy in strategies:
+            Fiber.setMergeStrategy(strategy)
+
+            start = time.perf_counter()
+            results.append(dataflow(a, b_k))
+            times.append(time.perf_counter() - start)
+
+        assert all(z == results[0] for z in results)
+
+        print(f"{name:>14}" + "".join(f"{t:>10.3f}" for t in times))
+
+    Fiber.setMergeStrategy(saved)
@@ -0,0 +1,54 @@
+"""Measure reordering the ranks of a tensor
+
+Swizzles a random 3-rank tensor into each order of its ranks with
+`Tensor.swizzleRanks()` (a full swizzle when the lowest rank moves,
+otherwise a partial one), and swaps its top two ranks with
+`Tensor.swapRanks()`, with and without copy-on-write.
+
+Usage:
+
+    python3 bench_swizzle.py [--nnz N]
+
+"""
+
+import argparse
+import time
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+def timeit(function, *args, **kwargs):
+    """Return the time of a call and its result"""
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nnz", type=int, default=300000)
+    args = parser.parse_args()
+
+    t = Tensor.fromRandomSparse(["M", "N", "K"], [100, 1000, 1000],
+                                nnz=args.nnz, seed=1)
+
+    print(f"{t.countValues()} values")
+    print("")
+    print(f"{'case':>22}{'deep copy (s)':>15}{'copy-on-write (s)':>19}")
+
+    cases = [(f"swizzle {''.join(r)}", lambda r=r: t.swizzleRanks(r))
+             for r in [["N", "M", "K"], ["K", "N", "M"], ["M", "K", "N"]]]
+    cases.append(("swapRanks(depth=0)", lambda: t.swapRanks()))
+
+    for name, function in cases:
+        times = []
+        for cow in [False, True]:
+            Fiber.setCopyOnWrite(cow)
+            times.append(timeit(function)[0])
+
+        print(f"{name:>22}{times[0]:>15.3f}{times[1]:>19.3f}")
+
+    Fiber.setCopyOnWrite(False)
@@ -0,0 +1,186 @@
+"""Measure collecting and reading traces of uses
+
+Records the uses of a dense 3-level loop nest with `Metrics.addUse()`,
+and runs Gustavson's sparse matrix multiply (Z[m,n] += A[m,k] * B[k,n])
+without metrics, with metrics but no traces, and tracing the
+intersection of K and the population of N into CSV and binary
+(`.npy`) trace files and into memory (see `Metrics.setTraceFormat()`).
+Then counts the intersections of the traces with
+`Compute.numIsectSkipAhead()`, and computes the cache traffic of Z
+with traces in memory and in files, with the intermediate traces of
+`Traffic` in memory and (with no memory budget) in files.
+
+Usage:
+
+    python3 bench_trace.py [--uses N] [--size N] [--density D]
+
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+import yaml
+
+from fibertree import Metrics
+from fibertree import Tensor
+from fibertree.model import Compute, Format, Traffic
+
+
+def timeit(function, *args, **kwargs):
+    """Return the time of a call and its result"""
+
+    gc.collect()
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def multiply(a, b):
+    """Gustavson's matrix multiply"""
+
+    z = Tensor(rank_ids=["M", "N"], shape=[a.getShape()[0], b.getShape()[1]])
+
+    z_m = z.getRoot()
+    a_m = a.getRoot()
+    b_k = b.getRoot()
+
+    for m, (z_n, a_k) in z_m << a_m:
+        for k, (a_val, b_n) in a_k & b_k:
+            for n, (z_ref, b_val) in z_n << b_n:
+                z_ref += a_val * b_val
+
+    return z
+
+
+def addUses(prefix, num_uses, format_=None):
+    """Record the uses of a dense M x K x N loop nest"""
+
+    Metrics.beginCollect(prefix)
+
+    if format_ is not None:
+        Metrics.setTraceFormat(format_)
+        Metrics.trace("N")
+
+    for rank in ["M", "K", "N"]:
+        Metrics.registerRank(rank)
+
+    for m in range(num_uses // 100000):
+        Metrics.addUse("M", m, m)
+        for k in range(100):
+            Metrics.addUse("K", k, k)
+            for n in range(1000):
+                Metrics.addUse("N", n, n)
+                Metrics.incIter("N")
+            Metrics.endIter("N")
+            Metrics.incIter("K")
+        Metrics.endIter("K")
+        Metrics.incIter("M")
+
+    Metrics.endCollect()
+
+
+def collect(a, b, prefix, format_=None):
+    """Multiply with metrics on, tracing into `format_` files"""
+
+    Metrics.beginCollect(prefix)
+
+    if format_ is not None:
+        Metrics.setTraceFormat(format_)
+
+        Metrics.trace("K", type_="intersect_0")
+        Metrics.trace("K", type_="intersect_1")
+        Metrics.trace("N", type_="populate_read_0")
+        Metrics.trace("N", type_="populate_write_0")
+
+    z = multiply(a, b)
+
+    Metrics.endCollect()
+
+    return z, Metrics.dumpTraces()
+
+
+def traffic(z, traces):
+    """Compute the cache traffic of Z"""
+
+    formats = yaml.safe_load("""
+    M:
+        format: U
+        pbits: 32
+    N:
+        format: C
+        cbits: 32
+        pbits: 64
+    """)
+    formats = {"Z": Format(z, formats)}
+
+    bindings = yaml.safe_load("""
+    - tensor: Z
+      rank: N
+      type: payload
+    """)
+
+    trace_fns = {("Z", "N", "payload", "read"): traces["N", "populate_read_0"],
+                 ("Z", "N", "payload", "write"): traces["N", "populate_write_0"]}
+
+    return Traffic.cacheTraffic(bindings, formats, trace_fns, 256 * 64, 64)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--uses", type=int, default=1000000)
+    parser.add_argument("--size", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.1)
+    args = parser.parse_args()
+
+    size = args.size
+
+    a = Tensor.fromRandom(["M", "K"], [size, size], [1.0, args.density], seed=1)
+    b = Tensor.fromRandom(["K", "N"], [size, size], [1.0, args.density], seed=2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, "bench")
+
+        print(f"{'case':>30}{'time (s)':>10}")
+
+        for format_ in [None, "csv", "npy"]:
+            (elapsed, _) = timeit(addUses, prefix, args.uses, format_)
+            name = "no traces" if format_ is None else format_ + " trace"
+            print(f"{'addUse(), ' + name:>30}{elapsed:>10.3f}")
+
+        print("")
+
+        (elapsed, _) = timeit(multiply, a, b)
+        print(f"{'no metrics':>30}{elapsed:>10.3f}")
+
+        (elapsed, _) = timeit(collect, a, b, prefix)
+        print(f"{'metrics, no traces':>30}{elapsed:>10.3f}")
+
+        traces = {}
+        for format_ in ["csv", "npy", "memory"]:
+            (elapsed, (z, traces[format_])) = timeit(collect, a, b, prefix, format_)
+            print(f"{'metrics, ' + format_ + ' traces':>30}{elapsed:>10.3f}")
+
+        print("")
+
+        for format_ in ["csv", "npy"]:
+            fns = [f"{prefix}-K-intersect_{i}.{format_}" for i in range(2)]
+            size = sum(os.path.getsize(fn) for fn in fns)
+
+            (elapsed, isects) = timeit(Compute.numIsectSkipAhead, *fns)
+            print(f"{'numIsectSkipAhead (' + format_ + ')':>30}{elapsed:>10.3f}"
+                  f"  ({isects} intersections, {size / 1e6:.1f} MB)")
+
+        print("")
+
+        for format_ in ["csv", "npy", "memory"]:
+            for budget in [1 << 30, 0]:
+                Traffic.setMemoryBudget(budget)
+
+                (elapsed, bits) = timeit(traffic, z, traces[format_])
+                name = f"cacheTraffic ({format_}, {'files' if budget == 0 else 'memory'})"
+                print(f"{name:>30}{elapsed:>10.3f}  {bits}")
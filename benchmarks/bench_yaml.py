@@ -0,0 +1,94 @@
+"""Measure loading a YAML tensor file with and without streaming
+
+Dumps a random 3-rank tensor in YAML format and loads it by first
+loading the whole document (`yaml.load()` followed by
+`Fiber.dict2fiber()`) and with the streaming loader
+(`fibertree.core.yaml_loader.loadYAML()`), and reports the time and
+the peak memory allocated, as measured by `tracemalloc`. The
+"safe_load" case is the pure Python loader previously used by
+`Tensor.fromYAMLfile()`.
+
+Usage:
+
+    python3 bench_yaml.py [--shape N] [--density D]
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+from fibertree.core.yaml_loader import loadYAML
+
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def loadDocument(filename, loader=Loader):
+    """Load the whole document and then convert it to fibers"""
+
+    with open(filename) as stream:
+        doc = yaml.load(stream, Loader=loader)
+
+    return Fiber.dict2fiber(doc['tensor']['root'][0])
+
+
+def loadStream(filename, max_depth=None):
+    """Load with the streaming loader"""
+
+    with open(filename) as stream:
+        return loadYAML(stream, max_depth=max_depth)['tensor']['root'][0]
+
+
+def measure(load, *args):
+    """Return the time and peak memory of a load"""
+
+    start = time.perf_counter()
+    load(*args)
+    elapsed = time.perf_counter() - start
+
+    #
+    # Tracing slows down the load, so measure memory in a second run
+    #
+    tracemalloc.start()
+    load(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shape", type=int, default=60)
+    parser.add_argument("--density", type=float, default=0.3)
+    args = parser.parse_args()
+
+    shape = [args.shape] * 3
+    t = Tensor.fromRandom(["M", "N", "K"], shape, [1.0, 1.0, args.density], seed=1)
+
+    print(f"shape {shape}, {t.countValues()} values")
+    print("")
+    print(f"{'loader':>20}{'time (s)':>10}{'peak (MB)':>11}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "tensor.yaml")
+        t.dump(filename)
+
+        cases = [("safe_load", loadDocument, (yaml.SafeLoader,)),
+                 ("document", loadDocument, ()),
+                 ("stream", loadStream, ()),
+                 ("stream max_depth=2", loadStream, (2,))]
+
+        for name, load, extra in cases:
+            elapsed, peak = measure(load, filename, *extra)
+
+            print(f"{name:>20}{elapsed:>10.3f}{peak / 2**20:>11.2f}")
@@ -4,6 +4,7 @@ from .core.rank import *
 from .core.fiber import *
 from .core.coord_payload import *
 from .core.payload import *
+from .core.builder import *
 
 from .codec.tensor_codec import *
 from .codec.compression_types import *
@@ -6,62 +6,10 @@ from fibertree import Codec
 
 # matrix market converter
 def mm_to_hfa_yaml(infilename, tensor_name, rank_ids, outfilename):
-    # read mm into csr
-    shape_m = 0
-    shape_n = 0
-    nnz = 0
-    csr = None
-    m_coords = list()
-    with open(infilename, 'r') as infile:
-        for line in infile:
-            if line.startswith("%"):
-                continue
-            parts = line.split(" ")
-            elt_1 = int(parts[0])
-            elt_2 = int(parts[1])
-            elt_3 = int(parts[2])
-            if shape_m == 0: # not filled in yet
-                shape_m = elt_1
-                shape_n = elt_2
-                nnz = elt_3
-                csr = list()
-                for i in range(0, shape_m):
-                    csr.append([list(), list()])
-            else:
-                # 0 indexing
-                elt_1 -= 1
-                elt_2 -= 1
-                
-                assert elt_1 < shape_m
-                # struct of arrays for (coord, payload)
-                if len(m_coords) == 0 or m_coords[-1] != elt_1:
-                    m_coords.append(elt_1)
-               
-                csr[elt_1][0].append(elt_2)
-                csr[elt_1][1].append(elt_3)
-
+    a = Tensor.fromMatrixMarket(infilename, rank_ids=rank_ids, name=tensor_name)
     print("finished reading in CSR")
-    # write to YAML (manually? since fiber is not a unique key)
-    twospace = "  "
-    fourspace = twospace * 2
-    sixspace = fourspace + twospace
-    eightspace = fourspace * 2
-    tenspace = eightspace + twospace
-    twelvespace = sixspace * 2
-    fourteenspace = twelvespace + twospace
-    with open(outfilename, 'w') as outfile:
-        outfile.write("tensor:\n")
-        outfile.write(twospace + "name: {}\n".format(tensor_name))
-        outfile.write(twospace + "rank_ids: {}\n".format(rank_ids))
-        outfile.write(twospace + "shape: {}\n".format([shape_m, shape_n]))
-        outfile.write(twospace + "root:\n")
-        outfile.write(fourspace + "- fiber:\n")
-        outfile.write(eightspace + "coords: {}\n".format(m_coords))
-        outfile.write(eightspace + "payloads:\n")
-        for i in range(0, len(m_coords)):
-            outfile.write(tenspace + "- fiber:\n")
-            outfile.write(fourteenspace + "coords: {}\n".format(csr[m_coords[i]][0]))
-            outfile.write(fourteenspace + "payloads: {}\n".format(csr[m_coords[i]][1]))
+
+    a.dump(outfilename)
     print("finished writing out YAML")
 
 def preproc_mtx_dsds():
@@ -0,0 +1,488 @@
+#cython: language_level=3
+"""Builder
+
+Classes used to build fibertrees (and tensors) from a stream of
+(point, value) pairs that arrive in any order.
+
+Inserting elements one at a time into a fiber (e.g., with
+`Fiber.getPayloadRef()`) costs O(n) per insertion. The builders
+instead buffer the elements and create the fibertree in one pass
+after sorting them, combining the values of duplicate points.
+
+"""
+
+import logging
+import operator
+
+from .fiber import Fiber
+from .payload import Payload
+from .tensor import Tensor
+
+#
+# Set up logging
+#
+module_logger = logging.getLogger('fibertree.core.builder')
+
+
+class FiberBuilder():
+    """A buffer of elements used to build a fibertree
+
+    Elements are added with `FiberBuilder.add()` (or with index
+    assignment, i.e., `builder[point] = value`) in any order, and
+    the fibertree is created with `FiberBuilder.build()`.
+
+    Parameters
+    ----------
+    depth: integer, default=1
+        The number of levels of the fibertree, i.e., the number of
+        coordinates in each point
+
+    default: value, default=0
+        The default (empty) value of the leaf payloads, elements
+        whose final value is the default are not included in the
+        fibertree
+
+    combine: str or function, default="sum"
+        How to combine the values of elements with the same point,
+        one of "sum", "max", "min", "first" or "last", or a function
+        `combine(old_value, new_value)` returning the combined value
+
+    columnar: Boolean, default=False
+        Create the leaf fibers with columnar storage (see
+        `Fiber.fromColumnar()`)
+
+    """
+
+    COMBINE = {"sum": operator.add,
+               "max": max,
+               "min": min,
+               "first": lambda old, new: old,
+               "last": lambda old, new: new}
+    """The named combine functions"""
+
+    def __init__(self, depth=1, default=0, combine="sum", columnar=False):
+
+        assert depth >= 1
+
+        if not callable(combine):
+            assert combine in FiberBuilder.COMBINE, \
+                f"Unknown combine function: {combine}"
+            combine = FiberBuilder.COMBINE[combine]
+
+        self.depth = depth
+        self.default = default
+        self.combine = combine
+        self.columnar = columnar
+
+        self.clear()
+
+
+    def clear(self):
+        """Remove all the buffered elements"""
+
+        self._points = []
+        self._values = []
+
+
+    def add(self, point, value):
+        """Add an element
+
+        Parameters
+        ----------
+        point: tuple or coordinate
+            The coordinates of the element (for `depth` of 1 a single
+            coordinate is also accepted)
+
+        value: scalar
+            The value of the element
+
+        Returns
+        -------
+        None
+
+        """
+
+        if type(point) is not tuple:
+            point = (point,)
+
+        assert len(point) == self.depth, \
+            f"Point {point} does not have {self.depth} coordinates"
+
+        self._points.append(point)
+        self._values.append(Payload.get(value))
+
+
+    def getPayloadRef(self, point):
+        """Add an element and return a reference to its value
+
+        The element's value is a new `Payload` holding the default
+        value, which can be updated (e.g., with `+=` or `<<=`) until
+        the fibertree is created. Each call adds a separate element,
+        so multiple references to the same point are combined with
+        `combine` (e.g., summed) by `FiberBuilder.build()`.
+
+        Parameters
+        ----------
+        point: tuple or coordinate
+            The coordinates of the element
+
+        Returns
+        -------
+        ref: Payload
+            A reference to the value of the element
+
+        """
+
+        if type(point) is not tuple:
+            point = (point,)
+
+        assert len(point) == self.depth, \
+            f"Point {point} does not have {self.depth} coordinates"
+
+        ref = Payload(self.default)
+
+        self._points.append(point)
+        self._values.append(ref)
+
+        return ref
+
+
+    def extend(self, elements):
+        """Add a sequence of (point, value) elements"""
+
+        for point, value in elements:
+            self.add(point, value)
+
+
+    def __setitem__(self, point, value):
+        """Add an element, i.e., `builder[point] = value`"""
+
+        self.add(point, value)
+
+
+    def __len__(self):
+        """The number of buffered elements (including duplicates)"""
+
+        return len(self._points)
+
+
+    def build(self):
+        """Create a fibertree from the buffered elements
+
+        Returns
+        -------
+        fiber: Fiber
+            The root of a fibertree containing the elements
+
+        """
+
+        points, values = self._merge()
+
+        if not points:
+            return Fiber(default=self.default)
+
+        return self._build(points, values, 0, len(points), 0)
+
+#
+# Utility methods
+#
+    def _merge(self):
+        """Sort the elements and combine the values of duplicates"""
+
+        points = self._points
+        values = [Payload.get(value) for value in self._values]
+
+        # Python's sort is stable, so duplicates stay in the order added
+        order = sorted(range(len(points)), key=points.__getitem__)
+
+        combine = self.combine
+        default = self.default
+
+        merged_points = []
+        merged_values = []
+
+        last_point = None
+
+        for i in order:
+            point = points[i]
+
+            if point == last_point:
+                merged_values[-1] = combine(merged_values[-1], values[i])
+                continue
+
+            merged_points.append(point)
+            merged_values.append(values[i])
+            last_point = point
+
+        #
+        # Remove the elements that ended up empty
+        #
+        keep = [i for i, value in enumerate(merged_values) if value != default]
+
+        if len(keep) != len(merged_values):
+            merged_points = [merged_points[i] for i in keep]
+            merged_values = [merged_values[i] for i in keep]
+
+        return merged_points, merged_values
+
+
+    def _build(self, points, values, lo, hi, level):
+        """Build the fiber for the sorted `points[lo:hi]` at `level`"""
+
+        if level == self.depth - 1:
+            coords = [point[level] for point in points[lo:hi]]
+
+            if self.columnar:
+                return Fiber.fromColumnar(coords, values[lo:hi], default=self.default)
+
+            return Fiber(coords, values[lo:hi], default=self.default)
+
+        coords = []
+        payloads = []
+
+        start = lo
+
+        while start < hi:
+            coord = points[start][level]
+
+            end = start + 1
+            while end < hi and points[end][level] == coord:
+                end += 1
+
+            coords.append(coord)
+            payloads.append(self._build(points, values, start, end, level + 1))
+
+            start = end
+
+        return Fiber(coords, payloads)
+
+
+class TensorBuilder():
+    """A buffer of elements used to build a tensor
+
+    A `FiberBuilder` for all the ranks of a tensor, which can be used
+    as the output of a computation that produces its elements out of
+    order, e.g., the outer-product or Gustavson dataflows of SpGEMM:
+
+    ```
+    z = TensorBuilder(["M", "N"], combine="sum")
+
+    for k, (a_m, b_n) in a_k & b_k:
+        for m, a_val in a_m:
+            for n, b_val in b_n:
+                z.add((m, n), a_val * b_val)
+
+    Z = z.build()
+    ```
+
+    It can also be the output of an existing loop nest written with
+    `getPayloadRef()` and the `<<` operator, by using the root proxy
+    returned by `TensorBuilder.getRoot()` in place of the root of the
+    output tensor:
+
+    ```
+    z_m = z.getRoot()
+
+    for m, (z_n, a_k) in z_m << a_m:
+        for k, (a_val, b_n) in a_k & b_k:
+            for n, (z_ref, b_val) in z_n << b_n:
+                z_ref += a_val * b_val
+    ```
+
+    Parameters
+    ----------
+    rank_ids: list of strings
+        The names of the ranks of the tensor
+
+    shape: list of integers, default=None
+        The shapes of the ranks of the tensor
+
+    default: value, default=0
+        The default value of the leaf rank
+
+    combine: str or function, default="sum"
+        How to combine the values of elements with the same point
+        (see `FiberBuilder`)
+
+    name: string, default=""
+        A name for the tensor
+
+    color: string, default="red"
+        The color to paint values when displaying the tensor
+
+    columnar: Boolean, default=False
+        Create the leaf fibers with columnar storage
+
+    """
+
+    def __init__(self,
+                 rank_ids,
+                 shape=None,
+                 default=0,
+                 combine="sum",
+                 name="",
+                 color="red",
+                 columnar=False):
+
+        assert len(rank_ids) > 0
+
+        self.rank_ids = rank_ids
+        self.shape = shape
+        self.default = default
+        self.name = name
+        self.color = color
+
+        self.builder = FiberBuilder(len(rank_ids),
+                                    default=default,
+                                    combine=combine,
+                                    columnar=columnar)
+
+
+    def clear(self):
+        """Remove all the buffered elements"""
+
+        self.builder.clear()
+
+
+    def add(self, point, value):
+        """Add an element (see `FiberBuilder.add()`)"""
+
+        self.builder.add(point, value)
+
+
+    def extend(self, elements):
+        """Add a sequence of (point, value) elements"""
+
+        self.builder.extend(elements)
+
+
+    def getRoot(self):
+        """Return a proxy for the root fiber of the tensor
+
+        Returns
+        -------
+        root: BuilderFiber
+            A proxy whose `getPayloadRef()` and `<<` add elements to
+            the builder (see `BuilderFiber`)
+
+        """
+
+        return BuilderFiber(self.builder)
+
+
+    def __setitem__(self, point, value):
+        """Add an element, i.e., `builder[point] = value`"""
+
+        self.builder.add(point, value)
+
+
+    def __len__(self):
+        """The number of buffered elements (including duplicates)"""
+
+        return len(self.builder)
+
+
+    def build(self):
+        """Create a tensor from the buffered elements
+
+        Returns
+        -------
+        tensor: Tensor
+            A (mutable) tensor containing the elements
+
+        """
+
+        tensor = Tensor(rank_ids=self.rank_ids,
+                        shape=self.shape,
+                        default=self.default,
+                        name=self.name,
+                        color=self.color)
+
+        if len(self.builder) > 0:
+            tensor.setRoot(self.builder.build())
+
+            # setRoot may modify the shape, fix the shape if authoritative
+            if self.shape:
+                tensor.setShape(self.shape)
+
+        return tensor
+
+
+class BuilderFiber():
+    """A proxy for a fiber of the output of a `FiberBuilder`
+
+    Supports the subset of the `Fiber` interface used to write the
+    output of a loop nest, i.e., `getPayloadRef()` and the `<<`
+    operator, by adding elements to the builder. The proxy stores no
+    elements, so it cannot be read (e.g., iterated or intersected).
+
+    Every leaf reference starts at the builder's default value, and
+    references to the same point are combined with the builder's
+    `combine`, so an update like `z_ref += value` with "sum" produces
+    the same tensor as with the tensor's own fibers. Updates that
+    read the previous value of a point (e.g., `z_ref <<= z_ref + 1`)
+    do not see the values of the earlier references.
+
+    Parameters
+    ----------
+    builder: FiberBuilder
+        The builder to add the elements to
+
+    point: tuple, default=()
+        The coordinates of the fiber in the fibertree
+
+    """
+
+    def __init__(self, builder, point=()):
+
+        assert len(point) < builder.depth
+
+        self.builder = builder
+        self.point = point
+
+
+    def getPayloadRef(self, *coords):
+        """Return a reference to the payload at `coords`
+
+        Parameters
+        ----------
+        coords: coordinates
+            The coordinates of the payload, one per level
+
+        Returns
+        -------
+        ref: BuilderFiber or Payload
+            A proxy for the fiber at `coords`, or a reference to the
+            value of a new element of the builder at a leaf
+
+        """
+
+        point = self.point + coords
+
+        if len(point) == self.builder.depth:
+            return self.builder.getPayloadRef(point)
+
+        return BuilderFiber(self.builder, point)
+
+
+    def __lshift__(self, other):
+        """Fiber assignment
+
+        Assign `other` to the proxied fiber, yielding a reference to
+        the payload of the output at each of the coordinates of
+        `other` (see `Fiber.__lshift__()`).
+
+        Parameters
+        ----------
+        other: Fiber
+            A fiber to assign into the current fiber
+
+        Returns
+        -------
+        result: generator
+            A generator yielding `(coord, (ref, payload))`
+
+        """
+
+        for coord, payload in other:
+            yield coord, (self.getPayloadRef(coord), payload)
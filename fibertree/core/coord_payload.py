@@ -92,7 +92,13 @@ class CoordPayload():
     Iteration through an instance of this class results in the
     "coordinate" followed by the "payload".
 
+    The attributes are held in slots, so no other attributes can be
+    set on an instance of this class.
+
     """
+
+    __slots__ = ("coord", "payload")
+
     def __init__(self, coord, payload):
         """__init__"""
 
@@ -106,11 +112,39 @@ class CoordPayload():
         self.payload = Payload.maybe_box(payload)
 
 
+    @staticmethod
+    def fromPayload(coord, payload):
+        """Create an element from a payload known to be legal
+
+        A fast path equivalent to `CoordPayload(coord, payload)` for
+        a `payload` that is already a `Payload` or a `Fiber`, which
+        skips `Payload.maybe_box()`.
+
+        Parameters
+        ----------
+        coord: a coordinate
+            A value used as a coordinate
+
+        payload: Payload or Fiber
+            A legal "payload" value
+
+        Returns
+        -------
+        element: CoordPayload
+            A new element
+
+        """
+
+        self = object.__new__(CoordPayload)
+        self.coord = coord
+        self.payload = payload
+        return self
+
+
     def __iter__(self):
         """__iter__"""
 
-        yield self.coord
-        yield self.payload
+        return iter((self.coord, self.payload))
 
     #
     # Position based methods
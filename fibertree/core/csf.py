@@ -0,0 +1,568 @@
+#cython: language_level=3
+"""CSF
+
+Functions to convert between fibertrees and flat arrays in
+compressed sparse fiber (CSF) form, i.e., for each rank `r` of the
+fibertree (from the top):
+
+- `coords[r]` - the coordinates of all the fibers of the rank, one
+  fiber after another
+
+- `segs[r]` - the offsets in `coords[r]` where each fiber of the rank
+  starts, plus the total number of coordinates in the rank
+
+The payload of the i-th element of rank `r` is the i-th fiber of
+rank `r+1`, and `values` holds the payloads of the leaf rank.
+
+The conversions from and to coordinate (COO) form, i.e., one array
+of coordinates per rank and an array of values, are done with a
+single sort of the elements followed by vectorized (numpy)
+operations, and the fibers are created in one pass per rank.
+
+The ranks of a fibertree are reordered (see `Tensor.swizzleRanks()`)
+the same way, i.e., by converting the ranks into COO form, sorting
+the elements by their coordinates in the new rank order and
+converting them back (see `permuteFiber()`).
+
+"""
+
+from array import array
+import logging
+
+import numpy as np
+
+from .fiber import Fiber
+from .payload import Payload
+
+#
+# Set up logging
+#
+module_logger = logging.getLogger('fibertree.core.csf')
+
+
+COMBINE = {"sum": lambda values, starts: np.add.reduceat(values, starts),
+           "max": lambda values, starts: np.maximum.reduceat(values, starts),
+           "min": lambda values, starts: np.minimum.reduceat(values, starts),
+           "first": lambda values, starts: values[starts],
+           "last": lambda values, starts: values[np.append(starts[1:], len(values)) - 1]}
+"""The (vectorized) combine functions for duplicate elements (see `FiberBuilder`)"""
+
+
+def segmentsFromCOO(coords, values, default=0, combine="sum", is_sorted=False):
+    """Convert elements in COO form into CSF form
+
+    Parameters
+    ----------
+    coords: list of arrays of integers
+        The coordinates of the elements, one array per rank
+
+    values: array
+        The values of the elements
+
+    default: value, default=0
+        The default (empty) value, elements whose (combined) value is
+        the default are dropped
+
+    combine: str, default="sum"
+        How to combine the values of elements with the same point,
+        one of "sum", "max", "min", "first" or "last"
+
+    is_sorted: Boolean, default=False
+        The elements are already sorted by point without duplicates
+        (e.g., the result of `np.nonzero()`), so skip sorting them
+
+    Returns
+    -------
+    segs: list of numpy arrays
+        The fiber offsets of each rank
+
+    coords: list of numpy arrays
+        The coordinates of each rank
+
+    values: numpy array
+        The leaf payloads
+
+    """
+
+    assert combine in COMBINE, f"Unknown combine function: {combine}"
+
+    coords = [np.asarray(c, dtype=np.int64) for c in coords]
+    values = np.asarray(values)
+
+    assert len(coords) > 0
+    assert all(c.shape == values.shape for c in coords), \
+        "Coordinate and value arrays must have the same length"
+
+    if not is_sorted:
+        #
+        # Sort the elements (np.lexsort() uses the last key as the
+        # primary key)
+        #
+        order = np.lexsort(coords[::-1])
+
+        coords = [c[order] for c in coords]
+        values = values[order]
+
+        #
+        # Combine duplicates
+        #
+        starts = np.flatnonzero(_newPoint(coords))
+
+        if len(starts) != len(values):
+            values = COMBINE[combine](values, starts)
+            coords = [c[starts] for c in coords]
+
+    #
+    # Remove the elements that ended up empty
+    #
+
+    keep = values != default
+
+    if not keep.all():
+        values = values[keep]
+        coords = [c[keep] for c in coords]
+
+    (rank_segs, rank_coords) = _sortedSegments(coords, len(values))
+
+    return rank_segs, rank_coords, values
+
+
+def segmentsFromFiber(root, depth, default=None):
+    """Convert a fibertree into CSF form
+
+    Parameters
+    ----------
+    root: Fiber
+        The root of the fibertree
+
+    depth: integer
+        The number of ranks of the fibertree
+
+    default: value, default=None
+        The default (empty) value, elements whose value is the
+        default are dropped, as in `segmentsFromCOO()`, unless it is
+        None
+
+    Returns
+    -------
+    segs: list of numpy arrays
+        The fiber offsets of each rank
+
+    coords: list of numpy arrays
+        The coordinates of each rank
+
+    values: list or numpy array
+        The leaf payloads (unboxed)
+
+    Raises
+    ------
+    AssertionError
+        The coordinates are not integers
+
+    """
+
+    segments = _fiberSegments(root, depth)
+
+    assert segments is not None, "Coordinates must be integers"
+
+    if default is not None:
+        segments = _dropDefault(*segments, default)
+
+    return segments
+
+
+def fiberFromSegments(segs, coords, values, columnar=False):
+    """Create a fibertree from its CSF form
+
+    Parameters
+    ----------
+    segs: list of arrays
+        The fiber offsets of each rank
+
+    coords: list of arrays
+        The coordinates of each rank
+
+    values: array
+        The leaf payloads
+
+    columnar: Boolean, default=False
+        Create the leaf fibers with columnar storage (see
+        `Fiber.fromColumnar()`)
+
+    Returns
+    -------
+    root: Fiber
+        The root of the fibertree
+
+    """
+
+    payloads = _toList(values)
+
+    fibers = None
+
+    for level in reversed(range(len(coords))):
+        rank_segs = _toList(segs[level])
+        rank_coords = _toList(coords[level])
+
+        if fibers is not None:
+            payloads = fibers
+
+        assert len(payloads) == len(rank_coords), "Malformed CSF arrays"
+
+        if fibers is None and columnar:
+            fibers = [Fiber.fromColumnar(rank_coords[start:end], payloads[start:end])
+                      for start, end in zip(rank_segs, rank_segs[1:])]
+        else:
+            fibers = [Fiber(rank_coords[start:end], payloads[start:end])
+                      for start, end in zip(rank_segs, rank_segs[1:])]
+
+    assert len(fibers) == 1, "Malformed CSF arrays"
+
+    return fibers[0]
+
+
+def coordsFromSegments(segs, coords):
+    """Expand the coordinates of each rank to one per leaf element
+
+    Parameters
+    ----------
+    segs: list of numpy arrays
+        The fiber offsets of each rank
+
+    coords: list of numpy arrays
+        The coordinates of each rank
+
+    Returns
+    -------
+    coords: list of numpy arrays
+        The coordinates of the leaf elements (i.e., COO form), one
+        array per rank
+
+    """
+
+    depth = len(coords)
+
+    result = [None] * depth
+    result[-1] = coords[-1]
+
+    counts = np.ones(len(coords[-1]), dtype=np.int64)
+
+    for level in reversed(range(depth - 1)):
+        #
+        # The elements of rank `level` are the fibers of rank
+        # `level+1`, so count the leaf elements below each fiber
+        #
+        below = np.concatenate(([0], np.cumsum(counts)))
+        next_segs = segs[level + 1]
+
+        counts = below[next_segs[1:]] - below[next_segs[:-1]]
+        result[level] = np.repeat(coords[level], counts)
+
+    return result
+
+
+def permuteFiber(root, depth, order, columnar=False):
+    """Reorder the top ranks of a fibertree
+
+    All the elements of the top `depth` ranks are converted into COO
+    form, stably sorted by their coordinates in the new order of the
+    ranks and converted back into a fibertree one rank at a time. The
+    ranks below the top `depth` ranks are not restructured, so their
+    fibers are moved as a whole (shared or copied as with
+    `Fiber._transformCopy()`).
+
+    Parameters
+    ----------
+    root: Fiber
+        The root of the fibertree
+
+    depth: integer
+        The number of ranks to reorder
+
+    order: list of integers
+        The original level of each rank of the new fibertree
+
+    columnar: Boolean, default=False
+        Create the leaf fibers with columnar storage (see
+        `Fiber.fromColumnar()`), only if all the ranks are reordered
+
+    Returns
+    -------
+    root: Fiber or None
+        The root of the new fibertree, or None if the coordinates of
+        the ranks are not integers
+
+    """
+
+    assert sorted(order) == list(range(depth)), "Order must be a permutation"
+
+    segments = _fiberSegments(root, depth)
+
+    if segments is None:
+        return None
+
+    (segs, coords, values) = permuteSegments(*segments, order)
+
+    return fiberFromSegments(segs, coords, _movePayloads(values), columnar=columnar)
+
+
+def permuteSegments(segs, coords, values, order):
+    """Reorder the ranks of a fibertree in CSF form
+
+    Parameters
+    ----------
+    segs: list of numpy arrays
+        The fiber offsets of each rank
+
+    coords: list of numpy arrays
+        The coordinates of each rank
+
+    values: list or numpy array
+        The leaf payloads
+
+    order: list of integers
+        The original rank of each rank of the result
+
+    Returns
+    -------
+    segs: list of numpy arrays
+        The fiber offsets of each reordered rank
+
+    coords: list of numpy arrays
+        The coordinates of each reordered rank
+
+    values: list or numpy array
+        The reordered leaf payloads
+
+    """
+
+    points = coordsFromSegments(segs, coords)
+    keys = [points[level] for level in order]
+
+    #
+    # Sort the elements (np.lexsort() is stable and uses the last key
+    # as the primary key)
+    #
+    perm = np.lexsort(keys[::-1])
+
+    keys = [k[perm] for k in keys]
+
+    if isinstance(values, np.ndarray):
+        values = values[perm]
+    else:
+        values = [values[i] for i in perm.tolist()]
+
+    (segs, coords) = _sortedSegments(keys, len(values))
+
+    return segs, coords, values
+
+#
+# Utility functions
+#
+def _fiberSegments(root, depth):
+    """Convert a fibertree into CSF form, or None if the coordinates are not integers"""
+
+    rank_segs = []
+    rank_coords = []
+
+    fibers = [root]
+    values = []
+
+    for level in range(depth):
+        is_leaf = level == depth - 1
+
+        if is_leaf:
+            # Without the default elements of dense storage
+            fibers = [f._occupied() for f in fibers]
+
+        if is_leaf and fibers and all(f.isColumnar() for f in fibers):
+            (segs, coords, values) = _columnarSegments(fibers)
+
+            rank_segs.append(segs)
+            rank_coords.append(coords)
+            break
+
+        segs = [0]
+        coords = []
+        next_fibers = []
+
+        for fiber in fibers:
+            assert not fiber.isLazy()
+
+            coords.extend(fiber.coords)
+            segs.append(len(coords))
+
+            if is_leaf:
+                if fiber.isColumnar():
+                    values.extend(fiber.payloads.getValues())
+                else:
+                    values.extend(Payload.get(p) for p in fiber.payloads)
+            else:
+                for p in fiber.payloads:
+                    assert isinstance(p, Fiber), \
+                        f"Payload at level {level} is not a fiber"
+
+                    next_fibers.append(p)
+
+        coords = np.array(coords)
+
+        if len(coords) == 0:
+            coords = coords.astype(np.int64)
+
+        if coords.ndim != 1 or coords.dtype.kind not in "iu":
+            return None
+
+        rank_segs.append(np.array(segs, dtype=np.int64))
+        rank_coords.append(coords)
+
+        fibers = next_fibers
+
+    return rank_segs, rank_coords, values
+
+
+def _dropDefault(segs, coords, values, default):
+    """Remove the elements whose value is the default from CSF arrays"""
+
+    if isinstance(values, np.ndarray):
+        keep = values != default
+    else:
+        keep = np.array([v != default for v in values], dtype=bool)
+
+    if keep.all():
+        return segs, coords, values
+
+    points = [c[keep] for c in coordsFromSegments(segs, coords)]
+
+    if isinstance(values, np.ndarray):
+        values = values[keep]
+    else:
+        values = [v for v, k in zip(values, keep.tolist()) if k]
+
+    #
+    # Fibers left empty are dropped along with their elements
+    #
+    (segs, coords) = _sortedSegments(points, len(values))
+
+    return segs, coords, values
+
+
+def _sortedSegments(coords, num_values):
+    """Find the CSF offsets and coordinates of sorted distinct elements"""
+
+    rank_segs = []
+    rank_coords = []
+
+    is_element = np.zeros(num_values, dtype=bool)
+    is_element[:1] = True
+
+    for level, level_coords in enumerate(coords):
+        #
+        # An element of the rank starts where any coordinate of this
+        # or a higher rank changes, and a fiber where any coordinate
+        # of a higher rank changes
+        #
+        is_fiber = is_element
+
+        is_element = is_fiber.copy()
+        is_element[1:] |= level_coords[1:] != level_coords[:-1]
+
+        position = np.cumsum(is_element) - 1
+        num_elements = num_values and int(position[-1]) + 1
+
+        if level == 0:
+            segs = np.array([0, num_elements], dtype=np.int64)
+        else:
+            segs = np.append(position[is_fiber], num_elements).astype(np.int64)
+
+        rank_segs.append(segs)
+        rank_coords.append(level_coords[is_element])
+
+    return rank_segs, rank_coords
+
+
+def _movePayloads(values):
+    """Prepare payloads to be put into a new fibertree
+
+    The payloads are shared or copied as with `Fiber._transformCopy()`,
+    except immutable scalars, which are reboxed anyway.
+
+    """
+
+    if isinstance(values, np.ndarray) \
+       or all(isinstance(v, _IMMUTABLE) for v in values):
+        return values
+
+    if Fiber.getCopyOnWrite():
+        return [Fiber._sharePayload(v) for v in values]
+
+    #
+    # Copy the fibers one level at a time, since a deep copy of a
+    # fiber also copies its owning rank (see `Fiber.__deepcopy__()`)
+    #
+    return [v._cowCopy(v.getDepth() - 1) if isinstance(v, Fiber)
+            else Fiber._sharePayload(v)
+            for v in values]
+
+
+_IMMUTABLE = (bool, float, int, str, frozenset)
+"""The payload types that need not be copied (see `Fiber._sharePayload()`)"""
+
+
+def _newPoint(coords):
+    """Mark the sorted elements whose point differs from the previous one"""
+
+    new = np.zeros(len(coords[0]), dtype=bool)
+    new[:1] = True
+
+    for c in coords:
+        new[1:] |= c[1:] != c[:-1]
+
+    return new
+
+
+def _columnarSegments(fibers):
+    """Get the CSF arrays of a rank of columnar fibers
+
+    The coordinates and values are concatenated directly from the
+    array-backed storage of the fibers, i.e., without creating a
+    Python object per element.
+
+    """
+
+    segs = array("q", [0])
+    coords = array("q")
+
+    for fiber in fibers:
+        coords.extend(fiber.coords)
+        segs.append(len(coords))
+
+    storage = [fiber.payloads.getValues() for fiber in fibers]
+    typecodes = {getattr(values, "typecode", None) for values in storage}
+
+    if len(typecodes) == 1 and None not in typecodes:
+        typecode = typecodes.pop()
+
+        values = array(typecode)
+        for v in storage:
+            values.extend(v)
+
+        values = np.frombuffer(values, dtype=_TYPECODES[typecode])
+    else:
+        values = np.asarray([v for values in storage for v in values])
+
+    return (np.frombuffer(segs, dtype=np.int64),
+            np.frombuffer(coords, dtype=np.int64),
+            values)
+
+
+_TYPECODES = {"q": np.int64, "d": np.float64}
+"""The numpy dtype of each `PayloadArray` typecode"""
+
+
+def _toList(values):
+    """Convert an array into a list of Python values"""
+
+    if isinstance(values, np.ndarray):
+        return values.tolist()
+
+    return list(values)
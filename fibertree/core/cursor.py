@@ -0,0 +1,184 @@
+#cython: language_level=3
+"""Cursor
+
+A class used to hold a position in a fiber across a sequence of
+coordinate lookups, and the search function used to move it.
+
+"""
+
+import bisect
+
+from .payload import Payload
+
+
+def gallopLeft(coords, coord, lo=0):
+    """Find the position of the first coordinate >= `coord`
+
+    Equivalent to `bisect.bisect_left(coords, coord, lo)` but starts
+    with an exponential (galloping) search forward from `lo`, so the
+    cost is O(log d) where `d` is the distance moved, rather than
+    O(log n).
+
+    Parameters
+    ----------
+    coords: sequence of coordinates
+        Ordered coordinates
+
+    coord: coordinate
+        The coordinate to search for
+
+    lo: integer, default=0
+        The position to start searching from, all coordinates before
+        `lo` must be less than `coord`
+
+    Returns
+    -------
+    position: integer
+        The position of the first coordinate >= `coord` (which may be
+        `len(coords)`)
+
+    """
+
+    length = len(coords)
+
+    if lo >= length or coords[lo] >= coord:
+        return lo
+
+    #
+    # Gallop until coords[lo + step] >= coord, all coordinates in
+    # [lo, prev] are then known to be less than `coord`
+    #
+    prev = lo
+    step = 1
+
+    while lo + step < length and coords[lo + step] < coord:
+        prev = lo + step
+        step *= 2
+
+    return bisect.bisect_left(coords, coord, prev + 1, min(lo + step + 1, length))
+
+
+class Cursor():
+    """A position in a fiber used for monotone lookups
+
+    A cursor remembers the position of the last element it looked up
+    in a fiber, so a sequence of lookups of increasing coordinates
+    (e.g., in the inner loop of a kernel) searches forward from the
+    previous position with `gallopLeft()`, which is amortized O(1)
+    when the coordinates are close together.
+
+    Lookups of a coordinate before the cursor are still correct, but
+    fall back to a full binary search. The number of hints (positions)
+    that could and could not be used are recorded in the fiber (see
+    `Fiber.getSavedPosStats()`).
+
+    Parameters
+    ----------
+    fiber: Fiber
+        The (eager) fiber to look up coordinates in
+
+    position: integer, default=0
+        The initial position of the cursor
+
+    """
+
+    def __init__(self, fiber, position=0):
+
+        assert not fiber.isLazy()
+
+        self.fiber = fiber
+        self.position = position
+
+
+    def getPosition(self):
+        """Get the current position of the cursor"""
+
+        return self.position
+
+
+    def reset(self, position=0):
+        """Move the cursor back to `position`"""
+
+        self.position = position
+
+
+    def seek(self, coord):
+        """Move the cursor to the first coordinate >= `coord`
+
+        Parameters
+        ----------
+        coord: coordinate
+            The coordinate to look up
+
+        Returns
+        -------
+        position: integer
+            The new position of the cursor (which may be the length
+            of the fiber)
+
+        """
+
+        self.position = self.fiber._findPosition(coord, start_pos=self.position)
+
+        return self.position
+
+
+    def getPayload(self, coord, default=None):
+        """Get the payload at `coord` [non-mutating]
+
+        Parameters
+        ----------
+        coord: coordinate
+            The coordinate to look up
+
+        default: value, default=None
+            The value to return if there is no element at `coord`
+            (if None, the default payload of the fiber, as with
+            `Fiber.getPayload()`)
+
+        Returns
+        -------
+        payload: a (boxed) scalar or Fiber
+            The payload at `coord` or the default
+
+        """
+
+        pos = self.seek(coord)
+
+        if pos < len(self.fiber.coords) and self.fiber.coords[pos] == coord:
+            return self.fiber.payloads[pos]
+
+        if default is None:
+            return self.fiber._createDefault(addtorank=False)
+
+        return Payload.maybe_box(default)
+
+
+    def getPayloadRef(self, coord):
+        """Get a (mutable) reference to the payload at `coord`
+
+        If there is no element at `coord` one is created with the
+        default payload (see `Fiber.getPayloadRef()`).
+
+        Parameters
+        ----------
+        coord: coordinate
+            The coordinate to look up
+
+        Returns
+        -------
+        payload: a (boxed) scalar or Fiber
+            The payload at `coord`
+
+        """
+
+        payload = self.fiber.getPayloadRef(coord, start_pos=self.position)
+        self.position = self.fiber.getSavedPos()
+
+        return payload
+
+
+    def __repr__(self):
+        """__repr__"""
+
+        return f"Cursor(position={self.position})"
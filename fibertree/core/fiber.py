@@ -9,23 +9,30 @@ a tensor.
 
 import logging
 
+from array import array
 import bisect
 import copy
 from functools import partialmethod
 import numbers
 import pickle
 import random
+import sys
+import weakref
 
 import yaml
 
 from .any import Any
 from .coord_payload import CoordPayload
+from .cursor import Cursor, gallopLeft
+from . import merge_kernels
 from .iterators import coiterShape, coiterShapeRef, coiterActiveShape, \
     coiterActiveShapeRef, coiterRangeShape, coiterRangeShapeRef, intersection, \
     union
 from .metrics import Metrics
 from .payload import Payload
+from .payload_array import PayloadArray, PayloadView
 from .rank_attrs import RankAttrs
+from .yaml_loader import loadYAML
 
 #
 # Set up logging
@@ -161,8 +168,42 @@ class Fiber:
     instance variables holding those lists (coords and payloads) are
     currently left public...
 
+    The rank transforms (e.g., `Fiber.splitUniform()`,
+    `Fiber.flattenRanks()` and `Tensor.swizzleRanks()`) copy the
+    fibertree they transform. Optionally (see
+    `Fiber.setCopyOnWrite()`), they only copy the levels of the
+    fibertree that they restructure and share the fibers below those
+    levels with the original fibertree.
+
     """
 
+    _copy_on_write = False
+    """Whether the rank transforms share fibers (see `Fiber.setCopyOnWrite()`)"""
+
+    _shared = False
+    """Whether the fiber is shared by more than one fibertree (see `Fiber._cowCopy()`)"""
+
+    _dense = False
+    """Whether the fiber was given dense storage (see `Fiber.isDense()`)"""
+
+    _shape_cache = None
+    """The cached shapes of the fibertree rooted at the fiber (see `Fiber._estimatedShape()`)"""
+
+    _shape_parents = None
+    """The fibers whose cached shapes depend on this fiber's (see `Fiber._addShapeParent()`)"""
+
+    _shape_gen = 0
+    """The number of invalidations of the fiber's cached shapes (see `self._noteShapeChange()`)"""
+
+    _owner = None
+    """The owning rank of the fiber until one is set (see `Fiber.setOwner()`)"""
+
+    _rank_attrs = None
+    """The rank attributes of the fiber until they are set (see `Fiber.setRankAttrs()`)"""
+
+    _version = 0
+    """The number of in-place changes of the coordinates (see `merge_kernels.PositionCache`)"""
+
 
     def __init__(self,
                  coords=None,
@@ -281,6 +322,11 @@ class Fiber:
         #
         self._saved_pos = 0
 
+        #
+        # No coordinate index (see `Fiber._getCoordIndex()`)
+        #
+        self._clearCoordIndex()
+
         #
         # Clear all stats
         #
@@ -323,7 +369,49 @@ class Fiber:
 
 
     @classmethod
-    def fromYAMLfile(cls, yamlfile, default=0, **kwargs):
+    def fromColumnar(cls, coords, payloads, **kwargs):
+        """Construct a leaf Fiber with array-backed (columnar) storage
+
+        The coordinates are held in an `array.array` of integers and
+        the payloads in a `PayloadArray`, so no `Payload` box is
+        created per element. Boxes (actually `PayloadView`s) are only
+        created when an element is accessed, and updating them
+        updates the fiber.
+
+        Parameters
+        ----------
+
+        coords: sequence of integers
+            The coordinates of the fiber
+
+        payloads: sequence of scalars
+            The (leaf) payloads of the fiber
+
+        kwargs: keyword arguments
+            Keyword arguments accepted by `Fiber.__init__()`
+
+        Notes
+        -----
+
+        See `Fiber.setColumnar()` for the restrictions on columnar
+        fibers.
+
+        """
+
+        assert len(coords) == len(payloads), \
+            "Coordinates and payloads must be same length"
+
+        f = cls(**kwargs)
+        f._setColumnarStorage(coords, payloads)
+
+        f._checkOrdered()
+        f._checkUnique()
+
+        return f
+
+
+    @classmethod
+    def fromYAMLfile(cls, yamlfile, default=0, max_depth=None, **kwargs):
         """Construct a Fiber from a YAML file
 
         Parameters
@@ -332,12 +420,17 @@ class Fiber:
         yamlfile: str
             The name of a YAML file holding a description of a fiber
 
+        max_depth: integer, default=None
+            The number of levels of fibers to load; the payloads of
+            the lowest loaded level are the number of leaf payloads
+            below them (see `fibertree.core.yaml_loader.loadYAML()`)
+
         kwargs: keyword arguments
             Keyword arguments accepted by `Fiber.__init__()`
 
         """
 
-        (coords, payloads) = Fiber.parse(yamlfile, default)
+        (coords, payloads) = Fiber.parse(yamlfile, default, max_depth)
 
         return cls(coords, payloads, default=default, **kwargs)
 
@@ -431,7 +524,7 @@ class Fiber:
 
 
     @classmethod
-    def fromRandom(cls, shape, density, interval=10, seed=None):
+    def fromRandom(cls, shape, density, interval=10, seed=None, columnar=False):
         """Create a fiber populated with random values.
 
         Multi-level fibers are supported by recursively creating
@@ -456,6 +549,10 @@ class Fiber:
         seed: a valid argument for `random.seed`
             A seed to pass to `random.seed`.
 
+        columnar: Boolean, default=False
+            Create the leaf fibers with columnar storage (see
+            `Fiber.fromColumnar()`)
+
         """
 
         if not isinstance(density, list):
@@ -483,13 +580,17 @@ class Fiber:
                 else:
                     payload = Fiber.fromRandom(shape[1:],
                                                density[1:],
-                                               interval)
+                                               interval,
+                                               columnar=columnar)
                     if payload.isEmpty():
                         continue
 
                 coords.append(c)
                 payloads.append(payload)
 
+        if columnar and len(shape) == 1:
+            return Fiber.fromColumnar(coords, payloads)
+
         f = Fiber(coords, payloads)
 
         return f
@@ -625,6 +726,231 @@ class Fiber:
         return self._unique
 
 
+    def isColumnar(self):
+        """Return whether the fiber uses columnar (array-backed) storage
+
+        Returns
+        -------
+        is_columnar: Boolean
+            Set to True if the payloads are held in a `PayloadArray`
+
+        """
+
+        return isinstance(self.payloads, PayloadArray)
+
+
+    def setColumnar(self, columnar=True):
+        """Switch the storage of a leaf fiber to/from columnar form
+
+        In columnar form the coordinates are held in an `array.array`
+        of integers and the payloads in a `PayloadArray` (see
+        `Fiber.fromColumnar()`).
+
+        Parameters
+        ----------
+        columnar: Boolean, default=True
+            Whether the fiber should use columnar storage
+
+        Returns
+        -------
+        self: Fiber
+            Returns `self` so method can be used in a chain
+
+        Raises
+        ------
+
+        AssertionError
+            Non-integer coordinates or non-leaf payloads
+
+        Notes
+        -----
+
+        Only leaf fibers with integer coordinates can be columnar.
+
+        References to payloads obtained before the switch are no
+        longer connected to the fiber.
+
+        """
+
+        assert not self.isLazy()
+
+        if columnar == self.isColumnar():
+            return self
+
+        if columnar:
+            self._setColumnarStorage(self.coords, self.payloads)
+        else:
+            self._setSparseStorage()
+            self.coords = list(self.coords)
+            self.payloads = [Payload(v) for v in self.payloads.getValues()]
+
+        return self
+
+
+    def _setColumnarStorage(self, coords, payloads):
+        """Replace the coords and payloads with columnar storage"""
+
+        assert all(type(c) is int for c in coords), \
+            "Columnar fibers must have integer coordinates"
+
+        self.coords = array("q", coords)
+        self.payloads = PayloadArray(payloads,
+                                     coords=self.coords,
+                                     ordered=self._ordered)
+
+        if self._dense:
+            self._dense = False
+
+
+    def isDense(self):
+        """Return whether the fiber uses dense storage
+
+        A fiber has dense storage if it is columnar and holds an
+        element for every coordinate from zero up to its length, so
+        the payloads are an array indexed by coordinate. Rank format
+        "U" gives its leaf fibers dense storage (see
+        `Rank.setFormat()`).
+
+        The elements of a fiber with dense storage that hold the
+        **default** value are only part of the storage, i.e., they
+        are not counted or returned as elements of the fiber (e.g.,
+        by `len()`, `Fiber.maxCoord()`, the rank transforms or
+        `Tensor.toCOO()`).
+
+        Returns
+        -------
+        is_dense: Boolean
+            Set to True if the fiber uses dense storage
+
+        """
+
+        if not self._dense:
+            return False
+
+        coords = self.coords
+
+        return len(coords) > 0 and coords[-1] == len(coords) - 1
+
+
+    def _setDenseStorage(self, size):
+        """Switch a leaf fiber to dense storage
+
+        Fill in an explicit default element for every missing
+        coordinate in `range(size)` and store the payloads in a
+        `PayloadArray` indexed by coordinate. Fibers that cannot be
+        held that way, i.e., with coordinates that are not integers
+        in `range(size)` or with fiber payloads, are left as is.
+
+        Parameters
+        ----------
+        size: integer
+            The number of coordinates (i.e., the shape) of the fiber
+
+        Returns
+        -------
+        is_dense: Boolean
+            Set to True if the fiber now uses dense storage
+
+        """
+
+        assert not self.isLazy()
+
+        coords = self.coords
+
+        if not size or not self._ordered or not self._unique \
+           or not all(type(c) is int and 0 <= c < size for c in coords):
+            return False
+
+        if self.isColumnar():
+            values = self.payloads.getValues()
+        else:
+            if any(isinstance(p, Fiber) for p in self.payloads):
+                return False
+
+            values = [Payload.get(p) for p in self.payloads]
+
+        if len(coords) == size:
+            dense = values
+        else:
+            dense = [self.getDefault()] * size
+            for c, v in zip(coords, values):
+                dense[c] = v
+
+        self._setColumnarStorage(range(size), dense)
+        self._clearCoordIndex()
+        self._noteShapeChange()
+
+        self._dense = True
+
+        return True
+
+
+    def _setSparseStorage(self):
+        """Switch a fiber with dense storage back to sparse storage
+
+        Drop the explicit default elements that were filled in by
+        `Fiber._setDenseStorage()`. The fiber stays columnar.
+
+        """
+
+        if not self._dense:
+            return
+
+        is_dense = self.isDense()
+        self._dense = False
+
+        if not is_dense:
+            return
+
+        default = self.getDefault()
+        values = self.payloads.getValues()
+
+        coords = [c for c, v in enumerate(values) if v != default]
+
+        if len(coords) == len(values):
+            return
+
+        self._setColumnarStorage(coords, [values[c] for c in coords])
+        self._clearCoordIndex()
+        self._noteShapeChange()
+
+
+    def _growDenseStorage(self, size):
+        """Extend the dense storage with default elements up to `size` coordinates"""
+
+        coords = self.coords
+        length = len(coords)
+
+        if size <= length:
+            return
+
+        coords.extend(range(length, size))
+        self.payloads.extend([self.getDefault()] * (size - length))
+        self._clearCoordIndex()
+
+
+    def _occupied(self):
+        """Get the fiber without the default elements of its dense storage
+
+        Returns
+        -------
+        fiber: Fiber
+            The fiber itself or, if it has dense storage (see
+            `Fiber.isDense()`), a shallow copy of it with sparse
+            storage, for the methods that read the elements of a
+            fiber by position
+
+        """
+
+        if not self.isDense():
+            return self
+
+        fiber = copy.copy(self)
+        fiber._setSparseStorage()
+
+        return fiber
+
+
 #
 # Coordinate-based methods
 #
@@ -694,17 +1020,22 @@ class Fiber:
         start_pos = Payload.get(start_pos)
         assert not start_pos or self.coords[start_pos] <= coords[0]
 
-        # If there is no saved shortcut, then do a log search
-        if start_pos is None:
-            index = bisect.bisect_left(self.coords, coords[0])
+        #
+        # In a leaf fiber with dense storage the position of an
+        # element is its coordinate
+        #
+        if start_pos is None and len(coords) == 1 and self.isColumnar():
+            coord = coords[0]
+            fiber_coords = self.coords
 
-        # If there is a saved shortcut, then search linearly from that point
-        else:
-            index = len(self.coords)
-            for i in range(start_pos, len(self.coords)):
-                if self.coords[i] >= coords[0]:
-                    index = i
-                    break
+            if type(coord) is int and 0 <= coord < len(fiber_coords) \
+               and fiber_coords[coord] == coord:
+                return PayloadView(self.payloads, coord)
+
+        # If there is a saved shortcut, then search forward from that point
+        index = self._findPosition(coords[0],
+                                   start_pos=start_pos,
+                                   exact=start_pos is None)
 
         const_used = False
         existing = index < len(self.coords) and self.coords[index] == coords[0]
@@ -775,16 +1106,21 @@ class Fiber:
         assert not self.isLazy()
         assert start_pos is None or len(coords) == 1
 
-        # TBD: Actually optimize the search
-
         start_pos = Payload.get(start_pos)
 
         # Get the payload for the particular index
-        index = bisect.bisect_left(self.coords, coords[0])
+        index = self._findPosition(coords[0], start_pos=start_pos)
         if index < len(self.coords) and self.coords[index] == coords[0]:
-            payload = self.payloads[index]
+            payload = self._cowPayload(index)
+
+            #
+            # Setting a default element of dense storage adds an
+            # element to the fiber
+            #
+            if self.isDense() and self.payloads.getValue(index) == self.getDefault():
+                self._noteShapeChange()
         else:
-            payload = self._create_payload(coords[0])
+            payload = self._create_payload(coords[0], pos=index)
 
         if len(coords) > 1:
             # Recurse to the next level's fiber
@@ -815,10 +1151,26 @@ class Fiber:
 
         assert Payload.is_payload(payload)
 
+        #
+        # Keep dense storage dense (see `Fiber.isDense()`), which is
+        # only possible for a coordinate after the end of the storage
+        #
+        if self.isDense():
+            if type(coord) is int and coord >= len(self.coords):
+                self._growDenseStorage(coord + 1)
+                self.payloads[coord] = payload
+                self._noteShapeChange()
+
+                return self.payloads[coord]
+
+            self._setSparseStorage()
+            pos = None
+
         if pos is None:
             pos = bisect.bisect_left(self.coords, coord)
         self.coords.insert(pos, coord)
         self.payloads.insert(pos, payload)
+        self._noteInsert(pos, coord)
 
         #
         # Get the payload out of the payloads array
@@ -983,12 +1335,10 @@ class Fiber:
 
         assert not self.isLazy()
 
-        # TBD: Actually optimize the search
-
         start_pos = Payload.get(start_pos)
 
-        index = bisect.bisect_left(self.coords, coord)
-        if coord != self.coords[index]:
+        index = self._findPosition(coord, start_pos=start_pos, exact=True)
+        if index == len(self.coords) or coord != self.coords[index]:
             index = None
 
         if start_pos is not None and index is not None:
@@ -1035,11 +1385,9 @@ class Fiber:
 
         start_pos = Payload.get(start_pos)
 
-        # TBD: Actually optimize the search
-
-        index = bisect.bisect_left(self.coords, coord)
-        if coord != self.coords[index]:
-            self._create_payload(coord)
+        index = self._findPosition(coord, start_pos=start_pos)
+        if index == len(self.coords) or coord != self.coords[index]:
+            self._create_payload(coord, pos=index)
 
         if start_pos is not None and index is not None:
             self.setSavedPos(index, distance=index - start_pos)
@@ -1047,6 +1395,174 @@ class Fiber:
         return index
 
 
+    def getCursor(self, position=0):
+        """Get a cursor for a sequence of lookups in the fiber
+
+        A cursor remembers its position in the fiber, so lookups of
+        increasing coordinates search forward from the previous
+        lookup rather than across the whole fiber.
+
+        Parameters
+        ----------
+        position: integer, default=0
+            The initial position of the cursor
+
+        Returns
+        -------
+        cursor: Cursor
+            A cursor into this fiber
+
+        See also
+        --------
+
+        `fibertree.core.cursor.Cursor`
+
+        """
+
+        return Cursor(self, position)
+
+
+    def _findPosition(self, coord, start_pos=None, exact=False):
+        """Find the position of the first coordinate >= `coord`
+
+        If `start_pos` is a usable hint (all coordinates before it are
+        less than `coord`), gallop forward from it, otherwise do a
+        binary search of the whole fiber. The use of the hint is
+        recorded in the savedPos statistics.
+
+        Without a hint, fibers in a rank with format "U" first check
+        if `coord` is at position `coord`, which is always the case
+        for a fiber with dense storage (see `Fiber.isDense()`), and
+        fibers in a rank with format "H" look `coord` up in a hash
+        index (see `Fiber._getCoordIndex()`). If `exact` is True the
+        caller only needs the position of an existing `coord`, so if
+        it is not in the index the length of the fiber is returned
+        without a search.
+
+        """
+
+        coords = self.coords
+
+        if start_pos is None:
+            fmt = self._getFormat()
+
+            if fmt == "U":
+                if type(coord) is int and 0 <= coord < len(coords) \
+                   and coords[coord] == coord:
+                    return coord
+
+            elif fmt == "H":
+                pos = self._getCoordIndex().get(coord)
+
+                if pos is not None:
+                    return pos
+
+                if exact:
+                    return len(coords)
+
+            return bisect.bisect_left(coords, coord)
+
+        if start_pos <= len(coords) \
+           and (start_pos == 0 or coords[start_pos - 1] < coord):
+            self._saved_hits += 1
+            return gallopLeft(coords, coord, start_pos)
+
+        self._saved_misses += 1
+        return bisect.bisect_left(coords, coord)
+
+
+    def _getFormat(self):
+        """Get the format of the rank this fiber belongs to"""
+
+        attrs = self.getRankAttrs()
+
+        if attrs is None:
+            return "C"
+
+        return attrs.getFormat()
+
+
+    def _getCoordIndex(self):
+        """Get the coordinate to position index of the fiber
+
+        The index is a dict used by fibers in a rank with format "H".
+        It is built on first use, and rebuilt if the coordinates have
+        been replaced or changed length since then. Appends update the index in place (see
+        `Fiber._noteInsert()`), other in-place coordinate changes must
+        call `Fiber._clearCoordIndex()`.
+
+        """
+
+        coords = self.coords
+
+        if self._coord_index is None \
+           or self._index_coords is not coords \
+           or self._index_len != len(coords):
+            self._coord_index = {c: pos for pos, c in enumerate(coords)}
+            self._index_coords = coords
+            self._index_len = len(coords)
+
+        return self._coord_index
+
+
+    def _noteInsert(self, pos, coord):
+        """Update the coordinate index (if any) for a coordinate inserted at `pos`
+
+        Also updates the cached shapes (if any) for the new element
+        (see `Fiber._insertShape()`).
+
+        """
+
+        self._version += 1
+
+        if self._shape_cache is not None or self._shape_parents is not None:
+            self._insertShape(pos)
+
+        index = self._coord_index
+
+        if index is None:
+            return
+
+        if pos != self._index_len or self._index_coords is not self.coords:
+            self._clearCoordIndex()
+            return
+
+        index[coord] = pos
+        self._index_len += 1
+
+
+    def _clearCoordIndex(self):
+        """Discard the coordinate index
+
+        Also counts the change of the coordinates in the fiber's
+        version (see `merge_kernels.PositionCache`)
+
+        """
+
+        self._version += 1
+
+        self._coord_index = None
+        self._index_coords = None
+        self._index_len = 0
+
+
+    def getIndexBytes(self):
+        """Get the memory used by the fiber's coordinate index
+
+        Returns
+        -------
+        nbytes: integer
+            The size in bytes of the coordinate index, zero if none
+            has been built (see rank format "H")
+
+        """
+
+        if self._coord_index is None:
+            return 0
+
+        return sys.getsizeof(self._coord_index)
+
+
     def project(self, trans_fn=None, interval=None, rank_id=None,
                 start_pos=None, coord_ex=None, tick=False):
         """Create a new fiber with coordinates projected according to `trans_fn`
@@ -1223,6 +1739,9 @@ class Fiber:
 
         payload = Payload.maybe_box(value)
 
+        self._noteShapeChange()
+        self._clearCoordIndex()
+
         index = 0
         try:
             index = next(x for x, val in enumerate(self.coords) if val >= coord)
@@ -1244,6 +1763,9 @@ class Fiber:
 
         payload = Payload.maybe_box(value)
 
+        self._noteShapeChange()
+        self._clearCoordIndex()
+
         try:
             index = next(x for x, val in enumerate(self.coords) if val > coord)
             self.coords.insert(index, coord)
@@ -1276,6 +1798,9 @@ class Fiber:
 
         """
 
+        if owner is not self._owner:
+            self._noteShapeChange()
+
         self._owner = owner
 
     def getOwner(self):
@@ -1311,6 +1836,10 @@ class Fiber:
         None
         """
         assert isinstance(attrs, RankAttrs)
+
+        if self._rank_attrs is not None:
+            self._noteShapeChange()
+
         self._rank_attrs = attrs
 
     def getRankAttrs(self):
@@ -1453,6 +1982,19 @@ class Fiber:
 
         """
 
+        return self._defaultFactory(addtorank)()
+
+
+    def _defaultFactory(self, addtorank=True):
+        """_defaultFactory
+
+        Return a function that creates a new default payload for the
+        fiber each time it is called (see `Fiber._createDefault()`).
+        Use this to avoid repeatedly looking up (and copying) the
+        default when creating many default payloads.
+
+        """
+
         owner = self.getOwner()
 
         default = self.getDefault()
@@ -1463,7 +2005,7 @@ class Fiber:
         else:
             next_default = None
 
-        return Fiber._instantiateDefault(owner, default, next_default, addtorank)
+        return lambda: Fiber._instantiateDefault(owner, default, next_default, addtorank)
 
 
     @staticmethod
@@ -1637,7 +2179,7 @@ class Fiber:
         return self._saved_pos
 
 
-    def getSavedPosStats(self, clear=True):
+    def getSavedPosStats(self, clear=True, hints=False):
         """Get the statistcs assocaited with **shortcuts**
 
         Get the number of shortcuts used and the distance searched
@@ -1649,11 +2191,17 @@ class Fiber:
         clear: Bool
             Clear the statistics
 
+        hints: Bool, default=False
+            Also return the number of searches that could (hits) and
+            could not (misses) start from the given `start_pos`
+
 
         Returns
         -------
         stats: tuple
-            Tuple of number of **shortcuts** set and total search distance
+            Tuple of number of **shortcuts** set and total search
+            distance, followed by the number of hint hits and misses
+            if `hints` is True
 
 
         See also
@@ -1666,6 +2214,9 @@ class Fiber:
 
         stats = (self._saved_count, self._saved_dist)
 
+        if hints:
+            stats += (self._saved_hits, self._saved_misses)
+
         if clear:
             self._clearSavedPosStats()
 
@@ -1677,6 +2228,8 @@ class Fiber:
 
         self._saved_count = 0
         self._saved_dist = 0
+        self._saved_hits = 0
+        self._saved_misses = 0
 
     #
     # Computed attribute acccessors
@@ -1707,6 +2260,15 @@ class Fiber:
         if len(self.coords) == 0:
             return None
 
+        #
+        # Skip the default elements of dense storage
+        #
+        if self.isDense():
+            default = self.getDefault()
+            return next((c for c, v in enumerate(self.payloads.getValues())
+                         if v != default),
+                        None)
+
         return min(self.coords)
 
     def maxCoord(self):
@@ -1730,6 +2292,16 @@ class Fiber:
 
         assert not self.isLazy()
 
+        #
+        # Skip the default elements of dense storage
+        #
+        if self.isDense():
+            default = self.getDefault()
+            values = self.payloads.getValues()
+            return next((c for c in reversed(range(len(values)))
+                         if values[c] != default),
+                        None)
+
         #
         # If _max_coord is set we assume it is correct
         #
@@ -1959,6 +2531,11 @@ class Fiber:
             coord = None
             payload = newvalue
 
+        if coord is not None \
+           or isinstance(payload, Fiber) \
+           or isinstance(self.payloads[position], Fiber):
+            self._noteShapeChange()
+
         if coord is not None:
             #
             # Check that coordinate order is maintained
@@ -1971,6 +2548,7 @@ class Fiber:
                     raise CoordinateError
 
             self.coords[position] = coord
+            self._clearCoordIndex()
 
         #
         # A payload of None just updates the coordinate
@@ -1988,6 +2566,13 @@ class Fiber:
                 len_ += 1
             return len_
 
+        elif self.isDense():
+            #
+            # The default elements of dense storage are not elements
+            #
+            values = self.payloads.getValues()
+            return len(values) - values.count(self.getDefault())
+
         else:
             return len(self.coords)
 
@@ -2014,6 +2599,22 @@ class Fiber:
         """
         assert not self.isLazy()
 
+        if "_window_of" in self.__dict__:
+            #
+            # Check an unmaterialized window without materializing it
+            # (which getDefault() would do to look at the payloads, but
+            # the default only matters for payloads that are not fibers)
+            #
+            owner = self.getOwner()
+            if owner is not None:
+                default = owner.getDefault()
+            else:
+                default = self.getRankAttrs().getDefault()
+
+            (fiber, start_pos, end_pos, _) = self._window_of
+            return all(Payload.isEmpty(fiber.payloads[pos], default=default)
+                       for pos in range(start_pos, end_pos))
+
         return all(map(lambda p: Payload.isEmpty(p, default=self.getDefault()), self.payloads))
 
 
@@ -2137,8 +2738,12 @@ class Fiber:
 
         """
 
-        self.coords.clear()
-        self.payloads.clear()
+        del self.coords[:]
+        del self.payloads[:]
+        self._noteShapeChange()
+
+        if self._dense:
+            self._dense = False
 
         # No longer lazy
         self._setIsLazy(False)
@@ -2184,8 +2789,21 @@ class Fiber:
 
         payload = Payload.maybe_box(value)
 
+        #
+        # Keep dense storage dense (see `Fiber.isDense()`)
+        #
+        if self.isDense():
+            if type(coord) is int and coord >= 0:
+                self._growDenseStorage(coord + 1)
+                self.payloads[coord] = payload
+                self._noteShapeChange()
+                return
+
+            self._setSparseStorage()
+
         self.coords.append(coord)
         self.payloads.append(payload)
+        self._noteInsert(len(self.coords) - 1, coord)
 
 
     def extend(self, other):
@@ -2223,12 +2841,29 @@ class Fiber:
             # Extending with an empty fiber is a nop
             return None
 
+        other = other._occupied()
+
         if self._ordered:
             assert self.maxCoord() is None or self.maxCoord() < other.coords[0], \
                 "Fiber coordinates in 'ordered' fibers must be monotonically increasing"
 
+        #
+        # Keep dense storage dense (see `Fiber.isDense()`)
+        #
+        if self.isDense() and all(type(c) is int and c >= 0 for c in other.coords):
+            self._growDenseStorage(max(other.coords) + 1)
+
+            for c, p in zip(other.coords, other.payloads):
+                self.payloads[c] = p
+
+            self._noteShapeChange()
+            return None
+
+        self._setSparseStorage()
+
         self.coords.extend(other.coords)
         self.payloads.extend(other.payloads)
+        self._noteShapeChange()
 
         return None
 
@@ -2283,15 +2918,25 @@ class Fiber:
 
         if depth > 0:
             # Recurse down to depth...
-            for p in self.payloads:
-                p.updateCoords(func, depth=depth - 1)
+            for i in range(len(self.payloads)):
+                self._cowPayload(i).updateCoords(func, depth=depth - 1)
         else:
             # Update my coordinates
 
+            #
+            # Columnar storage can only hold integer coordinates, so
+            # do the update on lists and switch back afterwards
+            #
+            columnar = self.isColumnar()
+            self.setColumnar(False)
+
             no_sort_needed = True
 
             last_coord = None
 
+            self._clearCoordIndex()
+            self._noteShapeChange()
+
             for i in range(len(self.coords)):
                 new_coord = func(i, self.coords[i], self.payloads[i])
                 self.coords[i] = new_coord
@@ -2309,6 +2954,9 @@ class Fiber:
                 sorted_cp = sorted(zipped_cp)
                 self.coords, self.payloads = [ list(tuple) for tuple in zip(*sorted_cp)]
 
+            if columnar and all(type(c) is int for c in self.coords):
+                self.setColumnar(True)
+
         return None
 
 
@@ -2353,13 +3001,15 @@ class Fiber:
 
         if depth > 0:
             # Recurse down to depth...
-            for p in self.payloads:
-                p.updatePayloads(func, depth=depth - 1)
+            for i in range(len(self.payloads)):
+                self._cowPayload(i).updatePayloads(func, depth=depth - 1)
         else:
             # Update my payloads
             for i, (c, p) in enumerate(self.iterOccupancy()):
                 self.payloads[i] = func(i, c, p)
 
+            self._noteShapeChange()
+
         return None
 
 
@@ -2418,6 +3068,10 @@ class Fiber:
 
         Note:
 
+        The shapes of a fiber without an owner are cached (see
+        `Fiber._estimatedShape()`), so only the first call traverses
+        the tree.
+
         """
         owner = self.getOwner()
         assert owner is not None or not all_ranks or not authoritative
@@ -2430,21 +3084,7 @@ class Fiber:
             shape = self.getRankAttrs().getShape()
             if shape and all_ranks:
                 # Not authoritative
-                rest = []
-                for _, p in self:
-                    if not isinstance(p, Fiber):
-                        continue
-
-                    new_shape = p.getShape(all_ranks=all_ranks, authoritative=authoritative)
-                    for i, ns in enumerate(new_shape):
-                        # If the new shape has more ranks
-                        if i >= len(rest):
-                            rest.append(ns)
-
-                        else:
-                            rest[i] = max(rest[i], ns)
-
-                shape = [shape] + rest
+                return list(self._declaredShape()[0])
 
 
         if shape is not None or authoritative:
@@ -2465,18 +3105,446 @@ class Fiber:
 
         """
 
-        assert not self.isLazy()
+        assert not self.isLazy()
+
+        if all_ranks:
+            return list(self._estimatedShape())
+
+        return self._fiberShape()
+
+#
+# Cached shapes
+#
+# Each fiber caches the shapes of the fibertree rooted at it in a
+# dict (`Fiber._shape_cache`) with up to three entries:
+#
+#   "fiber"     - the estimated shape of the fiber alone
+#   "estimated" - the estimated shape of the fibertree
+#   "declared"  - the shape of the fibertree using the shapes in the
+#                 rank attributes of fibers without an owner
+#
+# Leaf fibers only get cached shapes when they are queried directly
+# (see `Fiber._lowerShape()`). A fiber whose cached shapes depend on
+# a lower fiber's is recorded as a parent of that fiber, and a fiber
+# whose "declared" shape depends on its rank attributes is recorded
+# as a listener of them.
+# Inserting an element grows the cached shapes of the fiber in place,
+# and the growth is merged up through the parents (see
+# `Fiber._insertShape()`). Any other change discards the cached
+# shapes of the fiber and its parents, recursively (see
+# `Fiber._noteShapeChange()`).
+#
+    def _getShapeCache(self):
+        """Get the dict of cached shapes of the fiber"""
+
+        cache = self._shape_cache
+
+        if cache is None:
+            cache = {}
+            self._shape_cache = cache
+
+        return cache
+
+
+    def _fiberShape(self):
+        """Get the (cached) estimated shape of the fiber alone"""
+
+        cache = self._getShapeCache()
+
+        shape = cache.get("fiber")
+        if shape is None:
+            shape = self._calcFiberShape()
+            cache["fiber"] = shape
+
+        return shape
+
+
+    def _calcFiberShape(self):
+        """Find the estimated shape of the fiber alone (see `Fiber._calcShape()`)"""
+
+        if len(self.coords) == 0:
+            return 0
+
+        max_coord = self.maxCoord()
+
+        if max_coord is None:
+            return 0
+
+        if type(max_coord) is int:
+            return max_coord + 1
+
+        return Fiber._transCoord(max_coord, lambda c: c + 1)
+
+
+    def _estimatedShape(self):
+        """Get the (cached) estimated shape of the fibertree
+
+        The shape is the one found by `Fiber._calcShape()`, i.e., the
+        shape of this fiber followed by the maximum of the estimated
+        shapes of the fibers below it.
+
+        Returns
+        -------
+        shape: list
+            The cached shape (not a copy)
+
+        """
+
+        cache = self._getShapeCache()
+
+        shape = cache.get("estimated")
+        if shape is not None:
+            return shape
+
+        shape = [self._fiberShape()]
+
+        payloads = self.payloads
+        if len(payloads) > 0 and isinstance(payloads[0], Fiber):
+            entry = Fiber._shapeEntry(self)
+
+            for p in payloads:
+                Fiber._mergeShape(shape, p._lowerShape())
+                p._addShapeParent(self, entry)
+
+        cache["estimated"] = shape
+        return shape
+
+
+    def _lowerShape(self):
+        """Get the estimated shape of a fibertree below another fiber
+
+        Leaf fibers without cached shapes do not get any, since their
+        shape is found from their maximum coordinate (see
+        `Fiber._insertShape()`).
+
+        """
+
+        cache = self._shape_cache
+
+        if cache is None:
+            payloads = self.payloads
+            if len(payloads) == 0 or not isinstance(payloads[0], Fiber):
+                return [self._calcFiberShape()]
+
+        return self._estimatedShape()
+
+
+    def _declaredShape(self):
+        """Get the (cached) shape of a fibertree with a declared shape
+
+        The shape is the shape in the rank attributes of the fiber
+        followed by the maximum of the shapes contributed by the
+        fibers below it (see `Fiber._contributedShape()`).
+
+        Returns
+        -------
+        shape: list
+            The shape (not a copy)
+
+        cacheable: Boolean
+            Whether the shape was cached, i.e., it does not depend on
+            a fiber with an owner
+
+        """
+
+        cache = self._getShapeCache()
+
+        shape = cache.get("declared")
+        if shape is not None:
+            return shape, True
+
+        self._watchRankAttrs()
+
+        shape = [self.getRankAttrs().getShape()]
+        cacheable = True
+        entry = Fiber._shapeEntry(self)
+
+        for p in self.payloads:
+            if not isinstance(p, Fiber):
+                continue
+
+            if p.getOwner() is not None:
+                Fiber._mergeShape(shape, p.getShape(all_ranks=True))
+                cacheable = False
+                continue
+
+            (lower, lower_cacheable) = p._contributedShape()
+            Fiber._mergeShape(shape, lower)
+            p._addShapeParent(self, entry)
+
+            cacheable = cacheable and lower_cacheable
+
+        if cacheable:
+            cache["declared"] = shape
+
+        return shape, cacheable
+
+
+    def _contributedShape(self):
+        """Get the shape a fiber without an owner contributes to a declared shape
+
+        Returns
+        -------
+        shape: list
+            The declared shape if the rank attributes of the fiber
+            have a shape, otherwise the estimated shape (not a copy)
+
+        cacheable: Boolean
+            Whether the shape was cached
+
+        """
+
+        self._watchRankAttrs()
+
+        if self.getRankAttrs().getShape():
+            return self._declaredShape()
+
+        return self._lowerShape(), True
+
+
+    def _insertShape(self, pos):
+        """Update the cached shapes for an element inserted at `pos`
+
+        The shapes can only grow, so the fiber's own shape is found
+        from its maximum coordinate, and the shapes of a new fiber
+        payload are merged into the shapes of the fibertree. If a
+        cached shape grew, the growth is merged into the parents of
+        the fiber (see `Fiber._noteShapeGrowth()`).
+
+        """
+
+        cache = self._shape_cache
+        coords = self.coords
+        payloads = self.payloads
+
+        payload = payloads[pos]
+        is_fiber = isinstance(payload, Fiber)
+
+        if (len(payloads) > 1
+            and isinstance(payloads[1 if pos == 0 else 0], Fiber) != is_fiber) \
+           or (cache is None and is_fiber):
+            #
+            # Mixed leaf and fiber payloads, or a leaf fiber that became
+            # a fiber of fibers, just recalculate
+            #
+            self._noteShapeChange()
+            return
+
+        if cache is None:
+            #
+            # A leaf fiber whose shape is only cached by its parents
+            #
+            self._noteShapeGrowth(["estimated"], {"estimated": [self._calcFiberShape()]})
+            return
+
+        grown = []
+
+        if "fiber" in cache:
+            if len(coords) == 1 or self._ordered or self._max_coord is not None:
+                new_shape = self._calcFiberShape()
+            else:
+                new_shape = max(cache["fiber"],
+                                Fiber._transCoord(coords[pos], lambda c: c + 1))
+
+            cache["fiber"] = new_shape
+
+            shape = cache.get("estimated")
+            if shape is not None and shape[0] != new_shape:
+                shape[0] = new_shape
+                grown.append("estimated")
+
+        if is_fiber:
+            shape = cache.get("estimated")
+            if shape is not None:
+                if Fiber._mergeShape(shape, payload._estimatedShape()) \
+                   and "estimated" not in grown:
+                    grown.append("estimated")
+
+                payload._addShapeParent(self)
+
+            shape = cache.get("declared")
+            if shape is not None:
+                if payload.getOwner() is not None:
+                    self._noteShapeChange()
+                    return
+
+                (lower, cacheable) = payload._contributedShape()
+                if not cacheable:
+                    self._noteShapeChange()
+                    return
+
+                if Fiber._mergeShape(shape, lower):
+                    grown.append("declared")
+
+                payload._addShapeParent(self)
+
+        if grown:
+            self._noteShapeGrowth(grown)
+
+
+    def _noteShapeGrowth(self, kinds, cache=None):
+        """Merge the grown cached shapes of kinds `kinds` into the parents
+        (the shapes are taken from `cache`, by default the fiber's)"""
+
+        parents = self._shape_parents
+
+        if not parents:
+            return
+
+        if cache is None:
+            cache = self._shape_cache
+
+        if self.getOwner() is None and self.getRankAttrs().getShape():
+            contributed = "declared"
+        else:
+            contributed = "estimated"
+
+        for (ref, gen) in zip(parents[::2], parents[1::2]):
+            parent = ref()
+
+            if parent is None or parent._shape_gen != gen \
+               or parent._shape_cache is None:
+                continue
+
+            parent_cache = parent._shape_cache
+            grown = []
+
+            if "estimated" in kinds and "estimated" in parent_cache \
+               and Fiber._mergeShape(parent_cache["estimated"], cache["estimated"]):
+                grown.append("estimated")
+
+            if contributed in kinds and "declared" in parent_cache \
+               and Fiber._mergeShape(parent_cache["declared"], cache[contributed]):
+                grown.append("declared")
+
+            if grown:
+                parent._noteShapeGrowth(grown)
+
+
+    def _noteShapeChange(self):
+        """Discard the cached shapes of the fiber and of its parents
+
+        Changes to the coordinates or fiber payloads of a fiber,
+        other than by inserting an element with
+        `Fiber._create_payload()` or `Fiber.append()`, must call this
+        method.
+
+        """
+
+        #
+        # Parents recorded before this call are no longer valid
+        #
+        self._shape_gen += 1
+
+        parents = self._shape_parents
+
+        if self._shape_cache is None and parents is None:
+            return
+
+        self._shape_cache = None
+        self._shape_parents = None
+
+        if parents is None:
+            return
+
+        for (ref, gen) in zip(parents[::2], parents[1::2]):
+            parent = ref()
+
+            if parent is not None and parent._shape_gen == gen:
+                parent._noteShapeChange()
+
+
+    def _addShapeParent(self, parent, entry=None):
+        """Record that the cached shapes of `parent` depend on this fiber's
+        (`entry` is a shared entry for `parent`, see `Fiber._shapeEntry()`)"""
+
+        self._shape_parents = Fiber._addShapeEntry(self._shape_parents, parent, entry)
+
+
+    def _watchRankAttrs(self):
+        """Record that the cached shapes depend on the fiber's rank attributes"""
+
+        attrs = self._rank_attrs
+
+        if attrs is not None:
+            attrs._shape_listeners = Fiber._addShapeEntry(attrs._shape_listeners, self)
+
+
+    @staticmethod
+    def _shapeEntry(fiber):
+        """Get a list of weakref, generation entries holding only `fiber`
+
+        The list can be shared by all of the fibers below `fiber`,
+        since lists of entries are never changed in place.
+
+        """
+
+        return [weakref.ref(fiber), fiber._shape_gen]
+
+
+    @staticmethod
+    def _addShapeEntry(entries, fiber, entry=None):
+        """Add `fiber` to a flat list of weakref, generation entries
+
+        The entries are kept flat (weakref, generation, weakref,
+        generation, ...) to allocate one object less per fiber.
+        Entries for fibers that were deleted or whose cached shapes
+        were discarded since they were added are dropped. If there
+        are no other entries, `entry` (see `Fiber._shapeEntry()`) is
+        returned.
+
+        """
+
+        if not entries:
+            if entry is not None:
+                return entry
+
+            return Fiber._shapeEntry(fiber)
+
+        live = []
+
+        for (ref, gen) in zip(entries[::2], entries[1::2]):
+            entry = ref()
+
+            if entry is None or entry._shape_gen != gen:
+                continue
+
+            if entry is fiber:
+                return entries
+
+            live += [ref, gen]
+
+        live += [weakref.ref(fiber), fiber._shape_gen]
+        return live
+
+
+    @staticmethod
+    def _mergeShape(shape, lower):
+        """Merge the shape `lower` of a lower fiber into `shape`
+
+        Take the maximum of each level of `lower` and the
+        corresponding level (i.e., one level lower) of `shape`,
+        extending `shape` if needed.
+
+        Returns
+        -------
+        grown: Boolean
+            Whether `shape` changed
+
+        """
+
+        grown = False
 
-        shape = self._calcShape(all_ranks=all_ranks)
+        for level, lower_shape in enumerate(lower, 1):
+            if level >= len(shape):
+                shape.append(lower_shape)
+                grown = True
 
-        #
-        # Since _calcShape() always returns a list we may
-        # need to get out first value
-        #
-        if not all_ranks:
-            shape = shape[0]
+            elif lower_shape > shape[level]:
+                shape[level] = lower_shape
+                grown = True
 
-        return shape
+        return grown
 
 
     def _calcShape(self, shape=None, level=0, all_ranks=True):
@@ -2504,7 +3572,7 @@ class Fiber:
         #
         # If fiber is empty then shape doesn't change
         #
-        if not self.coords:
+        if not self.coords or max_coord is None:
             if len(shape) < level + 1:
                 shape.append(0)
 
@@ -2517,7 +3585,7 @@ class Fiber:
         if len(shape) < level + 1:
             shape.append(new_shape)
         else:
-            shape[level] = max(shape[level], Fiber._transCoord(max_coord))
+            shape[level] = max(shape[level], new_shape)
 
         #
         # Recursively process payloads that are Fibers
@@ -2682,7 +3750,7 @@ class Fiber:
 #
 # Miscelaneous methods
 #
-    def uncompress(self, shape=None, level=0):
+    def uncompress(self, shape=None, level=0, view=False):
         """Return an uncompressed fibertree (i.e., a nest of lists)
 
         Recursively create a nest of lists that corresponding to the
@@ -2696,6 +3764,11 @@ class Fiber:
         shape: list of integers, default=None
             Impose a fixed shape on the result
 
+        view: Boolean, default=False
+            Return the payload array of leaf fibers with dense storage
+            that match the shape (see `Fiber.isDense()`) rather than a
+            copy, so updating the result updates the fibertree
+
 
         Returns
         -------
@@ -2718,18 +3791,36 @@ class Fiber:
         if shape is None:
             shape = self.getShape(all_ranks=True)
 
+        if level == len(shape) - 1 and len(self.coords) == shape[level] \
+           and self.isDense():
+            values = self.payloads.getValues()
+            return values if view else list(values)
+
         f = []
 
-        shape_fiber = Fiber(coords=list(range(shape[level])), initial=1)
-        for c, (mask, p, _) in self | shape_fiber:
+        #
+        # Walk the coordinates in the shape and the elements of the
+        # fiber together
+        #
+        coords = self.coords
+        payloads = self.payloads
+
+        pos = bisect.bisect_left(coords, 0)
+        default = self.getDefault()
+
+        for c in range(shape[level]):
+            while pos < len(coords) and coords[pos] < c:
+                pos += 1
+
+            if pos < len(coords) and coords[pos] == c \
+               and not Payload.isEmpty(payloads[pos], default=default):
+                p = payloads[pos]
 
-            if (mask == "AB"):
                 if Payload.contains(p, Fiber):
-                    f.append(Payload.get(p).uncompress(shape, level + 1))
+                    f.append(Payload.get(p).uncompress(shape, level + 1, view))
                 else:
                     f.append(Payload.get(p))
-
-            if (mask == "B"):
+            else:
                 f.append(self._fillempty(shape, level + 1))
 
         return f
@@ -2803,6 +3894,7 @@ class Fiber:
             #
             self.coords = []
             self.payloads = []
+            self._noteShapeChange()
 
 
         self._setDefault(other.getDefault())
@@ -3191,7 +4283,7 @@ class Fiber:
         """
         assert not self.isLazy()
 
-        occupancy = len(self.coords)
+        occupancy = len(self)
 
         return self.splitEqual ((occupancy+partitions-1)//partitions)
 
@@ -3256,17 +4348,18 @@ class Fiber:
                     ind = self.get_split_ind(start_c) - 1
                     # Check if there is a partition with just a halo
                     if ind > last_ind and (ind + 1) * self.step > active_start:
-                        coords, payloads, _ = self.build_partition(ind, pos)
+                        end_pos, _ = self.build_partition(ind, pos)
 
-                        if coords:
-                            yield self.build_elem(ind, coords, payloads)
+                        if end_pos > pos:
+                            yield self.build_elem(ind, pos, end_pos)
 
                     if start_c >= active_end:
                         break
 
                     ind = self.get_split_ind(start_c)
-                    coords, payloads, pos = self.build_partition(ind, pos)
-                    yield self.build_elem(ind, coords, payloads)
+                    end_pos, new_pos = self.build_partition(ind, pos)
+                    yield self.build_elem(ind, pos, end_pos)
+                    pos = new_pos
 
                     last_ind = ind
 
@@ -3283,48 +4376,41 @@ class Fiber:
                     # Check if the first coordinate outside the active range
                     # corresponds to a halo we have not yet built
                     if halo_ind > ind:
-                        coords, payloads, _ = self.build_partition(halo_ind, pos)
+                        end_pos, _ = self.build_partition(halo_ind, pos)
 
-                        if coords:
-                            yield self.build_elem(halo_ind, coords, payloads)
+                        if end_pos > pos:
+                            yield self.build_elem(halo_ind, pos, end_pos)
 
 
-            def build_elem(self, ind, coords, payloads):
+            def build_elem(self, ind, start_pos, end_pos):
                 part = ind * self.step
-                if relativeCoords:
-                    coords = [c - part for c in coords]
+                offset = part if self.relative else 0
 
                 range_start = max(part, self.fiber.getActive()[0])
                 range_end = min(part + self.step, self.fiber.getActive()[1])
                 active_range = (range_start, range_end)
 
-                return part, coords, payloads, active_range
+                return part, start_pos, end_pos, offset, active_range
 
             def build_partition(self, ind, pos):
-                coords = []
-                payloads = []
-
                 part_end = min(self.fiber.getActive()[1], (ind + 1) * self.step)
 
-                new_pos = pos + 1
-                for c, p in self.fiber.iterRange(self.fiber.coords[pos],
-                               part_end + self.halo, start_pos=pos):
-                    if c < part_end:
-                        new_pos = self.fiber.getSavedPos() + 1
-
-                    coords.append(c)
-                    payloads.append(p)
+                # The partition (with its halo) ends before the first
+                # coordinate at or after part_end + halo, and the next
+                # partition starts at the first coordinate at or after part_end
+                end_pos = bisect.bisect_left(self.fiber.coords,
+                                             part_end + self.halo,
+                                             lo=pos)
+                new_pos = max(bisect.bisect_left(self.fiber.coords,
+                                                 part_end,
+                                                 lo=pos),
+                              pos + 1)
 
-                return coords, payloads, new_pos
+                return end_pos, new_pos
 
 
             def first_coord(self):
-                start = 0
-                for c, p in self.fiber.iterActive(start_pos=start):
-                    return self.fiber.getSavedPos()
-
-                # We need to look for the end of the active_range
-                return bisect.bisect_left(self.fiber.coords, self.fiber.getActive()[1])
+                return bisect.bisect_left(self.fiber.coords, self.fiber.getActive()[0])
 
             def get_split_ind(self, c):
                 return c // self.step
@@ -3414,17 +4500,18 @@ class Fiber:
                     ind = self.get_split_ind(ind, start_c) - 1
                     # Check if there is a partition with just a halo
                     if ind > last_ind and self.splits[ind + 1] > active_start:
-                        coords, payloads, _ = self.build_partition(ind, pos)
+                        end_pos, _ = self.build_partition(ind, pos)
 
-                        if coords:
-                            yield self.build_elem(ind, coords, payloads)
+                        if end_pos > pos:
+                            yield self.build_elem(ind, pos, end_pos)
 
                     if start_c >= active_end:
                         break
 
                     ind = self.get_split_ind(ind, start_c)
-                    coords, payloads, pos = self.build_partition(ind, pos)
-                    yield self.build_elem(ind, coords, payloads)
+                    end_pos, new_pos = self.build_partition(ind, pos)
+                    yield self.build_elem(ind, pos, end_pos)
+                    pos = new_pos
 
                     last_ind = ind
 
@@ -3442,47 +4529,44 @@ class Fiber:
                     # Check if the first coordinate outside the active range
                     # corresponds to a halo we have not yet built
                     if halo_ind > ind:
-                        coords, payloads, _ = self.build_partition(halo_ind, pos)
+                        end_pos, _ = self.build_partition(halo_ind, pos)
 
-                        if coords:
-                            yield self.build_elem(halo_ind, coords, payloads)
+                        if end_pos > pos:
+                            yield self.build_elem(halo_ind, pos, end_pos)
 
 
-            def build_elem(self, ind, coords, payloads):
-                if relativeCoords:
-                    coords = [c - self.splits[ind] for c in coords]
+            def build_elem(self, ind, start_pos, end_pos):
+                offset = self.splits[ind] if self.relative else 0
 
                 range_start = max(self.splits[ind], self.fiber.getActive()[0])
                 range_end = min(self.splits[ind + 1], self.fiber.getActive()[1])
                 active_range = (range_start, range_end)
 
-                return self.splits[ind], coords, payloads, active_range
+                return self.splits[ind], start_pos, end_pos, offset, active_range
 
             def build_partition(self, ind, pos):
-                coords = []
-                payloads = []
-
                 part_end = min(self.fiber.getActive()[1], self.splits[ind + 1])
 
-                new_pos = pos + 1
-                for c, p in self.fiber.iterRange(self.fiber.coords[pos],
-                               part_end + self.halo, start_pos=pos):
-                    if c < part_end:
-                        new_pos = self.fiber.getSavedPos() + 1
-
-                    coords.append(c)
-                    payloads.append(p)
+                # See _SplitterUniform.build_partition()
+                end_pos = bisect.bisect_left(self.fiber.coords,
+                                             part_end + self.halo,
+                                             lo=pos)
+                new_pos = max(bisect.bisect_left(self.fiber.coords,
+                                                 part_end,
+                                                 lo=pos),
+                              pos + 1)
 
-                return coords, payloads, new_pos
+                return end_pos, new_pos
 
 
             def first_coord(self):
-                start = 0
-                for c, p in self.fiber.iterActive(start_pos=start):
-                    if c >= self.splits[1]:
-                        return self.fiber.getSavedPos()
+                active_start, active_end = self.fiber.getActive()
 
-                return self.fiber.getSavedPos() + 1
+                # The first active coordinate in a partition, or the
+                # end of the active range
+                first = bisect.bisect_left(self.fiber.coords,
+                                           max(active_start, self.splits[1]))
+                return min(first, bisect.bisect_left(self.fiber.coords, active_end))
 
 
             def get_split_ind(self, ind, c):
@@ -3548,46 +4632,23 @@ class Fiber:
                 if len(self.fiber) == 0:
                     return
 
-                parts = []
-                coords = []
-                payloads = []
-                pos = 0
-                for i, (c, p) in enumerate(self.fiber.iterActive(start_pos=0)):
-                    pos = self.fiber.getSavedPos()
-                    # The first partition is labeled by the first coordinate
-                    if i == 0:
-                        parts.append(c)
-                        coords.append([])
-                        payloads.append([])
-
-                    # Otherwise, if we are about to start a new partition,
-                    # then we need to build the halo first
-                    elif i % self.step == 0:
-                        halo_coords, halo_payloads = self.build_halo(c, pos)
-                        coords[-1].extend(halo_coords)
-                        payloads[-1].extend(halo_payloads)
-
-                        # Now start the new partition
-                        parts.append(c)
-                        coords.append([])
-                        payloads.append([])
-
-                    coords[-1].append(c)
-                    payloads[-1].append(p)
-
-                halo_coords, halo_payloads = self.build_halo(self.fiber.getActive()[1], pos + 1)
-
-                # Add the final halo
-                coords[-1].extend(halo_coords)
-                payloads[-1].extend(halo_payloads)
-
-                # Yield the partitions
-                for i, (clist, plist) in enumerate(zip(coords, payloads)):
-                    yield self.build_elem(i, parts, clist, plist)
-
-            def build_elem(self, i, parts, coords, payloads):
-                if self.relative:
-                    coords = [c - parts[i] for c in coords]
+                active_start, active_end = self.fiber.getActive()
+
+                lo = bisect.bisect_left(self.fiber.coords, active_start)
+                hi = bisect.bisect_left(self.fiber.coords, active_end)
+
+                # The positions at which the partitions start
+                starts = list(range(lo, hi, self.step))
+                parts = [self.fiber.coords[pos] for pos in starts]
+
+                for i, start_pos in enumerate(starts):
+                    part_end_pos = min(start_pos + self.step, hi)
+                    end_pos = self.build_halo(part_end_pos, hi)
+
+                    yield self.build_elem(i, parts, start_pos, end_pos)
+
+            def build_elem(self, i, parts, start_pos, end_pos):
+                offset = parts[i] if self.relative else 0
 
                 if i == 0:
                     range_start = self.fiber.getActive()[0]
@@ -3600,28 +4661,26 @@ class Fiber:
                     range_end = self.fiber.getActive()[1]
 
                 active_range = (range_start, range_end)
-                return parts[i], coords, payloads, active_range
+                return parts[i], start_pos, end_pos, offset, active_range
 
-            def build_halo(self, part_end, part_end_pos):
-                """Build a halo starting at a given part_end_pos"""
+            def build_halo(self, part_end_pos, active_end_pos):
+                """Find the end of the halo starting at a given part_end_pos"""
                 if part_end_pos >= len(self.fiber):
-                    return [], []
+                    return part_end_pos
 
                 if self.halo == 0:
-                    return [], []
-
-                assert isinstance(part_end, numbers.Number)
+                    return part_end_pos
 
-                coords = []
-                payloads = []
-                for c, p in self.fiber.iterOccupancy(start_pos=part_end_pos):
-                    if c - part_end >= self.halo:
-                        break
+                if part_end_pos < active_end_pos:
+                    part_end = self.fiber.coords[part_end_pos]
+                else:
+                    part_end = self.fiber.getActive()[1]
 
-                    coords.append(c)
-                    payloads.append(p)
+                assert isinstance(part_end, numbers.Number)
 
-                return coords, payloads
+                return bisect.bisect_left(self.fiber.coords,
+                                          part_end + self.halo,
+                                          lo=part_end_pos)
 
         if rankid is not None:
             depth = self._rankid2depth(rankid)
@@ -3688,49 +4747,33 @@ class Fiber:
                 if len(self.fiber) == 0:
                     return
 
-                parts = []
-                coords = []
-                payloads = []
-
-                count = 0
-                ind  = 0
-
-                for i, (c, p) in enumerate(self.fiber.iterActive(start_pos=0)):
-                    # If this is the first payload in the partition, save the coordinate
-                    if count == 0:
-                        parts.append(c)
-                        coords.append([])
-                        payloads.append([])
+                active_start, active_end = self.fiber.getActive()
 
-                    coords[-1].append(c)
-                    payloads[-1].append(p)
+                lo = bisect.bisect_left(self.fiber.coords, active_start)
+                hi = bisect.bisect_left(self.fiber.coords, active_end)
 
-                    # If this is the last payload in the partition, end the partition
-                    count += 1
-                    if count == self.sizes[ind]:
-                        pos = self.fiber.getSavedPos() + 1
-                        part_end = self.get_part_end(pos)
+                # The positions at which the partitions start, where a
+                # size of less than one puts all the remaining
+                # coordinates into that partition
+                starts = []
+                pos = lo
+                for size in self.sizes:
+                    if pos >= hi:
+                        break
 
-                        halo_coords, halo_payloads = self.build_halo(part_end, pos)
-                        coords[-1].extend(halo_coords)
-                        payloads[-1].extend(halo_payloads)
+                    starts.append(int(pos))
+                    pos += size if size >= 1 else float("inf")
 
-                        count = 0
-                        ind += 1
+                parts = [self.fiber.coords[pos] for pos in starts]
 
-                # If we did not build the last halo, build it now
-                if count > 0:
-                    pos = self.fiber.getSavedPos() + 1
-                    halo_coords, halo_payloads = self.build_halo(self.fiber.getActive()[1], pos)
-                    coords[-1].extend(halo_coords)
-                    payloads[-1].extend(halo_payloads)
+                for i, start_pos in enumerate(starts):
+                    part_end_pos = starts[i + 1] if i + 1 < len(starts) else hi
+                    end_pos = self.build_halo(part_end_pos, hi)
 
-                for i, (clist, plist) in enumerate(zip(coords, payloads)):
-                    yield self.build_elem(i, parts, clist, plist)
+                    yield self.build_elem(i, parts, start_pos, end_pos)
 
-            def build_elem(self, i, parts, coords, payloads):
-                if self.relative:
-                    coords = [c - parts[i] for c in coords]
+            def build_elem(self, i, parts, start_pos, end_pos):
+                offset = parts[i] if self.relative else 0
 
                 if i == 0:
                     range_start = self.fiber.getActive()[0]
@@ -3743,34 +4786,26 @@ class Fiber:
                     range_end = self.fiber.getActive()[1]
 
                 active_range = (range_start, range_end)
-                return parts[i], coords, payloads, active_range
+                return parts[i], start_pos, end_pos, offset, active_range
 
-            def build_halo(self, part_end, part_end_pos):
-                """Build a halo starting at a given part_end_pos"""
+            def build_halo(self, part_end_pos, active_end_pos):
+                """Find the end of the halo starting at a given part_end_pos"""
                 if part_end_pos >= len(self.fiber):
-                    return [], []
+                    return part_end_pos
 
                 if self.halo == 0:
-                    return [], []
-
-                assert isinstance(part_end, numbers.Number)
-
-                coords = []
-                payloads = []
-                for c, p in self.fiber.iterOccupancy(start_pos=part_end_pos):
-                    if c - part_end >= self.halo:
-                        break
-
-                    coords.append(c)
-                    payloads.append(p)
+                    return part_end_pos
 
-                return coords, payloads
+                if part_end_pos < active_end_pos:
+                    part_end = self.fiber.coords[part_end_pos]
+                else:
+                    part_end = self.fiber.getActive()[1]
 
-            def get_part_end(self, pos):
-                if pos >= len(self.fiber):
-                    return [], []
+                assert isinstance(part_end, numbers.Number)
 
-                return min(self.fiber.coords[pos], self.fiber.getActive()[1])
+                return bisect.bisect_left(self.fiber.coords,
+                                          part_end + self.halo,
+                                          lo=part_end_pos)
 
         if rankid is not None:
             depth = self._rankid2depth(rankid)
@@ -3803,8 +4838,8 @@ class Fiber:
         ----------
 
         splitter: Iterator
-            An iterator that yields 4 element tuples:
-            (partition_coord, coord_list, payload_list, active_range)
+            An iterator that yields 5 element tuples:
+            (partition_coord, start_pos, end_pos, coord_offset, active_range)
 
         depth: int
             The depth of the rank to actually partition
@@ -3815,11 +4850,21 @@ class Fiber:
         fiber: Fiber
             A fiber like self with the top rank split into two according to the
             splitter
-        """
-        fiber = copy.deepcopy(self)
 
+        Notes
+        -----
+
+        The partitions are windows over the fibers being split (see
+        `Fiber._window()`), so only the levels above the split rank are
+        copied. With **copy-on-write** enabled, the fibers being split
+        are shared with this fibertree (see `Fiber._cowCopy()`), so the
+        cost of the split is proportional to the number of partitions.
+
+        """
         if depth == 0:
-            return fiber._splitFiber(splitter)
+            return self._transformCopy(0)._splitFiber(splitter)
+
+        fiber = self._transformCopy(depth - 1)
 
         fiber.updatePayloadsBelow(Fiber._splitFiber, splitter, depth=depth-1)
 
@@ -3835,8 +4880,8 @@ class Fiber:
         ----------
 
         splitter: Iterator
-            An iterator that yields 4 element tuples:
-            (partition_coord, coord_list, payload_list, active_range)
+            An iterator that yields 5 element tuples:
+            (partition_coord, start_pos, end_pos, coord_offset, active_range)
 
         Returns
         -------
@@ -3852,13 +4897,19 @@ class Fiber:
         as a result of a call to Fiber._splitGeneric.
 
         In light of the above, this method does not copy the fiber (so the
-        result may contain references to the payloads of self).
+        partitions are windows over self, see `Fiber._window()`).
 
         """
         upper = Fiber(default=Fiber(), active_range=self.getActive())
 
-        for part, coords, payloads, active_range in splitter(self):
-            lower = Fiber(coords=coords, payloads=payloads, active_range=active_range)
+        #
+        # The partitions are windows over the elements of the fiber
+        # (i.e., without the default elements of dense storage)
+        #
+        fiber = self._occupied()
+
+        for part, start_pos, end_pos, offset, active_range in splitter(fiber):
+            lower = fiber._window(start_pos, end_pos, offset, active_range)
             upper.coords.append(part)
             upper.payloads.append(lower)
 
@@ -3881,11 +4932,13 @@ class Fiber:
         assert Payload.contains(other, Fiber), \
             "Fiber concatenation must involve two fibers"
 
+        (first, second) = (self._occupied(), other._occupied())
+
         #
         # TBD: Set default for Fiber
         #
-        return self._newFiber(coords=self.coords + other.coords,
-                              payloads=self.payloads + other.payloads)
+        return self._newFiber(coords=list(first.coords) + list(second.coords),
+                              payloads=list(first.payloads) + list(second.payloads))
 
 #
 # Iterators
@@ -3909,6 +4962,78 @@ class Fiber:
         """
         return union(*args, **kwargs)
 
+    @staticmethod
+    def setMergeStrategy(strategy):
+        """Set the strategy used to merge fibers in intersection/union
+
+        When metrics are not being collected, the merge operators can
+        find the matching elements of eager fibers in bulk with a
+        merge kernel, rather than stepping through the fibers element
+        by element.
+
+        Parameters
+        ----------
+        strategy: str
+            One of `fibertree.core.merge_kernels.STRATEGIES`, "auto"
+            (the default) picks a strategy per merge and "lazy"
+            always steps through the fibers
+
+        Returns
+        -------
+        None
+
+        """
+        merge_kernels.setDefaultStrategy(strategy)
+
+    @staticmethod
+    def getMergeStrategy():
+        """Get the strategy used to merge fibers in intersection/union
+
+        Returns
+        -------
+        strategy: str
+            The strategy set with `Fiber.setMergeStrategy()`
+
+        """
+        return merge_kernels.getDefaultStrategy()
+
+    @staticmethod
+    def setMergeCache(max_bytes):
+        """Set the memory bound of the cache of merge positions
+
+        When enabled, the positions of the matching elements found by
+        the merge kernels of the two-operand merge operators (`&`,
+        `|` and `-`) are memoized for each pair of fibers, so merging
+        the same unchanged fibers again, e.g., a stationary operand
+        of a loop nest, does not search their coordinates again (see
+        `merge_kernels.PositionCache`).
+
+        Parameters
+        ----------
+        max_bytes: int or None
+            The maximum number of bytes of positions (and of the
+            coordinates they keep alive) to keep, None or
+            0 (the default) disables the cache
+
+        Returns
+        -------
+        None
+
+        """
+        merge_kernels.setPositionCache(max_bytes)
+
+    @staticmethod
+    def getMergeCache():
+        """Get the cache of merge positions
+
+        Returns
+        -------
+        cache: PositionCache or None
+            The cache enabled by `Fiber.setMergeCache()`, if any
+
+        """
+        return merge_kernels.getPositionCache()
+
     from .iterators import __and__
     from .iterators import __or__
     from .iterators import __xor__
@@ -3934,7 +5059,9 @@ class Fiber:
         Notes
         -----
 
-        This function relies on flattenRanks() and unflattenRanks().
+        For integer coordinates, the elements of the two ranks are
+        sorted in a single pass (see `csf.permuteFiber()`), otherwise
+        this function relies on flattenRanks() and unflattenRanks().
         FIXME: flattenRanks() could be more general to support all p1 types,
         including tuples.
 
@@ -3948,11 +5075,23 @@ class Fiber:
         assert not self.isLazy()
         assert self._ordered and self._unique
 
+        # Make sure that the fiber has at least one coordinate
+        assert len(self.coords) > 0
+
+        # The csf module imports this module
+        from .csf import permuteFiber
+
+        if Payload.contains(self.payloads[0], Fiber):
+            swapped = permuteFiber(self, 2, [1, 0])
+
+            if swapped is not None:
+                return swapped
+
         #
         # Flatten the (highest) two ranks
         #
-        # Note: We do not need to deepcopy explicitly, because flattenRanks
-        # does the deepcopy for us
+        # Note: We do not need to copy explicitly, because flattenRanks
+        # does the copy for us
         flattened = self.flattenRanks(style="pair")
 
         # Make sure that the flattened fiber has at least one coordinate
@@ -4122,8 +5261,8 @@ class Fiber:
         if merge_fn is None:
             merge_fn = lambda ps: sum(ps)
 
-        # Ensure that we only deepcopy once
-        copied = copy.deepcopy(self)
+        # Ensure that we only copy once
+        copied = self._transformCopy(depth + levels)
 
         if depth == 0:
             return copied._mergeRanksHelper(levels=levels, style=style, merge_fn=merge_fn)
@@ -4423,9 +5562,126 @@ class Fiber:
     unflattenRanksBelow = partialmethod(updatePayloadsBelow,
                                         unflattenRanks)
 
+#
+# Window methods
+#
+    def _window(self, start_pos, end_pos, coord_offset=0, active_range=None):
+        """Create a fiber that is a window over a range of positions of this fiber
+
+        The new fiber holds the elements of this fiber at positions
+        [`start_pos`, `end_pos`), with `coord_offset` subtracted from
+        their coordinates. Its coordinate and payload lists are only
+        created the first time either of them is used (see
+        `Fiber.__getattr__()`), so creating a window costs the same
+        whatever its size.
+
+        Parameters
+        ----------
+        start_pos: integer
+            The position of the first element of the window
+
+        end_pos: integer
+            The position after the last element of the window
+
+        coord_offset: integer, default=0
+            The offset to subtract from the coordinates
+
+        active_range: Optional[Tuple[int, int]]
+            The active range of the window
+
+        Returns
+        -------
+        window: Fiber
+            The window
+
+        Notes
+        -----
+
+        This fiber must not be changed while the window is
+        unmaterialized, i.e., it must be either a private copy or
+        shared **copy-on-write** (see `Fiber._cowCopy()`).
+
+        """
+
+        window = Fiber(active_range=active_range)
+
+        del window.coords
+        del window.payloads
+        window._window_of = (self, start_pos, end_pos, coord_offset)
+
+        return window
+
+
+    def __getattr__(self, name):
+        """__getattr__
+
+        Only called for missing attributes, i.e., the coordinate and
+        payload lists of an unmaterialized window (see
+        `Fiber._window()`).
+
+        """
+
+        if name in ("coords", "payloads") and "_window_of" in self.__dict__:
+            self._materializeWindow()
+            return self.__dict__[name]
+
+        raise AttributeError(f"'Fiber' object has no attribute '{name}'")
+
+
+    def _materializeWindow(self):
+        """Create the coordinate and payload lists of a window"""
+
+        (fiber, start_pos, end_pos, offset) = self.__dict__.pop("_window_of")
+
+        coords = fiber.coords[start_pos:end_pos]
+        payloads = fiber.payloads[start_pos:end_pos]
+
+        if not isinstance(coords, list):
+            coords = list(coords)
+
+        if offset:
+            coords = [c - offset for c in coords]
+
+        #
+        # The payloads of a shared fiber (or the views of the values
+        # of a columnar one) cannot be moved into the window
+        #
+        if fiber._shared or fiber.isColumnar():
+            payloads = [Fiber._sharePayload(p) for p in payloads]
+
+        self.coords = coords
+        self.payloads = payloads
+
 #
 # Copy operation
 #
+    def __getstate__(self):
+        """__getstate__
+
+        An unmaterialized window (see `Fiber._window()`) is
+        materialized first, so pickling (or copying) it does not
+        pickle the whole fiber it is a window over. The cached
+        shapes are not pickled.
+
+        """
+
+        if "_window_of" in self.__dict__:
+            self._materializeWindow()
+
+        state = self.__dict__
+
+        #
+        # The cached shapes hold references to other fibers, which
+        # are not copied (see `Fiber._estimatedShape()`)
+        #
+        if "_shape_cache" in state or "_shape_parents" in state:
+            state = dict(state)
+            state.pop("_shape_cache", None)
+            state.pop("_shape_parents", None)
+
+        return state
+
+
     def __deepcopy__(self, memo):
         """__deepcopy__
 
@@ -4435,6 +5691,179 @@ class Fiber:
         """
         return pickle.loads(pickle.dumps(self))
 
+
+    @staticmethod
+    def setCopyOnWrite(enable):
+        """Set whether the rank transforms share fibers
+
+        By default, the rank transforms (e.g., `Fiber.splitUniform()`,
+        `Fiber.flattenRanks()` and `Tensor.swizzleRanks()`) make a
+        deep copy of the fibertree they transform. With copy-on-write
+        enabled, they only copy the levels of the fibertree that they
+        restructure, e.g., just the top rank when splitting at depth
+        0, and share the fibers below those levels with the original
+        fibertree.
+
+        Shared fibers are copied (one level at a time) when they are
+        reached for mutation from either fibertree via
+        `Fiber.getPayloadRef()`, the populate operator (<<) or
+        `Fiber.updateCoords()`/`Fiber.updatePayloads()`. So a fiber
+        obtained some other way, e.g., with `Fiber.getPayload()` or
+        by iteration, must not be mutated, since the mutation would be
+        seen by both fibertrees.
+
+        Parameters
+        ----------
+        enable: Boolean
+            Whether to enable copy-on-write
+
+        Returns
+        -------
+        None
+
+        """
+        Fiber._copy_on_write = enable
+
+    @staticmethod
+    def getCopyOnWrite():
+        """Get whether the rank transforms share fibers
+
+        Returns
+        -------
+        enable: Boolean
+            The value set with `Fiber.setCopyOnWrite()`
+
+        """
+        return Fiber._copy_on_write
+
+
+    def _transformCopy(self, depth=0):
+        """Copy the fibertree for a rank transform
+
+        Return a deep copy of the fibertree or, if copy-on-write is
+        enabled (see `Fiber.setCopyOnWrite()`), a copy of the top
+        `depth`+1 levels (see `Fiber._cowCopy()`).
+
+        """
+
+        if Fiber._copy_on_write:
+            return self._cowCopy(depth)
+
+        return copy.deepcopy(self)
+
+
+    def _cowCopy(self, depth=0):
+        """Copy the top levels of a fibertree
+
+        Create a copy of this fiber and (recursively) of the fibers in
+        the `depth` levels below it. The fibers below those levels
+        are not copied, instead they are shared with this fibertree
+        and marked **copy-on-write** (see `Fiber._cowPayload()`). So
+        the cost of the copy is proportional to the size of the
+        copied levels rather than the whole fibertree.
+
+        Parameters
+        ----------
+        depth: integer, default=0
+            The number of levels below this fiber to copy
+
+        Returns
+        -------
+        fiber: Fiber
+            The copy
+
+        Notes
+        -----
+
+        Lazy fibers are copied with `copy.deepcopy()`.
+
+        """
+
+        if self.isLazy():
+            return copy.deepcopy(self)
+
+        fiber = copy.copy(self)
+        fiber._shared = False
+        fiber._rank_attrs = copy.deepcopy(self._rank_attrs)
+        fiber._clearCoordIndex()
+
+        if self.isColumnar():
+            # Columnar fibers only hold leaf payloads
+            fiber._setColumnarStorage(self.coords, self.payloads.getValues())
+            fiber._dense = self._dense
+            return fiber
+
+        fiber.coords = list(self.coords)
+
+        if depth > 0:
+            fiber.payloads = [p._cowCopy(depth - 1) if isinstance(p, Fiber)
+                              else Fiber._sharePayload(p)
+                              for p in self.payloads]
+        else:
+            fiber.payloads = [Fiber._sharePayload(p) for p in self.payloads]
+
+        return fiber
+
+
+    @staticmethod
+    def _sharePayload(payload):
+        """Prepare a payload to be put into another fibertree
+
+        Fibers are marked as shared (**copy-on-write**), while other
+        (mutable) boxed payloads are copied.
+
+        """
+
+        if isinstance(payload, Fiber):
+            payload._shared = True
+            return payload
+
+        value = Payload.get(payload)
+
+        if isinstance(value, (bool, float, int, str, frozenset)):
+            return Payload.fromScalar(value)
+
+        return copy.deepcopy(payload)
+
+
+    def _cowPayload(self, pos):
+        """Get the payload at a position in preparation for mutating it
+
+        If the payload is a fiber that is shared with another
+        fibertree, replace it with a copy (see `Fiber._cowCopy()`),
+        which is owned by the next rank (if any) of this fiber's
+        owner, and return the copy.
+
+        Parameters
+        ----------
+        pos: integer
+            The position of the payload
+
+        Returns
+        -------
+        payload: a (boxed) scalar or Fiber
+            The (unshared) payload at `pos`
+
+        """
+
+        payload = self.payloads[pos]
+
+        if not isinstance(payload, Fiber) or not payload._shared:
+            return payload
+
+        fiber = payload._cowCopy()
+
+        owner = self.getOwner()
+        next_rank = None if owner is None else owner.getNextRank()
+
+        if next_rank is not None:
+            next_rank.replaceFiber(payload, fiber)
+
+        self.payloads[pos] = fiber
+        self._noteShapeChange()
+
+        return fiber
+
 #
 #  Comparison operations
 #
@@ -4519,6 +5948,8 @@ class Fiber:
         if self.isLazy():
             return "(Fiber, fromIterator)"
 
+        fiber = self._occupied()
+
         def format_coord(coord):
             """Return "coord" properly formatted with "coord_fmt" """
 
@@ -4549,18 +5980,18 @@ class Fiber:
 
         str = ''
 
-        if self._owner is None:
+        if fiber._owner is None:
             str += "F/["
         else:
-            str += f"F({self._owner.getId()})/["
+            str += f"F({fiber._owner.getId()})/["
 
         coord_indent = 0
         next_indent = 0
-        items = len(self.coords)
+        items = len(fiber.coords)
 
-        if self.payloads and Payload.contains(self.payloads[0], Fiber):
+        if fiber.payloads and Payload.contains(fiber.payloads[0], Fiber):
 
-            for (c, p) in zip(self.coords[0:cutoff], self.payloads[0:cutoff]):
+            for (c, p) in zip(fiber.coords[0:cutoff], fiber.payloads[0:cutoff]):
                 if coord_indent == 0:
                     coord_indent = indent + len(str)
                     str += f"( {format_coord(c)} -> "
@@ -4593,8 +6024,8 @@ class Fiber:
                 str += cond_string('\n')
 
             str += cond_string(coord_indent * ' ')
-            str += f"({format_coord(self.coords[i])} -> "
-            str += f"{format_payload(self.payloads[i])}) "
+            str += f"({format_coord(fiber.coords[i])} -> "
+            str += f"{format_payload(fiber.payloads[i])}) "
             coord_indent = next_indent
 
         if items > cutoff:
@@ -4613,8 +6044,10 @@ class Fiber:
 
         # TBD: Owner is not properly reflected in representation
 
-        payloads = [Payload.get(r) for r in self.payloads]
-        str = f"Fiber({self.coords!r}, {payloads!r}"
+        fiber = self._occupied()
+
+        payloads = [Payload.get(r) for r in fiber.payloads]
+        str = f"Fiber({list(fiber.coords)!r}, {payloads!r}"
 
         if self._owner:
             str += f", owner={self._owner.getId()}"
@@ -4628,12 +6061,12 @@ class Fiber:
 #
 
     @staticmethod
-    def parse(yamlfile, default):
-        """Parse a yaml file containing a tensor"""
+    def parse(yamlfile, default, max_depth=None):
+        """Parse a yaml file containing a fiber"""
 
         with open(yamlfile, 'r') as stream:
             try:
-                y_file = yaml.safe_load(stream)
+                newfiber = loadYAML(stream, max_depth=max_depth)
             except yaml.YAMLError as exc:
                 print(exc)
                 exit(1)
@@ -4641,12 +6074,10 @@ class Fiber:
         #
         # Make sure key "fiber" exists
         #
-        if not isinstance(y_file, dict) or 'fiber' not in y_file:
+        if not isinstance(newfiber, Fiber):
             print("Yaml is not a fiber")
             exit(1)
 
-        newfiber = Fiber.dict2fiber(y_file)
-
         return (newfiber.getCoords(), newfiber.getPayloads())
 
 
@@ -4712,9 +6143,11 @@ class Fiber:
         """Return dictionary with fiber information"""
         assert not self.isLazy()
 
+        fiber = self._occupied()
+
         f = {'fiber':
-             {'coords': self.coords,
-              'payloads': [Payload.payload2dict(p) for p in self.payloads]}}
+             {'coords': list(fiber.coords),
+              'payloads': [Payload.payload2dict(p) for p in fiber.payloads]}}
 
         return f
 
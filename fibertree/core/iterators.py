@@ -7,11 +7,17 @@ A module storing the implementations of all of the iterators of the Fiber class
 """
 
 import bisect
+from itertools import islice
 
 from .any import ANY
 from .coord_payload import CoordPayload
+from .cursor import gallopLeft
+from .merge_kernels import chooseStrategy, mergePositions
+from .merge_kernels import intersectPositionsN
+from .merge_kernels import unionPositionsN
 from .metrics import Metrics
 from .payload import Payload
+from .payload_array import PayloadView
 
 def __iter__(self, tick=True, start_pos=None):
     """__iter__"""
@@ -22,7 +28,7 @@ def __iter__(self, tick=True, start_pos=None):
     else:
         fmt = "C"
 
-    if fmt == "C":
+    if fmt == "C" or fmt == "H":
         return self.iterOccupancy(tick, start_pos=start_pos)
     elif fmt == "U":
         return self.iterShape(tick)
@@ -39,7 +45,7 @@ def __reversed__(self):
                               reversed(self.payloads)):
         yield CoordPayload(coord, payload)
 
-def iterOccupancy(self, tick=True, start_pos=None):
+def iterOccupancy(self, tick=True, start_pos=None, reuse=False):
     """Iterate over non-default elements of the fiber
 
     Iterate over every non-default payload in the shape, returning a
@@ -53,8 +59,12 @@ def iterOccupancy(self, tick=True, start_pos=None):
     start_pos: Optional[int]
         Saved position to start iteration
 
+    reuse: bool
+        True if the same CoordPayload should be updated and returned
+        for every element (see `Fiber.iterRange()`)
+
     """
-    return self.iterRange(None, None, tick=tick, start_pos=start_pos)
+    return self.iterRange(None, None, tick=tick, start_pos=start_pos, reuse=reuse)
 
 def iterShape(self, tick=True):
     """Iterate over fiber shape
@@ -86,15 +96,19 @@ def iterShapeRef(self, tick=True):
     """
     return self.iterRangeShapeRef(0, self.getShape(all_ranks=False), tick=tick)
 
-def iterActive(self, tick=True, start_pos=None):
+def iterActive(self, tick=True, start_pos=None, reuse=False):
     """Iterate over the non-default elements within the fiber's active range
 
     Parameters
     ----------
     tick: bool
         True if this iterator should tick the metrics counter
+
+    reuse: bool
+        True if the same CoordPayload should be updated and returned
+        for every element (see `Fiber.iterRange()`)
     """
-    return self.iterRange(*self.getActive(), tick=tick, start_pos=start_pos)
+    return self.iterRange(*self.getActive(), tick=tick, start_pos=start_pos, reuse=reuse)
 
 def iterActiveShape(self, tick=True):
     """Iterate over the fiber's active range, including default elements
@@ -117,7 +131,7 @@ def iterActiveShapeRef(self, tick=True):
     """
     return self.iterRangeShapeRef(*self.getActive(), tick=tick)
 
-def iterRange(self, start, end, tick=True, start_pos=None):
+def iterRange(self, start, end, tick=True, start_pos=None, reuse=False):
     """
     Iterate over the non-default elements within the given range
 
@@ -135,6 +149,41 @@ def iterRange(self, start, end, tick=True, start_pos=None):
     start_pos: Optional[int]
         Saved position to start iteration
 
+    reuse: bool
+        True if the same CoordPayload should be updated and returned
+        for every element, which avoids an allocation per element
+        but means the caller must not keep a reference to it (e.g.,
+        with `list()`) past the next element
+
+    Notes
+    -----
+
+    The implementation of the iteration is chosen once, when this
+    method is called. Iteration over an eager fiber with no saved
+    position and no metrics collection, which is the common case,
+    uses a loop specialized to the fiber's storage that does none
+    of the per-element bookkeeping of the general case (and finds
+    the range by bisection, so the fiber must be ordered).
+
+    """
+    start_pos = Payload.get(start_pos)
+
+    if self.isLazy() or not self._ordered or start_pos is not None \
+       or (tick and Metrics.isCollecting()):
+        return _iterRangeGeneral(self, start, end, tick, start_pos, reuse)
+
+    if self.isColumnar():
+        return _iterRangeColumnar(self, start, end, reuse)
+
+    return _iterRangeEager(self, start, end, reuse)
+
+
+def _iterRangeGeneral(self, start, end, tick, start_pos, reuse):
+    """Iterate over the non-default elements within the given range
+
+    The general implementation of `Fiber.iterRange()`, which handles
+    lazy fibers, saved positions and metrics collection.
+
     """
     # Cannot save a position of a lazy fiber
     assert not self.isLazy() or start_pos is None
@@ -145,7 +194,6 @@ def iterRange(self, start, end, tick=True, start_pos=None):
         i = 0
     else:
         # Set i: the starting position
-        start_pos = Payload.get(start_pos)
         if start_pos is not None:
             assert start_pos < len(self.coords)
             i = start_pos
@@ -160,6 +208,11 @@ def iterRange(self, start, end, tick=True, start_pos=None):
     if is_collecting and tick:
         Metrics.registerRank(rank)
 
+    default = self.getDefault()
+
+    if reuse:
+        element = CoordPayload(None, None)
+
     for j, (coord, payload) in enumerate(iter_):
         # If we are outside the range, stop
         if end is not None and coord >= end:
@@ -167,14 +220,19 @@ def iterRange(self, start, end, tick=True, start_pos=None):
 
         # If we are within the range, emit the non-default elements
         elif start is None or coord >= start:
-            if not Payload.isEmpty(payload, default=self.getDefault()):
+            if not Payload.isEmpty(payload, default=default):
                 if start_pos is not None:
                     self.setSavedPos(i + j, distance=j)
 
                 if is_collecting and tick:
                     Metrics.addUse(rank, coord, i + j)
 
-                yield CoordPayload(coord, payload)
+                if reuse:
+                    element.coord = coord
+                    element.payload = payload
+                    yield element
+                else:
+                    yield CoordPayload(coord, payload)
 
                 if is_collecting and tick:
                     Metrics.incIter(rank)
@@ -185,6 +243,87 @@ def iterRange(self, start, end, tick=True, start_pos=None):
     if is_collecting and tick:
         Metrics.endIter(rank)
 
+
+def _iterRangeEager(self, start, end, reuse):
+    """Iterate over the non-default elements within the given range
+
+    The implementation of `Fiber.iterRange()` for an eager fiber
+    with no saved position and no metrics collection.
+
+    """
+    coords = self.coords
+    lo, hi = _rangePositions(coords, start, end)
+
+    default = Payload.get(self.getDefault())
+
+    if reuse:
+        element = CoordPayload(None, None)
+
+    # Inline CoordPayload.fromPayload() to save a call per element
+    new = object.__new__
+
+    for coord, payload in islice(zip(coords, self.payloads), lo, hi):
+        if type(payload) is Payload:
+            if payload.value == default:
+                continue
+        elif Payload.isEmpty(payload, default=default):
+            continue
+
+        if not reuse:
+            element = new(CoordPayload)
+
+        element.coord = coord
+        element.payload = payload
+        yield element
+
+
+def _iterRangeColumnar(self, start, end, reuse):
+    """Iterate over the non-default elements within the given range
+
+    The implementation of `Fiber.iterRange()` for an eager columnar
+    fiber with no saved position and no metrics collection, which
+    checks the raw values and only creates a `PayloadView` for the
+    non-default elements.
+
+    """
+    coords = self.coords
+    lo, hi = _rangePositions(coords, start, end)
+
+    payloads = self.payloads
+    values = payloads.getValues()
+
+    default = Payload.get(self.getDefault())
+
+    if reuse:
+        element = CoordPayload(None, None)
+
+    new = object.__new__
+
+    for pos in range(lo, hi):
+        if values[pos] == default:
+            continue
+
+        if not reuse:
+            element = new(CoordPayload)
+
+        element.coord = coords[pos]
+        element.payload = PayloadView(payloads, pos)
+        yield element
+
+        # The consumer may have changed the storage (e.g., assigning
+        # a float to an integer array)
+        values = payloads.getValues()
+
+
+def _rangePositions(coords, start, end):
+    """Get the range of positions of the coordinates in [start, end)"""
+
+    lo = 0 if start is None else bisect.bisect_left(coords, start)
+    hi = len(coords) if end is None else bisect.bisect_left(coords, end, lo)
+
+    return lo, hi
+
+
 def iterRangeShape(self, start, end, step=1, tick=True):
     """Iterate over the given range, including default elements
 
@@ -209,8 +348,52 @@ def iterRangeShape(self, start, end, step=1, tick=True):
     if is_collecting and tick:
         self.registerRank(rank)
 
+    if step <= 0:
+        for c in range(start, end, step):
+            p = self.getPayload(c)
+            yield CoordPayload(c, p)
+
+            if is_collecting and tick:
+                Metrics.incIter(rank)
+
+        if is_collecting and tick:
+            Metrics.endIter(rank)
+
+        return
+
+    #
+    # Walk the fiber's elements along with the coordinates, rather than
+    # searching for each coordinate
+    #
+    create_default = self._defaultFactory(addtorank=False)
+
+    coords = self.coords
+    payloads = self.payloads
+    columnar = self.isColumnar()
+    length = len(coords)
+    pos = bisect.bisect_left(coords, start)
+
     for c in range(start, end, step):
-        p = self.getPayload(c)
+        if self.coords is not coords or len(coords) != length:
+            # The fiber was changed by the consumer
+            coords = self.coords
+            payloads = self.payloads
+            columnar = self.isColumnar()
+            length = len(coords)
+            pos = bisect.bisect_left(coords, c)
+
+        if c < length and coords[c] == c:
+            # Always the case in a fiber with dense storage
+            pos = c
+            p = PayloadView(payloads, c) if columnar else payloads[c]
+        else:
+            pos = gallopLeft(coords, c, pos)
+
+            if pos < length and coords[pos] == c:
+                p = payloads[pos]
+            else:
+                p = create_default()
+
         yield CoordPayload(c, p)
 
         if is_collecting and tick:
@@ -448,7 +631,7 @@ def coiterRangeShapeRef(fibers, start, end, step=1):
 #
 # Aggretated intersection/union methods
 #
-def intersection(*args):
+def intersection(*args, strategy=None):
     """Intersect a set of fibers.
 
     Create a new fiber containing all the coordinates that are
@@ -464,6 +647,10 @@ def intersection(*args):
     args: list of Fibers
         The set of fibers to intersect
 
+    strategy: str, default=None
+        The merge strategy to use (see `Fiber.setMergeStrategy()`),
+        None implies the default strategy
+
     Returns
     -------
 
@@ -476,18 +663,30 @@ def intersection(*args):
 
     Currently only supported for "ordered", "unique" fibers.
 
+    Unless the merge strategy is "lazy" (or metrics are being
+    collected), eager fibers are merged in a single pass over all
+    the fibers (see `merge_kernels.intersectPositionsN()`) rather
+    than by a nest of two-operand intersections.
+
     """
 
-    nested_result = args[0] & args[1]
+    nested_result = args[0].__and__(args[1], strategy=strategy)
 
     for arg in args[2:]:
-        nested_result = nested_result & arg
+        nested_result = nested_result.__and__(arg, strategy=strategy)
 
     # Lazy implementation
     class intersection_iterator:
+        fibers = args
         nested = nested_result
+        merge_strategy = strategy
 
         def __iter__(self):
+            strategy = chooseStrategy(self.fibers, self.merge_strategy)
+            if strategy != "lazy":
+                yield from _intersectKernelN(self.fibers, strategy)
+                return
+
             for c, np in self.nested.__iter__(tick=False):
                 p = []
                 while isinstance(Payload.get(np), tuple):
@@ -502,7 +701,7 @@ def intersection(*args):
     fiber.getRankAttrs().setId(args[0].getRankAttrs().getId())
     return fiber
 
-def union(*args):
+def union(*args, strategy=None):
     """Union a set of fibers.
 
     Create a new fiber containing the coordinates that exist in
@@ -520,6 +719,10 @@ def union(*args):
     args: list of Fibers
         The set of fibers to union
 
+    strategy: str, default=None
+        The merge strategy to use (see `Fiber.setMergeStrategy()`),
+        None implies the default strategy
+
     Returns
     -------
 
@@ -531,19 +734,31 @@ def union(*args):
 
     Currently only supported for "ordered", "unique" fibers.
 
+    Unless the merge strategy is "lazy" (or metrics are being
+    collected), eager fibers are merged in a single pass over all
+    the fibers (see `merge_kernels.unionPositionsN()`) rather than
+    by a nest of two-operand unions.
+
     """
 
-    nested_result = args[0] | args[1]
+    nested_result = args[0].__or__(args[1], strategy=strategy)
 
     for arg in args[2:]:
-        nested_result = nested_result | arg
+        nested_result = nested_result.__or__(arg, strategy=strategy)
 
     # Lazy implementation
     class union_iterator:
+        fibers = args
         nested = nested_result
         num_args = len(args)
+        merge_strategy = strategy
 
         def __iter__(self):
+            strategy = chooseStrategy(self.fibers, self.merge_strategy)
+            if strategy != "lazy":
+                yield from _unionKernelN(self.fibers, strategy)
+                return
+
             for c, np in self.nested:
                 p = [None] * (self.num_args + 1)
 
@@ -583,10 +798,174 @@ def _get_next(iter_):
 
     return CoordPayload(coord, payload)
 
+
+def _intersectKernel(a_fiber, b_fiber, strategy):
+    """Untraced intersection of two eager fibers using a merge kernel
+
+    See `fibertree.core.merge_kernels`
+
+    """
+
+    a_coords = a_fiber.coords
+    a_payloads = a_fiber.payloads
+    b_payloads = b_fiber.payloads
+
+    a_default = a_fiber.getDefault()
+    b_default = b_fiber.getDefault()
+
+    a_pos, b_pos = mergePositions("intersect", a_fiber, b_fiber, strategy)
+
+    for i, j in zip(a_pos, b_pos):
+        a_payload = a_payloads[i]
+        b_payload = b_payloads[j]
+
+        #
+        # Empty elements are skipped by the operand iterators of the
+        # lazy merge, so skip them here too
+        #
+        if Payload.isEmpty(a_payload, default=a_default) or \
+           Payload.isEmpty(b_payload, default=b_default):
+            continue
+
+        yield a_coords[i], (a_payload, b_payload)
+
+
+def _unionKernel(a_fiber, b_fiber, strategy):
+    """Untraced union of two eager fibers using a merge kernel
+
+    See `fibertree.core.merge_kernels`
+
+    """
+
+    a_coords = a_fiber.coords
+    a_payloads = a_fiber.payloads
+    b_coords = b_fiber.coords
+    b_payloads = b_fiber.payloads
+
+    a_default = a_fiber.getDefault()
+    b_default = b_fiber.getDefault()
+
+    a_pos, b_pos = mergePositions("union", a_fiber, b_fiber, strategy)
+
+    for i, j in zip(a_pos, b_pos):
+        a_payload = a_payloads[i] if i >= 0 else None
+        b_payload = b_payloads[j] if j >= 0 else None
+
+        a_empty = i < 0 or Payload.isEmpty(a_payload, default=a_default)
+        b_empty = j < 0 or Payload.isEmpty(b_payload, default=b_default)
+
+        if a_empty and b_empty:
+            continue
+
+        if not a_empty and not b_empty:
+            yield a_coords[i], ("AB", a_payload, b_payload)
+
+        elif not a_empty:
+            yield a_coords[i], ("A", a_payload, b_fiber._createDefault())
+
+        else:
+            yield b_coords[j], ("B", a_fiber._createDefault(), b_payload)
+
+
+
+def _differenceKernel(a_fiber, b_fiber, strategy):
+    """Untraced difference of two eager fibers using a merge kernel
+
+    The elements of `a_fiber` are found from the positions of the
+    union of the fibers
+
+    See `fibertree.core.merge_kernels`
+
+    """
+
+    a_coords = a_fiber.coords
+    a_payloads = a_fiber.payloads
+    b_payloads = b_fiber.payloads
+
+    a_default = a_fiber.getDefault()
+    b_default = b_fiber.getDefault()
+
+    a_pos, b_pos = mergePositions("union", a_fiber, b_fiber, strategy)
+
+    for i, j in zip(a_pos, b_pos):
+        if i < 0:
+            continue
+
+        a_payload = a_payloads[i]
+
+        if Payload.isEmpty(a_payload, default=a_default):
+            continue
+
+        if j >= 0 and not Payload.isEmpty(b_payloads[j], default=b_default):
+            continue
+
+        yield a_coords[i], a_payload
+
+
+def _intersectKernelN(fibers, strategy):
+    """Untraced single-pass intersection of a set of eager fibers
+
+    See `fibertree.core.merge_kernels`
+
+    """
+
+    coords = fibers[0].coords
+    payloads_list = [fiber.payloads for fiber in fibers]
+    defaults = [fiber.getDefault() for fiber in fibers]
+
+    positions = intersectPositionsN([fiber.coords for fiber in fibers], strategy)
+
+    for row in zip(*positions):
+        payloads = tuple(payloads[p] for payloads, p in zip(payloads_list, row))
+
+        if any(Payload.isEmpty(payload, default=default)
+               for payload, default in zip(payloads, defaults)):
+            continue
+
+        yield CoordPayload(coords[row[0]], payloads)
+
+
+def _unionKernelN(fibers, strategy):
+    """Untraced single-pass union of a set of eager fibers
+
+    See `fibertree.core.merge_kernels`
+
+    """
+
+    coords_list = [fiber.coords for fiber in fibers]
+    payloads_list = [fiber.payloads for fiber in fibers]
+    defaults = [fiber.getDefault() for fiber in fibers]
+    names = [chr(ord("A") + i) for i in range(len(fibers))]
+
+    positions = unionPositionsN(coords_list, strategy)
+
+    for row in zip(*positions):
+        mask = ""
+        payloads = [None]
+        coord = None
+
+        for i, p in enumerate(row):
+            if p >= 0:
+                payload = payloads_list[i][p]
+
+                if not Payload.isEmpty(payload, default=defaults[i]):
+                    mask += names[i]
+                    payloads.append(payload)
+                    coord = coords_list[i][p]
+                    continue
+
+            payloads.append(fibers[i]._createDefault())
+
+        if coord is None:
+            continue
+
+        payloads[0] = mask
+        yield CoordPayload(coord, tuple(payloads))
+
 #
 # Merge methods
 #
-def __and__(self, other):
+def __and__(self, other, strategy=None):
     """Two-operand intersection
 
     Return the intersection of `self` and `other` by considering
@@ -617,6 +996,10 @@ def __and__(self, other):
     other: Fiber
         A fiber to intersect with the current fiber
 
+    strategy: str, default=None
+        The merge strategy to use (see `Fiber.setMergeStrategy()`),
+        None implies the default strategy
+
 
     Returns
     --------
@@ -636,11 +1019,18 @@ def __and__(self, other):
     class and_iterator:
         a_fiber = self
         b_fiber = other
+        merge_strategy = strategy
 
         def __iter__(self):
             """
             Iterator simulating the intersection operator
             """
+            strategy = chooseStrategy([self.a_fiber, self.b_fiber],
+                                      self.merge_strategy)
+            if strategy != "lazy":
+                yield from _intersectKernel(self.a_fiber, self.b_fiber, strategy)
+                return
+
             is_collecting = Metrics.isCollecting()
             a_traced = False
             b_traced = False
@@ -765,7 +1155,7 @@ def __and__(self, other):
     fiber.getRankAttrs().setId(self.getRankAttrs().getId())
     return fiber
 
-def __or__(self, other):
+def __or__(self, other, strategy=None):
     """__or__
 
     Return the union of `self` and `other` by considering all possible
@@ -797,6 +1187,9 @@ def __or__(self, other):
     other: Fiber
         A fiber to union with the current fiber
 
+    strategy: str, default=None
+        The merge strategy to use (see `Fiber.setMergeStrategy()`),
+        None implies the default strategy
 
     Returns
     --------
@@ -816,8 +1209,15 @@ def __or__(self, other):
     class or_iterator:
         a_fiber = self
         b_fiber = other
+        merge_strategy = strategy
 
         def __iter__(self):
+            strategy = chooseStrategy([self.a_fiber, self.b_fiber],
+                                      self.merge_strategy)
+            if strategy != "lazy":
+                yield from _unionKernel(self.a_fiber, self.b_fiber, strategy)
+                return
+
             a = self.a_fiber.__iter__()
             b = self.b_fiber.__iter__()
 
@@ -1020,7 +1420,7 @@ def __lshift__(self, other, start_pos=None):
                 rank = self.a_fiber.getRankAttrs().getId()
                 a_label = str(Metrics.getLabel(rank))
                 b_label = str(Metrics.getLabel(rank))
-                compressed_output = self.a_fiber.getRankAttrs().getFormat() == "C"
+                compressed_output = self.a_fiber.getRankAttrs().getFormat() in ("C", "H")
 
                 a_read_trace = "populate_read_" + a_label
                 a_write_trace = "populate_write_" + a_label
@@ -1079,7 +1479,7 @@ def __lshift__(self, other, start_pos=None):
                 # Find the position this coordinate should be inserted into
                 get_payload_pos = None
                 if self.a_fiber.coords:
-                    a_pos += bisect.bisect_left(self.a_fiber.coords[a_pos:], b_coord)
+                    a_pos = gallopLeft(self.a_fiber.coords, b_coord, a_pos)
 
                     # If we have already found the location of the coordinate,
                     # we can go directly to that location
@@ -1097,6 +1497,11 @@ def __lshift__(self, other, start_pos=None):
 
                 new_a_payload = a_payload is None
 
+                # Copy a fiber shared with another fibertree before it
+                # is populated (see Fiber.setCopyOnWrite())
+                if isinstance(a_payload, type(self.a_fiber)) and a_payload._shared:
+                    a_payload = self.a_fiber._cowPayload(a_pos)
+
                 if new_a_payload:
                     # Do not actually insert the payload into the tensor
                     a_payload = self.a_fiber._create_payload(b_coord, pos=a_pos)
@@ -1122,6 +1527,7 @@ def __lshift__(self, other, start_pos=None):
                     index = bisect.bisect_left(self.a_fiber.coords, b_coord)
                     del self.a_fiber.coords[index]
                     del self.a_fiber.payloads[index]
+                    self.a_fiber._noteShapeChange()
 
                     # Remove the payload from its owning rank (if relevant)
                     if self.a_fiber.getOwner() is not None and \
@@ -1240,6 +1646,10 @@ def __sub__(self, other):
 
     Currently only supported for "ordered", "unique" fibers.
 
+    Unless the merge strategy is "lazy" (or metrics are being
+    collected), eager fibers are merged with the union kernel (see
+    `merge_kernels.unionPositions()`).
+
     """
 
 
@@ -1250,6 +1660,11 @@ def __sub__(self, other):
         b_fiber = other
 
         def __iter__(self):
+            strategy = chooseStrategy([self.a_fiber, self.b_fiber])
+            if strategy != "lazy":
+                yield from _differenceKernel(self.a_fiber, self.b_fiber, strategy)
+                return
+
             a = self.a_fiber.__iter__()
             b = self.b_fiber.__iter__()
 
@@ -0,0 +1,853 @@
+#cython: language_level=3
+"""Merge Kernels
+
+A module holding the kernels used by the fast (untraced) paths of the
+fiber merge operators, i.e., intersection (&) and union (|).
+
+Each kernel takes the coordinate lists of two **eager**, "ordered",
+"unique" fibers and returns the positions of the matching elements,
+so the operators can produce their output by indexing into the
+fibers rather than by stepping two iterators one element at a time.
+
+The following strategies are supported:
+
+- "lazy": do not use a kernel, i.e., use the original element-by-element
+  merge, which is the only one that collects metrics
+- "merge": a linear two-finger merge - O(n+m)
+- "gallop": a binary search (with a moving lower bound) of each
+  coordinate of the shorter fiber in the longer fiber - O(n log m)
+- "hash": a hash table of the longer fiber probed with the
+  coordinates of the shorter fiber - O(n+m)
+- "vector": a NumPy version of "gallop" (intersection) or a
+  sorted merge (union), only for integer coordinates (otherwise
+  "gallop" or "merge" is used)
+- "auto": pick one of the above based on the fibers
+
+Union only distinguishes "vector" from the other strategies, which
+all use "merge".
+
+Optionally (see `setPositionCache()`), the positions found for a pair
+of fibers are memoized in a `PositionCache`, so merging the same
+(unchanged) fibers again, e.g., intersecting a stationary operand
+with the same fiber on every iteration of a loop, does not search
+their coordinates again.
+
+The n-way versions (`intersectPositionsN()` and `unionPositionsN()`),
+used by `Fiber.intersection()` and `Fiber.union()`, merge all the
+fibers in a single pass: intersection "leapfrogs" every fiber to the
+largest current coordinate (stepping linearly for "merge" and with a
+binary search for "gallop"), while union pops the smallest current
+coordinates off a heap.
+
+"""
+
+import bisect
+import heapq
+import weakref
+
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from .any import Any
+
+STRATEGIES = ("auto", "lazy", "merge", "gallop", "hash", "vector")
+"""The names of the supported merge strategies"""
+
+GALLOP_RATIO = 16
+"""Length ratio at which "auto" switches to "gallop" """
+
+VECTOR_MIN_LEN = 256
+"""Total length at which "auto" switches to "vector" """
+
+_default_strategy = "auto"
+
+_position_cache = None
+
+
+def setDefaultStrategy(strategy):
+    """Set the strategy used by the merge operators
+
+    Parameters
+    ----------
+    strategy: str
+        One of `STRATEGIES`
+
+    Returns
+    -------
+    None
+
+    """
+
+    global _default_strategy
+
+    assert strategy in STRATEGIES, f"Unknown merge strategy: {strategy}"
+
+    _default_strategy = strategy
+
+
+def getDefaultStrategy():
+    """Get the strategy used by the merge operators
+
+    Returns
+    -------
+    strategy: str
+        One of `STRATEGIES`
+
+    """
+
+    return _default_strategy
+
+
+def chooseStrategy(fibers, strategy=None):
+    """Choose the strategy for merging a set of fibers
+
+    Parameters
+    ----------
+    fibers: list of Fibers
+        The fibers to be merged
+
+    strategy: str, default=None
+        The requested strategy (None implies the default strategy)
+
+    Returns
+    -------
+    strategy: str
+        The strategy to use, "lazy" if the fibers cannot use a kernel
+
+    Notes
+    -----
+
+    The kernels are never used while metrics are being collected,
+    since they do not generate traces.
+
+    """
+
+    from .metrics import Metrics
+
+    if strategy is None:
+        strategy = _default_strategy
+
+    assert strategy in STRATEGIES, f"Unknown merge strategy: {strategy}"
+
+    if strategy == "lazy" or Metrics.isCollecting():
+        return "lazy"
+
+    if not all(_isEligible(f) for f in fibers):
+        return "lazy"
+
+    #
+    # The coordinates must be comparable, i.e., all integers or all
+    # tuples of the same length
+    #
+    kinds = set(_coordKind(f) for f in fibers if len(f.coords) > 0)
+
+    if len(kinds) > 1 or None in kinds:
+        return "lazy"
+
+    if strategy != "auto":
+        return strategy
+
+    lengths = [len(f.coords) for f in fibers]
+
+    if min(lengths) > 0 and max(lengths) >= GALLOP_RATIO * min(lengths):
+        return "gallop"
+
+    if sum(lengths) >= VECTOR_MIN_LEN and kinds == {int}:
+        return "vector"
+
+    return "merge"
+
+
+def setPositionCache(max_bytes):
+    """Set the memory bound of the cache of merge positions
+
+    Parameters
+    ----------
+    max_bytes: int or None
+        The maximum number of bytes of positions to keep (see
+        `PositionCache`), None or 0 disables the cache
+
+    Returns
+    -------
+    None
+
+    """
+
+    global _position_cache
+
+    if not max_bytes:
+        _position_cache = None
+        return
+
+    assert max_bytes > 0, "The cache size must be positive"
+
+    _position_cache = PositionCache(max_bytes)
+
+
+def getPositionCache():
+    """Get the cache of merge positions
+
+    Returns
+    -------
+    cache: PositionCache or None
+        The cache set with `setPositionCache()`, if any
+
+    """
+
+    return _position_cache
+
+
+def mergePositions(op, a_fiber, b_fiber, strategy="merge"):
+    """Find the positions of the elements of a merge of two fibers
+
+    Parameters
+    ----------
+    op: str
+        "intersect" (see `intersectPositions()`) or "union" (see
+        `unionPositions()`)
+
+    a_fiber, b_fiber: Fibers
+        The (eager, ordered, unique) fibers to merge
+
+    strategy: str, default="merge"
+        A strategy other than "auto" or "lazy"
+
+    Returns
+    -------
+    a_pos, b_pos: sequences of integers
+        The positions returned by the kernel for `op`, from the
+        position cache if it is enabled (see `setPositionCache()`)
+
+    """
+
+    if _position_cache is not None:
+        return _position_cache.positions(op, a_fiber, b_fiber, strategy)
+
+    return _POSITIONS[op](a_fiber.coords, b_fiber.coords, strategy)
+
+
+class PositionCache:
+    """A least-recently-used cache of the positions of merges
+
+    The positions found by `intersectPositions()` or
+    `unionPositions()` for a pair of fibers are kept (as arrays of
+    integers) until the total size of the cached positions exceeds
+    `max_bytes`, when the least recently used ones are evicted.
+
+    An entry is keyed on the identity of the two fibers and is only
+    used while both of them still exist and their coordinates are
+    unchanged, i.e., the fiber holds the same coordinate list with the
+    same length and version (see `Fiber._noteInsert()` and
+    `Fiber._clearCoordIndex()`). The payloads may change, since the
+    kernels only look at the coordinates. An entry is dropped as soon
+    as either of its fibers is deleted.
+
+    Since an entry keeps the coordinate lists of its fibers alive
+    until it is dropped, their size (at 8 bytes per coordinate) is
+    counted in the size of the entry, along with its positions.
+
+    Parameters
+    ----------
+    max_bytes: int
+        The maximum number of bytes of positions (and coordinates) to keep
+
+    """
+
+    def __init__(self, max_bytes):
+
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+
+
+    def positions(self, op, a_fiber, b_fiber, strategy="merge"):
+        """Find the positions of a merge, see `mergePositions()`"""
+
+        key = (op, id(a_fiber), id(b_fiber))
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            (a_state, b_state, a_pos, b_pos, _) = entry
+
+            if _isCurrent(a_fiber, a_state) and _isCurrent(b_fiber, b_state):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return a_pos, b_pos
+
+            self._evict(key)
+
+        self.misses += 1
+
+        a_pos, b_pos = _POSITIONS[op](a_fiber.coords, b_fiber.coords, strategy)
+        a_pos = array("q", a_pos)
+        b_pos = array("q", b_pos)
+
+        nbytes = _nbytes(a_pos) + _nbytes(b_pos) \
+            + 8 * (len(a_fiber.coords) + len(b_fiber.coords))
+
+        if nbytes <= self.max_bytes:
+            drop = lambda ref, key=key: self._drop(key, ref)
+
+            self._entries[key] = (_state(a_fiber, drop), _state(b_fiber, drop),
+                                  a_pos, b_pos, nbytes)
+            self.nbytes += nbytes
+
+            while self.nbytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+        return a_pos, b_pos
+
+
+    def clear(self):
+        """Discard all the cached positions"""
+
+        self._entries.clear()
+        self.nbytes = 0
+
+
+    def __len__(self):
+        """Return the number of cached merges"""
+
+        return len(self._entries)
+
+
+    def _evict(self, key):
+        """Discard the positions of one merge"""
+
+        (_, _, _, _, nbytes) = self._entries.pop(key)
+        self.nbytes -= nbytes
+
+
+    def _drop(self, key, ref):
+        """Discard the positions of a merge of a fiber that was deleted"""
+
+        entry = self._entries.get(key)
+
+        if entry is not None and (entry[0][0] is ref or entry[1][0] is ref):
+            self._evict(key)
+
+
+def intersectPositions(a_coords, b_coords, strategy="merge"):
+    """Find the positions of the coordinates common to two fibers
+
+    Parameters
+    ----------
+    a_coords, b_coords: sequences of coordinates
+        The (ordered, unique) coordinates of the two fibers
+
+    strategy: str, default="merge"
+        A strategy other than "auto" or "lazy"
+
+    Returns
+    -------
+    a_pos, b_pos: lists of integers
+        The positions in `a_coords` and `b_coords` of each common
+        coordinate, in coordinate order
+
+    """
+
+    if len(a_coords) == 0 or len(b_coords) == 0:
+        return [], []
+
+    if strategy == "merge":
+        return _intersectMerge(a_coords, b_coords)
+
+    #
+    # The remaining strategies search the longer fiber
+    #
+    swap = len(a_coords) > len(b_coords)
+    if swap:
+        a_coords, b_coords = b_coords, a_coords
+
+    if strategy == "gallop":
+        short_pos, long_pos = _intersectGallop(a_coords, b_coords)
+    elif strategy == "hash":
+        short_pos, long_pos = _intersectHash(a_coords, b_coords)
+    elif strategy == "vector":
+        short_pos, long_pos = _intersectVector(a_coords, b_coords)
+    else:
+        raise ValueError(f"Unsupported intersection strategy: {strategy}")
+
+    if swap:
+        return long_pos, short_pos
+
+    return short_pos, long_pos
+
+
+def unionPositions(a_coords, b_coords, strategy="merge"):
+    """Find the positions of the coordinates in either of two fibers
+
+    Parameters
+    ----------
+    a_coords, b_coords: sequences of coordinates
+        The (ordered, unique) coordinates of the two fibers
+
+    strategy: str, default="merge"
+        A strategy other than "auto" or "lazy"; only "vector" is
+        treated differently from "merge"
+
+    Returns
+    -------
+    a_pos, b_pos: lists of integers
+        For each coordinate in the union (in coordinate order) the
+        position in `a_coords` and `b_coords`, or -1 if the
+        coordinate is not in that fiber
+
+    """
+
+    if strategy == "vector":
+        return _unionVector(a_coords, b_coords)
+
+    return _unionMerge(a_coords, b_coords)
+
+
+def intersectPositionsN(coords_list, strategy="merge"):
+    """Find the positions of the coordinates common to a set of fibers
+
+    Parameters
+    ----------
+    coords_list: list of sequences of coordinates
+        The (ordered, unique) coordinates of each fiber
+
+    strategy: str, default="merge"
+        A strategy other than "auto" or "lazy"
+
+    Returns
+    -------
+    positions: list of lists of integers
+        For each fiber, the positions in its coordinates of each
+        common coordinate, in coordinate order
+
+    """
+
+    if any(len(coords) == 0 for coords in coords_list):
+        return [[] for _ in coords_list]
+
+    if strategy == "vector":
+        arrays = [_toArray(coords) for coords in coords_list]
+
+        if all(array_ is not None for array_ in arrays):
+            return _intersectVectorN(arrays)
+
+    if strategy == "hash":
+        return _intersectHashN(coords_list)
+
+    return _intersectLeapfrog(coords_list, gallop=(strategy != "merge"))
+
+
+def unionPositionsN(coords_list, strategy="merge"):
+    """Find the positions of the coordinates in any of a set of fibers
+
+    Parameters
+    ----------
+    coords_list: list of sequences of coordinates
+        The (ordered, unique) coordinates of each fiber
+
+    strategy: str, default="merge"
+        A strategy other than "auto" or "lazy"; only "vector" is
+        treated differently from "merge"
+
+    Returns
+    -------
+    positions: list of lists of integers
+        For each fiber and each coordinate in the union (in
+        coordinate order) the position in the fiber's coordinates,
+        or -1 if the coordinate is not in that fiber
+
+    """
+
+    if strategy == "vector":
+        arrays = [_toArray(coords) for coords in coords_list]
+
+        if all(array_ is not None for array_ in arrays):
+            return _unionVectorN(arrays)
+
+    return _unionHeap(coords_list)
+
+_POSITIONS = {"intersect": intersectPositions,
+              "union": unionPositions}
+"""The kernels used by `mergePositions()` for each operation"""
+
+#
+# Utility functions
+#
+def _state(fiber, callback=None):
+    """Get the state of the coordinates of a fiber (see `PositionCache`)"""
+
+    coords = fiber.coords
+
+    return (weakref.ref(fiber, callback), coords, len(coords), fiber._version)
+
+
+def _isCurrent(fiber, state):
+    """Check if a fiber is the one with a state and is unchanged since"""
+
+    (ref, coords, length, version) = state
+
+    return ref() is fiber \
+        and fiber.coords is coords \
+        and len(coords) == length \
+        and fiber._version == version
+
+
+def _nbytes(positions):
+    """Get the size of an array of positions"""
+
+    return positions.itemsize * len(positions)
+
+
+def _isEligible(fiber):
+    """Check if a fiber can be merged with a kernel"""
+
+    if fiber.isLazy() or not fiber.isOrdered() or not fiber.isUnique():
+        return False
+
+    if fiber.getOwner() is not None:
+        fmt = fiber.getOwner().getFormat()
+    else:
+        fmt = fiber.getRankAttrs().getFormat()
+
+    return fmt == "C" or fmt == "H"
+
+
+def _coordKind(fiber):
+    """Classify the coordinates of a (non-empty) fiber
+
+    Returns int, the length of a tuple coordinate or None if the
+    coordinates cannot be handled by a kernel
+
+    """
+
+    coord = fiber.coords[0]
+
+    if type(coord) is int:
+        return int
+
+    if type(coord) is tuple and not any(isinstance(c, Any) for c in coord):
+        return len(coord)
+
+    return None
+
+
+def _toArray(coords):
+    """Convert a sequence of coordinates into a NumPy integer array"""
+
+    if len(coords) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if getattr(coords, "typecode", None) == "q":
+        # An array.array of integers can be used without a copy
+        return np.frombuffer(coords, dtype=np.int64)
+
+    coords = np.asarray(coords)
+
+    if coords.ndim != 1 or coords.dtype.kind not in "iu":
+        return None
+
+    return coords
+
+
+def _intersectMerge(a_coords, b_coords):
+    """Two-finger merge intersection"""
+
+    a_pos = []
+    b_pos = []
+
+    i = 0
+    j = 0
+    len_a = len(a_coords)
+    len_b = len(b_coords)
+
+    a_coord = a_coords[0]
+    b_coord = b_coords[0]
+
+    while True:
+        if a_coord == b_coord:
+            a_pos.append(i)
+            b_pos.append(j)
+            i += 1
+            j += 1
+            if i == len_a or j == len_b:
+                break
+            a_coord = a_coords[i]
+            b_coord = b_coords[j]
+
+        elif a_coord < b_coord:
+            i += 1
+            if i == len_a:
+                break
+            a_coord = a_coords[i]
+
+        else:
+            j += 1
+            if j == len_b:
+                break
+            b_coord = b_coords[j]
+
+    return a_pos, b_pos
+
+
+def _intersectGallop(short_coords, long_coords):
+    """Search each coordinate of `short_coords` in `long_coords`"""
+
+    short_pos = []
+    long_pos = []
+
+    lo = 0
+    len_long = len(long_coords)
+
+    for i, coord in enumerate(short_coords):
+        lo = bisect.bisect_left(long_coords, coord, lo)
+
+        if lo == len_long:
+            break
+
+        if long_coords[lo] == coord:
+            short_pos.append(i)
+            long_pos.append(lo)
+            lo += 1
+
+    return short_pos, long_pos
+
+
+def _intersectHash(short_coords, long_coords):
+    """Probe a hash table of `long_coords` with `short_coords`"""
+
+    index = {coord: pos for pos, coord in enumerate(long_coords)}
+
+    short_pos = []
+    long_pos = []
+
+    for i, coord in enumerate(short_coords):
+        pos = index.get(coord)
+
+        if pos is not None:
+            short_pos.append(i)
+            long_pos.append(pos)
+
+    return short_pos, long_pos
+
+
+def _intersectVector(short_coords, long_coords):
+    """NumPy search of each coordinate of `short_coords` in `long_coords`"""
+
+    short_array = _toArray(short_coords)
+    long_array = _toArray(long_coords)
+
+    if short_array is None or long_array is None:
+        return _intersectGallop(short_coords, long_coords)
+
+    pos = np.searchsorted(long_array, short_array)
+    found = long_array[np.minimum(pos, len(long_array) - 1)] == short_array
+
+    return np.flatnonzero(found).tolist(), pos[found].tolist()
+
+
+def _unionMerge(a_coords, b_coords):
+    """Two-finger merge union"""
+
+    a_pos = []
+    b_pos = []
+
+    i = 0
+    j = 0
+    len_a = len(a_coords)
+    len_b = len(b_coords)
+
+    while i < len_a and j < len_b:
+        a_coord = a_coords[i]
+        b_coord = b_coords[j]
+
+        if a_coord == b_coord:
+            a_pos.append(i)
+            b_pos.append(j)
+            i += 1
+            j += 1
+
+        elif a_coord < b_coord:
+            a_pos.append(i)
+            b_pos.append(-1)
+            i += 1
+
+        else:
+            a_pos.append(-1)
+            b_pos.append(j)
+            j += 1
+
+    a_pos.extend(range(i, len_a))
+    b_pos.extend([-1] * (len_a - i))
+
+    a_pos.extend([-1] * (len_b - j))
+    b_pos.extend(range(j, len_b))
+
+    return a_pos, b_pos
+
+
+def _unionVector(a_coords, b_coords):
+    """NumPy sorted merge union"""
+
+    a_array = _toArray(a_coords)
+    b_array = _toArray(b_coords)
+
+    if a_array is None or b_array is None:
+        return _unionMerge(a_coords, b_coords)
+
+    union = np.union1d(a_array, b_array)
+
+    return _unionLookup(a_array, union), _unionLookup(b_array, union)
+
+
+def _unionLookup(array_, union):
+    """Positions of each element of `union` in `array_` or -1"""
+
+    if len(array_) == 0:
+        return [-1] * len(union)
+
+    pos = np.searchsorted(array_, union)
+    found = array_[np.minimum(pos, len(array_) - 1)] == union
+
+    return np.where(found, pos, -1).tolist()
+
+
+def _intersectLeapfrog(coords_list, gallop=True):
+    """N-way intersection advancing each fiber to the largest coordinate"""
+
+    num = len(coords_list)
+    lens = [len(coords) for coords in coords_list]
+
+    positions = [[] for _ in range(num)]
+    pos = [0] * num
+
+    target = max(coords[0] for coords in coords_list)
+
+    while True:
+        #
+        # Advance every fiber to the first coordinate >= target,
+        # until all of them agree on the target
+        #
+        changed = False
+
+        for i, coords in enumerate(coords_list):
+            p = pos[i]
+
+            if gallop:
+                p = bisect.bisect_left(coords, target, p)
+            else:
+                while p < lens[i] and coords[p] < target:
+                    p += 1
+
+            if p == lens[i]:
+                return positions
+
+            pos[i] = p
+
+            coord = coords[p]
+            if coord != target:
+                target = coord
+                changed = True
+
+        if changed:
+            continue
+
+        for i in range(num):
+            positions[i].append(pos[i])
+            pos[i] += 1
+
+        if any(pos[i] == lens[i] for i in range(num)):
+            return positions
+
+        target = max(coords[pos[i]] for i, coords in enumerate(coords_list))
+
+
+def _intersectHashN(coords_list):
+    """N-way intersection probing hash tables with the shortest fiber"""
+
+    shortest = min(range(len(coords_list)), key=lambda i: len(coords_list[i]))
+
+    indices = [None if i == shortest else
+               {coord: pos for pos, coord in enumerate(coords)}
+               for i, coords in enumerate(coords_list)]
+
+    positions = [[] for _ in coords_list]
+
+    for s_pos, coord in enumerate(coords_list[shortest]):
+        row = []
+
+        for i, index in enumerate(indices):
+            pos = s_pos if index is None else index.get(coord)
+
+            if pos is None:
+                break
+
+            row.append(pos)
+        else:
+            for i, pos in enumerate(row):
+                positions[i].append(pos)
+
+    return positions
+
+
+def _intersectVectorN(arrays):
+    """N-way NumPy intersection searching for the shortest fiber"""
+
+    shortest = min(range(len(arrays)), key=lambda i: len(arrays[i]))
+
+    candidates = arrays[shortest]
+    found = np.ones(len(candidates), dtype=bool)
+    all_pos = []
+
+    for i, array_ in enumerate(arrays):
+        if i == shortest:
+            all_pos.append(np.arange(len(candidates)))
+            continue
+
+        pos = np.searchsorted(array_, candidates)
+        found &= array_[np.minimum(pos, len(array_) - 1)] == candidates
+        all_pos.append(pos)
+
+    return [pos[found].tolist() for pos in all_pos]
+
+
+def _unionHeap(coords_list):
+    """N-way union popping the smallest coordinates off a heap"""
+
+    num = len(coords_list)
+    lens = [len(coords) for coords in coords_list]
+
+    positions = [[] for _ in range(num)]
+    pos = [0] * num
+
+    heap = [(coords[0], i) for i, coords in enumerate(coords_list) if lens[i] > 0]
+    heapq.heapify(heap)
+
+    while heap:
+        coord = heap[0][0]
+        row = [-1] * num
+
+        while heap and heap[0][0] == coord:
+            _, i = heapq.heappop(heap)
+
+            row[i] = pos[i]
+            pos[i] += 1
+
+            if pos[i] < lens[i]:
+                heapq.heappush(heap, (coords_list[i][pos[i]], i))
+
+        for i in range(num):
+            positions[i].append(row[i])
+
+    return positions
+
+
+def _unionVectorN(arrays):
+    """N-way NumPy sorted merge union"""
+
+    union = np.unique(np.concatenate(arrays))
+
+    return [_unionLookup(array_, union) for array_ in arrays]
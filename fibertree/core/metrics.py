@@ -1,5 +1,7 @@
 #cython: language_level=3
 # cython: profile=True
+from .trace_file import TraceMemory, TraceWriter
+
 class Metrics:
     """A globally available class for tracking metrics.
 
@@ -19,6 +21,12 @@ class Metrics:
     - A **metrics** list, which contains dictionaries associated with the metrics
       collected by the program.
 
+    - A **trace_format** string, which specifies the format of the trace
+      files (see `Metrics.setTraceFormat()`).
+
+    - A **collected_traces** dictionary, which contains the traces
+      collected by the program (see `Metrics.dumpTraces()`).
+
 
     Constructor
     ----------
@@ -27,6 +35,7 @@ class Metrics:
 
     """
     # Create a class instance variable for the metrics collection
+    collected_traces = {}
     collecting = False
     fiber_label = {}
     iteration = None
@@ -37,8 +46,12 @@ class Metrics:
     point = None
     prefix = None
     rank_matches = {}
+    trace_format = "csv"
+    trace_memory = 1 << 30
     traces = {}
 
+    _trace_memory = None
+
     def __init__(self):
         raise NotImplementedError
 
@@ -81,27 +94,25 @@ class Metrics:
             i = cls.line_order[cls.rank_matches[rank]]
 
         # Make sure we are tracking this rank and type_
-        if rank not in cls.traces.keys():
-            return
-
-        if type_ not in cls.traces[rank].keys():
+        writer = cls.traces.get(rank, {}).get(type_)
+        if writer is None:
             return
 
         if iteration_num is None:
             iteration_num = cls.iteration
 
+        # Append the row (iteration, point, pos) to the buffered rows
+        rows = writer.rows
 
-        iteration = iteration_num[:(i + 1)]
-        point = cls.point[:i] + [coord]
-
-        data = iteration + point + [pos]
-        data_str = ",".join(map(str, data))
-        cls.traces[rank][type_][0].append(data_str + "\n")
+        rows.extend(iteration_num[:(i + 1)])
+        rows.extend(cls.point[:i])
+        rows.append(coord)
+        rows.append(pos)
 
         # If we are at the limit of the number of cached uses, write the data
         # to disk
-        if len(cls.traces[rank][type_][0]) == cls.num_cached_uses:
-            cls._writeTrace(rank, type_)
+        if len(rows) >= writer.chunk_len:
+            writer.flush()
 
     @classmethod
     def beginCollect(cls, prefix=None):
@@ -121,6 +132,7 @@ class Metrics:
         None
 
         """
+        cls.collected_traces = {}
         cls.collecting = True
         cls.fiber_label = {}
         cls.iteration = []
@@ -153,6 +165,32 @@ class Metrics:
         """
         return cls.metrics
 
+    @classmethod
+    def dumpTraces(cls):
+        """Get the most-recently collected set of traces
+
+        Return the dictionary containing all traces collected since the
+        most recent `Metrics.beginCollect()`, once `Metrics.endCollect()`
+        has been called
+
+        Parameters
+        ----------
+
+        None
+
+        Returns
+        -------
+
+        traces: a dictionary
+            The dictionary {(rank, type_): trace} of traces, where each
+            trace is either a `fibertree.core.trace_file.Trace` held in
+            memory or the name of a trace file (see
+            `Metrics.setTraceFormat()`), which can be given to the
+            models of `fibertree.model`
+
+        """
+        return cls.collected_traces
+
     @classmethod
     def endCollect(cls):
         """End metrics collection
@@ -173,7 +211,8 @@ class Metrics:
         # Save the trace of uses
         for rank, dicts in cls.traces.items():
             for type_ in dicts:
-                cls._writeTrace(rank, type_)
+                if dicts[type_] is not None:
+                    cls._endTrace(rank, type_)
 
         # Clear all info
         cls.collecting = False
@@ -184,8 +223,12 @@ class Metrics:
         cls.num_cached_uses = 1000
         cls.point = None
         cls.prefix = None
+        cls.trace_format = "csv"
+        cls.trace_memory = 1 << 30
         cls.traces = {}
 
+        cls._trace_memory = None
+
     @classmethod
     def endIter(cls, rank):
         """
@@ -426,7 +469,7 @@ class Metrics:
         # Start any traces that can now be started
         if new_rank in cls.traces:
             for type_ in cls.traces[new_rank]:
-                if not cls.traces[new_rank][type_][1]:
+                if cls.traces[new_rank][type_] is None:
                     cls._startTrace(new_rank, type_)
 
     @classmethod
@@ -482,6 +525,64 @@ class Metrics:
 
         cls.num_cached_uses = num_cached_uses
 
+    @classmethod
+    def setTraceFormat(cls, format_):
+        """Set the format of the trace files
+
+        The traces are written into `<prefix>-<rank>-<type>.csv` with
+        the "csv" format (the default), or into the binary
+        `<prefix>-<rank>-<type>.npy` with the "npy" format (see
+        `fibertree.core.trace_file`), which is much faster to write
+        and read. The trace readers of `fibertree.model` accept both
+        formats, and a binary trace can be exported for debugging
+        with `fibertree.core.trace_file.traceToCSV()`.
+
+        With the "memory" format, the traces are held in memory, and
+        are only spilled into binary trace files if they do not fit in
+        the memory budget (see `Metrics.setTraceMemory()`). The traces
+        are handed over with `Metrics.dumpTraces()`.
+
+        Note: must be called before the traces are started.
+
+        Parameters
+        ----------
+
+        format_: str
+            The format of the traces: "csv", "npy" or "memory"
+
+        Returns
+        -------
+
+        None
+
+        """
+        assert format_ in ["csv", "npy", "memory"]
+
+        cls.trace_format = format_
+
+    @classmethod
+    def setTraceMemory(cls, max_bytes):
+        """Set the number of bytes all the traces may hold in memory with the
+        "memory" trace format, before they are spilled to disk
+
+        Note: must be called before the traces are started.
+
+        Parameters
+        ----------
+
+        max_bytes: int
+            The memory budget of the traces
+
+        Returns
+        -------
+
+        None
+
+        """
+        assert max_bytes >= 0
+
+        cls.trace_memory = max_bytes
+
     @classmethod
     def _startTrace(cls, rank, type_="iter"):
         """Start to trace the given rank
@@ -508,16 +609,23 @@ class Metrics:
         else:
             end = cls.line_order[cls.rank_matches[rank]] + 1
 
-        cls.traces[rank][type_] = ([], True)
+        pos = [r + "_pos" for r in cls.loop_order[:end]]
+        coord = list(cls.loop_order[:end])
+
+        headings = pos + coord + ["fiber_pos"]
 
-        with open(cls.prefix + "-" + rank + "-" + type_ + ".csv", "w") as f:
-            f.write("")
+        # All the traces held in memory share one budget
+        memory = None
+        if cls.trace_format == "memory":
+            if cls._trace_memory is None:
+                cls._trace_memory = TraceMemory(cls.trace_memory)
 
-        pos = ",".join(r + "_pos" for r in cls.loop_order[:end])
-        coord = ",".join(r for r in cls.loop_order[:end])
+            memory = cls._trace_memory
 
-        headings = [pos, coord, "fiber_pos"]
-        cls.traces[rank][type_][0].append(",".join(headings) + "\n")
+        cls.traces[rank][type_] = TraceWriter(cls._traceFilename(rank, type_),
+                                              headings,
+                                              chunk_rows=cls.num_cached_uses,
+                                              memory=memory)
 
 
     @classmethod
@@ -526,6 +634,11 @@ class Metrics:
 
         Note must be called after Metrics.beginCollect()
 
+        If the rank is already registered, the trace starts immediately
+        (with the next use); otherwise it starts when the rank is
+        registered. Setting a trace that is already set does nothing (the
+        trace is not restarted).
+
         Parameters
         ----------
 
@@ -547,11 +660,19 @@ class Metrics:
         if rank not in cls.traces.keys():
             cls.traces[rank] = {}
 
-        cls.traces[rank][type_] = ([], False)
+        # If this trace has already been set, do nothing
+        if type_ in cls.traces[rank]:
+            return
+
+        cls.traces[rank][type_] = None
+
+        # Start the trace now if the rank has already been registered
+        if rank in cls.line_order or rank in cls.rank_matches:
+            cls._startTrace(rank, type_)
 
     @classmethod
-    def _writeTrace(cls, rank, type_):
-        """Write the trace to the file
+    def _endTrace(cls, rank, type_):
+        """Finish writing the trace to the file
 
         Parameters
         ----------
@@ -568,7 +689,13 @@ class Metrics:
         None
 
         """
-        with open(cls.prefix + "-" + rank + "-" + type_ + ".csv", "a") as f:
-            f.write("".join(cls.traces[rank][type_][0]))
+        cls.collected_traces[rank, type_] = cls.traces[rank][type_].close()
+        cls.traces[rank][type_] = None
+
+    @classmethod
+    def _traceFilename(cls, rank, type_):
+        """Get the name of the file holding (or spilling) a trace"""
+
+        extension = "npy" if cls.trace_format == "memory" else cls.trace_format
 
-        cls.traces[rank][type_] = ([], True)
+        return cls.prefix + "-" + rank + "-" + type_ + "." + extension
@@ -87,23 +87,30 @@ class Payload:
     - `Payload.contains()`
     - `Payload.get()`
 
+    The **boxed** value is held in a slot, so a `Payload` has no
+    `__dict__` and no other attributes can be set on it. Code that
+    knows it is boxing a scalar can use `Payload.fromScalar()` to
+    skip the checks made by the constructor.
+
     """
 
+    __slots__ = ("value",)
+
     def __new__(cls, value=None):
 
         #
         # Since we do not wrap Fibers in a Payload, we check if we
         # just want to just return the Fiber.
         #
-        if type(value).__name__ == "Fiber":
+        if not isinstance(value, _SCALAR_TYPES) \
+           and type(value).__name__ == "Fiber":
             return value
 
         #
-        # Just handle regular Payload creation
+        # Just handle regular Payload creation (Python then calls
+        # __init__() since the result is an instance of `cls`)
         #
-        self = super(Payload, cls).__new__(cls)
-        self.__init__(value=value)
-        return self
+        return object.__new__(cls)
 
 
     def __init__(self, value=None):
@@ -161,7 +168,7 @@ class Payload:
         if isinstance(value, Payload):
             value = value.v()
 
-        self.__dict__[name] = value
+        object.__setattr__(self, name, value)
 
     def __iter__(self):
         """__iter__"""
@@ -188,6 +195,30 @@ class Payload:
 #
 # Static methods
 #
+    @staticmethod
+    def fromScalar(value):
+        """Box a value known not to be a `Fiber` or a `Payload`
+
+        A fast path equivalent to `Payload(value)` that skips the
+        checks made by the constructor.
+
+        Parameters
+        ----------
+        value: immutable value
+            The value to **box**
+
+        Returns
+        -------
+        payload: Payload
+            A new `Payload` boxing `value`
+
+        """
+
+        self = object.__new__(Payload)
+        _set_value(self, value)
+        return self
+
+
     @staticmethod
     def isEmpty(p, default=0):
         """Check if a fiber element's payload is empty.
@@ -259,8 +290,8 @@ class Payload:
 
         """
 
-        if isinstance(value, (bool, float, int, str, tuple, frozenset)):
-            return Payload(value)
+        if isinstance(value, _SCALAR_TYPES):
+            return Payload.fromScalar(value)
 
         return value
 
@@ -678,6 +709,13 @@ class Payload:
             return payload
 
 
+
+_SCALAR_TYPES = (bool, float, int, str, tuple, frozenset)
+"""Types that are **boxed** by `Payload.maybe_box()`"""
+
+_set_value = Payload.value.__set__
+"""Set the slot holding the **boxed** value (bypassing `__setattr__()`)"""
+
 #
 # Pdoc stuff
 #
@@ -0,0 +1,426 @@
+#cython: language_level=3
+"""PayloadArray
+
+A compact, array-backed container for the payloads of a leaf fiber
+and the `PayloadView` class used to provide (boxed) references into
+it.
+
+"""
+
+from array import array
+import bisect
+from collections.abc import MutableSequence
+
+from .payload import Payload
+
+
+class PayloadArray(MutableSequence):
+    """An array-backed list of leaf payloads
+
+    This class is used as the `Fiber.payloads` list of a **columnar**
+    fiber (see `Fiber.fromColumnar()`). Rather than holding a boxed
+    `Payload` for every element, the raw values are kept in a typed
+    `array.array` ("q" for integers or "d" for floats). Values of any
+    other type cause the storage to fall back to a list of **unboxed**
+    values.
+
+    Reading an element returns a `PayloadView`, i.e., a `Payload`
+    whose value lives in this array. Views are created on demand and
+    are not retained, so a fiber that is only read never allocates a
+    box per element, while a reference obtained via
+    `Fiber.getPayloadRef()` or the populate operator (<<) can still
+    be updated, e.g., with `+=` or `<<=`.
+
+    Constructor
+    -----------
+
+    Parameters
+    ----------
+
+    values: iterable, default=()
+        The initial (boxed or unboxed) payload values
+
+    coords: sequence, default=None
+        The coordinates of the owning fiber, used to re-locate views
+        after an insertion or deletion shifted their position
+
+    ordered: Boolean, default=True
+        Whether `coords` are ordered (enables binary search)
+
+    Notes
+    -----
+
+    Only leaf payloads are supported, i.e., a `Fiber` cannot be
+    stored in a `PayloadArray`.
+
+    """
+
+    def __init__(self, values=(), coords=None, ordered=True):
+        """__init__"""
+
+        self._values = PayloadArray._pack(values)
+        self._coords = coords
+        self._ordered = ordered
+
+        #
+        # Bumped whenever elements shift position, so that views can
+        # tell if they need to re-locate their element
+        #
+        self._version = 0
+
+#
+# Accessor methods
+#
+    def getTypecode(self):
+        """Get the `array` typecode of the storage
+
+        Returns
+        -------
+        typecode: str or None
+            The typecode of the array or None if the storage has
+            fallen back to a list
+
+        """
+
+        if isinstance(self._values, array):
+            return self._values.typecode
+
+        return None
+
+
+    def getValues(self):
+        """Get the raw (unboxed) storage of the payloads
+
+        Returns
+        -------
+        values: array.array or list
+            The payload values (not a copy)
+
+        """
+
+        return self._values
+
+
+    def getValue(self, pos):
+        """Get the raw (unboxed) value at a position
+
+        Parameters
+        ----------
+        pos: integer
+            Position of the element
+
+        Returns
+        -------
+        value: scalar
+            The value at `pos`
+
+        """
+
+        return self._values[pos]
+
+
+    def nbytes(self):
+        """Return the size of the payload storage in bytes
+
+        Notes
+        -----
+
+        For list storage only the size of the list itself is counted.
+
+        """
+
+        if isinstance(self._values, array):
+            return self._values.itemsize * len(self._values)
+
+        return self._values.__sizeof__()
+
+#
+# Sequence methods
+#
+    def __len__(self):
+        """__len__"""
+
+        return len(self._values)
+
+
+    def __getitem__(self, pos):
+        """__getitem__"""
+
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(len(self._values)))]
+
+        if pos < 0:
+            pos += len(self._values)
+
+        if pos < 0 or pos >= len(self._values):
+            raise IndexError(f"The index ({pos}) is out of range")
+
+        return PayloadView(self, pos)
+
+
+    def __iter__(self):
+        """__iter__"""
+
+        for pos in range(len(self._values)):
+            yield PayloadView(self, pos)
+
+
+    def __reversed__(self):
+        """__reversed__"""
+
+        for pos in reversed(range(len(self._values))):
+            yield PayloadView(self, pos)
+
+
+    def __setitem__(self, pos, value):
+        """__setitem__"""
+
+        if isinstance(pos, slice):
+            values = PayloadArray._unbox(value)
+
+            if not all(self._fits(v) for v in values):
+                self._despecialize()
+
+            if isinstance(self._values, array):
+                values = array(self._values.typecode, values)
+
+            self._values[pos] = values
+            self._version += 1
+            return
+
+        self._store(pos, value)
+
+
+    def __delitem__(self, pos):
+        """__delitem__"""
+
+        del self._values[pos]
+        self._version += 1
+
+
+    def insert(self, pos, value):
+        """Insert a payload at a position"""
+
+        if pos >= len(self._values):
+            self.append(value)
+            return
+
+        value = PayloadArray._unboxOne(value)
+
+        if not self._fits(value):
+            self._despecialize()
+
+        self._values.insert(pos, value)
+        self._version += 1
+
+
+    def append(self, value):
+        """Append a payload"""
+
+        value = PayloadArray._unboxOne(value)
+
+        if not self._fits(value):
+            self._despecialize()
+
+        self._values.append(value)
+
+
+    def extend(self, values):
+        """Extend with a sequence of payloads"""
+
+        values = PayloadArray._unbox(values)
+
+        if not all(self._fits(v) for v in values):
+            self._despecialize()
+
+        self._values.extend(values)
+
+
+    def clear(self):
+        """Remove all payloads"""
+
+        del self._values[:]
+        self._version += 1
+
+
+    def __eq__(self, other):
+        """__eq__"""
+
+        try:
+            return len(self) == len(other) and \
+                all(Payload.get(a) == Payload.get(b) for a, b in zip(self._values, other))
+        except TypeError:
+            return False
+
+
+    def __repr__(self):
+        """__repr__"""
+
+        return f"PayloadArray({list(self._values)!r})"
+
+#
+# Utility functions
+#
+    def _store(self, pos, value):
+        """Store a (raw) value at a position"""
+
+        value = PayloadArray._unboxOne(value)
+
+        if not self._fits(value):
+            self._despecialize()
+
+        self._values[pos] = value
+
+
+    def _fits(self, value):
+        """Check if `value` can be held in the current storage"""
+
+        if not isinstance(self._values, array):
+            return True
+
+        if self._values.typecode == "q":
+            return type(value) is int and -2**63 <= value < 2**63
+
+        return type(value) is float
+
+
+    def _despecialize(self):
+        """Fall back from typed array storage to a list"""
+
+        if isinstance(self._values, array):
+            self._values = self._values.tolist()
+
+
+    @staticmethod
+    def _unboxOne(value):
+        """Unbox a single payload"""
+
+        value = Payload.get(value)
+
+        assert type(value).__name__ != "Fiber", \
+            "Columnar fibers can only hold leaf payloads"
+
+        return value
+
+
+    @staticmethod
+    def _unbox(values):
+        """Unbox a sequence of payloads"""
+
+        if isinstance(values, PayloadArray):
+            return values._values
+
+        return [PayloadArray._unboxOne(v) for v in values]
+
+
+    @staticmethod
+    def _pack(values):
+        """Pack (unboxed) values into the most compact storage"""
+
+        values = PayloadArray._unbox(values)
+
+        if isinstance(values, array):
+            return array(values.typecode, values)
+
+        if all(type(v) is int for v in values):
+            try:
+                return array("q", values)
+            except OverflowError:
+                return list(values)
+
+        if all(type(v) is float for v in values):
+            return array("d", values)
+
+        return list(values)
+
+
+class PayloadView(Payload):
+    """A `Payload` whose value is held in a `PayloadArray`
+
+    A `PayloadView` behaves like any other `Payload` (so all the
+    operators and the `Payload` static methods work), but reading or
+    assigning its value reads or writes the underlying array.
+
+    If elements are inserted into or deleted from the fiber after the
+    view was created, the view re-locates its element using its
+    coordinate.
+
+    """
+
+    __slots__ = ("_array", "_pos", "_coord", "_version")
+
+    def __new__(cls, array_, pos):
+        """__new__"""
+
+        self = object.__new__(cls)
+
+        object.__setattr__(self, "_array", array_)
+        object.__setattr__(self, "_pos", pos)
+        object.__setattr__(self, "_version", array_._version)
+
+        coords = array_._coords
+        object.__setattr__(self, "_coord", None if coords is None else coords[pos])
+
+        return self
+
+
+    def __init__(self, array_, pos):
+        """__init__"""
+
+        pass
+
+
+    @property
+    def value(self):
+        """The value held in the array"""
+
+        return self._array._values[self._locate()]
+
+
+    def __setattr__(self, name, value):
+        """__setattr__"""
+
+        if name == "v" or name == "value":
+            self._array._store(self._locate(), value)
+            return
+
+        object.__setattr__(self, name, value)
+
+
+    def _locate(self):
+        """Return the current position of the element of the view"""
+
+        array_ = self._array
+
+        if self._version == array_._version:
+            return self._pos
+
+        coords = array_._coords
+
+        if coords is None:
+            raise IndexError("PayloadView element has moved")
+
+        if array_._ordered:
+            pos = bisect.bisect_left(coords, self._coord)
+            found = pos < len(coords) and coords[pos] == self._coord
+        else:
+            found = self._coord in coords
+            pos = coords.index(self._coord) if found else None
+
+        if not found:
+            raise IndexError(f"PayloadView element at coordinate {self._coord} was removed")
+
+        object.__setattr__(self, "_pos", pos)
+        object.__setattr__(self, "_version", array_._version)
+
+        return pos
+
+
+    def __reduce__(self):
+        """__reduce__
+
+        A copy of a view is a plain (detached) `Payload`
+
+        """
+
+        return (Payload, (self.value,))
@@ -0,0 +1,382 @@
+#cython: language_level=3
+"""Random Sparse
+
+Functions to generate the elements of random sparse tensors in
+coordinate (COO) form with numpy (see `Tensor.fromRandomSparse()`).
+
+Unlike `Fiber.fromRandom()`, which draws a random number for every
+point of the (dense) shape of the tensor, the positions of the
+non-empty elements are sampled directly, so the time to generate a
+tensor is proportional to its number of elements.
+
+The supported patterns are:
+
+- "uniform" - the elements are spread uniformly, either with a
+  density per rank (like `Fiber.fromRandom()`) or with an exact
+  number of elements
+
+- "powerlaw" - the number of elements in each coordinate of the top
+  rank follows a power law (e.g., rows of a matrix with a skewed
+  number of non-zeros)
+
+- "banded" - the elements of a matrix are within a band around the
+  diagonal
+
+- "block" - the elements form dense blocks
+
+"""
+
+import logging
+import math
+
+import numpy as np
+
+#
+# Set up logging
+#
+module_logger = logging.getLogger('fibertree.core.random_sparse')
+
+
+PATTERNS = ["uniform", "powerlaw", "banded", "block"]
+"""The supported patterns"""
+
+_CHUNK = 1 << 22
+"""The maximum number of random numbers drawn at a time for dense sampling"""
+
+
+def randomCOO(shape,
+              density=None,
+              nnz=None,
+              pattern="uniform",
+              interval=10,
+              seed=None,
+              alpha=1.0,
+              bandwidth=1,
+              block=None):
+    """Generate the elements of a random sparse tensor
+
+    Parameters
+    ----------
+    shape: list of integers
+        The shape of each rank of the tensor
+
+    density: float or list of floats, default=None
+        The fraction of non-empty elements. For the "uniform"
+        pattern, a list gives the probability that an element of a
+        fiber is not empty for each rank (a scalar is the density of
+        the leaf rank with all other ranks dense, as in
+        `Fiber.fromRandom()`). For the "banded" pattern, the fraction
+        of the band, and for the "block" pattern, the fraction of
+        the blocks.
+
+    nnz: integer, default=None
+        The exact number of elements (instead of `density`). For the
+        "block" pattern, randomly chosen blocks are added until the
+        next one would exceed `nnz`, counting the blocks on the
+        edges of the shape by the size of their part inside it, so
+        there may be fewer elements than `nnz` (by less than a
+        block).
+
+    pattern: str, default="uniform"
+        The pattern of the elements (see `PATTERNS`)
+
+    interval: integer, default=10
+        The values are drawn uniformly from [1, `interval`]
+
+    seed: integer, default=None
+        A seed for the random number generator (`np.random.default_rng()`)
+
+    alpha: float, default=1.0
+        The exponent of the "powerlaw" pattern, i.e., the probability
+        of top rank coordinate `c` is proportional to `(c+1)**-alpha`
+
+    bandwidth: integer, default=1
+        The number of diagonals on each side of the main diagonal of
+        the "banded" pattern
+
+    block: list of integers, default=None
+        The shape of the blocks of the "block" pattern
+
+    Returns
+    -------
+    coords: list of numpy arrays
+        The coordinates of the elements, one array per rank (in no
+        particular order)
+
+    values: numpy array
+        The values of the elements
+
+    """
+
+    assert pattern in PATTERNS, f"Unknown pattern: {pattern}"
+    assert (density is None) != (nnz is None), \
+        "Exactly one of density and nnz must be given"
+
+    shape = [int(s) for s in shape]
+    rng = np.random.default_rng(seed)
+
+    if pattern == "uniform":
+        if nnz is not None:
+            coords = _uniformCount(rng, shape, nnz)
+        else:
+            coords = _uniformDensity(rng, shape, density)
+
+    elif pattern == "powerlaw":
+        if nnz is None:
+            nnz = round(density * math.prod(shape))
+
+        coords = _powerlaw(rng, shape, nnz, alpha)
+
+    elif pattern == "banded":
+        coords = _banded(rng, shape, density, nnz, bandwidth)
+
+    else:
+        coords = _blocks(rng, shape, density, nnz, block)
+
+    values = rng.integers(1, interval + 1, len(coords[0]))
+
+    return coords, values
+
+#
+# Pattern generators
+#
+def _uniformCount(rng, shape, nnz):
+    """Exactly `nnz` distinct points, uniformly distributed"""
+
+    total = math.prod(shape)
+
+    assert 0 <= nnz <= total, "More elements than points in the shape"
+
+    positions = rng.choice(total, nnz, replace=False)
+
+    return list(np.unravel_index(positions, shape))
+
+
+def _uniformDensity(rng, shape, density):
+    """Points sampled rank by rank with a density per rank"""
+
+    if not isinstance(density, list):
+        density = (len(shape) - 1) * [1.0] + [density]
+
+    assert len(shape) == len(density), \
+        "Density and shape arrays must be same length"
+
+    coords = []
+    num_fibers = 1
+
+    for size, rank_density in zip(shape, density):
+        (parent, coord) = _sampleFibers(rng, num_fibers, size, rank_density)
+
+        coords = [c[parent] for c in coords] + [coord]
+        num_fibers = len(coord)
+
+    return coords
+
+
+def _powerlaw(rng, shape, nnz, alpha):
+    """Exactly `nnz` distinct points with a power law top rank"""
+
+    total = math.prod(shape)
+    rest = total // shape[0] if shape[0] else 0
+
+    assert 0 <= nnz <= total, "More elements than points in the shape"
+
+    weights = np.arange(1, shape[0] + 1, dtype=np.float64) ** -alpha
+
+    #
+    # Draw the number of elements of each top rank coordinate, which
+    # can be at most the number of points below it
+    #
+    counts = np.zeros(shape[0], dtype=np.int64)
+    left = nnz
+
+    while left > 0:
+        room = rest - counts
+
+        p = np.where(room > 0, weights, 0.0)
+        p /= p.sum()
+
+        counts += np.minimum(rng.multinomial(left, p), room)
+        left = nnz - int(counts.sum())
+
+    (top, position) = _sampleDistinct(rng, counts, rest)
+
+    return [top] + list(np.unravel_index(position, shape[1:]))
+
+
+def _banded(rng, shape, density, nnz, bandwidth):
+    """Distinct points of a matrix within `bandwidth` of the diagonal"""
+
+    assert len(shape) == 2, "The banded pattern is only for matrices"
+
+    rows = np.arange(shape[0], dtype=np.int64)
+
+    low = np.maximum(rows - bandwidth, 0)
+    high = np.minimum(rows + bandwidth, shape[1] - 1)
+    width = np.maximum(high - low + 1, 0)
+
+    ends = np.cumsum(width)
+    total = int(ends[-1]) if len(ends) else 0
+
+    if nnz is None:
+        nnz = round(density * total)
+
+    assert 0 <= nnz <= total, "More elements than points in the band"
+
+    positions = rng.choice(total, nnz, replace=False)
+
+    row = np.searchsorted(ends, positions, side="right")
+    col = low[row] + positions - (ends[row] - width[row])
+
+    return [row, col]
+
+
+def _blocks(rng, shape, density, nnz, block):
+    """Dense blocks of shape `block`"""
+
+    assert block is not None and len(block) == len(shape), \
+        "The block pattern needs a block shape for each rank"
+
+    grid = [-(-s // b) for s, b in zip(shape, block)]
+    block_size = math.prod(block)
+
+    total_blocks = math.prod(grid)
+
+    if nnz is None:
+        num_blocks = round(density * total_blocks)
+        origins = _uniformCount(rng, grid, num_blocks)
+    else:
+        assert 0 <= nnz <= math.prod(shape), "More elements than points in the shape"
+
+        #
+        # Draw enough blocks (in random order) to reach `nnz` even if
+        # all the blocks on the edges are drawn, and keep them until
+        # the next one would exceed `nnz`
+        #
+        whole = math.prod(s // b for s, b in zip(shape, block))
+        candidates = min(total_blocks, nnz // block_size + total_blocks - whole)
+
+        origins = _uniformCount(rng, grid, candidates)
+
+        sizes = np.ones(candidates, dtype=np.int64)
+        for o, s, b in zip(origins, shape, block):
+            sizes *= np.minimum(s - o * b, b)
+
+        num_blocks = int(np.searchsorted(np.cumsum(sizes), nnz, side="right"))
+        origins = [o[:num_blocks] for o in origins]
+
+    offsets = np.indices(block).reshape(len(block), -1)
+
+    coords = [(o[:, None] * b + off[None, :]).ravel()
+              for o, b, off in zip(origins, block, offsets)]
+
+    #
+    # Remove the parts of the blocks on the edges outside the shape
+    #
+    inside = np.ones(len(coords[0]), dtype=bool)
+    for c, s in zip(coords, shape):
+        inside &= c < s
+
+    return [c[inside] for c in coords]
+
+#
+# Utility functions
+#
+def _sampleFibers(rng, num_fibers, size, density):
+    """Sample the elements of `num_fibers` fibers of shape `size`
+
+    Each element is non-empty with probability `density`.
+
+    Returns
+    -------
+    parent: numpy array
+        The fiber of each element
+
+    coord: numpy array
+        The coordinate of each element
+
+    """
+
+    if density >= 0.25:
+        #
+        # Dense enough to draw a random number per point, since at
+        # least a quarter of them are kept
+        #
+        rows = max(1, _CHUNK // max(size, 1))
+
+        parents = []
+        coords = []
+
+        for start in range(0, num_fibers, rows):
+            count = min(rows, num_fibers - start)
+
+            (parent, coord) = np.nonzero(rng.random((count, size)) < density)
+
+            parents.append(parent + start)
+            coords.append(coord)
+
+        if not parents:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        return np.concatenate(parents), np.concatenate(coords)
+
+    #
+    # Draw the number of elements of each fiber, and then their
+    # distinct coordinates
+    #
+    counts = rng.binomial(size, density, num_fibers)
+
+    return _sampleDistinct(rng, counts, size)
+
+
+def _sampleDistinct(rng, counts, size):
+    """Sample `counts[i]` distinct coordinates in `range(size)` for each fiber `i`
+
+    Distinct coordinates are drawn until each fiber has its elements,
+    except for fibers with more than half of `size` elements, whose
+    coordinates are the first ones of a random order of all the
+    coordinates, so no fiber needs many draws.
+
+    Returns
+    -------
+    parent: numpy array
+        The fiber of each element (ordered)
+
+    coord: numpy array
+        The coordinate of each element
+
+    """
+
+    counts = np.asarray(counts, dtype=np.int64)
+    num_fibers = len(counts)
+
+    full = np.flatnonzero(2 * counts > size)
+
+    keys = np.empty(0, dtype=np.int64)
+
+    if len(full):
+        #
+        # The fibers with more than half of the coordinates (so the
+        # random numbers drawn are at most twice their elements)
+        #
+        order = np.argsort(rng.random((len(full), size)), axis=1)
+        take = np.arange(size)[None, :] < counts[full][:, None]
+
+        keys = np.sort(full[np.nonzero(take)[0]] * size + order[take])
+
+    need = counts.copy()
+    need[full] = 0
+
+    while need.any():
+        parent = np.repeat(np.arange(num_fibers, dtype=np.int64), need)
+        new = parent * size + rng.integers(0, size, len(parent))
+
+        keys = np.sort(np.concatenate((keys, new)))
+        keys = keys[np.append(True, keys[1:] != keys[:-1])]
+
+        need = counts - np.bincount(keys // size, minlength=num_fibers)
+
+    if size == 0:
+        return keys, keys
+
+    return keys // size, keys % size
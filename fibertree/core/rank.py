@@ -45,8 +45,8 @@ class Rank:
         A list of the fibers in the rank
 
     fmt: string
-        What format is this rank in (either "C" (compressed) or
-        "U" (uncompressed))
+        What format is this rank in, "C" (compressed), "U"
+        (uncompressed) or "H" (compressed with a hash index)
 
     Constructor
     -----------
@@ -66,8 +66,8 @@ class Rank:
         The next rank in the tensor
 
     fmt: Boolean, default="C"
-        What format is this rank in (either "C" (compressed) or
-        "U" (uncompressed))
+        What format is this rank in, "C" (compressed), "U"
+        (uncompressed) or "H" (compressed with a hash index)
 
 
     Notes
@@ -351,7 +351,8 @@ class Rank:
         ----------
 
         fmt: string
-            The format of the rank; "C" = compressed, "U" = uncompressed
+            The format of the rank; "C" = compressed, "U" = uncompressed,
+            "H" = compressed with a hash index
 
         Returns
         -------
@@ -365,10 +366,45 @@ class Rank:
         AssertionError
             Illegal format
 
+        Notes
+        -----
+
+        Changing a leaf rank to format "U" gives each of its fibers
+        dense storage, i.e., an array of payloads indexed by
+        coordinate with explicit default elements (see
+        `Fiber.isDense()`), and changing it back drops the default
+        elements. The default elements are only storage, i.e., the
+        fibers have the same elements in either format. References
+        to payloads obtained before the change are no longer
+        connected to the fibers.
+
         """
 
+        old_fmt = self._attrs.getFormat()
+
         self._attrs.setFormat(fmt)
 
+        #
+        # Drop the coordinate indices of the fibers, they are rebuilt
+        # for the new format on the next lookup
+        #
+        for fiber in self.fibers:
+            fiber._clearCoordIndex()
+
+        #
+        # Convert the storage of the fibers of a leaf rank
+        #
+        if self.next_rank is None and fmt != old_fmt:
+            if fmt == "U":
+                size = self.getShape(all_ranks=False)
+
+                for fiber in self.fibers:
+                    fiber._setDenseStorage(size)
+
+            elif old_fmt == "U":
+                for fiber in self.fibers:
+                    fiber._setSparseStorage()
+
         return self
 
     def getFormat(self):
@@ -382,7 +418,8 @@ class Rank:
         -------
 
         fmt: string
-            The format of the rank; "C" = compressed, "U" = uncompressed
+            The format of the rank; "C" = compressed, "U" = uncompressed,
+            "H" = compressed with a hash index
 
 
         Raises
@@ -498,6 +535,37 @@ class Rank:
         fiber.setOwner(None)
         return fiber
 
+    def replaceFiber(self, old, new):
+        """
+        Replace a fiber of the rank with another fiber
+
+        Used when a fiber shared with another tensor is copied before
+        being mutated (see `Fiber._cowPayload()`).
+
+        Parameters
+        ----------
+
+        old: Fiber
+            The fiber to replace (if it is not in the rank, `new` is
+            just added to the rank)
+
+        new: Fiber
+            The replacement fiber
+
+        Returns
+        _______
+
+        None
+        """
+        for i, fiber in enumerate(self.fibers):
+            if fiber is old:
+                self.fibers[i] = new
+                break
+        else:
+            self.fibers.append(new)
+
+        new.setOwner(self)
+
 #
 # Linked list methods
 #
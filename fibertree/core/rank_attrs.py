@@ -26,8 +26,8 @@ class RankAttrs:
         The shape of the fibers in the rank
 
     fmt: string
-        What format is this rank in (either "C" (compressed) or
-        "U" (uncompressed))
+        What format is this rank in, "C" (compressed), "U"
+        (uncompressed) or "H" (compressed with a hash index)
 
     collecting: bool
         Whether we are collecting metrics for this rank
@@ -47,11 +47,14 @@ class RankAttrs:
         The shape of the fibers in the rank
 
     fmt: Boolean, default="C"
-        What format is this rank in (either "C" (compressed) or
-        "U" (uncompressed))
+        What format is this rank in, "C" (compressed), "U"
+        (uncompressed) or "H" (compressed with a hash index)
 
     """
 
+    _shape_listeners = None
+    """The fibers whose cached shapes depend on the shape (see `Fiber._watchRankAttrs()`)"""
+
     def __init__(self, rank_id="Unknown", shape=None, fmt="C"):
         """__init__"""
 
@@ -196,7 +199,8 @@ class RankAttrs:
         ----------
 
         fmt: string
-            The format of the rank; "C" = compressed, "U" = uncompressed
+            The format of the rank; "C" = compressed, "U" = uncompressed,
+            "H" = compressed with a hash index
 
         Returns
         -------
@@ -211,7 +215,7 @@ class RankAttrs:
             Illegal format
 
         """
-        assert fmt == "C" or fmt == "U"
+        assert fmt in ("C", "U", "H")
         self._fmt = fmt
 
         return self
@@ -227,7 +231,8 @@ class RankAttrs:
         -------
 
         fmt: string
-            The format of the rank; "C" = compressed, "U" = uncompressed
+            The format of the rank; "C" = compressed, "U" = uncompressed,
+            "H" = compressed with a hash index
 
 
         Raises
@@ -259,6 +264,17 @@ class RankAttrs:
             shape not an int
 
         """
+        listeners = self._shape_listeners
+
+        if shape != self._shape and listeners is not None:
+            self._shape_listeners = None
+
+            for (ref, gen) in zip(listeners[::2], listeners[1::2]):
+                fiber = ref()
+
+                if fiber is not None and fiber._shape_gen == gen:
+                    fiber._noteShapeChange()
+
         self._shape = shape
         return self
 
@@ -339,6 +355,22 @@ class RankAttrs:
 #
 # Copy operation
 #
+    def __getstate__(self):
+        """__getstate__
+
+        The fibers listening for changes of the shape are not pickled
+
+        """
+
+        state = self.__dict__
+
+        if "_shape_listeners" in state:
+            state = dict(state)
+            del state["_shape_listeners"]
+
+        return state
+
+
     def __deepcopy__(self, memo):
         """__deepcopy__
 
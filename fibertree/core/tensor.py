@@ -13,9 +13,17 @@ import pickle
 import yaml
 from copy import deepcopy
 
+import numpy as np
+
 from .rank    import Rank
 from .fiber   import Fiber
 from .payload import Payload
+from .csf import segmentsFromCOO, segmentsFromFiber, fiberFromSegments, \
+    coordsFromSegments, permuteFiber
+from .random_sparse import randomCOO
+from .tensor_file import isBinaryFile, readBinary, writeBinary, \
+    readMatrixMarket, writeMatrixMarket
+from .yaml_loader import loadYAML
 
 #
 # Set up logging
@@ -168,7 +176,7 @@ class Tensor:
 
 
     @classmethod
-    def fromYAMLfile(cls, yamlfile):
+    def fromYAMLfile(cls, yamlfile, max_depth=None):
         """Construct a tensor from a YAML file
 
         This constructor creates a Tensor from the specified
@@ -180,6 +188,11 @@ class Tensor:
         yamlfile: string
             Filename of file containing a YAML representation of a tensor
 
+        max_depth: integer, default=None
+            The number of (top) ranks to load; the leaf payloads of the
+            resulting tensor are the number of leaf payloads below them
+            in the full tensor (see `fibertree.core.yaml_loader.loadYAML()`)
+
 
         Todo
         ----
@@ -187,7 +200,7 @@ class Tensor:
         YAML file does not provide a non-zero default value
 
         """
-        (rank_ids, root, shape, name) = Tensor.parse(yamlfile)
+        (rank_ids, root, shape, name) = Tensor.parse(yamlfile, max_depth)
 
         if not isinstance(root, Fiber):
             t = Tensor(rank_ids=[], shape=shape, name=name)
@@ -198,6 +211,370 @@ class Tensor:
         return Tensor.fromFiber(rank_ids, root, shape=shape)
 
 
+    @classmethod
+    def fromFile(cls, filename, columnar=False):
+        """Construct a tensor from a file
+
+        This constructor creates a Tensor from a file written by
+        `Tensor.dump()` in either the YAML or the binary format (see
+        `fibertree.core.tensor_file`).
+
+        Parameters
+        -----------
+
+        filename: string
+            Name of a YAML file or a binary tensor file (directory)
+
+        columnar: Boolean, default=False
+            Create the leaf fibers of a binary tensor file with
+            columnar storage (see `Fiber.fromColumnar()`)
+
+        """
+
+        if not isBinaryFile(filename):
+            return Tensor.fromYAMLfile(filename)
+
+        (attrs, root) = readBinary(filename, columnar=columnar)
+
+        rank_ids = attrs['rank_ids']
+        shape = attrs['shape']
+        name = attrs['name']
+
+        if not isinstance(root, Fiber):
+            t = Tensor(rank_ids=[], shape=shape, name=name)
+            t.setMutable(False)
+            t._root = Payload(root)
+            return t
+
+        t = Tensor.fromFiber(rank_ids, root, shape=shape, name=name)
+
+        t.setDefault(attrs['default'])
+
+        if attrs['formats'] is not None:
+            for rank, fmt in zip(t.ranks, attrs['formats']):
+                rank.setFormat(fmt)
+
+        return t
+
+
+    @classmethod
+    def fromCOO(cls,
+                rank_ids,
+                coords,
+                values=None,
+                shape=None,
+                order=None,
+                default=0,
+                combine="sum",
+                name="",
+                color="red",
+                columnar=False):
+        """Construct a tensor from arrays of coordinates and values
+
+        The elements are sorted into the order of the ranks of the
+        tensor and the fibertree is created in a single pass (see
+        `fibertree.core.csf`), so the elements can be in any order.
+
+        Parameters
+        ----------
+
+        rank_ids: list of strings
+            The names of the ranks of the coordinates in `coords`
+
+        coords: list of arrays of integers
+            The coordinates of the elements, one array per rank in `rank_ids`
+
+        values: array, default=(all ones)
+            The values of the elements
+
+        shape: list of integers, default=(the maximum coordinates plus one)
+            The shapes of the ranks in `rank_ids`
+
+        order: list of strings, default=`rank_ids`
+            The order of the ranks of the tensor, i.e., a permutation
+            of `rank_ids`
+
+        default: value, default=0
+            The default value of the leaf payloads, elements whose
+            (combined) value is the default are not included
+
+        combine: str, default="sum"
+            How to combine the values of elements with the same
+            point, one of "sum", "max", "min", "first" or "last"
+
+        name: string, default=""
+            A name for the tensor
+
+        color: string, default="red"
+            The color to paint values when displaying the tensor
+
+        columnar: Boolean, default=False
+            Create the leaf fibers with columnar storage (see
+            `Fiber.fromColumnar()`)
+
+        """
+
+        assert len(rank_ids) > 0 and len(coords) == len(rank_ids), \
+            "Need one array of coordinates per rank"
+
+        coords = [np.asarray(c, dtype=np.int64) for c in coords]
+
+        if values is None:
+            values = np.ones(len(coords[0]), dtype=np.int64)
+
+        if shape is None:
+            shape = [int(c.max()) + 1 if len(c) else 0 for c in coords]
+
+        assert all(len(c) == 0 or (c.min() >= 0 and c.max() < s)
+                   for c, s in zip(coords, shape)), \
+            "Coordinates out of range of the shape"
+
+        if order is not None:
+            assert sorted(order) == sorted(rank_ids), \
+                "The order must be a permutation of the rank ids"
+
+            perm = [rank_ids.index(r) for r in order]
+
+            rank_ids = list(order)
+            coords = [coords[i] for i in perm]
+            shape = [shape[i] for i in perm]
+
+        (segs, rank_coords, values) = segmentsFromCOO(coords,
+                                                      values,
+                                                      default=default,
+                                                      combine=combine)
+
+        root = fiberFromSegments(segs, rank_coords, values, columnar=columnar)
+
+        t = Tensor.fromFiber(rank_ids, root, shape=shape, name=name, color=color)
+        t.setDefault(default)
+
+        return t
+
+
+    @classmethod
+    def fromCSR(cls, indptr, indices, data=None, shape=None, rank_ids=None, **kwargs):
+        """Construct a matrix from arrays in compressed sparse row form
+
+        Parameters
+        ----------
+
+        indptr: array of integers
+            The offsets in `indices` and `data` where each row starts
+
+        indices: array of integers
+            The column coordinates of the elements
+
+        data: array, default=(all ones)
+            The values of the elements
+
+        shape: list of integers, default=(inferred)
+            The number of rows and columns
+
+        rank_ids: list of strings, default=["M", "K"]
+            The names of the row and column ranks
+
+        kwargs: keyword arguments
+            Keyword arguments accepted by `Tensor.fromCOO()`, e.g.,
+            `order=["K", "M"]` for a column-major tensor
+
+        """
+
+        if rank_ids is None:
+            rank_ids = ["M", "K"]
+
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+
+        num_rows = len(indptr) - 1
+        rows = np.repeat(np.arange(num_rows, dtype=np.int64), np.diff(indptr))
+
+        if shape is None:
+            shape = [num_rows, int(indices.max()) + 1 if len(indices) else 0]
+
+        return Tensor.fromCOO(rank_ids, [rows, indices], data, shape=shape, **kwargs)
+
+
+    @classmethod
+    def fromCSC(cls, indptr, indices, data=None, shape=None, rank_ids=None, **kwargs):
+        """Construct a matrix from arrays in compressed sparse column form
+
+        Parameters
+        ----------
+
+        indptr: array of integers
+            The offsets in `indices` and `data` where each column starts
+
+        indices: array of integers
+            The row coordinates of the elements
+
+        data: array, default=(all ones)
+            The values of the elements
+
+        shape: list of integers, default=(inferred)
+            The number of rows and columns
+
+        rank_ids: list of strings, default=["M", "K"]
+            The names of the row and column ranks
+
+        kwargs: keyword arguments
+            Keyword arguments accepted by `Tensor.fromCOO()`
+
+        """
+
+        if rank_ids is None:
+            rank_ids = ["M", "K"]
+
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+
+        num_cols = len(indptr) - 1
+        cols = np.repeat(np.arange(num_cols, dtype=np.int64), np.diff(indptr))
+
+        if shape is None:
+            shape = [int(indices.max()) + 1 if len(indices) else 0, num_cols]
+
+        return Tensor.fromCOO(rank_ids, [indices, cols], data, shape=shape, **kwargs)
+
+
+    @classmethod
+    def fromMatrixMarket(cls, filename, rank_ids=None, **kwargs):
+        """Construct a matrix from a Matrix Market file
+
+        Parameters
+        ----------
+
+        filename: string
+            The name of the Matrix Market (.mtx) file
+
+        rank_ids: list of strings, default=["M", "K"]
+            The names of the row and column ranks
+
+        kwargs: keyword arguments
+            Keyword arguments accepted by `Tensor.fromCOO()`
+
+        """
+
+        if rank_ids is None:
+            rank_ids = ["M", "K"]
+
+        (shape, coords, values) = readMatrixMarket(filename)
+
+        return Tensor.fromCOO(rank_ids, coords, values, shape=shape, **kwargs)
+
+
+    @classmethod
+    def fromNumpy(cls,
+                  ndarray,
+                  rank_ids=None,
+                  default=0,
+                  name="",
+                  color="red",
+                  columnar=False):
+        """Construct a tensor from a (dense) numpy array
+
+        The non-default elements are found with `np.nonzero()`, which
+        produces them in the order of the fibertree, so the fibertree
+        is created in a single pass (see `fibertree.core.csf`).
+
+        Parameters
+        ----------
+
+        ndarray: numpy array (or array-like)
+            The values of the tensor
+
+        rank_ids: list, default=["Rn", "Rn-1", ... "R0"]
+            List containing names of ranks.
+
+        default: value, default=0
+            The default value of the leaf payloads, elements with the
+            default value are not included (False for a boolean array)
+
+        name: string, default=""
+            A name for the tensor
+
+        color: string, default="red"
+            The color to paint values when displaying the tensor
+
+        columnar: Boolean, default=False
+            Create the leaf fibers with columnar storage (see
+            `Fiber.fromColumnar()`)
+
+        """
+
+        ndarray = np.asarray(ndarray)
+
+        if ndarray.ndim == 0:
+            # Handle a rank zero tensor
+            t = Tensor(rank_ids=[], shape=[], name=name, color=color)
+            t._root = Payload(ndarray.item())
+            return t
+
+        if rank_ids is None:
+            maxrank = ndarray.ndim - 1
+            rank_ids = [f"R{maxrank-i}" for i in range(maxrank + 1)]
+
+        assert len(rank_ids) == ndarray.ndim, \
+            "Need one rank id per dimension of the array"
+
+        # Keep the default of a boolean array boolean
+        if ndarray.dtype == np.bool_ and default is not True and default == 0:
+            default = False
+
+        coords = np.nonzero(ndarray != default)
+
+        (segs, rank_coords, values) = segmentsFromCOO(coords,
+                                                      ndarray[coords],
+                                                      default=default,
+                                                      is_sorted=True)
+
+        root = fiberFromSegments(segs, rank_coords, values, columnar=columnar)
+
+        t = Tensor.fromFiber(rank_ids,
+                             root,
+                             shape=list(ndarray.shape),
+                             name=name,
+                             color=color)
+        t.setDefault(default)
+
+        return t
+
+
+    @classmethod
+    def fromScipySparse(cls, matrix, rank_ids=None, **kwargs):
+        """Construct a matrix from a scipy sparse matrix (or array)
+
+        Parameters
+        ----------
+
+        matrix: scipy.sparse matrix
+            A sparse matrix in any format
+
+        rank_ids: list of strings, default=["M", "K"]
+            The names of the row and column ranks
+
+        kwargs: keyword arguments
+            Keyword arguments accepted by `Tensor.fromCOO()`
+
+        Notes
+        -----
+
+        Duplicate entries are summed and explicit zeros are dropped.
+
+        """
+
+        if rank_ids is None:
+            rank_ids = ["M", "K"]
+
+        coo = matrix.tocoo()
+
+        return Tensor.fromCOO(rank_ids,
+                              [coo.row, coo.col],
+                              coo.data,
+                              shape=list(matrix.shape),
+                              **kwargs)
+
+
     @classmethod
     def fromUncompressed(cls,
                          rank_ids=None,
@@ -340,7 +717,8 @@ class Tensor:
                    interval=10,
                    seed=None,
                    name="",
-                   color="red"):
+                   color="red",
+                   columnar=False):
         """Create a random tensor
 
         Parameters
@@ -363,9 +741,13 @@ class Tensor:
         seed: a valid argument for `random.seed`
             A seed to pass to `random.seed`
 
+        columnar: Boolean, default=False
+            Create the leaf fibers with columnar storage (see
+            `Fiber.fromColumnar()`)
+
         """
 
-        f = Fiber.fromRandom(shape, density, interval, seed)
+        f = Fiber.fromRandom(shape, density, interval, seed, columnar=columnar)
 
         return Tensor.fromFiber(rank_ids=rank_ids,
                                 fiber=f,
@@ -375,6 +757,89 @@ class Tensor:
 
 
 
+    @classmethod
+    def fromRandomSparse(cls,
+                         rank_ids=None,
+                         shape=None,
+                         density=None,
+                         nnz=None,
+                         pattern="uniform",
+                         interval=10,
+                         seed=None,
+                         name="",
+                         color="red",
+                         columnar=False,
+                         **kwargs):
+        """Create a random sparse tensor
+
+        The positions of the elements are sampled directly with numpy
+        (see `fibertree.core.random_sparse.randomCOO()`) and the
+        tensor is built with `Tensor.fromCOO()`, so the time to
+        create the tensor is proportional to its number of elements
+        rather than to the size of its shape.
+
+        Parameters
+        ----------
+
+        rank_ids: list
+            The "rank ids" for the tensor
+
+        shape: list
+            The "shape" (i.e., size) of each level of the tree
+
+        density: float or list of floats, default=None
+            The density of the tensor (see `randomCOO()`)
+
+        nnz: integer, default=None
+            The exact number of elements (instead of `density`)
+
+        pattern: str, default="uniform"
+            The pattern of the elements; "uniform", "powerlaw",
+            "banded" or "block"
+
+        interval: integer
+            The closed range [1:`interval`] of each value at the leaf
+            level of the tree
+
+        seed: integer, default=None
+            A seed for the random number generator
+
+        columnar: Boolean, default=False
+            Create the leaf fibers with columnar storage (see
+            `Fiber.fromColumnar()`)
+
+        kwargs: keyword arguments
+            The options of the pattern (`alpha`, `bandwidth` or `block`)
+
+        Notes
+        -----
+
+        This is not a replacement for `Tensor.fromRandom()`, i.e., a
+        given `seed` produces different tensors in the two methods.
+
+        """
+
+        if rank_ids is None:
+            maxrank = len(shape) - 1
+            rank_ids = [f"R{maxrank-i}" for i in range(maxrank + 1)]
+
+        (coords, values) = randomCOO(shape,
+                                     density=density,
+                                     nnz=nnz,
+                                     pattern=pattern,
+                                     interval=interval,
+                                     seed=seed,
+                                     **kwargs)
+
+        return Tensor.fromCOO(rank_ids,
+                              coords,
+                              values,
+                              shape=list(shape),
+                              name=name,
+                              color=color,
+                              columnar=columnar)
+
+
     @staticmethod
     def _shape2lists(shape):
         """ Return a nest of lists of "shape" filled with zeros"""
@@ -688,6 +1153,10 @@ class Tensor:
         #       transistion from raw fibers as payloads to fibers in
         #       Payload
 
+        if fiber.isColumnar():
+            # Columnar fibers only hold leaf payloads
+            return
+
         for p in fiber.getPayloads():
             if Payload.contains(p, Fiber):
                 self._addFiber(Payload.get(p), level + 1)
@@ -714,7 +1183,11 @@ class Tensor:
         #
         # TBD: This is broken if Fibers are wrapped in a Payload
         #
+        # Note: the identity check avoids a full fiber comparison
+        # in the common case
+        #
         assert (isinstance(root, Payload) or
+                root is self.ranks[0].getFibers()[0] or
                 root == self.ranks[0].getFibers()[0])
 
         return root
@@ -945,7 +1418,8 @@ class Tensor:
             The ID of the rank whose format to modify
 
         fmt: string
-            The format of the rank; "C" = compressed, "U" = uncompressed
+            The format of the rank; "C" = compressed, "U" = uncompressed,
+            "H" = compressed with a hash index
 
         Returns
         -------
@@ -981,7 +1455,8 @@ class Tensor:
         -------
 
         fmt: string
-            The format of the rank; "C" = compressed, "U" = uncompressed
+            The format of the rank; "C" = compressed, "U" = uncompressed,
+            "H" = compressed with a hash index
 
 
         Raises
@@ -994,6 +1469,23 @@ class Tensor:
         rank_ids = self.getRankIds()
         return self.ranks[rank_ids.index(rank_id)].getFormat()
 
+    def getIndexBytes(self):
+        """Get the memory used by the hash indices of the tensor's fibers
+
+        Hash indices are built on the first random access to a fiber
+        in a rank with format "H" (see `Fiber.getIndexBytes()`).
+
+        Returns
+        -------
+        nbytes: integer
+            The total size in bytes of the hash indices
+
+        """
+
+        return sum(fiber.getIndexBytes()
+                   for rank in self.ranks
+                   for fiber in rank.getFibers())
+
 
 #
 #  Comparison operations
@@ -1308,7 +1800,14 @@ class Tensor:
         """Swizzle the ranks of the tensor
 
         Re-arrange (swizzle) the ranks of the tensor so they match the
-        given `rank_ids`. This is accompished via a series of rank swaps.
+        given `rank_ids`.
+
+        Only the top ranks up to the lowest rank that moves are
+        restructured, the fibers below them are moved as a whole.
+        Those ranks are reordered in a single pass, i.e., by sorting
+        all their elements by their coordinates in the new rank order
+        (see `csf.permuteFiber()`), unless their coordinates are not
+        integers (e.g., after `Tensor.flattenRanks()`).
 
         Parameters
         ----------
@@ -1329,9 +1828,9 @@ class Tensor:
         assert sorted(old_rank_ids) == sorted(rank_ids)
 
         old_name = self.getName()
-        copied = copy.deepcopy(self)
 
         if old_rank_ids == rank_ids:
+            copied = copy.deepcopy(self)
             copied.setName(f"{old_name}+swizzled")
             return copied
 
@@ -1347,9 +1846,44 @@ class Tensor:
         for rank_id in rank_ids:
             guide.append(old_rank_ids.index(rank_id))
 
+        leaves = self.ranks[-1].getFibers()
+        columnar = swiz_len == len(rank_ids) \
+            and len(leaves) > 0 and leaves[0].isColumnar()
+
+        root = permuteFiber(self.getRoot(), swiz_len, guide[:swiz_len],
+                            columnar=columnar)
+
+        if root is None:
+            root = self._swizzleFibers(guide, swiz_len)
+
+        # Build the new tensor
+        kwargs = {"fiber": root, "rank_ids": rank_ids}
+        old_shape = self.getShape(authoritative=True)
+        if old_shape:
+            new_shape = [old_shape[guide[i]] for i in range(swiz_len)] \
+                + old_shape[swiz_len:]
+            kwargs["shape"] = new_shape
+        swizzled = Tensor.fromFiber(**kwargs)
+        swizzled.setName(f"{old_name}+swizzled")
+
+        return swizzled
+
+
+    def _swizzleFibers(self, guide, swiz_len):
+        """Reorder the top `swiz_len` ranks of the fibertree
+
+        Used by `Tensor.swizzleRanks()` for coordinates that cannot be
+        sorted with numpy, so the coordinates of each element are
+        collected into a tuple and the tuples are sorted in Python.
+
+        """
+
+        # Only the swizzled ranks are restructured (see Fiber.setCopyOnWrite())
+        copied = self.getRoot()._transformCopy(swiz_len - 1)
+
         coords = []
         payloads = {}
-        frontier = [(copied.getRoot(), None, -1)]
+        frontier = [(copied, None, -1)]
         frontier_coords = [None] * swiz_len
 
         # Depth-first search through the fibertree and extract the coordinate
@@ -1368,6 +1902,7 @@ class Tensor:
                 continue
 
             # Otherwise, add this fiber to the frontier
+            head = head._occupied()
             for c, p in zip(head.coords, head.payloads):
                 frontier.append((p, c, depth + 1))
 
@@ -1398,17 +1933,7 @@ class Tensor:
 
             last_coord = coord
 
-        # Build the new tensor
-        kwargs = {"fiber": root, "rank_ids": rank_ids}
-        old_shape = self.getShape(authoritative=True)
-        if old_shape:
-            new_shape = [old_shape[guide[i]] for i in range(swiz_len)] \
-                + old_shape[swiz_len:]
-            kwargs["shape"] = new_shape
-        swizzled = Tensor.fromFiber(**kwargs)
-        swizzled.setName(f"{old_name}+swizzled")
-
-        return swizzled
+        return root
 
 
     def swapRanks(self, depth=0):
@@ -1449,12 +1974,15 @@ class Tensor:
         shape = None
 
         # Only call Fiber.swapRanks if there are actually payloads to swap
-        if not all(fiber.isEmpty() for fiber in self.ranks[depth].fibers):
+        if all(fiber.isEmpty() for fiber in self.ranks[depth].fibers):
+            root = copy.deepcopy(self.getRoot())
+        elif depth == 0:
+            # Fiber.swapRanks() copies (or shares) the fibers it moves
+            root = self.getRoot().swapRanks()
+        else:
             root = self._modifyRoot(Fiber.swapRanks,
                                     Fiber.swapRanksBelow,
                                     depth=depth)
-        else:
-            root = copy.deepcopy(self.getRoot())
 
         #
         # Create Tensor from rank_ids and root fiber
@@ -1705,7 +2233,7 @@ class Tensor:
         #
         # Create new root fiber
         #
-        root_copy = copy.deepcopy(self.getRoot())
+        root_copy = self.getRoot()._transformCopy(depth)
         if depth == 0:
             root = func(root_copy, **kwargs)
         else:
@@ -1791,12 +2319,12 @@ class Tensor:
 #
 
     @staticmethod
-    def parse(file):
+    def parse(file, max_depth=None):
         """Parse a yaml file containing a tensor"""
 
         with open(file, 'r') as stream:
             try:
-                y_file = yaml.safe_load(stream)
+                y_file = loadYAML(stream, max_depth=max_depth)
             except yaml.YAMLError as exc:
                 print(exc)
                 exit(1)
@@ -1827,6 +2355,15 @@ class Tensor:
         else:
             shape = None
 
+        #
+        # Keep only the loaded ranks
+        #
+        if max_depth is not None:
+            rank_ids = rank_ids[:max_depth]
+
+            if shape is not None:
+                shape = shape[:max_depth]
+
         #
         # Get tensor name
         #
@@ -1843,22 +2380,56 @@ class Tensor:
             print("Yaml has no root")
             exit(1)
 
-        y_root = y_tensor['root']
-
         #
-        # Generate the tree recursively
-        #   Note: fibers are added into self.ranks inside method
+        # Note: the fibers were created while loading the file, and
+        #       are added into self.ranks by the caller
         #
-        fiber = Fiber.dict2fiber(y_root[0])
+        fiber = y_tensor['root'][0]
 
         return (rank_ids, fiber, shape, name)
 
 
-    def dump(self, filename):
-        """Dump a tensor to a file in YAML format"""
+    def dump(self, filename, fmt="yaml"):
+        """Dump a tensor to a file
+
+        Parameters
+        ----------
+
+        filename: string
+            Name of the file to write (a directory for the binary format)
+
+        fmt: string, default="yaml"
+            The file format; "yaml" or "binary" (see
+            `fibertree.core.tensor_file`)
+
+        Notes
+        -----
+
+        Use `Tensor.fromFile()` to read the tensor back.
+
+        """
+
+        assert fmt in ["yaml", "binary"], f"Unsupported file format: {fmt}"
 
         root = self.getRoot()
 
+        if fmt == "binary":
+            if isinstance(root, Payload):
+                default = 0
+                formats = []
+            else:
+                default = self.getDefault()
+                formats = [rank.getFormat() for rank in self.ranks]
+
+            writeBinary(filename,
+                        self.getRankIds(),
+                        root,
+                        shape=self.getShape(),
+                        name=self.getName(),
+                        default=default,
+                        formats=formats)
+            return
+
         if isinstance(root, Payload):
             root_dict = Payload.payload2dict(root)
         else:
@@ -1873,6 +2444,207 @@ class Tensor:
         with open(filename, 'w') as file:
             yaml.dump(tensor_dict, file)
 
+
+    def toCOO(self):
+        """Get the elements of the tensor as arrays of coordinates and values
+
+        Returns
+        -------
+
+        coords: list of numpy arrays
+            The coordinates of the elements, one array per rank
+            (ordered by point)
+
+        values: numpy array
+            The values of the elements
+
+        Notes
+        -----
+
+        Elements that hold the default value (i.e., explicit zeros)
+        are not included, as they are dropped by `Tensor.fromCOO()`.
+
+        """
+
+        root = self.getRoot()
+
+        assert isinstance(root, Fiber), "Tensor has no ranks"
+
+        (segs, coords, values) = segmentsFromFiber(root,
+                                                   len(self.ranks),
+                                                   default=Payload.get(self.getDefault()))
+
+        values = np.asarray(values)
+        if len(values) == 0:
+            values = values.astype(np.int64)
+
+        return coordsFromSegments(segs, coords), values
+
+
+    def toCSR(self):
+        """Get a matrix in compressed sparse row form
+
+        Returns
+        -------
+
+        indptr: numpy array
+            The offsets in `indices` and `data` where each row (i.e.,
+            coordinate of the top rank) starts
+
+        indices: numpy array
+            The column coordinates of the elements
+
+        data: numpy array
+            The values of the elements
+
+        """
+
+        assert len(self.ranks) == 2, "Only matrices can be converted to CSR"
+
+        ((rows, cols), values) = self.toCOO()
+
+        return self._compress(rows, cols, values, self.getShape()[0])
+
+
+    def toCSC(self):
+        """Get a matrix in compressed sparse column form
+
+        Returns
+        -------
+
+        indptr: numpy array
+            The offsets in `indices` and `data` where each column
+            (i.e., coordinate of the bottom rank) starts
+
+        indices: numpy array
+            The row coordinates of the elements
+
+        data: numpy array
+            The values of the elements
+
+        """
+
+        assert len(self.ranks) == 2, "Only matrices can be converted to CSC"
+
+        ((rows, cols), values) = self.toCOO()
+
+        order = np.lexsort((rows, cols))
+
+        return self._compress(cols[order],
+                              rows[order],
+                              values[order],
+                              self.getShape()[1])
+
+
+    @staticmethod
+    def _compress(major, minor, values, size):
+        """Compress sorted major coordinates into offsets"""
+
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(major, minlength=size), out=indptr[1:])
+
+        return indptr, minor, values
+
+
+    def toNumpy(self, dtype=None):
+        """Get the tensor as a (dense) numpy array
+
+        Parameters
+        ----------
+
+        dtype: numpy dtype, default=(the dtype of the values)
+            The dtype of the array
+
+        Returns
+        -------
+
+        ndarray: numpy array
+            An array with the shape of the tensor, with the default
+            value in the empty elements
+
+        """
+
+        root = self.getRoot()
+
+        if not isinstance(root, Fiber):
+            return np.array(Payload.get(root), dtype=dtype)
+
+        (coords, values) = self.toCOO()
+
+        default = Payload.get(self.getDefault())
+
+        if dtype is None and len(values) == 0:
+            dtype = np.asarray(default).dtype
+        elif dtype is None:
+            dtype = np.result_type(values, np.asarray(default))
+
+        ndarray = np.full(self.getShape(), default, dtype=dtype)
+        ndarray[tuple(coords)] = values
+
+        return ndarray
+
+
+    def toScipySparse(self, format="csr"):
+        """Get a matrix as a scipy sparse matrix
+
+        Parameters
+        ----------
+
+        format: str, default="csr"
+            The format of the sparse matrix; "csr", "csc" or "coo"
+
+        Returns
+        -------
+
+        matrix: scipy.sparse matrix
+            The matrix (with its top rank as the rows)
+
+        Raises
+        ------
+
+        ImportError
+            scipy is not installed
+
+        """
+
+        import scipy.sparse
+
+        assert format in ["csr", "csc", "coo"], f"Unsupported format: {format}"
+        assert len(self.ranks) == 2, "Only matrices can be converted to scipy"
+
+        shape = tuple(self.getShape())
+
+        if format == "csr":
+            (indptr, indices, data) = self.toCSR()
+            return scipy.sparse.csr_matrix((data, indices, indptr), shape=shape)
+
+        if format == "csc":
+            (indptr, indices, data) = self.toCSC()
+            return scipy.sparse.csc_matrix((data, indices, indptr), shape=shape)
+
+        ((rows, cols), values) = self.toCOO()
+        return scipy.sparse.coo_matrix((values, (rows, cols)), shape=shape)
+
+
+    def toMatrixMarket(self, filename):
+        """Write a matrix to a Matrix Market file
+
+        Parameters
+        ----------
+
+        filename: string
+            The name of the Matrix Market (.mtx) file
+
+        """
+
+        assert len(self.ranks) == 2, "Only matrices can be written to Matrix Market files"
+
+        (coords, values) = self.toCOO()
+
+        comment = self.getName() or None
+
+        writeMatrixMarket(filename, self.getShape(), coords, values, comment=comment)
+
 #
 # Copy operation
 #
@@ -0,0 +1,377 @@
+#cython: language_level=3
+"""Tensor File
+
+Functions to write and read tensors in a binary, columnar file
+format, which is much more compact and faster to load than the YAML
+format (see `Tensor.dump()` and `Tensor.fromFile()`).
+
+A binary tensor file is a directory holding a small YAML file of
+tensor attributes (`tensor.yaml`) and a set of `.npy` files with
+the contents of the fibertree in compressed sparse fiber (CSF) form
+(see `fibertree.core.csf`). For each rank `r` (from the top):
+
+- `coords-r.npy` - the coordinates of all the fibers of the rank,
+  one fiber after another
+
+- `segs-r.npy` - the offsets in `coords-r.npy` where each fiber of
+  the rank starts, plus the total number of coordinates in the rank
+
+The payload of the i-th element of rank `r` is the i-th fiber of
+rank `r+1`, and the payloads of the leaf rank are held in
+`payloads.npy`.
+
+Only fibertrees with integer coordinates and numeric (or string)
+leaf payloads can be held in the binary format.
+
+Matrices can also be read and written in the (text) Matrix Market
+format (see `Tensor.fromMatrixMarket()`).
+
+"""
+
+import logging
+import os
+
+import numpy as np
+import yaml
+
+from .csf import segmentsFromFiber, fiberFromSegments
+from .fiber import Fiber
+from .payload import Payload
+
+#
+# Set up logging
+#
+module_logger = logging.getLogger('fibertree.core.tensor_file')
+
+
+ATTRS_FILE = "tensor.yaml"
+"""The name of the file holding the tensor attributes"""
+
+VERSION = 1
+"""The version of the binary format"""
+
+_CHUNK = 1 << 16
+"""The number of elements formatted at a time when writing text"""
+
+
+def isBinaryFile(path):
+    """Check if `path` is a binary tensor file
+
+    Parameters
+    ----------
+    path: str
+        The path to check
+
+    Returns
+    -------
+    is_binary: Boolean
+        Whether `path` is a directory holding a binary tensor file
+
+    """
+    return os.path.isfile(os.path.join(path, ATTRS_FILE))
+
+
+def writeBinary(path,
+                rank_ids,
+                root,
+                shape=None,
+                name="",
+                default=0,
+                formats=None):
+    """Write a tensor in the binary format
+
+    The fibertree is converted into CSF form (see
+    `fibertree.core.csf.segmentsFromFiber()`) and each array is
+    written into its own file.
+
+    Parameters
+    ----------
+    path: str
+        The name of the directory to write (created if necessary)
+
+    rank_ids: list of strings
+        The names of the ranks of the tensor
+
+    root: Fiber or Payload
+        The root of the tensor (a payload for a rank zero tensor)
+
+    shape: list of integers, default=None
+        The shape of the tensor
+
+    name: string, default=""
+        The name of the tensor
+
+    default: value, default=0
+        The default value of the leaf payloads
+
+    formats: list of strings, default=None
+        The formats of the ranks (see `Tensor.setFormat()`)
+
+    Returns
+    -------
+    None
+
+    """
+
+    os.makedirs(path, exist_ok=True)
+
+    attrs = {'version': VERSION,
+             'name': name,
+             'rank_ids': list(rank_ids),
+             'shape': None if shape is None else list(shape),
+             'default': Payload.get(default),
+             'formats': None if formats is None else list(formats)}
+
+    if not isinstance(root, Fiber):
+        _save(path, "payloads", _pack([Payload.get(root)]))
+        _writeAttrs(path, attrs)
+        return
+
+    (segs, coords, values) = segmentsFromFiber(root, len(rank_ids))
+
+    for level in range(len(rank_ids)):
+        _save(path, f"segs-{level}", segs[level])
+        _save(path, f"coords-{level}", coords[level])
+
+    _save(path, "payloads", _pack(values))
+
+    _writeAttrs(path, attrs)
+
+
+def readBinary(path, columnar=False):
+    """Read a tensor in the binary format
+
+    The arrays are memory mapped, and the fibers of each rank are
+    created in a single pass over the arrays of the rank, from the
+    leaf rank up.
+
+    Parameters
+    ----------
+    path: str
+        The name of the directory holding the tensor
+
+    columnar: Boolean, default=False
+        Create the leaf fibers with columnar storage (see
+        `Fiber.fromColumnar()`)
+
+    Returns
+    -------
+    attrs: dictionary
+        The attributes of the tensor ("name", "rank_ids", "shape",
+        "default" and "formats")
+
+    root: Fiber or value
+        The root of the tensor (a value for a rank zero tensor)
+
+    """
+
+    with open(os.path.join(path, ATTRS_FILE), "r") as stream:
+        attrs = yaml.safe_load(stream)['tensor']
+
+    assert attrs.get('version', VERSION) <= VERSION, \
+        f"Unsupported binary tensor file version: {attrs['version']}"
+
+    values = _load(path, "payloads")
+
+    num_ranks = len(attrs['rank_ids'])
+
+    if num_ranks == 0:
+        return attrs, values.tolist()[0]
+
+    segs = [_load(path, f"segs-{level}") for level in range(num_ranks)]
+    coords = [_load(path, f"coords-{level}") for level in range(num_ranks)]
+
+    root = fiberFromSegments(segs, coords, values, columnar=columnar)
+
+    return attrs, root
+
+
+def readMatrixMarket(filename):
+    """Read a matrix in Matrix Market format
+
+    Both the "coordinate" and "array" formats with "real", "integer"
+    or "pattern" values are supported. The elements mirrored by a
+    "symmetric" or "skew-symmetric" matrix are included in the
+    result.
+
+    Parameters
+    ----------
+    filename: str
+        The name of the Matrix Market (.mtx) file
+
+    Returns
+    -------
+    shape: list of integers
+        The shape of the matrix
+
+    coords: list of numpy arrays
+        The (zero-based) row and column coordinates of the elements
+
+    values: numpy array
+        The values of the elements
+
+    """
+
+    with open(filename, "r") as stream:
+        header = stream.readline().split()
+
+        assert len(header) == 5 and header[0].lower() == "%%matrixmarket", \
+            f"Not a Matrix Market file: {filename}"
+
+        (obj, fmt, field, symmetry) = (h.lower() for h in header[1:])
+
+        assert obj == "matrix", f"Unsupported Matrix Market object: {obj}"
+        assert fmt in ["coordinate", "array"], \
+            f"Unsupported Matrix Market format: {fmt}"
+        assert field in ["real", "double", "integer", "pattern"], \
+            f"Unsupported Matrix Market field: {field}"
+        assert symmetry in ["general", "symmetric", "skew-symmetric"], \
+            f"Unsupported Matrix Market symmetry: {symmetry}"
+
+        line = stream.readline()
+        while line.startswith("%") or not line.strip():
+            line = stream.readline()
+
+        size = [int(x) for x in line.split()]
+
+        #
+        # Parse all the remaining (whitespace-separated) numbers at once
+        #
+        dtype = np.int64 if field in ["integer", "pattern"] else np.float64
+        data = np.fromstring(stream.read(), dtype=dtype, sep=" ")
+
+    shape = size[:2]
+
+    if fmt == "array":
+        assert symmetry == "general", \
+            "Only general Matrix Market arrays are supported"
+        assert len(data) == shape[0] * shape[1], \
+            f"Malformed Matrix Market file: {filename}"
+
+        # Array entries are in column-major order
+        (cols, rows) = np.divmod(np.arange(len(data), dtype=np.int64), shape[0])
+        return shape, [rows, cols], data
+
+    width = 2 if field == "pattern" else 3
+
+    assert len(data) == size[2] * width, \
+        f"Malformed Matrix Market file: {filename}"
+
+    data = data.reshape(-1, width)
+
+    rows = data[:, 0].astype(np.int64) - 1
+    cols = data[:, 1].astype(np.int64) - 1
+
+    if field == "pattern":
+        values = np.ones(len(rows), dtype=np.int64)
+    else:
+        values = data[:, 2]
+
+    if symmetry != "general":
+        mirror = rows != cols
+        sign = 1 if symmetry == "symmetric" else -1
+
+        (rows, cols, values) = (np.concatenate((rows, cols[mirror])),
+                                np.concatenate((cols, rows[mirror])),
+                                np.concatenate((values, sign * values[mirror])))
+
+    return shape, [rows, cols], values
+
+
+def writeMatrixMarket(filename, shape, coords, values, comment=None):
+    """Write a matrix in Matrix Market format
+
+    The matrix is written in the "coordinate" format as a "general"
+    matrix with "integer" or "real" values.
+
+    Parameters
+    ----------
+    filename: str
+        The name of the Matrix Market (.mtx) file
+
+    shape: list of integers
+        The shape of the matrix
+
+    coords: list of arrays
+        The (zero-based) row and column coordinates of the elements
+
+    values: array
+        The values of the elements
+
+    comment: str, default=None
+        A comment to include after the header
+
+    Returns
+    -------
+    None
+
+    """
+
+    (rows, cols) = (np.asarray(c, dtype=np.int64) for c in coords)
+    values = np.asarray(values)
+
+    assert len(shape) == 2, "Matrix Market files only hold matrices"
+
+    if values.dtype.kind in "biu":
+        field = "integer"
+        value_fmt = "%d"
+    else:
+        assert values.dtype.kind == "f", \
+            "Matrix Market values must be integer or real"
+
+        field = "real"
+        value_fmt = "%.17g"
+
+    with open(filename, "w") as stream:
+        stream.write(f"%%MatrixMarket matrix coordinate {field} general\n")
+
+        if comment is not None:
+            for line in comment.splitlines():
+                stream.write(f"% {line}\n")
+
+        stream.write(f"{shape[0]} {shape[1]} {len(values)}\n")
+
+        for start in range(0, len(values), _CHUNK):
+            end = start + _CHUNK
+            lines = np.char.add(np.char.add(
+                np.char.mod("%d ", rows[start:end] + 1),
+                np.char.mod("%d ", cols[start:end] + 1)),
+                np.char.mod(value_fmt, values[start:end]))
+
+            stream.write("\n".join(lines.tolist()))
+            stream.write("\n")
+
+#
+# Utility functions
+#
+def _pack(values):
+    """Convert the leaf payload values into a numpy array"""
+
+    packed = np.asarray(values)
+
+    if len(values) == 0:
+        return packed.astype(np.int64)
+
+    assert packed.ndim == 1 and packed.dtype != object, \
+        "Binary tensor files can only hold scalar leaf payloads"
+
+    return packed
+
+
+def _save(path, name, values):
+    """Save an array into the directory"""
+
+    np.save(os.path.join(path, name + ".npy"), values)
+
+
+def _load(path, name):
+    """Memory map an array in the directory"""
+
+    return np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+
+
+def _writeAttrs(path, attrs):
+    """Write the tensor attributes file"""
+
+    with open(os.path.join(path, ATTRS_FILE), "w") as file:
+        yaml.dump({'tensor': attrs}, file)
@@ -0,0 +1,513 @@
+#cython: language_level=3
+"""Trace File
+
+Functions to write and read the traces of uses collected by `Metrics`
+(see `Metrics.trace()`) in a binary format, which is much faster to
+write and read than the original CSV format.
+
+A binary trace file is a `.npy` file holding a one-dimensional
+structured array with one 64-bit integer field per column of the
+trace, named after the corresponding column of the CSV format (e.g.,
+"M_pos", "K_pos", "M", "K", "fiber_pos"), so it can also be loaded
+directly with `numpy.load()`.
+
+A trace is written one chunk of rows at a time through a single open
+file (see `TraceWriter`), in either format. In the binary format, the
+header of the file, which holds the number of rows, is rewritten when
+the trace is closed.
+
+Traces can also be collected in memory (see `Trace`), within a
+budget of memory shared by all the traces (see `TraceMemory`), past
+which they are spilled into binary trace files.
+
+The readers of traces (see `readTrace()` and `iterTrace()`) accept
+traces held in memory and trace files in both the binary and the CSV
+formats (picked by the extension of the file name), and a binary
+trace can be exported to the CSV format for debugging (see
+`traceToCSV()`).
+
+"""
+
+import logging
+import os
+
+from array import array
+
+import numpy as np
+
+#
+# Set up logging
+#
+module_logger = logging.getLogger('fibertree.core.trace_file')
+
+
+_CHUNK = 1 << 16
+"""The number of rows formatted at a time when writing CSV"""
+
+
+class Trace:
+    """A trace held in memory
+
+    Traces collected in memory (see `Metrics.setTraceFormat()`) are
+    handed to their readers as `Trace` objects, which can be used
+    anywhere the name of a trace file can.
+
+    Parameters
+    ----------
+    names: list of strings
+        The names of the columns of the trace
+
+    rows: numpy array
+        A two-dimensional (rows x columns) int64 array of the trace
+
+    """
+
+    def __init__(self, names, rows):
+
+        self.names = list(names)
+        self.rows = rows
+
+    def __len__(self):
+        """Return the number of rows of the trace"""
+
+        return len(self.rows)
+
+    def __repr__(self):
+
+        return f"Trace({self.names}, <{len(self.rows)} rows>)"
+
+
+class TraceMemory:
+    """A budget of memory shared by the traces held in memory
+
+    Parameters
+    ----------
+    max_bytes: int
+        The number of bytes the traces may hold in memory
+
+    """
+
+    def __init__(self, max_bytes):
+
+        assert max_bytes >= 0
+
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+
+    def reserve(self, nbytes):
+        """Reserve `nbytes` bytes, returning whether they fit the budget"""
+
+        if self.nbytes + nbytes > self.max_bytes:
+            return False
+
+        self.nbytes += nbytes
+        return True
+
+    def release(self, nbytes):
+        """Release `nbytes` previously reserved bytes"""
+
+        self.nbytes -= nbytes
+
+
+class TraceWriter:
+    """Write a trace into a trace file (or into memory)
+
+    The rows of the trace are appended (flattened) to the `rows`
+    list, and every `chunk_len` values (see `flush()`) they are
+    packed into a typed array (or formatted as CSV lines) and
+    written to the file.
+
+    If a `memory` budget is given, the packed chunks are instead kept
+    in memory for as long as they fit in the budget. Once they do not,
+    the trace is spilled into the (binary) file and the rest of it is
+    written there.
+
+    Parameters
+    ----------
+    filename: str
+        The name of the file to write (`.npy` for the binary format)
+
+    names: list of strings
+        The names of the columns of the trace
+
+    chunk_rows: int, default=1000
+        The number of lines buffered before they are written (in the
+        CSV format, the header is one of the lines of the first chunk)
+
+    memory: TraceMemory, default=None
+        The budget of memory for holding the trace in memory
+
+    """
+
+    def __init__(self, filename, names, chunk_rows=1000, memory=None):
+
+        self.filename = filename
+        self.names = list(names)
+        self.num_rows = 0
+
+        self.rows = []
+        self.chunk_len = chunk_rows * len(self.names)
+
+        self._binary = isBinaryTrace(filename)
+
+        if memory is not None:
+            assert self._binary, "Traces are spilled in the binary format"
+
+            self._memory = memory
+            self._chunks = []
+            self._file = None
+            return
+
+        self._chunks = None
+        self._open()
+
+
+    def _open(self):
+        """Open the file and write its header"""
+
+        if not self._binary:
+            self._file = open(self.filename, "w")
+            self._file.write(",".join(self.names) + "\n")
+
+            self._chunk_len = self.chunk_len
+            self.chunk_len -= len(self.names)
+            return
+
+        self._dtype = _traceDtype(self.names)
+
+        #
+        # Reserve space for a header with the largest number of rows
+        #
+        self._header_len = len(_header(self._dtype, np.iinfo(np.int64).max))
+
+        self._file = open(self.filename, "wb")
+        self._file.write(_header(self._dtype, 0, self._header_len))
+
+
+    def inMemory(self):
+        """Return whether the trace is (still) held in memory"""
+
+        return self._chunks is not None
+
+
+    def flush(self):
+        """Write the buffered rows to the file (or memory)"""
+
+        if not self.rows:
+            return
+
+        num_cols = len(self.names)
+        assert len(self.rows) % num_cols == 0
+
+        if self._binary:
+            try:
+                chunk = array("q", self.rows)
+            except TypeError:
+                raise TypeError("Binary traces can only hold integer coordinates") from None
+
+            if self._chunks is not None and not self._keep(chunk):
+                self._spill()
+
+            if self._chunks is None:
+                chunk.tofile(self._file)
+
+        else:
+            values = map(str, self.rows)
+            lines = map(",".join, zip(*[values] * num_cols))
+            self._file.write("\n".join(lines) + "\n")
+
+            self.chunk_len = self._chunk_len
+
+        # Make the chunk visible to readers of the (unfinished) trace
+        if self._file is not None:
+            self._file.flush()
+
+        self.num_rows += len(self.rows) // num_cols
+        self.rows = []
+
+
+    def _keep(self, chunk):
+        """Keep a chunk in memory, if it fits in the budget"""
+
+        nbytes = len(chunk) * chunk.itemsize
+
+        if not self._memory.reserve(nbytes):
+            return False
+
+        self._chunks.append(chunk)
+        return True
+
+
+    def _spill(self):
+        """Move the chunks held in memory into the file"""
+
+        module_logger.info("Spilling trace %s (%d rows) to disk",
+                           self.filename, self.num_rows)
+
+        self._open()
+
+        for chunk in self._chunks:
+            chunk.tofile(self._file)
+            self._memory.release(len(chunk) * chunk.itemsize)
+
+        self._chunks = None
+
+
+    def close(self):
+        """Write the remaining rows and the final header of the file
+
+        Returns
+        -------
+        trace: Trace or str
+            The trace, if it is held in memory, otherwise the name
+            of its file
+
+        """
+
+        if self._file is None:
+            self.flush()
+
+        if self._chunks is not None:
+            values = np.frombuffer(b"".join(self._chunks), dtype=np.int64)
+            self._chunks = []
+
+            return Trace(self.names, values.reshape(-1, len(self.names)))
+
+        try:
+            self.flush()
+
+            if self._binary:
+                self._file.seek(0)
+                self._file.write(_header(self._dtype, self.num_rows, self._header_len))
+
+        finally:
+            self._file.close()
+
+        return self.filename
+
+
+def isBinaryTrace(filename):
+    """Check if `filename` names a binary trace file
+
+    Parameters
+    ----------
+    filename: str
+        The name of the trace file
+
+    Returns
+    -------
+    is_binary: Boolean
+        Whether the file is in the binary (`.npy`) format
+
+    """
+    return os.path.splitext(filename)[1] == ".npy"
+
+
+def readTrace(filename, mmap=False):
+    """Read a trace in either the binary or the CSV format
+
+    Parameters
+    ----------
+    filename: str or Trace
+        The name of the trace file (or a trace held in memory)
+
+    mmap: Boolean, default=False
+        Memory map a binary trace file rather than reading it
+
+    Returns
+    -------
+    names: list of strings
+        The names of the columns of the trace
+
+    rows: numpy array
+        A two-dimensional (rows x columns) array of the trace
+
+    """
+
+    if isinstance(filename, Trace):
+        return filename.names, filename.rows
+
+    if isBinaryTrace(filename):
+        values = np.load(filename, mmap_mode="r" if mmap else None)
+        names = list(values.dtype.names)
+
+        rows = values.view(np.int64).reshape(len(values), len(names))
+        return names, rows
+
+    with open(filename, "r") as stream:
+        names = stream.readline()[:-1].split(",")
+        text = stream.read()
+
+    text = text.rstrip().replace("\n", ",")
+
+    if not text:
+        return names, np.empty((0, len(names)), dtype=np.int64)
+
+    rows = np.fromstring(text, dtype=np.int64, sep=",")
+    return names, rows.reshape(-1, len(names))
+
+
+def iterTrace(filename):
+    """Iterate over the rows of a trace without reading it all at once
+
+    Parameters
+    ----------
+    filename: str or Trace
+        The name of the trace file (or a trace held in memory)
+
+    Returns
+    -------
+    names: list of strings
+        The names of the columns of the trace
+
+    rows: iterator
+        An iterator over the rows (lists of integers) of the trace
+
+    """
+
+    if isinstance(filename, Trace) or isBinaryTrace(filename):
+        (names, rows) = readTrace(filename, mmap=True)
+        return names, _iterChunks(rows)
+
+    with open(filename, "r") as stream:
+        names = stream.readline()[:-1].split(",")
+
+    return names, _iterLines(filename)
+
+
+def traceShape(filename):
+    """Get the number of rows and columns of a trace without reading it
+
+    Parameters
+    ----------
+    filename: str or Trace
+        The name of the trace file (or a trace held in memory)
+
+    Returns
+    -------
+    shape: tuple of ints
+        The number of rows and the number of columns of the trace
+
+    """
+
+    if isinstance(filename, Trace) or isBinaryTrace(filename):
+        return readTrace(filename, mmap=True)[1].shape
+
+    with open(filename, "rb") as stream:
+        num_cols = stream.readline().count(b",") + 1
+
+        num_rows = 0
+        for block in iter(lambda: stream.read(_CHUNK * 16), b""):
+            num_rows += block.count(b"\n")
+
+    return num_rows, num_cols
+
+
+def writeTrace(filename, names, rows):
+    """Write a trace in the format given by the extension of `filename`
+
+    Parameters
+    ----------
+    filename: str
+        The name of the trace file (`.npy` for the binary format)
+
+    names: list of strings
+        The names of the columns of the trace
+
+    rows: numpy array
+        A two-dimensional (rows x columns) array of the trace
+
+    Returns
+    -------
+    None
+
+    """
+
+    rows = np.ascontiguousarray(rows, dtype=np.int64).reshape(-1, len(names))
+
+    if isBinaryTrace(filename):
+        np.save(filename, rows.view(_traceDtype(names)).reshape(-1))
+        return
+
+    with open(filename, "w") as stream:
+        stream.write(",".join(names) + "\n")
+
+        for start in range(0, len(rows), _CHUNK):
+            lines = [",".join(map(str, row))
+                     for row in rows[start:start + _CHUNK].tolist()]
+
+            stream.write("\n".join(lines) + "\n")
+
+
+def traceToCSV(filename, csv_filename=None):
+    """Export a binary trace in the CSV format
+
+    Parameters
+    ----------
+    filename: str
+        The name of the binary trace file
+
+    csv_filename: str, default=None
+        The name of the CSV file (by default, `filename` with a
+        `.csv` extension)
+
+    Returns
+    -------
+    csv_filename: str
+        The name of the CSV file
+
+    """
+
+    if csv_filename is None:
+        csv_filename = os.path.splitext(filename)[0] + ".csv"
+
+    writeTrace(csv_filename, *readTrace(filename))
+
+    return csv_filename
+
+#
+# Utility functions
+#
+def _iterChunks(rows):
+    """Iterate over the rows of an array, converting a chunk at a time"""
+
+    for start in range(0, len(rows), _CHUNK):
+        yield from rows[start:start + _CHUNK].tolist()
+
+
+def _iterLines(filename):
+    """Iterate over the rows of a CSV trace file"""
+
+    with open(filename, "r") as stream:
+        stream.readline()
+
+        for line in stream:
+            yield [int(val) for val in line[:-1].split(",")]
+
+
+def _traceDtype(names):
+    """Get the structured dtype of the rows of a trace"""
+
+    return np.dtype([(name, np.int64) for name in names])
+
+
+def _header(dtype, num_rows, length=None):
+    """Build a `.npy` (version 1.0) header, padded to `length` bytes"""
+
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype),
+                   'fortran_order': False,
+                   'shape': (num_rows,)})
+
+    #
+    # The header is padded with spaces and ends with a newline, and
+    # the data starts at a multiple of 64 bytes
+    #
+    prefix_len = 10
+    if length is None:
+        length = -(-(prefix_len + len(header) + 1) // 64) * 64
+
+    header = header.ljust(length - prefix_len - 1) + "\n"
+
+    return np.lib.format.magic(1, 0) \
+        + len(header).to_bytes(2, "little") \
+        + header.encode("latin1")
@@ -0,0 +1,214 @@
+#cython: language_level=3
+"""YAML Loader
+
+A streaming loader for the YAML representation of fibers and
+tensors (see `Fiber.fiber2dict()` and `Tensor.dump()`).
+
+Rather than first loading the entire YAML document into nested
+dictionaries and lists and then converting them into fibers, the
+loader is driven by the event stream of the YAML parser (using the
+`libyaml` based parser when it is available). Each fiber is created
+as soon as the end of its description is parsed, so only the
+coordinates and payloads of the fibers on the current path from the
+root are ever held in any other form. No recursion is used, so the
+depth of the fibertree is not limited by the Python stack.
+
+"""
+
+import logging
+
+import yaml
+
+#
+# Set up logging
+#
+module_logger = logging.getLogger('fibertree.core.yaml_loader')
+
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+"""The fastest available safe loader"""
+
+
+class _Mapping():
+    """A YAML mapping being parsed"""
+
+    __slots__ = ("dict", "key", "is_fiber", "anchor")
+
+    def __init__(self, anchor):
+        self.dict = {}
+        self.key = _NONE
+        self.is_fiber = False
+        self.anchor = anchor
+
+
+class _Skipped():
+    """The count of leaf payloads of a fiber below the `max_depth`"""
+
+    __slots__ = ("count",)
+
+    def __init__(self, count):
+        self.count = count
+
+
+_NONE = object()
+"""Marker for a missing value"""
+
+
+def loadYAML(stream, max_depth=None):
+    """Load a YAML document holding fibers
+
+    Every mapping in the document with a "fiber" key (holding a
+    mapping with "coords" and "payloads") is replaced by a `Fiber`,
+    everything else is loaded like `yaml.safe_load()` does.
+
+    Parameters
+    ----------
+    stream: str or file
+        The YAML document
+
+    max_depth: integer, default=None
+        The number of levels of fibers to load. A fiber at the lowest
+        loaded level gets the number of leaf payloads in each of its
+        (unloaded) subtrees as its payloads.
+
+    Returns
+    -------
+    document: object
+        The contents of the first document in the stream
+
+    Raises
+    ------
+    yaml.YAMLError
+        Malformed YAML
+
+    AssertionError
+        Malformed fiber
+
+    """
+
+    from .fiber import Fiber
+
+    assert max_depth is None or max_depth > 0, "Illegal max_depth"
+
+    loader = _Loader(stream)
+
+    resolve = loader.resolve
+    constructors = loader.yaml_constructors
+
+    anchors = {}
+    stack = []
+    result = _NONE
+
+    #
+    # Number of enclosing fibers
+    #
+    depth = 0
+
+    try:
+        while result is _NONE:
+            event = loader.get_event()
+            cls = event.__class__
+
+            if cls is yaml.ScalarEvent:
+                text = event.value
+
+                if event.implicit[0] and event.style is None \
+                   and text.isdigit() and text.isascii() \
+                   and (text[0] != "0" or len(text) == 1):
+                    # Fast path for plain (non-octal) integers
+                    value = int(text)
+                else:
+                    tag = event.tag
+                    if tag is None or tag == "!":
+                        tag = resolve(yaml.ScalarNode, text, event.implicit)
+
+                    node = yaml.ScalarNode(tag, text, style=event.style)
+                    value = constructors[tag](loader, node)
+
+                if event.anchor is not None:
+                    anchors[event.anchor] = value
+
+            elif cls is yaml.SequenceStartEvent:
+                stack.append([])
+                if event.anchor is not None:
+                    anchors[event.anchor] = stack[-1]
+                continue
+
+            elif cls is yaml.MappingStartEvent:
+                stack.append(_Mapping(event.anchor))
+                continue
+
+            elif cls is yaml.SequenceEndEvent:
+                value = stack.pop()
+
+            elif cls is yaml.MappingEndEvent:
+                frame = stack.pop()
+                value = frame.dict
+
+                if frame.is_fiber:
+                    value = _makeFiber(Fiber, value, depth, max_depth)
+                    depth -= 1
+
+                if frame.anchor is not None:
+                    anchors[frame.anchor] = value
+
+            elif cls is yaml.AliasEvent:
+                value = anchors[event.anchor]
+
+            elif cls is yaml.StreamEndEvent:
+                # Empty stream
+                return None
+
+            else:
+                # Stream and document start events
+                continue
+
+            #
+            # Add the value to its container
+            #
+            if not stack:
+                result = value
+                continue
+
+            top = stack[-1]
+
+            if top.__class__ is list:
+                top.append(value)
+            elif top.key is _NONE:
+                top.key = value
+
+                if value == "fiber":
+                    top.is_fiber = True
+                    depth += 1
+            else:
+                top.dict[top.key] = value
+                top.key = _NONE
+    finally:
+        loader.dispose()
+
+    return result
+
+
+def _makeFiber(Fiber, fiber_dict, depth, max_depth):
+    """Create the fiber (or skipped count) for a parsed fiber mapping"""
+
+    y_fiber = fiber_dict['fiber']
+
+    assert isinstance(y_fiber, dict) \
+        and 'coords' in y_fiber \
+        and 'payloads' in y_fiber, "Malformed fiber"
+
+    payloads = y_fiber['payloads']
+
+    if max_depth is not None and depth > max_depth:
+        count = 0
+        for p in payloads:
+            count += p.count if p.__class__ is _Skipped else 1
+
+        return _Skipped(count)
+
+    if max_depth is not None and depth == max_depth:
+        payloads = [p.count if p.__class__ is _Skipped else p
+                    for p in payloads]
+
+    return Fiber(coords=y_fiber['coords'], payloads=payloads)
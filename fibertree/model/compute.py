@@ -5,6 +5,7 @@ Compute the number operations executed
 import bisect
 
 from fibertree import Tensor
+from fibertree.core.trace_file import readTrace
 
 class Compute:
     """Class for storing all compute counting methods
@@ -36,7 +37,8 @@ class Compute:
         ----------
 
         leader_fn: str
-            The filename of the access trace of the leader
+            The filename of the access trace of the leader (in either
+            the CSV or the binary format)
 
         Returns
         ------
@@ -45,17 +47,9 @@ class Compute:
             Number of intersection tests
 
         """
-        with open(leader_fn, "r") as f:
-            # Throw away the header
-            f.readline()
+        (_, rows) = readTrace(leader_fn)
 
-            isects = 0
-            line = f.readline()
-            while line:
-                isects += 1
-                line = f.readline()
-
-        return isects
+        return len(rows)
 
     @staticmethod
     def numIsectNaive(fn0, fn1):
@@ -66,7 +60,8 @@ class Compute:
         ----------
 
         fn0, fn1: str
-            The filenames of the intersection traces
+            The filenames of the intersection traces (in either the CSV
+            or the binary format)
 
         Returns
         ------
@@ -76,9 +71,9 @@ class Compute:
 
         """
         def get_data(f, stamp_len):
-            line = f.readline()
+            line = next(f, None)
             if line:
-                data = tuple(int(val) for val in line[:-1].split(",")[:-1])
+                data = tuple(line[:-1])
             else:
                 data = (float("inf"),)
 
@@ -117,33 +112,35 @@ class Compute:
             return line0, data0, line1, data1
 
 
-        with open(fn0, "r") as f0, open(fn1, "r") as f1:
-            # Throw away headers
-            line0 = f0.readline()
-            f1.readline()
+        # Read the traces (without their headers)
+        (names0, rows0) = readTrace(fn0)
+        (_, rows1) = readTrace(fn1)
 
-            isects = 0
+        f0 = iter(rows0.tolist())
+        f1 = iter(rows1.tolist())
 
-            stamp_len = (len(line0.split(",")) - 1) // 2
-            line0, data0, line1, data1, = \
-                get_next(f0, None, None, f1, None, None, stamp_len, True, True)
+        isects = 0
 
-            while line0 and line1:
-                isects += 1
+        stamp_len = (len(names0) - 1) // 2
+        line0, data0, line1, data1, = \
+            get_next(f0, None, None, f1, None, None, stamp_len, True, True)
 
-                if data0 == data1:
-                    line0, data0, line1, data1 = \
-                        get_next(f0, line0, data0, f1, line1, data1, stamp_len, True, True)
+        while line0 and line1:
+            isects += 1
 
-                elif data0 < data1:
-                    line0, data0, line1, data1 = \
-                        get_next(f0, line0, data0, f1, line1, data1, stamp_len, True, False)
+            if data0 == data1:
+                line0, data0, line1, data1 = \
+                    get_next(f0, line0, data0, f1, line1, data1, stamp_len, True, True)
 
+            elif data0 < data1:
+                line0, data0, line1, data1 = \
+                    get_next(f0, line0, data0, f1, line1, data1, stamp_len, True, False)
 
-                # data0 > data1
-                else:
-                    line0, data0, line1, data1 = \
-                        get_next(f0, line0, data0, f1, line1, data1, stamp_len, False, True)
+
+            # data0 > data1
+            else:
+                line0, data0, line1, data1 = \
+                    get_next(f0, line0, data0, f1, line1, data1, stamp_len, False, True)
 
 
         return isects
@@ -158,7 +155,8 @@ class Compute:
         ----------
 
         fn0, fn1: str
-            The filenames of the intersection traces
+            The filenames of the intersection traces (in either the CSV
+            or the binary format)
 
         Returns
         ------
@@ -168,9 +166,9 @@ class Compute:
 
         """
         def get_data(f, stamp_len):
-            line = f.readline()
+            line = next(f, None)
             if line:
-                data = tuple(int(val) for val in line[:-1].split(",")[:-1])
+                data = tuple(line[:-1])
             else:
                 data = (float("inf"),)
 
@@ -217,48 +215,50 @@ class Compute:
 
             return line0, data0, line1, data1, new_fiber
 
-        with open(fn0, "r") as f0, open(fn1, "r") as f1:
-            # Throw away headers
-            line0 = f0.readline()
-            f1.readline()
+        # Read the traces (without their headers)
+        (names0, rows0) = readTrace(fn0)
+        (_, rows1) = readTrace(fn1)
 
-            isects = 0
-            curr = None
+        f0 = iter(rows0.tolist())
+        f1 = iter(rows1.tolist())
 
-            stamp_len = (len(line0.split(",")) - 1) // 2
-            line0, data0, line1, data1, _ = \
-                get_next(f0, None, None, f1, None, None, stamp_len, True, True)
+        isects = 0
+        curr = None
 
-            while line0 and line1:
-                # If both matched, there is nothing to skip
-                if data0 == data1:
-                    curr = None
-                    isects += 1
+        stamp_len = (len(names0) - 1) // 2
+        line0, data0, line1, data1, _ = \
+            get_next(f0, None, None, f1, None, None, stamp_len, True, True)
+
+        while line0 and line1:
+            # If both matched, there is nothing to skip
+            if data0 == data1:
+                curr = None
+                isects += 1
 
-                    line0, data0, line1, data1, new_fiber = \
-                        get_next(f0, line0, data0, f1, line1, data1, stamp_len, True, True)
+                line0, data0, line1, data1, new_fiber = \
+                    get_next(f0, line0, data0, f1, line1, data1, stamp_len, True, True)
 
-                # Intersect or skip tensor 0
-                elif data0 < data1:
-                    if curr != 0:
-                        curr = 0
-                        isects += 1
+            # Intersect or skip tensor 0
+            elif data0 < data1:
+                if curr != 0:
+                    curr = 0
+                    isects += 1
 
-                    line0, data0, line1, data1, new_fiber = \
-                        get_next(f0, line0, data0, f1, line1, data1, stamp_len, True, False)
+                line0, data0, line1, data1, new_fiber = \
+                    get_next(f0, line0, data0, f1, line1, data1, stamp_len, True, False)
 
-                # Intersect or skip tensor 1
-                # elif data0 > data1
-                else:
-                    if curr != 1:
-                        curr = 1
-                        isects += 1
+            # Intersect or skip tensor 1
+            # elif data0 > data1
+            else:
+                if curr != 1:
+                    curr = 1
+                    isects += 1
 
-                    line0, data0, line1, data1, new_fiber = \
-                        get_next(f0, line0, data0, f1, line1, data1, stamp_len, False, True)
+                line0, data0, line1, data1, new_fiber = \
+                    get_next(f0, line0, data0, f1, line1, data1, stamp_len, False, True)
 
-                if new_fiber:
-                    curr = None
+            if new_fiber:
+                curr = None
 
         return isects
 
@@ -3,22 +3,66 @@
 """Traffic
 
 A class for computing the memory traffic incurred by a tensor
+
+For the buffet and the optimal cache, the traces of a tensor are
+combined (reads and writes) and annotated with the next use of each
+access, in memory if the traces fit in the memory budget (see
+`Traffic.setMemoryBudget()`), and otherwise in temporary files next
+to the traces.
+
+The LRU and FIFO caches (see `Traffic.lruTraffic()` and
+`Traffic.fifoTraffic()`) do not need the next uses, and read the
+traces once, in a single pass.
 """
 
-import functools
+import collections
 import heapq
 import itertools
 import os
+import tempfile
 
-import bisect
 from file_read_backwards import FileReadBackwards
-from sortedcontainers import SortedList
+import numpy as np
 
 from fibertree import Tensor
+from fibertree.core.trace_file import Trace, TraceMemory, iterTrace, \
+    readTrace, traceShape, writeTrace
+
+_CHUNK = 1 << 16
+"""The number of rows of an in-memory trace converted at a time"""
 
 class Traffic:
     """Class for computing the memory traffic of a tensor"""
 
+    memory_budget = 1 << 30
+    """The number of bytes of traces the models may hold in memory"""
+
+    @staticmethod
+    def setMemoryBudget(max_bytes):
+        """Set the number of bytes of (combined and next-use) traces the
+        models may hold in memory
+
+        The traces of each bound tensor (rank and type) are processed
+        in memory if they fit in what is left of the budget, and
+        otherwise through temporary files. A budget of 0 always uses
+        files.
+
+        Parameters
+        ----------
+
+        max_bytes: int
+            The memory budget
+
+        Returns
+        -------
+
+        None
+
+        """
+        assert max_bytes >= 0
+
+        Traffic.memory_budget = max_bytes
+
     @staticmethod
     def filterTrace(input_fn, filter_fn, output_fn):
         """Filter a trace by keeping only accesses that occur at least once
@@ -35,55 +79,72 @@ class Traffic:
 
         output_fn: str
             Filename of the output trace
+
+        Note: the traces may be in either the CSV or the binary format
+        (see `fibertree.core.trace_file`), and the output trace is
+        written in the format given by the extension of `output_fn`
         """
-        def get_data(line):
-            if line:
-                full = line[:-1].split(",")[:-1]
-                return tuple(int(val) for val in full[len(full) // 2:])
+        def get_data(lines, i):
+            if i < len(lines):
+                full = lines[i][:-1]
+                return tuple(full[len(full) // 2:])
 
             return ()
 
-        with open(input_fn, "r") as f_in, open(filter_fn, "r") as f_fil, \
-                open(output_fn, "w") as f_out:
-            f_out.write(f_in.readline())
-            f_fil.readline()
+        (names, rows_in) = readTrace(input_fn)
+        (_, rows_fil) = readTrace(filter_fn)
 
-            line_in = f_in.readline()
-            line_fil = f_fil.readline()
+        lines_in = rows_in.tolist()
+        lines_fil = rows_fil.tolist()
 
-            data_in = get_data(line_in)
-            data_fil = get_data(line_fil)[:len(data_in)]
+        # The positions of the lines of the input to keep
+        keep = []
 
-            while line_in and line_fil:
-                if data_in == data_fil:
-                    f_out.write(line_in)
+        i_in = 0
+        i_fil = 0
 
-                    line_in = f_in.readline()
-                    line_fil = f_fil.readline()
+        data_in = get_data(lines_in, i_in)
+        data_fil = get_data(lines_fil, i_fil)[:len(data_in)]
 
-                    data_in = get_data(line_in)
-                    data_fil = get_data(line_fil)[:len(data_in)]
+        while i_in < len(lines_in) and i_fil < len(lines_fil):
+            if data_in == data_fil:
+                keep.append(i_in)
 
-                elif data_in < data_fil:
-                    line_in = f_in.readline()
-                    data_in = get_data(line_in)
+                i_in += 1
+                i_fil += 1
 
-                else:
-                    line_fil = f_fil.readline()
-                    data_fil = get_data(line_fil)[:len(data_in)]
+                data_in = get_data(lines_in, i_in)
+                data_fil = get_data(lines_fil, i_fil)[:len(data_in)]
+
+            elif data_in < data_fil:
+                i_in += 1
+                data_in = get_data(lines_in, i_in)
+
+            else:
+                i_fil += 1
+                data_fil = get_data(lines_fil, i_fil)[:len(data_in)]
+
+        writeTrace(output_fn, names, rows_in[keep])
 
     @staticmethod
     def _combineTraces(read_fn=None, write_fn=None, comb_fn=None):
-        """Combine traces into a single trace"""
-        assert comb_fn and (read_fn or write_fn)
+        """Combine traces (held in memory or in files of either format) into
+        a single trace with an "is_write" column
+
+        The combined trace is written into the CSV file `comb_fn`, or, if
+        `comb_fn` is None, returned as a `Trace` held in memory (with
+        an "is_write" of 0 or 1)"""
+        assert read_fn or write_fn
+
+        if comb_fn is None:
+            return Traffic._combineTracesInMemory(read_fn, write_fn)
 
         def next_line(f):
-            line = f.readline()
-            if line:
-                split = line[:-1].split(",")
-                return tuple(int(val) for val in split[:len(split) // 2]), line
+            line = next(f, None)
+            if line is not None:
+                return tuple(line[:len(line) // 2]), ",".join(map(str, line)) + "\n"
             else:
-                return (float("inf"),), line
+                return (float("inf"),), ""
 
         with open(comb_fn, "w") as f_comb:
             head = None
@@ -92,15 +153,15 @@ class Traffic:
 
             # Read the first line
             if read_fn is not None:
-                f_read = open(read_fn, "r")
-                head = f_read.readline()
+                names, f_read = iterTrace(read_fn)
+                head = ",".join(names) + "\n"
                 read_line = next_line(f_read)
             else:
                 read_line = (float("inf"),), ""
 
             if write_fn is not None:
-                f_write = open(write_fn, "r")
-                head = f_write.readline()
+                names, f_write = iterTrace(write_fn)
+                head = ",".join(names) + "\n"
                 write_line = next_line(f_write)
             else:
                 write_line = (float("inf"),), ""
@@ -119,11 +180,29 @@ class Traffic:
                     f_comb.write(read_line[1][:-1] + ",False\n")
                     read_line = next_line(f_read)
 
-            if f_read:
-                f_read.close()
+    @staticmethod
+    def _combineTracesInMemory(read_fn, write_fn):
+        """Combine traces into a single trace held in memory"""
+        accesses = [(fn, is_write) for fn, is_write in [(read_fn, 0), (write_fn, 1)]
+                    if fn is not None]
+
+        comb = []
+        for fn, access in accesses:
+            names, rows = readTrace(fn)
+            comb.append(np.column_stack((rows, np.full(len(rows), access, dtype=np.int64))))
+
+        if len(comb) == 1:
+            return Trace(names + ["is_write"], comb[0])
+
+        comb = np.concatenate(comb)
 
-            if f_write:
-                f_write.close()
+        # Order the accesses as the traces are merged in the files: by
+        # stamp, and at the same stamp, the reads first (a stable sort
+        # keeps the accesses of each trace in order)
+        stamp_len = len(names) // 2
+        keys = [comb[:, -1]] + [comb[:, j] for j in range(stamp_len - 1, -1, -1)]
+
+        return Trace(names + ["is_write"], comb[np.lexsort(keys)])
 
     @staticmethod
     def _buildPoint(split, mask, elems_per_line):
@@ -135,10 +214,15 @@ class Traffic:
         return tuple(point)
 
     @staticmethod
-    def _buildNextUseTrace(ranks, elems_per_line, input_fn, output_fn):
+    def _buildNextUseTrace(ranks, elems_per_line, input_fn, output_fn=None):
         """Build a trace of for each access to a tensor (as specified by its
-        ranks), when the corresponding next use was"""
-        out_split = os.path.splitext(output_fn)
+        ranks), when the corresponding next use was
+
+        If `output_fn` is None, `input_fn` is a combined `Trace` held in
+        memory, and the position of the next use of each access (or -1)
+        is returned instead"""
+        if output_fn is None:
+            return Traffic._buildNextUseInMemory(ranks, elems_per_line, input_fn)
 
         # Build a mask specifying the locations of the interesting ranks
         with open(input_fn) as f_in:
@@ -174,6 +258,109 @@ class Traffic:
             head_out = ",".join(head_in + [val + "_next" for val in head_in])
             f_out.write(head_out + "\n")
 
+    @staticmethod
+    def _buildNextUseInMemory(ranks, elems_per_line, comb):
+        """Find the position of the next use of each access of a combined
+        trace held in memory"""
+        names = comb.names
+        rows = comb.rows
+
+        # Build a mask specifying the locations of the interesting ranks
+        start = (len(names) - 2) // 2
+        iter_ranks = names[start:-2]
+        cols = [start + j for j, rank in enumerate(iter_ranks) if rank in ranks]
+
+        # The point of each access is (coord, ... coord, line)
+        points = rows[:, cols]
+        points[:, -1] = rows[:, -2] // elems_per_line
+
+        # Group the accesses by their point (a stable sort keeps the
+        # accesses to each point in order), so the next use of each access
+        # is the access that follows it in its group
+        dims = points.max(axis=0, initial=0) + 1
+        if points.min(initial=0) >= 0 and np.prod(dims, dtype=float) < 2 ** 62:
+            # Sort a single key per point, if it fits in an int64
+            keys = np.ravel_multi_index(tuple(points.T), dims)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            same = sorted_keys[1:] == sorted_keys[:-1]
+
+        else:
+            order = np.lexsort(points.T[::-1])
+            sorted_points = points[order]
+            same = (sorted_points[1:] == sorted_points[:-1]).all(axis=1)
+
+        next_use = np.full(len(rows), -1, dtype=np.int64)
+        next_use[order[:-1][same]] = order[1:][same]
+
+        return next_use
+
+    @staticmethod
+    def _iterNextUseTrace(comb, next_use):
+        """Iterate over the accesses of a combined trace held in memory,
+        each followed by its next use, as read from a next-use trace file"""
+        names = comb.names + [name + "_next" for name in comb.names]
+
+        def rows():
+            none = [None] * len(comb.names)
+
+            for start in range(0, len(comb.rows), _CHUNK):
+                positions = next_use[start:start + _CHUNK]
+
+                for row, next_row, pos in zip(comb.rows[start:start + _CHUNK].tolist(),
+                                              comb.rows[positions].tolist(),
+                                              positions.tolist()):
+                    row[-1] = row[-1] == 1
+
+                    if pos < 0:
+                        row.extend(none)
+                    else:
+                        next_row[-1] = next_row[-1] == 1
+                        row.extend(next_row)
+
+                    yield row
+
+        return names, rows()
+
+    @staticmethod
+    def _readNextUseTrace(next_fn):
+        """Iterate over the accesses of a next-use trace file (which is
+        written backwards)"""
+        file_ = FileReadBackwards(next_fn)
+        names = file_.readline()[:-1].split(",")
+
+        def rows():
+            try:
+                line = file_.readline()
+                while line != "":
+                    yield Traffic._parseNextUse(line)
+                    line = file_.readline()
+
+            finally:
+                file_.close()
+
+        return names, rows()
+
+    @staticmethod
+    def _parseNextUse(line):
+        """Parse a line of a next-use trace file"""
+        split = line[:-1].split(",")
+        trace = []
+        for val in split:
+            if val.isdigit():
+                trace.append(int(val))
+            elif val == "None":
+                trace.append(None)
+            elif val == "True":
+                trace.append(True)
+            elif val == "False":
+                trace.append(False)
+            else:
+                # Should never reach here
+                raise ValueError("Unknown value: " + val)
+
+        return trace
+
     @staticmethod
     def buffetTraffic(bindings, formats, trace_fns, capacity, line_sz,
             loop_ranks=None):
@@ -192,7 +379,8 @@ class Traffic:
             A nested dictionary of traces of the form
             {(tensor, rank, type, access): trace_fn}}}
             where type is one of "elem", "coord", or "payload" and access is
-            "read" or "write"
+            "read" or "write" (the traces may be in either the CSV or the binary
+            format)
 
         capacity: int
             The number of bits that fit in the buffet
@@ -305,7 +493,8 @@ class Traffic:
             A nested dictionary of traces of the form
             {(tensor, rank, type, access): trace_fn}}}
             where type is one of "elem", "coord", or "payload" and access is
-            "read" or "write"
+            "read" or "write" (the traces may be in either the CSV or the binary
+            format)
 
         capacity: int
             The number of bits that fit in the buffet
@@ -351,17 +540,10 @@ class Traffic:
         if loop_ranks is None:
             loop_ranks = {}
 
-        loop_rank_ids = {}
-        for tensor in formats:
-            loop_rank_ids[tensor] = []
-            for rank in formats[tensor].tensor.getRankIds():
-                new_rank = rank
-                if rank in loop_ranks:
-                    new_rank = loop_ranks[rank]
-                loop_rank_ids[tensor].append(new_rank)
+        loop_rank_ids = Traffic._loopRankIds(formats, loop_ranks)
 
-        # First combine read and write traces
-        read_write_traces = {}
+        # Find the read and write traces of each key
+        access_fns = {}
         traffic = {}
         for (tensor, rank, type_, access), fn in trace_fns.items():
             # Initialize the traffic array
@@ -369,102 +551,78 @@ class Traffic:
                 traffic[tensor] = {}
             traffic[tensor][access] = 0
 
-            # Make sure we have not combined the accesses yet
             key = tensor, rank, type_
-            if key in read_write_traces:
-                continue
-
-            # Combine
-            split_fn = os.path.splitext(fn)
-            comb_fn = split_fn[0] + "-comb-" + "-".join(key) + split_fn[1]
-            args = {access + "_fn": fn, "comb_fn": comb_fn}
-
-            other_access = "read" if access == "write" else "write"
-            if key + (other_access,) in trace_fns:
-                args[other_access + "_fn"] = trace_fns[key + (other_access,)]
-
-            Traffic._combineTraces(**args)
-            read_write_traces[key] = comb_fn
+            if key not in access_fns:
+                access_fns[key] = {}
 
+            access_fns[key][access + "_fn"] = fn
 
-        # Build traces with the next use
-        next_use_traces = {}
-        for key, fn in read_write_traces.items():
+        # Combine the read and write traces and build traces with the next
+        # use, in memory if they fit in the budget
+        memory = TraceMemory(Traffic.memory_budget)
+        tmp_dir = None
+        temp_fns = []
+        traces = {}
+        for key, args in access_fns.items():
             tensor, rank, type_ = key
             elems_per_line = line_sz // formats[tensor].getElem(rank, type_)
             assert elems_per_line > 0
 
+            # The combined trace has an extra column, and the next uses
+            # another one
+            shapes = [traceShape(fn) for fn in args.values()]
+            nbytes = sum(rows * (cols + 2) for rows, cols in shapes) * 8
+
+            if memory.reserve(nbytes):
+                comb = Traffic._combineTraces(**args)
+                next_use = Traffic._buildNextUseTrace(loop_rank_ids[tensor],
+                    elems_per_line, comb)
+
+                traces[key] = Traffic._iterNextUseTrace(comb, next_use)
+                continue
+
+            # Otherwise, use files next to the trace (the combined trace is
+            # always in the CSV format)
+            fn = next(iter(args.values()))
+            if isinstance(fn, Trace):
+                if tmp_dir is None:
+                    tmp_dir = tempfile.mkdtemp()
+                fn = os.path.join(tmp_dir, "trace")
+
             split_fn = os.path.splitext(fn)
+            comb_fn = split_fn[0] + "-comb-" + "-".join(key) + ".csv"
+
+            Traffic._combineTraces(comb_fn=comb_fn, **args)
+
+            split_fn = os.path.splitext(comb_fn)
             next_fn = split_fn[0] + "-next-" + "-".join(key) + split_fn[1]
 
-            Traffic._buildNextUseTrace(loop_rank_ids[tensor], elems_per_line, fn, next_fn)
-            next_use_traces[key] = next_fn
+            Traffic._buildNextUseTrace(loop_rank_ids[tensor], elems_per_line,
+                comb_fn, next_fn)
 
-        # Open all the traces
-        traces = {}
-        for key, fn in next_use_traces.items():
-            traces[key] = FileReadBackwards(fn)
+            temp_fns += [comb_fn, next_fn]
+            traces[key] = Traffic._readNextUseTrace(next_fn)
 
-        # Get the loop order and pop off the headers
+        # Get the loop order from the headers
         order = []
-        for file_ in traces.values():
-            line = file_.readline()[:-1].split(",")
-
-            start = (len(line) - 4) // 4
+        for names, _ in traces.values():
+            start = (len(names) - 4) // 4
             if start > len(order):
-                order = line[start:(start * 2)]
+                order = names[start:(start * 2)]
 
         # Fill the loop ranks
         for rank in order:
             loop_ranks[rank] = rank
 
-        # Order the binding information, and get rid of the keys
-        bind_info = [[] for _ in order]
-        for binding in bindings:
-            pos = order.index(loop_ranks[binding["rank"]])
-            info = extract_binding(binding)
-            tensor, rank, type_ = info[:3]
-
-            # Make sure that the correct type is used
-            assert (type_ == "elem" and formats[tensor].getLayout(rank) == "interleaved") \
-                or (type_ == "coord" and formats[tensor].getLayout(rank) == "contiguous") \
-                or (type_ == "payload" and formats[tensor].getLayout(rank) == "contiguous")
-
-            bind_info[pos].append(info)
-
-        # Flatten the binding info
-        bind_info = [info for infos in bind_info for info in infos]
-
-        # Compute index masks for each bound tensor
-        masks = []
-        for info in bind_info:
-            tensor, rank = info[:2]
-            end = order.index(loop_ranks[rank]) + 1
-            masks.append(list(r in loop_rank_ids[tensor] for r in order[:end]))
-
-        # Compute the number of elements per line for each binding
-        elems_per_line = []
-        for info in bind_info:
-            tensor, rank, type_ = info[:3]
-            footprint = formats[tensor].getElem(rank, type_)
-            elems_per_line.append(line_sz // footprint)
-            assert elems_per_line[-1] > 0
-
-        # Compute the number of ranks listed in each file
-        all_num_ranks = []
-        for info in bind_info:
-            all_num_ranks.append(order.index(loop_ranks[info[1]]) + 1)
+        bind_info, masks, elems_per_line, all_num_ranks = Traffic._bindInfo(
+            bindings, formats, line_sz, loop_ranks, loop_rank_ids, order,
+            extract_binding)
 
         sim_info = pre_sim_hook(bind_info)
 
-        # Order the traces in the order they occur
-        next_keys = []
-        next_traces = []
-        for i, info in enumerate(bind_info):
-            next_key, next_trace = Traffic._extractNext(i, info, traces, order)
-            next_keys.append(next_key)
-            next_traces.append(next_trace)
-        next_keys.sort()
+        # Merge the traces in the order the accesses occur
+        accesses = heapq.merge(*[Traffic._iterAccesses(i, traces[info[:3]], len(order))
+                                 for i, info in enumerate(bind_info)])
 
         # Compute the last lines for all writable traces whose intermediate
         # writes we can ignore
@@ -491,14 +649,11 @@ class Traffic:
         occupancy = 0
         overflows = 0
 
-        # While at least one of the traces is still going
-        while next_keys[0][:-1] != (float("inf"),) * len(order):
-            i = next_keys[0][-1]
+        for _, i, trace in accesses:
             key = bind_info[i][:3]
             tensor, rank, type_ = key
 
             # Get the tensor access
-            trace = next_traces[i]
             num_ranks = all_num_ranks[i]
             point = list(itertools.compress(trace[num_ranks:num_ranks * 2], masks[i]))
 
@@ -543,62 +698,98 @@ class Traffic:
             else:
                 objs[tensor][type_][obj][0] = objs[tensor][type_][obj][0] or write_back
 
-            # Advance the relevant trace
-            del next_keys[0]
-            next_key, next_trace = Traffic._extractNext(i, bind_info[i], traces, order)
-            next_traces[i] = next_trace
-
-            j = bisect.bisect_left(next_keys, next_key)
-            next_keys.insert(j, next_key)
-
         # Close all files
-        for file_ in traces.values():
-            file_.close()
+        for _, rows in traces.values():
+            rows.close()
 
         # Remove all of the newly created files
-        for fn in read_write_traces.values():
+        for fn in temp_fns:
             os.remove(fn)
 
-        for fn in next_use_traces.values():
-            os.remove(fn)
+        if tmp_dir is not None:
+            os.rmdir(tmp_dir)
 
         return traffic, overflows
 
     @staticmethod
-    def _extractNext(i, info, traces, order):
-        """Get the next stamps for the given binding info"""
-        # Get the trace
-        line = traces[info[:3]].readline()
+    def _loopRankIds(formats, loop_ranks):
+        """Get the ranks of each tensor in the loop order"""
+        loop_rank_ids = {}
+        for tensor in formats:
+            loop_rank_ids[tensor] = []
+            for rank in formats[tensor].tensor.getRankIds():
+                new_rank = rank
+                if rank in loop_ranks:
+                    new_rank = loop_ranks[rank]
+                loop_rank_ids[tensor].append(new_rank)
 
-        # If there are no more lines, push this trace to the end
-        if line == "":
-            return (float("inf"),) * len(order) + (i,), []
+        return loop_rank_ids
 
-        split = line[:-1].split(",")
-        trace = []
-        for val in split:
-            if val.isdigit():
-                trace.append(int(val))
-            elif val == "None":
-                trace.append(None)
-            elif val == "True":
-                trace.append(True)
-            elif val == "False":
-                trace.append(False)
-            else:
-                # Should never reach here
-                raise ValueError("Unknown value: " + val)
+    @staticmethod
+    def _bindInfo(bindings, formats, line_sz, loop_ranks, loop_rank_ids, order,
+            extract_binding):
+        """Get the information of each binding (in the loop order), with
+        the mask of its ranks in each trace, the number of elements per
+        line, and the number of ranks listed in each trace"""
+        # Order the binding information, and get rid of the keys
+        bind_info = [[] for _ in order]
+        for binding in bindings:
+            pos = order.index(loop_ranks[binding["rank"]])
+            info = extract_binding(binding)
+            tensor, rank, type_ = info[:3]
+
+            # Make sure that the correct type is used
+            assert (type_ == "elem" and formats[tensor].getLayout(rank) == "interleaved") \
+                or (type_ == "coord" and formats[tensor].getLayout(rank) == "contiguous") \
+                or (type_ == "payload" and formats[tensor].getLayout(rank) == "contiguous")
+
+            bind_info[pos].append(info)
+
+        # Flatten the binding info
+        bind_info = [info for infos in bind_info for info in infos]
+
+        # Compute index masks for each bound tensor
+        masks = []
+        for info in bind_info:
+            tensor, rank = info[:2]
+            end = order.index(loop_ranks[rank]) + 1
+            masks.append(list(r in loop_rank_ids[tensor] for r in order[:end]))
+
+        # Compute the number of elements per line for each binding
+        elems_per_line = []
+        for info in bind_info:
+            tensor, rank, type_ = info[:3]
+            footprint = formats[tensor].getElem(rank, type_)
+            elems_per_line.append(line_sz // footprint)
+            assert elems_per_line[-1] > 0
+
+        # Compute the number of ranks listed in each file
+        all_num_ranks = []
+        for info in bind_info:
+            all_num_ranks.append(order.index(loop_ranks[info[1]]) + 1)
+
+        return bind_info, masks, elems_per_line, all_num_ranks
+
+    @staticmethod
+    def _iterAccesses(i, trace, depth):
+        """Iterate over the accesses of the trace of the given binding,
+        keyed by their packed iteration stamp and the position of the
+        binding"""
+        names, rows = trace
+        num_ranks = (len(names) - 4) // 4
 
+        for row in rows:
+            yield Traffic._packStamp(row[:num_ranks], depth), i, row
 
-        # Get the key that will be used to sort this trace
-        # It is the iteration stamp padded with -1s and then the position of
-        # the access type in the list of bindings
-        num_ranks = len(trace) - 2
-        key = [-1] * len(order) + [i]
-        key[:num_ranks // 4] = trace[:num_ranks // 4]
-        key = tuple(key)
+    @staticmethod
+    def _packStamp(stamp, depth):
+        """Pack an iteration stamp into an integer that orders as the stamp
+        padded with -1s to `depth` ranks does (each rank takes 64 bits)"""
+        key = 0
+        for val in stamp:
+            key = (key << 64) | (val + 1)
 
-        return key, trace
+        return key << (64 * (depth - len(stamp)))
 
     @staticmethod
     def cacheTraffic(bindings, formats, trace_fns, capacity, line_sz,
@@ -618,7 +809,8 @@ class Traffic:
             A nested dictionary of traces of the form
             {(tensor, rank, type, access): trace_fn}}}
             where type is one of "elem", "coord", or "payload" and access is
-            "read" or "write"
+            "read" or "write" (the traces may be in either the CSV or the binary
+            format)
 
         capacity: int
             The number of bits that fit in the buffet
@@ -635,26 +827,76 @@ class Traffic:
         reside on exactly one line (if the footprint is not a multiple of the
         line size, every line is padded)
         """
-        @functools.total_ordering
         class ListElem:
+            __slots__ = ["next_access", "obj", "pos", "entry"]
+
             def __init__(self, bind_pos, next_access, obj):
+                # The next access is a packed iteration stamp
                 self.next_access = next_access
                 self.obj = obj
                 self.pos = bind_pos
 
-            def __eq__(self, other):
-                return self.next_access == other.next_access and self.pos == other.pos
-
-            def __lt__(self, other):
-                if self.next_access != other.next_access:
-                    return self.next_access < other.next_access
+                # The entry of the element in the eviction heap
+                self.entry = None
 
+            def key(self):
                 # Fall back on the position if the next access is at the same point
-                return self.pos < other.pos
+                return self.next_access, self.pos
 
             def __repr__(self):
                 return str((self.next_access, self.obj, self.pos))
 
+        class EvictHeap:
+            """The elements that can be evicted, furthest next access first
+
+            A max-heap of the elements, where an element whose next
+            access changes is pushed again, and its old entry is left in
+            the heap (and skipped) until it reaches the top
+            """
+            def __init__(self):
+                self.heap = []
+                self.size = 0
+                self.count = 0
+
+            def __len__(self):
+                return self.size
+
+            def add(self, list_elem):
+                # Of the elements with the same key, evict the last added
+                self.count += 1
+                list_elem.entry = (-list_elem.next_access, -list_elem.pos,
+                    -self.count, list_elem)
+
+                heapq.heappush(self.heap, list_elem.entry)
+                self.size += 1
+
+                # Drop the old entries if they make up most of the heap
+                if len(self.heap) > 2 * self.size + 64:
+                    self.heap = [entry for entry in self.heap if entry[3].entry is entry]
+                    heapq.heapify(self.heap)
+
+            def remove(self, list_elem):
+                list_elem.entry = None
+                self.size -= 1
+
+            def update(self, list_elem, next_access):
+                self.remove(list_elem)
+                list_elem.next_access = next_access
+                self.add(list_elem)
+
+            def peek(self):
+                while self.heap[0][3].entry is not self.heap[0]:
+                    heapq.heappop(self.heap)
+
+                return self.heap[0][3]
+
+            def pop(self):
+                list_elem = self.peek()
+                heapq.heappop(self.heap)
+                self.remove(list_elem)
+
+                return list_elem
+
         def extract_binding(binding):
             return binding["tensor"], binding["rank"], binding["type"]
 
@@ -662,7 +904,7 @@ class Traffic:
             return info + ("write",) in trace_fns
 
         def pre_sim_hook(bind_info):
-            next_evict = SortedList()
+            next_evict = EvictHeap()
 
             pinned = {}
             for tensor, _, type_ in bind_info:
@@ -677,19 +919,17 @@ class Traffic:
         def to_be_buffered(bind_info, bind_pos, capacity, loop_ranks,
                 num_ranks, obj, objs, occupancy, order, shapes, sim_info, trace):
             next_evict, pinned, _ = sim_info
-            next_access = trace[num_ranks * 2 + 2:num_ranks * 3 + 2]
             tensor, _, type_ = bind_info[bind_pos]
+            cached = objs[tensor][type_].get(obj)
 
             # Do not buffer if never used again
             if trace[num_ranks * 2 + 2] is None:
-                if obj in objs[tensor][type_]:
-                    if next_evict and next_evict[0].obj == obj:
-                        list_elem = next_evict.pop(0)
-                    else:
-                        assert obj in pinned[tensor][type_]
-                        list_elem = objs[tensor][type_][obj][1]
+                if cached is not None:
+                    list_elem = cached[1]
+                    if obj not in pinned[tensor][type_]:
+                        next_evict.remove(list_elem)
 
-                    list_elem.next_access = [float("inf")]
+                    list_elem.next_access = float("inf")
 
                 else:
                     list_elem = None
@@ -697,20 +937,20 @@ class Traffic:
                 sim_info = next_evict, pinned, list_elem
                 return False, sim_info
 
+            next_access = Traffic._packStamp(trace[num_ranks * 2 + 2:num_ranks * 3 + 2],
+                len(order))
+
             # If this element is in the cache, but not pinned
-            if next_evict and next_evict[0].obj == obj \
-                    and next_evict[0].pos == bind_pos:
-                list_elem = next_evict.pop(0)
-                list_elem.next_access = next_access
+            if cached is not None and obj not in pinned[tensor][type_]:
+                list_elem = cached[1]
+                next_evict.update(list_elem, next_access)
 
-                next_evict.add(list_elem)
                 sim_info = next_evict, pinned, list_elem
-
                 return True, sim_info
 
             # If the element is pinned
-            elif obj in pinned[tensor][type_]:
-                list_elem = objs[tensor][type_][obj][1]
+            elif cached is not None:
+                list_elem = cached[1]
                 list_elem.next_access = next_access
 
                 sim_info = next_evict, pinned, list_elem
@@ -735,7 +975,7 @@ class Traffic:
             # Otherwise, make sure the next thing to evict is not the element
             # we would have buffered
             else:
-                to_buffer = list_elem <= next_evict[-1]
+                to_buffer = list_elem.key() <= next_evict.peek().key()
 
             return to_buffer, sim_info
 
@@ -746,7 +986,7 @@ class Traffic:
             # Evict if necessary to make space
             while occupancy + line_sz > capacity:
                 if next_evict:
-                    evict_elem = next_evict.pop(-1)
+                    evict_elem = next_evict.pop()
 
                     # If the line has been mutated and it needs to be saved, write it first
                     evict_tensor, _, evict_type = bind_info[evict_elem.pos]
@@ -783,7 +1023,7 @@ class Traffic:
             tensor, _, type_ = key
 
             # Ensure that there has been no error
-            assert list_elem.next_access == [float("inf")]
+            assert list_elem.next_access == float("inf")
 
             # If the line has been mutated and it needs to be saved, write it first
             if objs[tensor][type_][list_elem.obj][0]:
@@ -803,3 +1043,232 @@ class Traffic:
         return Traffic._bufferTraffic(bindings, formats, trace_fns, capacity,
             line_sz, loop_ranks, extract_binding, pin_intermediate_writes,
             pre_sim_hook, to_be_buffered, add_elem, evict_elem)
+
+    @staticmethod
+    def lruTraffic(bindings, formats, trace_fns, capacity, line_sz,
+            loop_ranks=None, ways=None, write_back=True, write_allocate=True):
+        """Compute the traffic loading data into a cache with least
+        recently used (LRU) replacement
+
+        Parameters
+        ----------
+
+        bindings: List[dict]
+            A list of the binding information
+
+        formats: Dict[str, Format]
+            A dictionary from tensor names to their corresponding format objects
+
+        trace_fns: Dict[Tuple[str, str, str, str], str]]]
+            A nested dictionary of traces of the form
+            {(tensor, rank, type, access): trace_fn}}}
+            where type is one of "elem", "coord", or "payload" and access is
+            "read" or "write" (the traces may be held in memory or be in
+            either the CSV or the binary format)
+
+        capacity: int
+            The number of bits that fit in the cache
+
+        line_sz: int
+            The number of bits across which spatial locality is exploited
+            (e.g., cache line size)
+
+        loop_ranks: Optional[Dict[str, str]]
+            A map from the original rank to the rank it corresponds to in
+            the loop order
+
+        ways: Optional[int]
+            The number of lines in each set of a set-associative cache
+            (by default, the cache is fully associative)
+
+        write_back: bool
+            Whether written lines are written back when they are evicted
+            (otherwise, every write is written through)
+
+        write_allocate: bool
+            Whether a write that misses allocates the line in the cache
+            (otherwise, it is written around the cache)
+
+        Note: see `Traffic._streamTraffic()`
+        """
+        return Traffic._streamTraffic(bindings, formats, trace_fns, capacity,
+            line_sz, loop_ranks, ways, write_back, write_allocate, True)
+
+    @staticmethod
+    def fifoTraffic(bindings, formats, trace_fns, capacity, line_sz,
+            loop_ranks=None, ways=None, write_back=True, write_allocate=True):
+        """Compute the traffic loading data into a cache with first in,
+        first out (FIFO) replacement
+
+        The parameters are the same as those of `Traffic.lruTraffic()`
+        """
+        return Traffic._streamTraffic(bindings, formats, trace_fns, capacity,
+            line_sz, loop_ranks, ways, write_back, write_allocate, False)
+
+    @staticmethod
+    def _streamTraffic(bindings, formats, trace_fns, capacity, line_sz,
+            loop_ranks, ways, write_back, write_allocate, is_lru):
+        """Compute the traffic of a cache whose replacement does not depend
+        on future accesses (LRU or FIFO)
+
+        The traces are read once, merged in the order the accesses occur,
+        without combining them or building next-use traces.
+
+        Each set of the cache is kept in an ordered dictionary, from the
+        oldest (least recently used) line to the newest. The set of a line
+        is given by its address, as if each bound rank were laid out
+        uncompressed (with the shape of the tensor), one rank after
+        another, so consecutive lines of a fiber map to consecutive sets.
+
+        At the same point, all reads go before all writes.
+
+        Returns the traffic and the number of overflows (always 0, since
+        nothing is pinned in the cache), as `Traffic.cacheTraffic()`
+        does.
+
+        Note: assumes all fibers start at line boundaries and all elements
+        reside on exactly one line (if the footprint is not a multiple of the
+        line size, every line is padded), that a write that allocates a
+        line does not need to read it first, and that a write that is
+        written through (or around) the cache only transfers the element
+        written
+        """
+        # Get the loop ranks of each tensor
+        if loop_ranks is None:
+            loop_ranks = {}
+
+        loop_rank_ids = Traffic._loopRankIds(formats, loop_ranks)
+
+        # Open the traces
+        traffic = {}
+        traces = {}
+        for (tensor, rank, type_, access), fn in trace_fns.items():
+            if tensor not in traffic:
+                traffic[tensor] = {}
+            traffic[tensor][access] = 0
+
+            traces[tensor, rank, type_, access] = iterTrace(fn)
+
+        # Get the loop order from the headers
+        order = []
+        for names, _ in traces.values():
+            num_ranks = (len(names) - 1) // 2
+            if num_ranks > len(order):
+                order = names[num_ranks:num_ranks * 2]
+
+        # Fill the loop ranks
+        for rank in order:
+            loop_ranks[rank] = rank
+
+        bind_info, masks, elems_per_line, all_num_ranks = Traffic._bindInfo(
+            bindings, formats, line_sz, loop_ranks, loop_rank_ids, order,
+            lambda binding: (binding["tensor"], binding["rank"], binding["type"]))
+
+        # Lay out the lines of each binding as if its rank were
+        # uncompressed, to get the address of each line
+        bases = []
+        strides = []
+        elem_szs = []
+        size = 0
+        for i, (tensor, rank, type_) in enumerate(bind_info):
+            shape = formats[tensor].tensor.getShape()
+            dims = [shape[loop_rank_ids[tensor].index(name)]
+                    for name in itertools.compress(order, masks[i])]
+            dims[-1] = -(-dims[-1] // elems_per_line[i])
+
+            stride = [1]
+            for dim in reversed(dims[1:]):
+                stride.insert(0, stride[0] * dim)
+
+            bases.append(size)
+            strides.append(stride[:-1])
+            elem_szs.append(formats[tensor].getElem(rank, type_))
+            size += stride[0] * dims[0]
+
+        # Merge the traces in the order the accesses occur (at the same
+        # point, reads go before writes)
+        def iter_accesses(i, access):
+            _, rows = traces[bind_info[i] + (access,)]
+            is_write = access == "write"
+            depth = len(order)
+            num_ranks = all_num_ranks[i]
+
+            for row in rows:
+                yield Traffic._packStamp(row[:num_ranks], depth), is_write, i, row
+
+        accesses = heapq.merge(*[iter_accesses(i, access)
+                                 for i, info in enumerate(bind_info)
+                                 for access in ["read", "write"]
+                                 if info + (access,) in traces])
+
+        # Prepare the cache
+        num_lines = capacity // line_sz
+        if ways is None:
+            ways = num_lines
+
+        assert ways > 0 and num_lines >= ways
+
+        num_sets = num_lines // ways
+        sets = [collections.OrderedDict() for _ in range(num_sets)]
+
+        # Simulate the cache
+        try:
+            for _, is_write, i, trace in accesses:
+                tensor, _, type_ = bind_info[i]
+
+                # Compute the line of the access and its address
+                num_ranks = all_num_ranks[i]
+                point = list(itertools.compress(trace[num_ranks:num_ranks * 2], masks[i]))
+                line = trace[num_ranks * 2] // elems_per_line[i]
+                addr = bases[i] + line
+                for coord, stride in zip(point, strides[i]):
+                    addr += coord * stride
+
+                point[-1] = line * elems_per_line[i]
+
+                obj = tensor, type_, tuple(point)
+                lines = sets[addr % num_sets]
+
+                # A hit
+                if obj in lines:
+                    if is_lru:
+                        lines.move_to_end(obj)
+
+                    if is_write and write_back:
+                        lines[obj] = True
+                    elif is_write:
+                        traffic[tensor]["write"] += elem_szs[i]
+
+                    continue
+
+                # A miss that does not allocate the line
+                if is_write and not write_allocate:
+                    traffic[tensor]["write"] += elem_szs[i]
+                    continue
+
+                if not is_write:
+                    traffic[tensor]["read"] += line_sz
+                elif not write_back:
+                    traffic[tensor]["write"] += elem_szs[i]
+
+                # Evict the oldest line of the set if it is full
+                if len(lines) == ways:
+                    (evict_tensor, _, _), dirty = lines.popitem(last=False)
+                    if dirty:
+                        traffic[evict_tensor]["write"] += line_sz
+
+                lines[obj] = is_write and write_back
+
+        # Close all files
+        finally:
+            accesses.close()
+            for _, rows in traces.values():
+                rows.close()
+
+        # Write back the lines left in the cache
+        for lines in sets:
+            for (tensor, _, _), dirty in lines.items():
+                if dirty:
+                    traffic[tensor]["write"] += line_sz
+
+        return traffic, 0
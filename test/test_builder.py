@@ -0,0 +1,158 @@
+import random
+import unittest
+
+from fibertree import Fiber
+from fibertree import Tensor
+from fibertree import FiberBuilder
+from fibertree import TensorBuilder
+
+
+class TestBuilder(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+
+        self.elements = [((random.randrange(6), random.randrange(8)),
+                          random.randrange(1, 5)) for _ in range(40)]
+
+    def reference(self, combine):
+        """Build the expected tensor with getPayloadRef()"""
+
+        t = Tensor(rank_ids=["M", "N"], shape=[6, 8])
+        root = t.getRoot()
+
+        for (m, n), value in self.elements:
+            ref = root.getPayloadRef(m, n)
+            if combine == "sum":
+                ref += value
+            else:
+                ref <<= value
+
+        return t
+
+    def test_fiber(self):
+        """Test building a one level fiber"""
+
+        b = FiberBuilder()
+
+        for c, v in [(5, 1), (2, 2), (8, 3), (2, 4)]:
+            b.add(c, v)
+
+        self.assertEqual(len(b), 4)
+        self.assertEqual(b.build(), Fiber([2, 5, 8], [6, 1, 3]))
+
+    def test_fiber_empty(self):
+        """Test building from no elements and from empty values"""
+
+        self.assertEqual(FiberBuilder().build(), Fiber())
+
+        b = FiberBuilder(combine="sum")
+        b[3] = 2
+        b[3] = -2
+        b[4] = 0
+        self.assertEqual(b.build(), Fiber())
+
+    def test_combine(self):
+        """Test the combine functions"""
+
+        elements = [(1, 3), (1, 7), (1, 5), (0, 2)]
+
+        answers = {"sum": 15, "max": 7, "min": 3, "first": 3, "last": 5}
+
+        for combine, answer in answers.items():
+            with self.subTest(combine=combine):
+                b = FiberBuilder(combine=combine)
+                b.extend(elements)
+                self.assertEqual(b.build(), Fiber([0, 1], [2, answer]))
+
+        b = FiberBuilder(combine=lambda old, new: old * new)
+        b.extend(elements)
+        self.assertEqual(b.build(), Fiber([0, 1], [2, 105]))
+
+        with self.assertRaises(AssertionError):
+            FiberBuilder(combine="bogus")
+
+    def test_tensor(self):
+        """Test building a tensor"""
+
+        for combine in ["sum", "last"]:
+            with self.subTest(combine=combine):
+                b = TensorBuilder(["M", "N"], shape=[6, 8], combine=combine)
+                b.extend(self.elements)
+
+                z = b.build()
+                ref = self.reference(combine)
+
+                self.assertEqual(z, ref)
+                self.assertEqual(z.getShape(), [6, 8])
+                self.assertTrue(z.isMutable())
+
+    def test_tensor_ranks(self):
+        """Test the built tensor's ranks own its fibers"""
+
+        b = TensorBuilder(["M", "N"])
+        b.extend(self.elements)
+        z = b.build()
+
+        root = z.getRoot()
+        self.assertEqual(root.getOwner().getId(), "M")
+
+        for _, n_fiber in root:
+            self.assertEqual(n_fiber.getOwner().getId(), "N")
+
+        self.assertEqual(len(z.ranks[1].getFibers()), len(root))
+
+    def test_tensor_columnar(self):
+        """Test building a tensor with columnar leaf fibers"""
+
+        b = TensorBuilder(["M", "N"], shape=[6, 8], columnar=True)
+        b.extend(self.elements)
+        z = b.build()
+
+        self.assertEqual(z, self.reference("sum"))
+
+        for _, n_fiber in z.getRoot():
+            self.assertTrue(n_fiber.isColumnar())
+
+    def test_tensor_sink(self):
+        """Test using the builder as the output of a loop nest"""
+
+        a = Tensor.fromRandom(["M", "K"], [10, 12], [1.0, 0.3], seed=1)
+        b = Tensor.fromRandom(["K", "N"], [12, 8], [1.0, 0.3], seed=2)
+
+        a_m = a.getRoot()
+        b_k = b.getRoot()
+
+        z = Tensor(rank_ids=["M", "N"], shape=[10, 8])
+        z_builder = TensorBuilder(["M", "N"], shape=[10, 8])
+
+        for z_m in [z.getRoot(), z_builder.getRoot()]:
+            for m, (z_n, a_k) in z_m << a_m:
+                for k, (a_val, b_n) in a_k & b_k:
+                    for n, (z_ref, b_val) in z_n << b_n:
+                        z_ref += a_val * b_val
+
+        self.assertEqual(z_builder.build(), z)
+
+        ref = z_builder.getRoot().getPayloadRef(1, 2)
+        ref <<= 5
+        self.assertEqual(z_builder.build().getPayload(1, 2), z.getPayload(1, 2) + 5)
+
+    def test_tensor_empty(self):
+        """Test building an empty tensor"""
+
+        z = TensorBuilder(["M", "N"], shape=[6, 8]).build()
+
+        self.assertEqual(z, Tensor(rank_ids=["M", "N"], shape=[6, 8]))
+
+    def test_bad_point(self):
+        """Test points with the wrong number of coordinates"""
+
+        b = TensorBuilder(["M", "N"])
+
+        with self.assertRaises(AssertionError):
+            b.add((1, 2, 3), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import bisect
+import random
+import unittest
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+from fibertree.core.cursor import gallopLeft
+
+
+class TestCursor(unittest.TestCase):
+
+    def setUp(self):
+        self.coords = [2, 4, 6, 9, 10, 15]
+        self.payloads = [3, 5, 7, 10, 11, 16]
+        self.a = Fiber(self.coords, self.payloads)
+
+    def test_gallopLeft(self):
+        """Test galloping search matches a binary search"""
+
+        random.seed(1)
+        coords = sorted(random.sample(range(1000), 100))
+
+        for lo in [0, 1, 10, 50, 99, 100]:
+            for coord in range(-1, 1001, 7):
+                expected = bisect.bisect_left(coords, coord, lo)
+                with self.subTest(lo=lo, coord=coord):
+                    self.assertEqual(gallopLeft(coords, coord, lo), expected)
+
+        self.assertEqual(gallopLeft([], 5), 0)
+
+    def test_seek(self):
+        """Test forward seeks"""
+
+        cursor = self.a.getCursor()
+
+        self.assertEqual(cursor.seek(4), 1)
+        self.assertEqual(cursor.seek(7), 3)
+        self.assertEqual(cursor.seek(9), 3)
+        self.assertEqual(cursor.seek(20), 6)
+        self.assertEqual(cursor.getPosition(), 6)
+
+        self.assertEqual(self.a.getSavedPosStats(hints=True), (0, 0, 4, 0))
+
+    def test_seek_backward(self):
+        """Test a backward seek falls back to a binary search"""
+
+        cursor = self.a.getCursor()
+
+        self.assertEqual(cursor.seek(10), 4)
+        self.assertEqual(cursor.seek(4), 1)
+
+        self.assertEqual(self.a.getSavedPosStats(hints=True), (0, 0, 1, 1))
+
+        cursor.reset()
+        self.assertEqual(cursor.getPosition(), 0)
+
+    def test_getPayload(self):
+        """Test getting payloads through a cursor"""
+
+        cursor = self.a.getCursor()
+
+        self.assertEqual(cursor.getPayload(6), 7)
+        self.assertEqual(cursor.getPayload(7), self.a.getPayload(7))
+        self.assertEqual(cursor.getPayload(7), 0)
+        self.assertEqual(cursor.getPayload(8, default=-1), -1)
+        self.assertEqual(cursor.getPayload(15), 16)
+
+        # The default of a non-leaf fiber is an empty fiber
+        t = Tensor.fromUncompressed(["M", "K"], [[1, 0], [0, 0], [2, 3]])
+        t_m = t.getRoot()
+
+        self.assertEqual(t_m.getCursor().getPayload(1), t_m.getPayload(1))
+        self.assertIsInstance(t_m.getCursor().getPayload(1), Fiber)
+
+        self.assertEqual(self.a, Fiber(self.coords, self.payloads))
+
+    def test_getPayloadRef(self):
+        """Test getting payload references through a cursor"""
+
+        cursor = self.a.getCursor()
+
+        for c in [1, 4, 5, 15, 16]:
+            cursor.getPayloadRef(c)
+            self.assertEqual(self.a.coords[cursor.getPosition()], c)
+
+        ref = cursor.getPayloadRef(5)
+        ref += 1
+
+        self.assertEqual(self.a.getCoords(), [1, 2, 4, 5, 6, 9, 10, 15, 16])
+        self.assertEqual(self.a.getPayload(5), 1)
+
+    def test_getPosition_start_pos(self):
+        """Test getPosition with a shortcut"""
+
+        self.assertEqual(self.a.getPosition(9, start_pos=1), 3)
+        self.assertEqual(self.a.getSavedPos(), 3)
+        self.assertEqual(self.a.getPosition(20, start_pos=3), None)
+        self.assertEqual(self.a.getPosition(2, start_pos=3), 0)
+
+        self.assertEqual(self.a.getSavedPosStats(hints=True), (2, 5, 2, 1))
+        self.assertEqual(self.a.getSavedPosStats(), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -529,6 +529,26 @@ class TestFiber(unittest.TestCase):
             self.assertEqual(c, c0[i])
             self.assertEqual(p, p0[i])
 
+    def test_iterOccupancy_reuse(self):
+        """Test iteration reusing a single CoordPayload"""
+
+        c0 = [1, 8, 9]
+        p0 = [2, 7, 10]
+
+        a = Fiber(c0, p0)
+
+        elements = []
+        for i, element in enumerate(a.iterOccupancy(reuse=True)):
+            c, p = element
+            self.assertEqual(c, c0[i])
+            self.assertEqual(p, p0[i])
+            elements.append(element)
+
+        self.assertTrue(all(e is elements[0] for e in elements))
+
+        self.assertEqual([(c, p) for c, p in a.iterActive(reuse=True)],
+                         list(zip(c0, p0)))
+
     def test_iterOccupancy_start_pos_eager_only(self):
         """Test iterOccupancy start_pos only works with eager fibers"""
         c0 = [1, 8, 9]
@@ -821,6 +841,39 @@ class TestFiber(unittest.TestCase):
 
         self.assertEqual(iters, 2)
 
+    def test_iterRange_bounds(self):
+        """Test iterRange with ranges that do not fall on coordinates"""
+
+        a = Fiber([1, 4, 8, 9], [2, 0, 7, 10])
+
+        ranges = [(None, None), (None, 8), (4, None), (0, 20),
+                  (5, 7), (9, 9), (10, 2)]
+
+        for start, end in ranges:
+            with self.subTest(start=start, end=end):
+                expected = [(c, p) for c, p in zip(a.coords, a.payloads)
+                            if p != 0
+                            and (start is None or c >= start)
+                            and (end is None or c < end)]
+
+                self.assertEqual([(c, p) for c, p in a.iterRange(start, end)],
+                                 expected)
+
+    def test_iterRange_unordered(self):
+        """Test iterRange of an unordered fiber"""
+
+        a = Fiber([3, 1, 2], [30, 10, 20], ordered=False)
+
+        self.assertEqual([(c, p) for c, p in a.iterRange(2, 10)],
+                         [(3, 30), (2, 20)])
+
+    def test_iterRange_empty_fibers(self):
+        """Test iterRange skips empty fiber payloads"""
+
+        a = Fiber([1, 4, 8], [Fiber([2], [3]), Fiber(), Fiber([1], [1])])
+
+        self.assertEqual([c for c, _ in a.iterRange(None, None)], [1, 8])
+
     def test_iterRange_start_pos_eager_only(self):
         """Test iterRange start_pos only works with eager fibers"""
         c0 = [1, 4, 8, 9]
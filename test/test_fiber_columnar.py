@@ -0,0 +1,244 @@
+import unittest
+import copy
+
+from fibertree import Payload
+from fibertree import Fiber
+from fibertree import Tensor
+
+from fibertree.core.payload_array import PayloadArray
+
+
+class TestFiberColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.coords = [1, 3, 5, 8]
+        self.payloads = [10, 20, 30, 40]
+
+        self.ref = Fiber(self.coords, self.payloads)
+        self.f = Fiber.fromColumnar(self.coords, self.payloads)
+
+    def test_constructor(self):
+        """Test construction of a columnar fiber"""
+
+        self.assertTrue(self.f.isColumnar())
+        self.assertFalse(self.ref.isColumnar())
+
+        self.assertEqual(list(self.f.getCoords()), self.coords)
+        self.assertEqual(self.f.getPayloads(), self.payloads)
+        self.assertEqual(self.f.getPayloads().getTypecode(), "q")
+
+        self.assertEqual(self.f, self.ref)
+        self.assertEqual(repr(self.f), repr(self.ref))
+
+    def test_constructor_float_and_other(self):
+        """Test storage selection for non-integer payloads"""
+
+        f = Fiber.fromColumnar([0, 1], [1.5, 2.5])
+        self.assertEqual(f.getPayloads().getTypecode(), "d")
+
+        f = Fiber.fromColumnar([0, 1], [(1, 2), (3, 4)])
+        self.assertIsNone(f.getPayloads().getTypecode())
+        self.assertEqual(f.getPayload(1), (3, 4))
+
+    def test_constructor_checks(self):
+        """Test columnar fibers check their coordinates"""
+
+        with self.assertRaises(AssertionError):
+            Fiber.fromColumnar([3, 1], [1, 2])
+
+        with self.assertRaises(AssertionError):
+            Fiber.fromColumnar([(0, 1)], [1])
+
+        with self.assertRaises(AssertionError):
+            Fiber.fromColumnar([0], [Fiber([1], [2])])
+
+    def test_set_columnar(self):
+        """Test switching to/from columnar storage"""
+
+        f = Fiber(self.coords, self.payloads)
+
+        self.assertIs(f.setColumnar(), f)
+        self.assertTrue(f.isColumnar())
+        self.assertEqual(f, self.ref)
+
+        f.setColumnar(False)
+        self.assertFalse(f.isColumnar())
+        self.assertEqual(f.getCoords(), self.coords)
+        self.assertEqual(f, self.ref)
+
+    def test_iteration(self):
+        """Test iteration over a columnar fiber"""
+
+        self.assertEqual([(c, p) for c, p in self.f],
+                         [(c, p) for c, p in self.ref])
+
+        self.assertEqual([(c, p) for c, p in reversed(self.f)],
+                         [(c, p) for c, p in reversed(self.ref)])
+
+        self.assertEqual(list(self.f.iterRange(3, 8)),
+                         list(self.ref.iterRange(3, 8)))
+
+    def test_iteration_update(self):
+        """Test updating payloads while iterating over a columnar fiber"""
+
+        f = Fiber.fromColumnar([1, 3, 5, 8], [10, 0, 30, 40])
+
+        for c, p in f:
+            p += 0.5
+
+        self.assertEqual(f, Fiber([1, 3, 5, 8], [10.5, 0, 30.5, 40.5]))
+
+    def test_getitem(self):
+        """Test position-based access"""
+
+        self.assertEqual(self.f[1], self.ref[1])
+        self.assertEqual(self.f[-1], self.ref[-1])
+        self.assertEqual(self.f[1:3], self.ref[1:3])
+
+    def test_getpayload(self):
+        """Test coordinate-based access"""
+
+        for c in range(10):
+            self.assertEqual(self.f.getPayload(c), self.ref.getPayload(c))
+
+        self.assertEqual(self.f.getPayload(4, allocate=False, default=-1), -1)
+
+    def test_getpayloadref(self):
+        """Test a reference updates the array"""
+
+        ref = self.f.getPayloadRef(3)
+        ref += 5
+        self.assertEqual(self.f.getPayload(3), 25)
+
+        new = self.f.getPayloadRef(4)
+        new <<= 7
+        self.assertEqual(self.f.getPayload(4), 7)
+        self.assertEqual(list(self.f.getCoords()), [1, 3, 4, 5, 8])
+
+        #
+        # A reference must follow its element across insertions
+        #
+        ref5 = self.f.getPayloadRef(5)
+        self.f.getPayloadRef(0)
+        ref5 += 1
+        self.assertEqual(self.f.getPayload(5), 31)
+
+    def test_payload_type_change(self):
+        """Test storing a value that does not fit the array"""
+
+        ref = self.f.getPayloadRef(1)
+        ref <<= 2.5
+
+        self.assertIsNone(self.f.getPayloads().getTypecode())
+        self.assertEqual(self.f.getPayload(1), 2.5)
+        self.assertEqual(self.f.getPayload(3), 20)
+
+    def test_append(self):
+        """Test append and extend"""
+
+        self.f.append(9, 50)
+        self.f.extend(Fiber([10, 11], [60, 70]))
+
+        ref = Fiber(self.coords + [9, 10, 11], self.payloads + [50, 60, 70])
+        self.assertEqual(self.f, ref)
+
+        with self.assertRaises(AssertionError):
+            self.f.append(2, 1)
+
+    def test_operators(self):
+        """Test the fiber operators on columnar fibers"""
+
+        other = Fiber([0, 3, 8, 9], [1, 2, 3, 4])
+        other_c = Fiber.fromColumnar([0, 3, 8, 9], [1, 2, 3, 4])
+
+        self.assertEqual(list(self.f & other_c), list(self.ref & other))
+        self.assertEqual(list(self.f | other_c), list(self.ref | other))
+        self.assertEqual(list(self.f ^ other_c), list(self.ref ^ other))
+        self.assertEqual(list(self.f - other_c), list(self.ref - other))
+
+    def test_populate(self):
+        """Test populating a columnar fiber"""
+
+        z = Fiber.fromColumnar([], [])
+        z_ref = Fiber()
+
+        for target in [z, z_ref]:
+            for _, (t_ref, f_val) in target << self.ref:
+                t_ref += 2 * f_val
+
+        self.assertTrue(z.isColumnar())
+        self.assertEqual(z, z_ref)
+
+    def test_populate_default(self):
+        """Test that populating with empty values does not add elements"""
+
+        z = Fiber.fromColumnar([], [])
+
+        for _, (z_ref, _) in z << self.ref:
+            pass
+
+        self.assertEqual(len(z), 0)
+
+    def test_deepcopy(self):
+        """Test copying a columnar fiber"""
+
+        f = copy.deepcopy(self.f)
+
+        self.assertTrue(f.isColumnar())
+        self.assertEqual(f, self.ref)
+
+        f.getPayloadRef(1).v = 100
+        self.assertEqual(self.f.getPayload(1), 10)
+
+        p = copy.deepcopy(self.f.getPayload(1))
+        self.assertEqual(type(p), Payload)
+        self.assertEqual(p, 10)
+
+    def test_update(self):
+        """Test updating coordinates and payloads"""
+
+        ref = copy.deepcopy(self.ref)
+
+        for f in [self.f, ref]:
+            f.updateCoords(lambda i, c, p: 10 - c)
+            f.updatePayloads(lambda i, c, p: p + 1)
+
+        self.assertTrue(self.f.isColumnar())
+        self.assertEqual(self.f, ref)
+
+    def test_clear(self):
+        """Test clearing a columnar fiber"""
+
+        self.f.clear()
+        self.assertEqual(len(self.f), 0)
+        self.assertTrue(self.f.isColumnar())
+
+    def test_tensor_random(self):
+        """Test creating a random tensor with columnar leaves"""
+
+        t = Tensor.fromRandom(["M", "K"], [10, 10], [1.0, 0.5], seed=3)
+        t_c = Tensor.fromRandom(["M", "K"], [10, 10], [1.0, 0.5],
+                                seed=3, columnar=True)
+
+        self.assertEqual(t_c, t)
+        self.assertEqual(t_c.getShape(), t.getShape())
+
+        for fiber in t_c.getRoot().getPayloads():
+            self.assertTrue(fiber.isColumnar())
+            self.assertEqual(fiber.getOwner().getId(), "K")
+
+    def test_payload_array(self):
+        """Test PayloadArray as a plain sequence"""
+
+        a = PayloadArray([1, 2, 3])
+
+        a.insert(1, 5)
+        del a[0]
+        a[2] = Payload(9)
+
+        self.assertEqual(a, [5, 2, 9])
+        self.assertEqual(a.nbytes(), 3 * a.getValues().itemsize)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import copy
+import unittest
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+class TestFiberCow(unittest.TestCase):
+
+    def setUp(self):
+        self.t = Tensor.fromRandom(["M", "N", "K"], [8, 6, 10], [0.9, 0.8, 0.6], seed=5)
+
+        Fiber.setCopyOnWrite(True)
+
+    def tearDown(self):
+        Fiber.setCopyOnWrite(False)
+
+    def deepResult(self, transform):
+        """Apply a transform without copy-on-write"""
+
+        Fiber.setCopyOnWrite(False)
+        try:
+            return transform(self.t)
+        finally:
+            Fiber.setCopyOnWrite(True)
+
+    def test_default(self):
+        """Test copy-on-write is set"""
+
+        self.assertTrue(Fiber.getCopyOnWrite())
+
+    def test_transforms(self):
+        """Test transforms match the transforms with deep copies"""
+
+        transforms = {"split": lambda t: t.splitUniform(3),
+                      "split_depth": lambda t: t.splitUniform(2, depth=1),
+                      "split_equal": lambda t: t.splitEqual(2),
+                      "flatten": lambda t: t.flattenRanks(),
+                      "flatten_depth": lambda t: t.flattenRanks(depth=1),
+                      "swap": lambda t: t.swapRanks(),
+                      "swizzle": lambda t: t.swizzleRanks(["N", "M", "K"])}
+
+        for name, transform in transforms.items():
+            with self.subTest(transform=name):
+                self.assertEqual(transform(self.t), self.deepResult(transform))
+
+    def test_split_shares(self):
+        """Test splitting the top rank shares the lower fibers"""
+
+        s = self.t.splitUniform(4)
+
+        t_root = self.t.getRoot()
+
+        for m1, m_fiber in s.getRoot():
+            for m, n_fiber in m_fiber:
+                self.assertIs(n_fiber, t_root.getPayload(m))
+
+    def test_getPayloadRef(self):
+        """Test mutating a transformed tensor leaves the original unchanged"""
+
+        orig = copy.deepcopy(self.t)
+        ref = self.deepResult(lambda t: t.splitUniform(4))
+
+        s = self.t.splitUniform(4)
+
+        m = self.t.getRoot().coords[0]
+        n, k_fiber = next(iter(self.t.getRoot().getPayload(m)))
+        k = k_fiber.coords[0]
+
+        m1 = (m // 4) * 4
+
+        p = s.getPayloadRef(m1, m, n, k)
+        p += 100
+
+        self.assertEqual(self.t, orig)
+        self.assertEqual(s.getPayload(m1, m, n, k), self.t.getPayload(m, n, k) + 100)
+
+        q = self.t.getPayloadRef(m, n, k)
+        q <<= 7
+
+        self.assertEqual(s.getPayload(m1, m, n, k), ref.getPayload(m1, m, n, k) + 100)
+
+    def test_getPayloadRef_owner(self):
+        """Test copied fibers are owned by the mutated tensor"""
+
+        s = self.t.splitUniform(4)
+
+        m = self.t.getRoot().coords[0]
+
+        n_fiber = s.getRoot().getPayloadRef((m // 4) * 4, m)
+
+        self.assertIsNot(n_fiber, self.t.getRoot().getPayload(m))
+        self.assertIs(n_fiber.getOwner(), s.ranks[2])
+        self.assertTrue(any(f is n_fiber for f in s.ranks[2].getFibers()))
+
+    def test_populate(self):
+        """Test populating a transformed tensor leaves the original unchanged"""
+
+        orig = copy.deepcopy(self.t)
+
+        s = self.t.flattenRanks()
+        mn = s.getRoot().coords[0]
+
+        a = Fiber([0, 1, 2], [5, 6, 7])
+
+        for _, (k_fiber, _) in s.getRoot() << Fiber([mn], [1]):
+            for _, (k_ref, a_val) in k_fiber << a:
+                k_ref <<= a_val
+
+        self.assertEqual(self.t, orig)
+        self.assertEqual(s.getPayload(mn, 2), 7)
+
+    def test_updatePayloads(self):
+        """Test updating an original tensor leaves the transform unchanged"""
+
+        ref = self.deepResult(lambda t: t.swizzleRanks(["N", "M", "K"]))
+
+        s = self.t.swizzleRanks(["N", "M", "K"])
+
+        self.t.getRoot().updatePayloads(lambda i, c, p: p * 2, depth=2)
+        self.t.getRoot().updateCoords(lambda i, c, p: c + 1, depth=2)
+
+        self.assertEqual(s, ref)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+import os
+import tempfile
+import unittest
+
+from array import array
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+class TestFiberDense(unittest.TestCase):
+
+    def setUp(self):
+        self.t = Tensor.fromRandom(["M", "K"], [10, 40], [0.8, 0.3], seed=4)
+
+        self.u = Tensor.fromRandom(["M", "K"], [10, 40], [0.8, 0.3], seed=4)
+        self.u.setFormat("K", "U")
+
+    def denseFiber(self, coords, payloads, shape=None):
+        """Create a standalone fiber with format "U" """
+
+        f = Fiber(coords, payloads, shape=shape)
+        f.getRankAttrs().setFormat("U")
+        return f
+
+    def test_getPayload(self):
+        """Test point lookups in fibers with dense storage"""
+
+        for m in range(10):
+            for k in range(40):
+                with self.subTest(m=m, k=k):
+                    self.assertEqual(self.u.getPayload(m, k),
+                                     self.t.getPayload(m, k))
+
+        for k_fiber in self.u.ranks[1].getFibers():
+            self.assertTrue(k_fiber.isDense())
+            self.assertEqual(list(k_fiber.coords), list(range(40)))
+            self.assertEqual(k_fiber.getIndexBytes(), 0)
+
+        self.assertFalse(self.u.getRoot().isDense())
+
+    def test_setFormat(self):
+        """Test changing the format converts the storage"""
+
+        k_fiber = self.u.getRoot().getPayload(0)
+        dense_values = list(k_fiber.payloads.getValues())
+
+        self.u.setFormat("K", "C")
+
+        self.assertFalse(k_fiber.isDense())
+        self.assertEqual(self.u, self.t)
+        self.assertEqual(list(k_fiber.coords), self.t.getRoot().getPayload(0).coords)
+
+        self.u.setFormat("K", "H")
+        self.assertEqual(self.u.getPayload(0, 1), self.t.getPayload(0, 1))
+
+        self.u.setFormat("K", "U")
+        self.assertTrue(k_fiber.isDense())
+        self.assertEqual(list(k_fiber.payloads.getValues()), dense_values)
+
+    def test_setFormat_ineligible(self):
+        """Test fibers that cannot have dense storage"""
+
+        t = Tensor.fromUncompressed(["K"], [1, 0, 3])
+        t.getRoot().append(5, 6)
+        t.setShape([3])
+        t.setFormat("K", "U")
+
+        self.assertFalse(t.getRoot().isDense())
+        self.assertEqual(t.getPayload(5), 6)
+
+        self.t.setFormat("M", "U")
+        self.assertFalse(self.t.getRoot().isDense())
+
+    def test_iterShape(self):
+        """Test iterShape walks the elements"""
+
+        f = Fiber([1, 4, 5, 9], [2, 0, 6, 10], shape=12)
+
+        expected = [(c, f.getPayload(c)) for c in range(12)]
+
+        self.assertEqual([(c, p) for c, p in f.iterShape()], expected)
+        self.assertEqual([(c, p) for c, p in f.iterRangeShape(3, 12, 3)],
+                         expected[3:12:3])
+
+        root = self.u.getRoot()
+        for (c, p), m in zip(root.iterShape(), range(10)):
+            self.assertEqual(p, root.getPayload(m))
+
+    def test_iterShape_modify(self):
+        """Test iterShape when the consumer inserts elements"""
+
+        f = Fiber([2, 6], [20, 60], shape=8)
+
+        for c, p in f.iterShape():
+            if c == 3:
+                f.getPayloadRef(1)
+                f.getPayloadRef(4)
+
+            if c in [2, 6]:
+                self.assertEqual(p, 10 * c)
+            else:
+                self.assertEqual(p, 0)
+
+    def test_uncompress(self):
+        """Test uncompress"""
+
+        f = Fiber([1, 4, 5, 9], [2, 0, 6, 10])
+        self.assertEqual(f.uncompress([12]), [0, 2, 0, 0, 0, 6, 0, 0, 0, 10, 0, 0])
+
+        self.assertEqual(self.u.getRoot().uncompress(), self.t.getRoot().uncompress())
+
+    def test_uncompress_view(self):
+        """Test uncompress returns a view of dense storage"""
+
+        views = self.u.getRoot().uncompress(view=True)
+        self.assertIsInstance(views[0], array)
+        self.assertEqual([list(v) for v in views], self.t.getRoot().uncompress())
+
+        views[0][3] = 33
+        self.assertEqual(self.u.getPayload(0, 3), 33)
+
+        self.assertEqual(self.t.getRoot().uncompress(view=True),
+                         self.t.getRoot().uncompress())
+
+    def test_append(self):
+        """Test lookups after appending beyond the dense storage"""
+
+        t = Tensor.fromUncompressed(["K"], [0, 10, 0, 0, 40, 0, 0, 0])
+        t.setFormat("K", "U")
+        f = t.getRoot()
+
+        self.assertEqual(f.getPayload(4), 40)
+
+        ref = f.getPayloadRef(6)
+        ref <<= 60
+        self.assertTrue(f.isDense())
+        self.assertEqual(f.getPayload(6), 60)
+
+        f.append(20, 200)
+        self.assertTrue(f.isDense())
+        self.assertEqual(list(f.coords), list(range(21)))
+        self.assertEqual(f.getPayload(20), 200)
+        self.assertEqual(f.getPayload(6), 60)
+        self.assertEqual(f.getPayload(12), 0)
+
+        ref = f.getPayloadRef(30)
+        ref <<= 300
+        self.assertTrue(f.isDense())
+        self.assertEqual(f.getPayload(30), 300)
+
+        self.assertEqual(len(f), 5)
+        self.assertEqual(f.maxCoord(), 30)
+
+    def test_occupancy(self):
+        """Test the default elements of dense storage are not elements"""
+
+        c = Tensor.fromUncompressed(["K"], [0, 1, 0, 3, 0])
+        u = Tensor.fromUncompressed(["K"], [0, 1, 0, 3, 0])
+        u.setFormat("K", "U")
+
+        (cf, uf) = (c.getRoot(), u.getRoot())
+
+        self.assertTrue(uf.isDense())
+        self.assertEqual(len(uf), len(cf))
+        self.assertEqual(uf.minCoord(), 1)
+        self.assertEqual(uf.maxCoord(), 3)
+        self.assertEqual(uf.estimateShape(), [4])
+        self.assertEqual(uf.countValues(), 2)
+        self.assertEqual(uf.fiber2dict(), cf.fiber2dict())
+        self.assertEqual(repr(uf), repr(cf))
+
+        self.assertEqual([list(p.coords) for _, p in uf.splitUniform(2)],
+                         [list(p.coords) for _, p in cf.splitUniform(2)])
+
+    def test_transforms(self):
+        """Test transforming and exporting a tensor with dense storage"""
+
+        u = Tensor.fromRandom(["M", "K"], [10, 40], [0.8, 0.3], seed=4)
+        u.setFormat("K", "U")
+
+        s = u.swizzleRanks(["K", "M"])
+        self.assertEqual(s, self.t.swizzleRanks(["K", "M"]))
+        self.assertEqual(s.countValues(), self.t.countValues())
+        self.assertEqual(s.getRoot().fiber2dict(),
+                         self.t.swizzleRanks(["K", "M"]).getRoot().fiber2dict())
+
+        (u_coords, u_values) = u.toCOO()
+        (t_coords, t_values) = self.t.toCOO()
+        self.assertEqual([c.tolist() for c in u_coords], [c.tolist() for c in t_coords])
+        self.assertEqual(u_values.tolist(), t_values.tolist())
+
+        self.assertEqual(Tensor.fromCOO(["M", "K"], u_coords, u_values, shape=[10, 40]),
+                         self.t)
+
+        split = u.splitUniform(8, depth=1).getRoot()
+        expected = self.t.splitUniform(8, depth=1).getRoot()
+        self.assertEqual(split.fiber2dict(), expected.fiber2dict())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, tensor in [("u", u), ("t", self.t)]:
+                tensor.dump(os.path.join(tmpdir, name + ".yaml"))
+
+            with open(os.path.join(tmpdir, "u.yaml")) as u_file, \
+                 open(os.path.join(tmpdir, "t.yaml")) as t_file:
+                self.assertEqual(u_file.read(), t_file.read())
+
+            u2 = Tensor.fromFile(os.path.join(tmpdir, "u.yaml"))
+            self.assertEqual(u2, self.t)
+
+if __name__ == '__main__':
+    unittest.main()
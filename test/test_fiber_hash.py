@@ -0,0 +1,115 @@
+import unittest
+
+from fibertree import Fiber
+from fibertree import Tensor
+from fibertree import CoordPayload
+
+from fibertree.core import merge_kernels
+
+
+class TestFiberHash(unittest.TestCase):
+
+    def setUp(self):
+        self.t = Tensor.fromRandom(["M", "K"], [20, 30], [0.8, 0.5], seed=3)
+
+        self.h = Tensor.fromRandom(["M", "K"], [20, 30], [0.8, 0.5], seed=3)
+        self.h.setFormat("M", "H")
+        self.h.setFormat("K", "H")
+
+    def hashFiber(self, coords, payloads):
+        """Create a standalone fiber with format "H" """
+
+        f = Fiber(coords, payloads)
+        f.getRankAttrs().setFormat("H")
+        return f
+
+    def test_format(self):
+        """Test setting the "H" format"""
+
+        self.assertEqual(self.h.getFormat("K"), "H")
+
+        with self.assertRaises(AssertionError):
+            self.h.setFormat("K", "X")
+
+    def test_getPayload(self):
+        """Test point lookups match the compressed format"""
+
+        self.assertEqual(self.h.getIndexBytes(), 0)
+
+        for m in range(20):
+            for k in range(30):
+                with self.subTest(m=m, k=k):
+                    self.assertEqual(self.h.getPayload(m, k),
+                                     self.t.getPayload(m, k))
+
+        self.assertGreater(self.h.getIndexBytes(), 0)
+        self.assertEqual(self.t.getIndexBytes(), 0)
+
+    def test_iter(self):
+        """Test iteration of an "H" fiber is over its occupancy"""
+
+        root = self.h.getRoot()
+
+        self.assertEqual(list(root), list(self.t.getRoot()))
+
+        self.assertNotEqual(merge_kernels.chooseStrategy([root, root], "merge"), "lazy")
+
+    def test_append(self):
+        """Test appends update the index"""
+
+        f = self.hashFiber([1, 5, 7], [10, 50, 70])
+
+        self.assertEqual(f.getPayload(5), 50)
+        index = f._getCoordIndex()
+
+        f.append(9, 90)
+        self.assertIs(f._getCoordIndex(), index)
+        self.assertEqual(f.getPayload(9), 90)
+
+        ref = f.getPayloadRef(12)
+        ref += 120
+        self.assertIs(f._getCoordIndex(), index)
+        self.assertEqual(f.getPayload(12), 120)
+        self.assertEqual(f.getPosition(12), 4)
+
+    def test_insert(self):
+        """Test inserts in the middle invalidate the index"""
+
+        f = self.hashFiber([1, 5, 7], [10, 50, 70])
+
+        self.assertEqual(f.getPayload(7), 70)
+
+        ref = f.getPayloadRef(3)
+        ref += 30
+
+        self.assertEqual(f.getPayload(3), 30)
+        self.assertEqual(f.getPayload(5), 50)
+        self.assertEqual(f.getPayload(7), 70)
+        self.assertEqual(f.getPosition(7), 3)
+
+        del f.coords[0]
+        del f.payloads[0]
+
+        self.assertEqual(f.getPayload(7), 70)
+        self.assertEqual(f.getPayload(1), 0)
+
+    def test_set_coord(self):
+        """Test in-place coordinate changes invalidate the index"""
+
+        f = self.hashFiber([1, 5, 7], [10, 50, 70])
+
+        self.assertEqual(f.getPayload(5), 50)
+
+        f[1] = CoordPayload(6, 60)
+
+        self.assertEqual(f.getPayload(5), 0)
+        self.assertEqual(f.getPayload(6), 60)
+
+        f.updateCoords(lambda i, c, p: c + 1)
+
+        self.assertEqual(f.getPayload(7), 60)
+        self.assertEqual(f.getPayload(8), 70)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+"""Tests of the cached shapes of fibertrees"""
+
+import copy
+import random
+import unittest
+
+from fibertree import CoordPayload
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+class TestFiberShapeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.f = Fiber([0, 2], [Fiber([0, 2], [1, 2]),
+                                Fiber([0, 1], [3, 4])])
+
+    def tearDown(self):
+        Fiber.setCopyOnWrite(False)
+
+    def test_estimateShape(self):
+        """Test the estimated shape uses the maximum of the lower fibers"""
+
+        f = Fiber([0, 5], [Fiber([6], [1]), Fiber([2], [1])])
+
+        self.assertEqual(f.estimateShape(), [6, 7])
+        self.assertEqual(f.estimateShape(all_ranks=False), 6)
+
+    def test_cached(self):
+        """Test the shape is only calculated once"""
+
+        self.assertEqual(self.f.getShape(), [3, 3])
+
+        calcs = []
+        calc = self.f._calcShape
+        self.f._calcShape = lambda: calcs.append(1) or calc()
+
+        for _ in range(3):
+            shape = self.f.getShape()
+            self.assertEqual(shape, [3, 3])
+
+            # A copy is returned
+            shape.append(10)
+
+        self.assertEqual(calcs, [])
+
+    def test_lower_mutation(self):
+        """Test changes to a lower fiber are seen by the root"""
+
+        self.assertEqual(self.f.getShape(), [3, 3])
+
+        k_fiber = self.f.getPayload(2)
+        ref = k_fiber.getPayloadRef(7)
+        ref <<= 5
+
+        self.assertEqual(self.f.getShape(), [3, 8])
+
+        k_fiber.append(9, 1)
+        self.assertEqual(self.f.getShape(), [3, 10])
+
+        ref = self.f.getPayloadRef(4, 1)
+        ref <<= 1
+        self.assertEqual(self.f.getShape(), [5, 10])
+
+        k_fiber.updateCoords(lambda i, c, p: i)
+        self.assertEqual(self.f.getShape(), [5, 4])
+
+        k_fiber.clear()
+        self.assertEqual(self.f.getShape(), [5, 3])
+
+    def test_setitem(self):
+        """Test assignments by position"""
+
+        self.assertEqual(self.f.getShape(), [3, 3])
+
+        self.f[1] = Fiber([8], [1])
+        self.assertEqual(self.f.getShape(), [3, 9])
+
+        self.f[1] = CoordPayload(4, None)
+        self.assertEqual(self.f.getShape(), [5, 9])
+
+        self.f[1] = CoordPayload(None, Fiber([1], [1]))
+        self.assertEqual(self.f.getShape(), [5, 3])
+
+    def test_invalidation(self):
+        """Test inserts update the cache in place"""
+
+        f = Fiber([0, 4], [1, 2])
+        self.assertEqual(f.getShape(), [5])
+
+        cache = f._shape_cache
+
+        ref = f.getPayloadRef(2)
+        ref <<= 3
+        ref = f.getPayloadRef(4)
+        ref <<= 5
+        self.assertIs(f._shape_cache, cache)
+
+        f.append(6, 1)
+        self.assertIs(f._shape_cache, cache)
+        self.assertEqual(f.getShape(), [7])
+
+        f.clear()
+        self.assertIsNone(f._shape_cache)
+        self.assertEqual(f.getShape(), [0])
+
+    def test_lower_insert(self):
+        """Test inserts in a lower fiber update the caches of the path"""
+
+        self.assertEqual(self.f.getShape(), [3, 3])
+
+        other = Fiber([1], [Fiber([5], [1])])
+        self.assertEqual(other.getShape(), [2, 6])
+        other_cache = other._shape_cache
+
+        root_cache = self.f._shape_cache
+        self.f.getPayload(0).append(6, 1)
+
+        self.assertIs(self.f._shape_cache, root_cache)
+        self.assertEqual(self.f.getShape(), [3, 7])
+
+        # Unrelated fibertrees keep their caches
+        self.f.getPayload(0).clear()
+        self.assertIsNone(self.f._shape_cache)
+        self.assertIs(other._shape_cache, other_cache)
+
+        self.assertEqual(self.f.getShape(), [3, 2])
+        self.assertEqual(other.getShape(), [2, 6])
+
+    def test_leaf_fibers(self):
+        """Test leaf fibers are not given cached shapes of their own"""
+
+        f = Fiber([0, 2, 3], [Fiber([0, 2], [1, 2]), Fiber([0, 1], [3, 4]), Fiber()])
+        self.assertEqual(f.getShape(), [4, 3])
+
+        for k_fiber in f.getPayloads():
+            self.assertIsNone(k_fiber._shape_cache)
+
+        # Inserts in a leaf fiber still grow the cached shape
+        root_cache = f._shape_cache
+        f.getPayload(0).append(6, 1)
+
+        self.assertIs(f._shape_cache, root_cache)
+        self.assertEqual(f.getShape(), [4, 7])
+
+        # An empty leaf fiber that gets a fiber payload adds a level
+        f.getPayload(3).append(1, Fiber([2, 9], [1, 1]))
+        self.assertEqual(f.getShape(), [4, 7, 10])
+        self.assertEqual(f.getShape(), f._calcShape())
+
+    def test_fiber_shape(self):
+        """Test the shape of just the fiber is cached"""
+
+        f = Fiber([4, 1, 9, 3], [1, 2, 3, 4], ordered=False)
+
+        self.assertEqual(f.getShape(all_ranks=False), 10)
+        self.assertEqual(f._shape_cache["fiber"], 10)
+
+        f.append(12, 1)
+        self.assertEqual(f.getShape(all_ranks=False), 13)
+
+        f.append(7, 1)
+        self.assertEqual(f.getShape(all_ranks=False), 13)
+
+    def test_random(self):
+        """Test the cached shapes match a recalculation after random updates"""
+
+        rng = random.Random(2)
+
+        t = Tensor.fromRandom(["M", "N", "K"], [4, 6, 8], [0.5, 0.5, 0.5], seed=3)
+        root = t.getRoot()
+
+        for rank in t.ranks:
+            for fiber in rank.getFibers():
+                fiber.setOwner(None)
+
+        for i in range(300):
+            with self.subTest(i=i):
+                m, n, k = rng.randrange(6), rng.randrange(9), rng.randrange(12)
+
+                n_fiber = root.getPayload(m)
+                k_fiber = n_fiber.getPayload(n) if len(n_fiber) > 0 else None
+
+                op = rng.randrange(5)
+                if op == 0 and k_fiber is not None and len(k_fiber) > 0:
+                    ref = k_fiber.getPayloadRef(k)
+                    ref <<= 1
+                elif op == 1 and k_fiber is not None:
+                    k_fiber.clear()
+                elif op == 2 and m > root.coords[-1]:
+                    root.append(m, Fiber([n], [Fiber([k], [1])]))
+                elif op == 3 and len(n_fiber) > 0 and n > n_fiber.coords[-1]:
+                    n_fiber.append(n, Fiber([k], [1]))
+                else:
+                    root.getShape(all_ranks=False)
+
+                self.assertEqual(root.getShape(), root._calcShape())
+
+    def test_copy(self):
+        """Test copying a fibertree with cached shapes"""
+
+        self.assertEqual(self.f.getShape(), [3, 3])
+
+        g = copy.deepcopy(self.f)
+        self.assertIsNone(g._shape_cache)
+        self.assertEqual(g, self.f)
+
+        g.getPayload(0).append(6, 1)
+        self.assertEqual(g.getShape(), [3, 7])
+        self.assertEqual(self.f.getShape(), [3, 3])
+
+    def test_declared_shape(self):
+        """Test fibers with a shape in their rank attributes"""
+
+        a = Fiber([0, 1], [Fiber([1], [1], shape=5), Fiber([2], [1])], shape=4)
+
+        self.assertEqual(a.getShape(), [4, 5])
+
+        a.getPayload(1).getRankAttrs().setShape(8)
+        self.assertEqual(a.getShape(), [4, 8])
+
+        a.getPayload(0).append(10, 1)
+        self.assertEqual(a.getShape(), [4, 8])
+
+        a.getRankAttrs().setShape(2)
+        self.assertEqual(a.getShape(), [2, 8])
+
+    def test_shared(self):
+        """Test a fiber shared by two fibertrees"""
+
+        Fiber.setCopyOnWrite(True)
+
+        s = self.f.splitUniform(2)
+
+        self.assertEqual(s.getShape(), [3, 3, 3])
+        self.assertEqual(self.f.getShape(), [3, 3])
+
+        #
+        # The lower fiber at coordinate 2 is in both fibertrees
+        #
+        k_fiber = self.f.getPayload(2)
+        self.assertIs(s.getPayload(2, 2), k_fiber)
+
+        k_fiber.append(6, 1)
+
+        self.assertEqual(s.getShape(), [3, 3, 7])
+        self.assertEqual(self.f.getShape(), [3, 7])
+
+
+if __name__ == '__main__':
+    unittest.main()
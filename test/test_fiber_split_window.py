@@ -0,0 +1,173 @@
+"""Tests of the partitions of a split being windows over the split fiber"""
+
+import copy
+import pickle
+import unittest
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+class TestFiberSplitWindow(unittest.TestCase):
+
+    def setUp(self):
+        self.t = Tensor.fromUncompressed(["M", "K"], [[1, 2, 0, 3, 4, 5],
+                                                      [0, 6, 7, 8, 0, 9]])
+
+    def tearDown(self):
+        Fiber.setCopyOnWrite(False)
+
+    def isWindow(self, fiber):
+        """Return whether a fiber is an unmaterialized window"""
+
+        return "_window_of" in fiber.__dict__
+
+    def test_window(self):
+        """Test the lists of a window are created when first used"""
+
+        f = Fiber([0, 2, 4, 6], [1, 2, 3, 4])
+
+        w = f._window(1, 3, coord_offset=2)
+
+        self.assertTrue(self.isWindow(w))
+        self.assertEqual(len(w), 2)
+        self.assertFalse(self.isWindow(w))
+
+        self.assertEqual(w.coords, [0, 2])
+        self.assertEqual(w.payloads, [2, 3])
+
+        with self.assertRaises(AttributeError):
+            w.not_an_attribute
+
+    def test_pickle(self):
+        """Test pickling a window does not pickle the whole fiber"""
+
+        f = Fiber(list(range(10000)), list(range(1, 10001)))
+
+        parts = f.splitUniform(10)
+        part = parts.getPayload(0)
+
+        self.assertTrue(self.isWindow(part))
+        self.assertLess(len(pickle.dumps(part)), 1000)
+
+        self.assertEqual(copy.deepcopy(part), Fiber(list(range(10)), list(range(1, 11))))
+        self.assertEqual(pickle.loads(pickle.dumps(parts)), f.splitUniform(10))
+
+    def test_lazy(self):
+        """Test the partitions are not created until they are used"""
+
+        for cow in [False, True]:
+            Fiber.setCopyOnWrite(cow)
+
+            with self.subTest(cow=cow):
+                s = self.t.getRoot().splitUniform(2, depth=1)
+
+                for _, k1_fiber in s:
+                    self.assertTrue(all(self.isWindow(p) for p in k1_fiber.payloads))
+
+                self.assertEqual(s.getPayload(1, 2), Fiber([2, 3], [7, 8]))
+
+    def test_halo(self):
+        """Test overlapping partitions"""
+
+        for split in [lambda f: f.splitUniform(2, halo=1),
+                      lambda f: f.splitNonUniform([0, 2, 4], halo=1),
+                      lambda f: f.splitEqual(2, halo=1),
+                      lambda f: f.splitUnEqual([2, 2, 2], halo=1)]:
+            for cow in [False, True]:
+                Fiber.setCopyOnWrite(cow)
+
+                with self.subTest(cow=cow):
+                    f = Fiber([0, 1, 2, 3, 4, 5], [1, 2, 3, 4, 5, 6])
+
+                    s = split(f)
+
+                    self.assertEqual(s.getPayload(0), Fiber([0, 1, 2], [1, 2, 3]))
+                    self.assertEqual(s.getPayload(2), Fiber([2, 3, 4], [3, 4, 5]))
+
+                    ref = s.getPayload(2).getPayloadRef(2)
+                    ref <<= 10
+
+                    self.assertEqual(f.getPayload(2), 3)
+                    self.assertEqual(s.getPayload(2, 2), 10)
+
+    def test_relative(self):
+        """Test partitions with relative coordinates"""
+
+        f = Fiber([1, 4, 5, 9], [1, 2, 3, 4])
+
+        s = f.splitUniform(4, relativeCoords=True)
+
+        self.assertEqual(s.getCoords(), [0, 4, 8])
+        self.assertEqual(s.getPayload(4), Fiber([0, 1], [2, 3]))
+        self.assertEqual(s.getPayload(8), Fiber([1], [4]))
+
+        s = f.splitEqual(3, relativeCoords=True)
+
+        self.assertEqual(s.getPayload(9), Fiber([0], [4]))
+
+    def test_independent(self):
+        """Test the split and the original do not change each other"""
+
+        for cow in [False, True]:
+            Fiber.setCopyOnWrite(cow)
+
+            with self.subTest(cow=cow):
+                t = copy.deepcopy(self.t)
+                root = t.getRoot()
+
+                s = root.splitUniform(2, depth=1)
+                s_ref = copy.deepcopy(s)
+
+                ref = root.getPayloadRef(1, 4)
+                ref <<= 10
+                ref = root.getPayloadRef(1, 2)
+                ref <<= 20
+
+                self.assertEqual(s, s_ref)
+
+                ref = s.getPayloadRef(0, 2, 3)
+                ref <<= 30
+
+                self.assertEqual(t.getPayload(0, 3), 3)
+                self.assertEqual(t.getPayload(1, 2), 20)
+
+    def test_tensor(self):
+        """Test tiling a tensor by splitting each rank"""
+
+        t = Tensor.fromRandom(["M", "K"], [20, 30], [0.8, 0.5], seed=2)
+
+        s = t.splitUniform(4, depth=0).splitEqual(3, depth=2)
+
+        self.assertEqual(s.getRankIds(), ["M.1", "M.0", "K.1", "K.0"])
+        self.assertEqual(s.countValues(), t.countValues())
+
+        for cow in [False, True]:
+            Fiber.setCopyOnWrite(cow)
+
+            with self.subTest(cow=cow):
+                self.assertEqual(t.splitUniform(4, depth=0).splitEqual(3, depth=2), s)
+
+        for m1, m0_fiber in s.getRoot():
+            for m0, k1_fiber in m0_fiber:
+                k_coords = [k for _, k0_fiber in k1_fiber for k, _ in k0_fiber]
+                self.assertEqual(k_coords, t.getPayload(m0).getCoords())
+
+    def test_columnar(self):
+        """Test splitting columnar fibers"""
+
+        t = Tensor.fromRandom(["M", "K"], [5, 20], [1.0, 0.5], seed=1, columnar=True)
+        u = Tensor.fromRandom(["M", "K"], [5, 20], [1.0, 0.5], seed=1)
+
+        s = t.splitUniform(5, depth=1)
+
+        self.assertEqual(s, u.splitUniform(5, depth=1))
+
+        ref = s.getRoot().getPayload(0, 0).getPayloadRef(u.getPayload(0).getCoords()[0])
+        ref <<= 100
+
+        self.assertNotEqual(t.getPayload(0, u.getPayload(0).getCoords()[0]), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+import gc
+import unittest
+
+from fibertree import Fiber
+from fibertree import Metrics
+from fibertree import Tensor
+
+
+class TestMergeCache(unittest.TestCase):
+
+    def setUp(self):
+        Metrics.endCollect()
+
+        self.strategy = Fiber.getMergeStrategy()
+
+        self.a = Fiber([1, 3, 4, 7, 9, 12, 15], [1, 0, 4, 7, 9, 12, 15])
+        self.b = Fiber([0, 3, 4, 8, 12, 15, 20], [10, 30, 40, 80, 0, 150, 200])
+
+        Fiber.setMergeCache(1 << 20)
+        self.cache = Fiber.getMergeCache()
+
+    def tearDown(self):
+        Fiber.setMergeCache(None)
+        Fiber.setMergeStrategy(self.strategy)
+
+    def merge(self, op, a, b, strategy="auto"):
+        """Return the elements of `a op b` using `strategy`"""
+
+        Fiber.setMergeStrategy(strategy)
+
+        return [(c, p) for c, p in op(a, b)]
+
+    def assertSameMerge(self, a, b):
+        """Check that each operator produces the same results as "lazy" """
+
+        for op in [Fiber.__and__, Fiber.__or__, Fiber.__sub__]:
+            with self.subTest(op=op.__name__):
+                self.assertEqual(self.merge(op, a, b), self.merge(op, a, b, "lazy"))
+
+    def test_setting(self):
+        """Test enabling and disabling the cache"""
+
+        self.assertIsNotNone(self.cache)
+        self.assertEqual(self.cache.max_bytes, 1 << 20)
+
+        Fiber.setMergeCache(0)
+        self.assertIsNone(Fiber.getMergeCache())
+
+        with self.assertRaises(AssertionError):
+            Fiber.setMergeCache(-1)
+
+    def test_hits(self):
+        """Test merging the same fibers again uses the cache"""
+
+        for strategy in ["merge", "gallop", "hash", "vector"]:
+            with self.subTest(strategy=strategy):
+                self.cache.clear()
+                ref = self.merge(Fiber.__and__, self.a, self.b, strategy)
+
+                misses = self.cache.misses
+                for _ in range(3):
+                    self.assertEqual(self.merge(Fiber.__and__, self.a, self.b, strategy), ref)
+
+                self.assertEqual(self.cache.misses, misses)
+                self.assertEqual(len(self.cache), 1)
+
+        hits = self.cache.hits
+        self.merge(Fiber.__or__, self.a, self.b)
+        self.merge(Fiber.__sub__, self.a, self.b)
+
+        # Difference uses the positions of the union
+        self.assertEqual(self.cache.hits, hits + 1)
+
+    def test_results(self):
+        """Test the cached merges match the lazy merge"""
+
+        for _ in range(2):
+            self.assertSameMerge(self.a, self.b)
+            self.assertSameMerge(self.b, self.a)
+            self.assertSameMerge(self.a, Fiber())
+
+        self.assertGreater(self.cache.hits, 0)
+
+    def test_payload_change(self):
+        """Test changed payloads are seen without invalidating the cache"""
+
+        self.assertSameMerge(self.a, self.b)
+
+        misses = self.cache.misses
+
+        ref = self.b.getPayloadRef(4)
+        ref <<= 0
+        ref = self.b.getPayloadRef(12)
+        ref <<= 5
+
+        self.assertSameMerge(self.a, self.b)
+        self.assertEqual(self.cache.misses, misses)
+
+    def test_coord_change(self):
+        """Test changed coordinates invalidate the cache"""
+
+        def change1(f):
+            ref = f.getPayloadRef(5)
+            ref <<= 2
+
+        def change2(f):
+            f.append(30, 3)
+
+        def change3(f):
+            f.updateCoords(lambda i, c, p: c + 1)
+
+        def change4(f):
+            del f.coords[0]
+            del f.payloads[0]
+            f.getPayloadRef(2) << 1
+
+        def change5(f):
+            f[0] = (5, 1)
+
+        for change in [change1, change2, change3, change4, change5]:
+            with self.subTest(change=change.__name__):
+                a = Fiber([1, 3, 4, 7, 9], [1, 2, 3, 4, 5])
+                b = Fiber([2, 3, 5, 8, 9], [1, 2, 3, 4, 5])
+
+                self.assertSameMerge(a, b)
+
+                change(a)
+                self.assertSameMerge(a, b)
+
+                change(b)
+                self.assertSameMerge(a, b)
+
+    def test_lru(self):
+        """Test the least recently used merges are evicted"""
+
+        Fiber.setMergeCache(700)
+        cache = Fiber.getMergeCache()
+
+        fibers = [Fiber(list(range(i, i + 10)), [1] * 10) for i in range(3)]
+
+        # Each intersection keeps 2 x 9 or 8 positions of 8 bytes, and
+        # the 2 x 10 coordinates of its fibers
+        self.merge(Fiber.__and__, fibers[0], fibers[1])
+        self.merge(Fiber.__and__, fibers[1], fibers[2])
+        self.assertEqual(len(cache), 2)
+
+        self.merge(Fiber.__and__, fibers[0], fibers[1])
+        self.merge(Fiber.__and__, fibers[0], fibers[2])
+
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.nbytes, 700)
+
+        misses = cache.misses
+        self.merge(Fiber.__and__, fibers[0], fibers[1])
+        self.assertEqual(cache.misses, misses)
+
+        self.merge(Fiber.__and__, fibers[1], fibers[2])
+        self.assertEqual(cache.misses, misses + 1)
+
+        # Positions larger than the cache are not kept
+        Fiber.setMergeCache(10)
+        self.merge(Fiber.__and__, fibers[0], fibers[1])
+        self.assertEqual(len(Fiber.getMergeCache()), 0)
+
+    def test_coords_counted(self):
+        """Test the coordinates kept alive by the cache count in its size"""
+
+        Fiber.setMergeCache(600)
+        cache = Fiber.getMergeCache()
+
+        # A small intersection of large fibers is not kept
+        a = Fiber(list(range(0, 200, 2)), [1] * 100)
+        b = Fiber(list(range(0, 20, 3)), [1] * 7)
+
+        self.merge(Fiber.__and__, a, b)
+        self.assertEqual(len(cache), 0)
+
+        self.merge(Fiber.__and__, self.a, self.b)
+        self.assertEqual(cache.nbytes, 2 * 4 * 8 + 2 * 7 * 8)
+        self.assertEqual(len(cache), 1)
+
+    def test_deleted_fibers(self):
+        """Test the merges of deleted fibers are dropped"""
+
+        a = Fiber([1, 2, 3], [1, 1, 1])
+        b = Fiber([2, 3, 4], [1, 1, 1])
+
+        self.merge(Fiber.__and__, a, b)
+        self.merge(Fiber.__and__, self.a, b)
+        self.assertEqual(len(self.cache), 2)
+
+        # The fibers are also held by the (lazy) results of the merges,
+        # which are only freed by the garbage collector
+        del a
+        gc.collect()
+        self.assertEqual(len(self.cache), 1)
+
+        del b
+        gc.collect()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.nbytes, 0)
+
+    def test_tensor(self):
+        """Test a stationary operand of a loop nest"""
+
+        a = Tensor.fromRandom(["M", "K"], [10, 50], [0.9, 0.3], seed=1)
+        b = Tensor.fromRandom(["K"], [50], [0.5], seed=2)
+
+        a_m = a.getRoot()
+        b_k = b.getRoot()
+
+        def multiply():
+            z = Tensor(rank_ids=["M"])
+            z_m = z.getRoot()
+
+            for m, (z_ref, a_k) in z_m << a_m:
+                for k, (a_val, b_val) in a_k & b_k:
+                    z_ref += a_val * b_val
+
+            return z
+
+        Fiber.setMergeCache(None)
+        ref = multiply()
+
+        Fiber.setMergeCache(1 << 20)
+        cache = Fiber.getMergeCache()
+
+        multiply()
+        misses = cache.misses
+
+        z = multiply()
+        self.assertEqual(cache.misses, misses)
+        self.assertGreater(cache.hits, 0)
+
+        self.assertEqual(z, ref)
+
+
+if __name__ == '__main__':
+    unittest.main()
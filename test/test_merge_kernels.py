@@ -0,0 +1,208 @@
+import unittest
+
+from fibertree import Fiber
+from fibertree import Tensor
+from fibertree import Metrics
+
+from fibertree.core import merge_kernels
+
+
+class TestMergeKernels(unittest.TestCase):
+
+    def setUp(self):
+        Metrics.endCollect()
+
+        self.strategy = Fiber.getMergeStrategy()
+
+        self.a = Fiber([1, 3, 4, 7, 9, 12, 15], [1, 0, 4, 7, 9, 12, 15])
+        self.b = Fiber([0, 3, 4, 8, 12, 15, 20], [10, 30, 40, 80, 0, 150, 200])
+
+    def tearDown(self):
+        Fiber.setMergeStrategy(self.strategy)
+
+    def merge(self, op, a, b, strategy):
+        """Return the elements of `a op b` using `strategy`"""
+
+        Fiber.setMergeStrategy(strategy)
+
+        return [(c, p) for c, p in op(a, b)]
+
+    def assertSameMerge(self, a, b, strategies):
+        """Check that `strategies` produce the same results as "lazy" """
+
+        for op in [Fiber.__and__, Fiber.__or__]:
+            ref = self.merge(op, a, b, "lazy")
+
+            for strategy in strategies:
+                with self.subTest(op=op.__name__, strategy=strategy):
+                    self.assertEqual(self.merge(op, a, b, strategy), ref)
+
+    def test_strategy_setting(self):
+        """Test setting the merge strategy"""
+
+        Fiber.setMergeStrategy("vector")
+        self.assertEqual(Fiber.getMergeStrategy(), "vector")
+
+        with self.assertRaises(AssertionError):
+            Fiber.setMergeStrategy("bogus")
+
+    def test_vector(self):
+        """Test the vector kernels (including explicit zeros)"""
+
+        self.assertSameMerge(self.a, self.b, ["vector"])
+        self.assertSameMerge(self.b, self.a, ["vector"])
+
+    def test_vector_empty(self):
+        """Test the vector kernels with empty fibers"""
+
+        self.assertSameMerge(self.a, Fiber(), ["vector"])
+        self.assertSameMerge(Fiber(), self.b, ["vector"])
+
+    def test_vector_columnar(self):
+        """Test the vector kernels on columnar fibers"""
+
+        a = Fiber.fromColumnar(self.a.getCoords(), self.a.getPayloads())
+        b = Fiber.fromColumnar(self.b.getCoords(), self.b.getPayloads())
+
+        self.assertSameMerge(a, b, ["vector"])
+
+    def test_vector_subfibers(self):
+        """Test the vector kernels on fibers of fibers"""
+
+        a = Tensor.fromRandom(["M", "K"], [20, 20], [0.6, 0.5], seed=1).getRoot()
+        b = Tensor.fromRandom(["M", "K"], [20, 20], [0.6, 0.5], seed=2).getRoot()
+
+        self.assertSameMerge(a, b, ["vector"])
+
+    def test_auto(self):
+        """Test that "auto" picks a kernel for large fibers"""
+
+        a = Fiber.fromRandom([1000], 0.3, seed=1)
+        b = Fiber.fromRandom([1000], 0.3, seed=2)
+
+        self.assertEqual(merge_kernels.chooseStrategy([a, b], "auto"), "vector")
+        self.assertEqual(merge_kernels.chooseStrategy([self.a, self.b], "auto"), "merge")
+
+        self.assertSameMerge(a, b, ["auto"])
+
+    def test_auto_skewed(self):
+        """Test that "auto" picks galloping for skewed fibers"""
+
+        a = Fiber([3, 500, 900], [1, 2, 3])
+        b = Fiber.fromRandom([1000], 0.5, seed=2)
+
+        self.assertEqual(merge_kernels.chooseStrategy([a, b], "auto"), "gallop")
+        self.assertEqual(merge_kernels.chooseStrategy([b, a], "auto"), "gallop")
+
+        self.assertSameMerge(a, b, ["auto"])
+        self.assertSameMerge(b, a, ["auto"])
+
+    def test_strategies(self):
+        """Test all the intersection strategies"""
+
+        strategies = ["merge", "gallop", "hash", "vector"]
+
+        self.assertSameMerge(self.a, self.b, strategies)
+        self.assertSameMerge(self.b, self.a, strategies)
+        self.assertSameMerge(self.a, Fiber(), strategies)
+
+        long = Fiber.fromRandom([1000], 0.5, seed=2)
+        self.assertSameMerge(self.a, long, strategies)
+        self.assertSameMerge(long, self.a, strategies)
+
+    def test_strategies_tuple_coords(self):
+        """Test the strategies on tuple coordinates"""
+
+        a = Fiber([(0, 1), (1, 0), (1, 2), (3, 3)], [1, 2, 3, 4])
+        b = Fiber([(0, 0), (1, 0), (3, 3)], [5, 6, 7])
+
+        self.assertEqual(merge_kernels.chooseStrategy([a, b], "auto"), "merge")
+
+        self.assertSameMerge(a, b, ["merge", "gallop", "hash", "vector"])
+
+    def test_intersection_strategy(self):
+        """Test selecting a strategy for Fiber.intersection()"""
+
+        c = Fiber([3, 4, 9, 15], [2, 2, 2, 2])
+
+        ref = list(Fiber.intersection(self.a, self.b, c, strategy="lazy"))
+
+        for strategy in ["merge", "gallop", "hash", "vector"]:
+            with self.subTest(strategy=strategy):
+                result = Fiber.intersection(self.a, self.b, c, strategy=strategy)
+                self.assertEqual(list(result), ref)
+
+        ref = list(Fiber.union(self.a, self.b, c, strategy="lazy"))
+        result = Fiber.union(self.a, self.b, c, strategy="merge")
+        self.assertEqual(list(result), ref)
+
+    def test_nway(self):
+        """Test the n-way intersection and union on many fibers"""
+
+        fibers = [Fiber.fromRandom([60], 0.7, seed=s) for s in range(6)]
+        fibers.append(Fiber([5, 59], [1, 1]))
+
+        for k in range(2, len(fibers) + 1):
+            for op in [Fiber.intersection, Fiber.union]:
+                ref = list(op(*fibers[:k], strategy="lazy"))
+
+                for strategy in ["merge", "gallop", "hash", "vector"]:
+                    with self.subTest(k=k, op=op.__name__, strategy=strategy):
+                        result = op(*fibers[:k], strategy=strategy)
+                        self.assertEqual(list(result), ref)
+
+    def test_positions_nway(self):
+        """Test the n-way position kernels directly"""
+
+        coords = [[1, 3, 4, 7, 9], [0, 3, 7, 9], [3, 5, 7, 9, 11]]
+
+        for strategy in ["merge", "gallop", "hash", "vector"]:
+            with self.subTest(strategy=strategy):
+                self.assertEqual(merge_kernels.intersectPositionsN(coords, strategy),
+                                 [[1, 3, 4], [1, 2, 3], [0, 2, 3]])
+
+        union = [[-1, 0, 1, 2, -1, 3, 4, -1],
+                 [0, -1, 1, -1, -1, 2, 3, -1],
+                 [-1, -1, 0, -1, 1, 2, 3, 4]]
+
+        self.assertEqual(merge_kernels.unionPositionsN(coords, "merge"), union)
+        self.assertEqual(merge_kernels.unionPositionsN(coords, "vector"), union)
+
+    def test_positions(self):
+        """Test the position kernels directly"""
+
+        a = [1, 3, 4, 7]
+        b = [0, 3, 7, 8, 9]
+
+        for strategy in ["merge", "gallop", "hash", "vector"]:
+            with self.subTest(strategy=strategy):
+                self.assertEqual(merge_kernels.intersectPositions(a, b, strategy),
+                                 ([1, 3], [1, 2]))
+                self.assertEqual(merge_kernels.intersectPositions(b, a, strategy),
+                                 ([1, 2], [1, 3]))
+
+        union = ([-1, 0, 1, 2, 3, -1, -1], [0, -1, 1, -1, 2, 3, 4])
+
+        self.assertEqual(merge_kernels.unionPositions(a, b, "merge"), union)
+        self.assertEqual(merge_kernels.unionPositions(a, b, "vector"), union)
+
+    def test_not_eligible(self):
+        """Test that ineligible fibers use the lazy merge"""
+
+        tuples = Fiber([(0, 1), (1, 1)], [1, 2])
+        self.assertEqual(merge_kernels.chooseStrategy([tuples, self.a], "vector"), "lazy")
+
+        lazy = self.a & self.b
+        self.assertEqual(merge_kernels.chooseStrategy([lazy, self.b], "vector"), "lazy")
+
+        t = Tensor.fromFiber(["K"], self.a)
+        t.setFormat("K", "U")
+        self.assertEqual(merge_kernels.chooseStrategy([t.getRoot(), self.b], "vector"), "lazy")
+
+        Metrics.beginCollect()
+        self.assertEqual(merge_kernels.chooseStrategy([self.a, self.b], "vector"), "lazy")
+        Metrics.endCollect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -428,6 +428,57 @@ class TestMetrics(unittest.TestCase):
         with self.assertRaises(AssertionError):
             Metrics.trace("K")
 
+    def test_trace_twice(self):
+        """Test that tracing a rank again does not restart its trace"""
+        Metrics.beginCollect("tmp/test_trace_twice")
+        Metrics.trace("K")
+
+        Metrics.registerRank("K")
+        Metrics.addUse("K", 3, 0)
+        Metrics.incIter("K")
+
+        Metrics.trace("K")
+        Metrics.addUse("K", 7, 1)
+        Metrics.incIter("K")
+        Metrics.endIter("K")
+
+        Metrics.endCollect()
+
+        corr = [
+            "K_pos,K,fiber_pos\n",
+            "0,3,0\n",
+            "1,7,1\n"
+        ]
+
+        with open("tmp/test_trace_twice-K-iter.csv", "r") as f:
+            self.assertEqual(f.readlines(), corr)
+
+    def test_trace_registered_rank(self):
+        """Test that tracing a rank that is already registered starts the
+        trace immediately"""
+        Metrics.beginCollect("tmp/test_trace_registered_rank")
+
+        Metrics.registerRank("K")
+        Metrics.addUse("K", 3, 0)
+        Metrics.incIter("K")
+
+        Metrics.trace("K")
+        self.assertTrue(Metrics.isTraced("K", "iter"))
+
+        Metrics.addUse("K", 7, 1)
+        Metrics.incIter("K")
+        Metrics.endIter("K")
+
+        Metrics.endCollect()
+
+        corr = [
+            "K_pos,K,fiber_pos\n",
+            "1,7,1\n"
+        ]
+
+        with open("tmp/test_trace_registered_rank-K-iter.csv", "r") as f:
+            self.assertEqual(f.readlines(), corr)
+
     def test_trace_rank_has_prefix(self):
         """Test that a prefix has been specified if we want to trace a rank"""
 
@@ -150,6 +150,41 @@ class TestPayload(unittest.TestCase):
         self.assertFalse(Payload.isEmpty(5))
         self.assertTrue(Payload.isEmpty(5, default=5))
 
+    def test_slots(self):
+        """Test payloads only have a value attribute"""
+
+        a = Payload(1)
+
+        with self.assertRaises(AttributeError):
+            a.bogus = 2
+
+        self.assertFalse(hasattr(a, "__dict__"))
+
+    def test_fromScalar(self):
+        """Test the scalar fast path constructor"""
+
+        a = Payload.fromScalar(4)
+        self.assertIsInstance(a, Payload)
+        self.assertEqual(a, Payload(4))
+
+        f = Fiber([1], [2])
+        self.assertIs(Payload(f), f)
+
+    def test_copy(self):
+        """Test pickling and copying payloads"""
+
+        import copy
+        import pickle
+
+        a = Payload(3)
+
+        self.assertEqual(pickle.loads(pickle.dumps(a)), a)
+
+        b = copy.deepcopy(a)
+        b += 1
+        self.assertEqual(a, 3)
+        self.assertEqual(b, 4)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -11,6 +11,25 @@ class TestPayloadCoord(unittest.TestCase):
         self.assertEqual(cp.coord, 1)
         self.assertEqual(cp.payload, 10)
 
+    def test_slots(self):
+        """Test coord/payload pairs only have coord and payload attributes"""
+
+        cp = CoordPayload(1, 2)
+
+        with self.assertRaises(AttributeError):
+            cp.bogus = 3
+
+        import pickle
+        self.assertEqual(pickle.loads(pickle.dumps(cp)), cp)
+
+    def test_fromPayload(self):
+        """Test creating an element from a legal payload"""
+
+        cp = CoordPayload.fromPayload(1, Payload(2))
+
+        self.assertEqual(cp, CoordPayload(1, 2))
+        self.assertIsInstance(cp.payload, Payload)
+
     def test_iter(self):
 
         cp_ref = [1, 10]
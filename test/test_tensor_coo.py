@@ -0,0 +1,282 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+from fibertree.core import csf
+
+
+class TestTensorCOO(unittest.TestCase):
+
+    def setUp(self):
+        self.a = Tensor.fromYAMLfile("./data/test_tensor-1.yaml")
+
+        # The elements of test_tensor-1.yaml, out of order
+        self.rows = [6, 1, 2, 4, 1, 2, 6, 1, 4]
+        self.cols = [3, 2, 1, 0, 0, 3, 1, 1, 2]
+        self.vals = [603, 102, 201, 400, 100, 203, 601, 101, 402]
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_fromCOO(self):
+        """Test construction from unsorted coordinate arrays"""
+
+        t = Tensor.fromCOO(["M", "K"], [self.rows, self.cols], self.vals, shape=[7, 4])
+
+        self.assertEqual(t, self.a)
+        self.assertEqual(t.getRankIds(), ["M", "K"])
+        self.assertEqual(t.getShape(), [7, 4])
+
+        for rank in t.ranks:
+            for fiber in rank.getFibers():
+                self.assertIs(fiber.getOwner(), rank)
+
+    def test_fromCOO_order(self):
+        """Test construction with a different rank order"""
+
+        t = Tensor.fromCOO(["M", "K"],
+                           [self.rows, self.cols],
+                           self.vals,
+                           shape=[7, 4],
+                           order=["K", "M"])
+
+        self.assertEqual(t.getRankIds(), ["K", "M"])
+        self.assertEqual(t.getShape(), [4, 7])
+        self.assertEqual(t, self.a.swapRanks())
+
+    def test_fromCOO_duplicates(self):
+        """Test combining duplicates and dropping empty elements"""
+
+        coords = [[2, 0, 2, 1, 1], [1, 3, 1, 0, 0]]
+        values = [5, 7, 6, 4, -4]
+
+        t = Tensor.fromCOO(["M", "K"], coords, values)
+
+        self.assertEqual(t.getRoot(), Fiber([0, 2], [Fiber([3], [7]), Fiber([1], [11])]))
+        self.assertEqual(t.getShape(), [3, 4])
+
+        t = Tensor.fromCOO(["M", "K"], coords, values, combine="first")
+        self.assertEqual(t.getPayload(2, 1), 5)
+
+        t = Tensor.fromCOO(["M", "K"], coords, values, combine="last")
+        self.assertEqual(t.getPayload(2, 1), 6)
+        self.assertEqual(t.getPayload(1, 0), -4)
+
+        t = Tensor.fromCOO(["M", "K"], coords, values, combine="max")
+        self.assertEqual(t.getPayload(1, 0), 4)
+
+    def test_fromCOO_3D(self):
+        """Test construction of a 3-D tensor matches its elements"""
+
+        ref = Tensor.fromRandom(["M", "N", "K"], [10, 8, 12], [0.8, 0.7, 0.5], seed=4)
+
+        points = [(m, n, k) for m, n_fiber in ref.getRoot()
+                  for n, k_fiber in n_fiber
+                  for k, _ in k_fiber]
+        values = [ref.getPayload(*p) for p in points]
+
+        rng = np.random.default_rng(1)
+        perm = rng.permutation(len(points))
+
+        coords = [[points[i][r] for i in perm] for r in range(3)]
+        values = [values[i] for i in perm]
+
+        t = Tensor.fromCOO(["M", "N", "K"], coords, values, shape=[10, 8, 12])
+
+        self.assertEqual(t, ref)
+
+        t = Tensor.fromCOO(["M", "N", "K"], coords, values, shape=[10, 8, 12],
+                           order=["K", "M", "N"], columnar=True)
+
+        self.assertEqual(t, ref.swizzleRanks(["K", "M", "N"]))
+
+    def test_fromCOO_empty(self):
+        """Test construction with no elements"""
+
+        t = Tensor.fromCOO(["M", "K"], [[], []], [], shape=[3, 4])
+
+        self.assertEqual(t, Tensor(rank_ids=["M", "K"], shape=[3, 4]))
+        self.assertEqual(t.getShape(), [3, 4])
+
+    def test_fromCOO_range(self):
+        """Test coordinates outside the shape"""
+
+        with self.assertRaises(AssertionError):
+            Tensor.fromCOO(["M", "K"], [[0, 5], [0, 1]], [1, 2], shape=[4, 4])
+
+    def test_toCOO(self):
+        """Test getting the elements as arrays"""
+
+        ((rows, cols), values) = self.a.toCOO()
+
+        order = np.lexsort((self.cols, self.rows))
+
+        self.assertEqual(rows.tolist(), np.array(self.rows)[order].tolist())
+        self.assertEqual(cols.tolist(), np.array(self.cols)[order].tolist())
+        self.assertEqual(values.tolist(), np.array(self.vals)[order].tolist())
+
+    def test_toCOO_explicit_zeros(self):
+        """Test explicit zeros are not exported"""
+
+        a = Tensor.fromFiber(["M", "K"],
+                             Fiber([0, 2, 3],
+                                   [Fiber([1, 2, 4], [10, 0, 14]),
+                                    Fiber([0], [0]),
+                                    Fiber([1, 3], [0, 31])]),
+                             shape=[4, 5])
+
+        ((rows, cols), values) = a.toCOO()
+
+        self.assertEqual(rows.tolist(), [0, 0, 3])
+        self.assertEqual(cols.tolist(), [1, 4, 3])
+        self.assertEqual(values.tolist(), [10, 14, 31])
+
+        t = Tensor.fromCOO(["M", "K"], [rows, cols], values, shape=[4, 5])
+
+        self.assertEqual(t, a)
+        self.assertEqual(t.toCOO()[1].tolist(), values.tolist())
+
+        filename = os.path.join(self.tmpdir.name, "a.mtx")
+        a.toMatrixMarket(filename)
+
+        with open(filename) as f:
+            lines = f.read().splitlines()
+
+        self.assertEqual(lines[1], "4 5 3")
+        self.assertEqual(len(lines), 5)
+
+        (segs, coords, values) = csf.segmentsFromFiber(a.getRoot(), 2, default=0)
+
+        self.assertEqual([s.tolist() for s in segs], [[0, 2], [0, 2, 3]])
+        self.assertEqual([c.tolist() for c in coords], [[0, 3], [1, 4, 3]])
+        self.assertEqual(values, [10, 14, 31])
+
+    def test_csr(self):
+        """Test conversion to and from CSR"""
+
+        (indptr, indices, data) = self.a.toCSR()
+
+        self.assertEqual(indptr.tolist(), [0, 0, 3, 5, 5, 7, 7, 9])
+        self.assertEqual(indices.tolist(), [0, 1, 2, 1, 3, 0, 2, 1, 3])
+        self.assertEqual(data.tolist(), [100, 101, 102, 201, 203, 400, 402, 601, 603])
+
+        t = Tensor.fromCSR(indptr, indices, data, shape=[7, 4])
+
+        self.assertEqual(t, self.a)
+
+    def test_csc(self):
+        """Test conversion to and from CSC"""
+
+        (indptr, indices, data) = self.a.toCSC()
+
+        self.assertEqual(indptr.tolist(), [0, 2, 5, 7, 9])
+        self.assertEqual(indices.tolist(), [1, 4, 1, 2, 6, 1, 4, 2, 6])
+        self.assertEqual(data.tolist(), [100, 400, 101, 201, 601, 102, 402, 203, 603])
+
+        t = Tensor.fromCSC(indptr, indices, data, shape=[7, 4])
+
+        self.assertEqual(t, self.a)
+        self.assertEqual(t.getShape(), [7, 4])
+
+        t = Tensor.fromCSC(indptr, indices, data, order=["K", "M"])
+
+        self.assertEqual(t, self.a.swapRanks())
+
+    def test_matrix_market(self):
+        """Test writing and reading a Matrix Market file"""
+
+        filename = os.path.join(self.tmpdir.name, "a.mtx")
+
+        self.a.setName("A")
+        self.a.toMatrixMarket(filename)
+
+        with open(filename) as f:
+            lines = f.read().splitlines()
+
+        self.assertEqual(lines[0], "%%MatrixMarket matrix coordinate integer general")
+        self.assertEqual(lines[1], "% A")
+        self.assertEqual(lines[2], "7 4 9")
+        self.assertEqual(lines[3], "2 1 100")
+        self.assertEqual(len(lines), 12)
+
+        t = Tensor.fromMatrixMarket(filename)
+
+        self.assertEqual(t, self.a)
+        self.assertEqual(t.getShape(), [7, 4])
+
+    def test_matrix_market_real(self):
+        """Test reading a symmetric real Matrix Market file"""
+
+        filename = os.path.join(self.tmpdir.name, "s.mtx")
+
+        with open(filename, "w") as f:
+            f.write("%%MatrixMarket matrix coordinate real symmetric\n"
+                    "% A comment\n"
+                    "3 3 3\n"
+                    "1 1 1.5\n"
+                    "3 1 -2e1\n"
+                    "3 2 0.25\n")
+
+        t = Tensor.fromMatrixMarket(filename, rank_ids=["I", "J"])
+
+        self.assertEqual(t.getRankIds(), ["I", "J"])
+        self.assertEqual(t.getPayload(0, 0), 1.5)
+        self.assertEqual(t.getPayload(2, 0), -20.0)
+        self.assertEqual(t.getPayload(0, 2), -20.0)
+        self.assertEqual(t.getPayload(1, 2), 0.25)
+        self.assertEqual(t.countValues(), 5)
+
+        filename2 = os.path.join(self.tmpdir.name, "s2.mtx")
+        t.toMatrixMarket(filename2)
+
+        self.assertEqual(Tensor.fromMatrixMarket(filename2, rank_ids=["I", "J"]), t)
+
+    def test_matrix_market_pattern(self):
+        """Test reading pattern and array Matrix Market files"""
+
+        filename = os.path.join(self.tmpdir.name, "p.mtx")
+
+        with open(filename, "w") as f:
+            f.write("%%MatrixMarket matrix coordinate pattern general\n"
+                    "2 3 2\n"
+                    "1 3\n"
+                    "2 1\n")
+
+        t = Tensor.fromMatrixMarket(filename)
+
+        self.assertEqual(t, Tensor.fromUncompressed(["M", "K"], [[0, 0, 1], [1, 0, 0]]))
+
+        with open(filename, "w") as f:
+            f.write("%%MatrixMarket matrix array integer general\n"
+                    "2 3\n"
+                    "0\n1\n0\n0\n1\n0\n")
+
+        t = Tensor.fromMatrixMarket(filename)
+
+        self.assertEqual(t, Tensor.fromUncompressed(["M", "K"], [[0, 0, 1], [1, 0, 0]]))
+
+    def test_segments(self):
+        """Test the CSF arrays of a tensor"""
+
+        (segs, coords, values) = csf.segmentsFromFiber(self.a.getRoot(), 2)
+
+        self.assertEqual([s.tolist() for s in segs], [[0, 4], [0, 3, 5, 7, 9]])
+        self.assertEqual([c.tolist() for c in coords],
+                         [[1, 2, 4, 6], [0, 1, 2, 1, 3, 0, 2, 1, 3]])
+
+        (segs2, coords2, values2) = csf.segmentsFromCOO([self.rows, self.cols], self.vals)
+
+        self.assertEqual([s.tolist() for s in segs2], [s.tolist() for s in segs])
+        self.assertEqual([c.tolist() for c in coords2], [c.tolist() for c in coords])
+        self.assertEqual(values2.tolist(), values)
+
+
+if __name__ == '__main__':
+    unittest.main()
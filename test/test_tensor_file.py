@@ -0,0 +1,139 @@
+import glob
+import os
+import tempfile
+import unittest
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+from fibertree.core import tensor_file
+
+
+class TestTensorFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def roundTrip(self, t, **kwargs):
+        """Dump a tensor in the binary format and read it back"""
+
+        path = os.path.join(self.tmpdir.name, "tensor")
+
+        t.dump(path, fmt="binary")
+        self.assertTrue(tensor_file.isBinaryFile(path))
+
+        return Tensor.fromFile(path, **kwargs)
+
+    def test_data_files(self):
+        """Test round trip of the YAML test tensors"""
+
+        for filename in sorted(glob.glob("./data/*.yaml")):
+            if "fiber" in filename:
+                continue
+
+            with self.subTest(filename=filename):
+                t = Tensor.fromYAMLfile(filename)
+                t2 = self.roundTrip(t)
+
+                self.assertEqual(t2, t)
+                self.assertEqual(t2.getRankIds(), t.getRankIds())
+                self.assertEqual(t2.getShape(), t.getShape())
+
+    def test_random(self):
+        """Test round trip of a random tensor"""
+
+        t = Tensor.fromRandom(["M", "N", "K"], [20, 30, 40], [0.8, 0.5, 0.3], seed=7)
+        t.setName("T")
+
+        t2 = self.roundTrip(t)
+
+        self.assertEqual(t2, t)
+        self.assertEqual(t2.getName(), "T")
+        self.assertEqual(t2.getShape(), [20, 30, 40])
+        self.assertFalse(t2.isMutable())
+
+        for rank, rank_ref in zip(t2.ranks, t.ranks):
+            self.assertEqual(len(rank.getFibers()), len(rank_ref.getFibers()))
+            for fiber in rank.getFibers():
+                self.assertIs(fiber.getOwner(), rank)
+
+    def test_columnar(self):
+        """Test reading the leaf fibers with columnar storage"""
+
+        t = Tensor.fromRandom(["M", "K"], [10, 20], [0.8, 0.5], seed=3)
+
+        t2 = self.roundTrip(t, columnar=True)
+
+        self.assertEqual(t2, t)
+
+        for fiber in t2.ranks[-1].getFibers():
+            self.assertTrue(fiber.isColumnar())
+
+    def test_float(self):
+        """Test round trip of float payloads and a non-zero default"""
+
+        t = Tensor.fromUncompressed(["M", "K"], [[1.5, 0, 2.5], [0, 0, 0.25]])
+        t.setDefault(-1)
+        t.setFormat("K", "U")
+
+        t2 = self.roundTrip(t)
+
+        self.assertEqual(t2, t)
+        self.assertEqual(t2.getDefault(), -1)
+        self.assertEqual(t2.getFormat("K"), "U")
+        self.assertEqual(t2.getFormat("M"), "C")
+        self.assertIsInstance(t2.getPayload(0, 0).value, float)
+
+    def test_empty(self):
+        """Test round trip of an empty tensor"""
+
+        t = Tensor(rank_ids=["M", "K"], shape=[4, 5])
+
+        t2 = self.roundTrip(t)
+
+        self.assertEqual(t2, t)
+        self.assertEqual(t2.getShape(), [4, 5])
+
+    def test_0D(self):
+        """Test round trip of a rank zero tensor"""
+
+        t = Tensor.fromYAMLfile("./data/tensor_0d.yaml")
+
+        t2 = self.roundTrip(t)
+
+        self.assertEqual(t2, t)
+        self.assertEqual(t2.getRankIds(), [])
+
+    def test_fromFile_yaml(self):
+        """Test fromFile() reads YAML files"""
+
+        t = Tensor.fromYAMLfile("./data/test_tensor-1.yaml")
+
+        path = os.path.join(self.tmpdir.name, "tensor.yaml")
+        t.dump(path)
+
+        self.assertFalse(tensor_file.isBinaryFile(path))
+        self.assertEqual(Tensor.fromFile(path), t)
+
+    def test_bad_coords(self):
+        """Test tuple coordinates cannot be written"""
+
+        t = Tensor.fromFiber(["MK"], Fiber([(0, 1), (1, 2)], [1, 2]))
+
+        with self.assertRaises(AssertionError):
+            t.dump(os.path.join(self.tmpdir.name, "tensor"), fmt="binary")
+
+    def test_bad_fmt(self):
+        """Test an unknown file format"""
+
+        t = Tensor.fromYAMLfile("./data/test_tensor-1.yaml")
+
+        with self.assertRaises(AssertionError):
+            t.dump(os.path.join(self.tmpdir.name, "tensor"), fmt="xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+
+import numpy as np
+
+from fibertree import Tensor
+
+try:
+    import scipy.sparse
+    have_scipy = True
+except ImportError:
+    have_scipy = False
+
+
+class TestTensorNumpy(unittest.TestCase):
+
+    def setUp(self):
+        self.a = Tensor.fromYAMLfile("./data/test_tensor-1.yaml")
+
+        self.a_np = np.zeros((7, 4), dtype=np.int64)
+        for m, k, v in [(1, 0, 100), (1, 1, 101), (1, 2, 102),
+                        (2, 1, 201), (2, 3, 203),
+                        (4, 0, 400), (4, 2, 402),
+                        (6, 1, 601), (6, 3, 603)]:
+            self.a_np[m, k] = v
+
+    def test_fromNumpy(self):
+        """Test construction from a numpy array"""
+
+        t = Tensor.fromNumpy(self.a_np, rank_ids=["M", "K"])
+
+        self.assertEqual(t, self.a)
+        self.assertEqual(t.getRankIds(), ["M", "K"])
+        self.assertEqual(t.getShape(), [7, 4])
+        self.assertIsInstance(t.getPayload(1, 0).value, int)
+
+        for rank in t.ranks:
+            for fiber in rank.getFibers():
+                self.assertIs(fiber.getOwner(), rank)
+
+    def test_fromNumpy_matches_fromUncompressed(self):
+        """Test fromNumpy() matches fromUncompressed()"""
+
+        rng = np.random.default_rng(3)
+        a = rng.integers(0, 3, (5, 6, 7)) * rng.integers(1, 10, (5, 6, 7))
+
+        ref = Tensor.fromUncompressed(["M", "N", "K"], a.tolist())
+
+        self.assertEqual(Tensor.fromNumpy(a, rank_ids=["M", "N", "K"]), ref)
+
+        t = Tensor.fromNumpy(a, columnar=True)
+        self.assertEqual(t.getRankIds(), ["R2", "R1", "R0"])
+        self.assertEqual(t.getRoot(), ref.getRoot())
+
+    def test_fromNumpy_default(self):
+        """Test construction with a non-zero default"""
+
+        a = np.array([[-1, 2.5], [0, -1]])
+
+        t = Tensor.fromNumpy(a, rank_ids=["M", "K"], default=-1)
+
+        self.assertEqual(t.getDefault(), -1)
+        self.assertEqual(t.countValues(), 2)
+        self.assertEqual(t.getPayload(0, 1), 2.5)
+        self.assertEqual(t.getPayload(1, 0), 0.0)
+        self.assertEqual(t.getPayload(0, 0), -1)
+
+        self.assertTrue(np.array_equal(t.toNumpy(), a))
+
+    def test_fromNumpy_bool(self):
+        """Test that a boolean array round trips"""
+
+        a = np.array([[True, False, True], [False, False, False]])
+
+        for columnar in [False, True]:
+            with self.subTest(columnar=columnar):
+                t = Tensor.fromNumpy(a, rank_ids=["M", "K"], columnar=columnar)
+
+                self.assertEqual(t.getDefault(), False)
+                self.assertIs(t.getPayload(0, 0).value, True)
+                self.assertEqual(t.toCOO()[1].dtype, np.bool_)
+
+                b = t.toNumpy()
+                self.assertEqual(b.dtype, np.bool_)
+                self.assertTrue(np.array_equal(b, a))
+
+        b = Tensor.fromNumpy(np.zeros((2, 3), dtype=bool)).toNumpy()
+        self.assertEqual(b.dtype, np.bool_)
+        self.assertFalse(b.any())
+
+    def test_fromNumpy_0D(self):
+        """Test construction of a rank zero tensor"""
+
+        t = Tensor.fromNumpy(np.array(4))
+
+        self.assertEqual(t.getRankIds(), [])
+        self.assertEqual(t.getRoot(), 4)
+        self.assertEqual(t.toNumpy(), 4)
+
+    def test_toNumpy(self):
+        """Test conversion to a numpy array"""
+
+        a = self.a.toNumpy()
+
+        self.assertEqual(a.shape, (7, 4))
+        self.assertEqual(a.dtype, np.int64)
+        self.assertTrue(np.array_equal(a, self.a_np))
+
+        self.assertEqual(self.a.toNumpy(dtype=np.float32).dtype, np.float32)
+
+    def test_toNumpy_columnar(self):
+        """Test conversion of a tensor with columnar leaf fibers"""
+
+        t = Tensor.fromRandom(["M", "N", "K"], [6, 7, 8], [0.8, 0.8, 0.5], seed=2)
+        c = Tensor.fromRandom(["M", "N", "K"], [6, 7, 8], [0.8, 0.8, 0.5], seed=2, columnar=True)
+
+        self.assertTrue(np.array_equal(c.toNumpy(), t.toNumpy()))
+        self.assertTrue(np.array_equal(t.toNumpy(), np.array(t.getRoot().uncompress(shape=[6, 7, 8]))))
+
+        # The fibers do not keep exporting their buffers
+        c.ranks[-1].getFibers()[0].append(100, 1)
+
+    def test_empty(self):
+        """Test conversion of an empty tensor"""
+
+        t = Tensor(rank_ids=["M", "K"], shape=[2, 3])
+
+        self.assertTrue(np.array_equal(t.toNumpy(), np.zeros((2, 3))))
+        self.assertEqual(Tensor.fromNumpy(np.zeros((2, 3)), rank_ids=["M", "K"]), t)
+
+    @unittest.skipUnless(have_scipy, "scipy not installed")
+    def test_scipy(self):
+        """Test conversion to and from scipy sparse matrices"""
+
+        for fmt in ["csr", "csc", "coo"]:
+            with self.subTest(format=fmt):
+                m = self.a.toScipySparse(format=fmt)
+
+                self.assertEqual(m.format, fmt)
+                self.assertTrue(np.array_equal(m.toarray(), self.a_np))
+
+                self.assertEqual(Tensor.fromScipySparse(m), self.a)
+
+        t = Tensor.fromScipySparse(scipy.sparse.csr_matrix(self.a_np), order=["K", "M"])
+
+        self.assertEqual(t, self.a.swapRanks())
+
+
+if __name__ == '__main__':
+    unittest.main()
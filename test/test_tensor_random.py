@@ -0,0 +1,174 @@
+import unittest
+
+from fibertree import Tensor
+
+from fibertree.core.random_sparse import randomCOO
+
+
+class TestTensorRandom(unittest.TestCase):
+
+    def points(self, t):
+        """Return the points and values of a matrix"""
+
+        return [(m, k, v) for m, k_fiber in t.getRoot() for k, v in k_fiber]
+
+    def test_seed(self):
+        """Test a seed reproduces the same tensor"""
+
+        t1 = Tensor.fromRandomSparse(["M", "K"], [50, 60], density=[0.8, 0.1], seed=3)
+        t2 = Tensor.fromRandomSparse(["M", "K"], [50, 60], density=[0.8, 0.1], seed=3)
+        t3 = Tensor.fromRandomSparse(["M", "K"], [50, 60], density=[0.8, 0.1], seed=4)
+
+        self.assertEqual(t1, t2)
+        self.assertNotEqual(t1, t3)
+
+        self.assertEqual(t1.getRankIds(), ["M", "K"])
+        self.assertEqual(t1.getShape(), [50, 60])
+
+    def test_density(self):
+        """Test the per-rank densities"""
+
+        t = Tensor.fromRandomSparse(["M", "K"], [400, 500], density=[0.5, 0.02],
+                                    interval=5, seed=1)
+
+        expected = 400 * 0.5 * 500 * 0.02
+        self.assertAlmostEqual(t.countValues() / expected, 1, delta=0.1)
+
+        self.assertAlmostEqual(len(t.getRoot()) / 200, 1, delta=0.15)
+
+        values = [v for _, _, v in self.points(t)]
+        self.assertEqual(min(values), 1)
+        self.assertEqual(max(values), 5)
+
+        t = Tensor.fromRandomSparse(["M", "K"], [100, 100], density=0.5, seed=1)
+
+        self.assertAlmostEqual(t.countValues() / 5000, 1, delta=0.1)
+
+    def test_nnz(self):
+        """Test the exact number of elements"""
+
+        for pattern, kwargs in [("uniform", {}),
+                                ("powerlaw", {"alpha": 2.0}),
+                                ("banded", {"bandwidth": 5})]:
+            with self.subTest(pattern=pattern):
+                t = Tensor.fromRandomSparse(["M", "K"], [200, 300], nnz=777,
+                                            pattern=pattern, seed=2, **kwargs)
+
+                self.assertEqual(t.countValues(), 777)
+
+        t = Tensor.fromRandomSparse(["M", "N", "K"], [20, 30, 40], nnz=1000, seed=2)
+
+        self.assertEqual(t.countValues(), 1000)
+
+    def test_large(self):
+        """Test the time is proportional to the number of elements"""
+
+        t = Tensor.fromRandomSparse(["M", "K"], [10**6, 10**6], nnz=100, seed=1)
+
+        self.assertEqual(t.countValues(), 100)
+
+        t = Tensor.fromRandomSparse(["M", "K"], [10**5, 10**5], density=[0.001, 0.0001], seed=1)
+
+        # About 100 rows with 10 elements each
+        self.assertAlmostEqual(t.countValues() / 1000, 1, delta=0.2)
+
+    def test_powerlaw(self):
+        """Test the power law pattern skews the top rank"""
+
+        t = Tensor.fromRandomSparse(["M", "K"], [100, 1000], nnz=2000,
+                                    pattern="powerlaw", alpha=1.5, seed=5)
+
+        lengths = {m: len(k_fiber) for m, k_fiber in t.getRoot()}
+
+        self.assertGreater(lengths[0], 5 * lengths.get(50, 0))
+        self.assertGreater(lengths[0], lengths[1])
+
+    def test_powerlaw_full(self):
+        """Test the power law pattern with nearly all the points"""
+
+        for alpha in [1.0, 3.0]:
+            for nnz in [9000, 10000]:
+                with self.subTest(alpha=alpha, nnz=nnz):
+                    t = Tensor.fromRandomSparse(["M", "K"], [100, 100], nnz=nnz,
+                                                pattern="powerlaw", alpha=alpha, seed=1)
+
+                    self.assertEqual(t.countValues(), nnz)
+                    self.assertEqual(len(t.getRoot().getPayload(0)), 100)
+
+        t = Tensor.fromRandomSparse(["M", "N", "K"], [20, 30, 40], nnz=20000,
+                                    pattern="powerlaw", alpha=2.0, seed=1)
+
+        self.assertEqual(t.countValues(), 20000)
+
+    def test_banded(self):
+        """Test the banded pattern"""
+
+        t = Tensor.fromRandomSparse(["M", "K"], [50, 40], density=1.0,
+                                    pattern="banded", bandwidth=2, seed=1)
+
+        points = {(m, k) for m, k, _ in self.points(t)}
+
+        band = {(m, k) for m in range(50) for k in range(40) if abs(m - k) <= 2}
+
+        self.assertEqual(points, band)
+
+        t = Tensor.fromRandomSparse(["M", "K"], [50, 40], density=0.5,
+                                    pattern="banded", bandwidth=3, seed=1)
+
+        self.assertTrue(all(abs(m - k) <= 3 for m, k, _ in self.points(t)))
+
+    def test_block(self):
+        """Test the block pattern"""
+
+        t = Tensor.fromRandomSparse(["M", "K"], [10, 10], density=0.5,
+                                    pattern="block", block=[4, 3], seed=1)
+
+        blocks = {(m // 4, k // 3) for m, k, _ in self.points(t)}
+
+        self.assertEqual(len(blocks), round(0.5 * 3 * 4))
+
+        for bm, bk in blocks:
+            for m in range(bm * 4, min(bm * 4 + 4, 10)):
+                for k in range(bk * 3, min(bk * 3 + 3, 10)):
+                    self.assertNotEqual(t.getPayload(m, k), 0)
+
+    def test_block_nnz(self):
+        """Test the number of elements of the block pattern"""
+
+        for nnz in [0, 8, 9, 20, 50, 99, 100]:
+            with self.subTest(nnz=nnz):
+                (coords, values) = randomCOO([10, 10], nnz=nnz, pattern="block",
+                                             block=[3, 3], seed=1)
+
+                # Short by less than a block, including the clipped blocks
+                self.assertLessEqual(len(values), nnz)
+                self.assertGreater(len(values), nnz - 9)
+
+                points = set(zip(*[c.tolist() for c in coords]))
+                self.assertEqual(len(points), len(values))
+
+    def test_randomCOO(self):
+        """Test the arguments of randomCOO()"""
+
+        with self.assertRaises(AssertionError):
+            randomCOO([10, 10], density=0.5, nnz=5)
+
+        with self.assertRaises(AssertionError):
+            randomCOO([10, 10], nnz=5, pattern="unknown")
+
+        with self.assertRaises(AssertionError):
+            randomCOO([10, 10], nnz=101)
+
+        (coords, values) = randomCOO([10, 10, 10], nnz=0, seed=1)
+
+        self.assertEqual(len(coords), 3)
+        self.assertEqual(len(values), 0)
+
+        t = Tensor.fromRandomSparse(shape=[4, 5], nnz=3, seed=1, columnar=True)
+
+        self.assertEqual(t.getRankIds(), ["R1", "R0"])
+        self.assertTrue(t.ranks[-1].getFibers()[0].isColumnar())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import itertools
+import unittest
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+
+class TestTensorSwizzle(unittest.TestCase):
+
+    def setUp(self):
+        self.t = Tensor.fromRandom(["M", "N", "K", "J"], [5, 6, 7, 4],
+                                   [0.9, 0.8, 0.7, 0.6], seed=3)
+
+    def tearDown(self):
+        Fiber.setCopyOnWrite(False)
+
+    def reference(self, t, rank_ids):
+        """Swizzle a tensor by rebuilding it from its points"""
+
+        (coords, values) = t.toCOO()
+        order = [t.getRankIds().index(r) for r in rank_ids]
+
+        return Tensor.fromCOO(rank_ids, [coords[o] for o in order], values,
+                              shape=[t.getShape()[o] for o in order])
+
+    def test_permutations(self):
+        """Test all the orders of the ranks"""
+
+        for rank_ids in itertools.permutations(self.t.getRankIds()):
+            rank_ids = list(rank_ids)
+
+            with self.subTest(rank_ids=rank_ids):
+                s = self.t.swizzleRanks(rank_ids)
+
+                self.assertEqual(s, self.reference(self.t, rank_ids))
+                self.assertEqual(s.getRankIds(), rank_ids)
+                self.assertEqual(s.getShape(), self.reference(self.t, rank_ids).getShape())
+
+    def test_partial(self):
+        """Test the fibers below the swizzled ranks are moved as a whole"""
+
+        s = self.t.swizzleRanks(["N", "M", "K", "J"])
+
+        self.assertEqual(s, self.reference(self.t, ["N", "M", "K", "J"]))
+
+        k_fiber = self.t.getPayload(1, 2)
+        s_k_fiber = s.getPayload(2, 1)
+
+        self.assertEqual(s_k_fiber, k_fiber)
+        self.assertIsNot(s_k_fiber, k_fiber)
+        self.assertIs(s_k_fiber.getOwner(), s.ranks[2])
+
+        Fiber.setCopyOnWrite(True)
+
+        s = self.t.swizzleRanks(["N", "M", "K", "J"])
+
+        self.assertIs(s.getPayload(2, 1), k_fiber)
+
+        ref = self.reference(self.t, ["N", "M", "K", "J"])
+        self.t.getRoot().updatePayloads(lambda i, c, p: p * 2, depth=3)
+
+        self.assertEqual(s, ref)
+
+    def test_fiber_swapRanks(self):
+        """Test Fiber.swapRanks() with integer and tuple coordinates"""
+
+        root = self.t.getRoot()
+
+        swapped = root.swapRanks()
+
+        self.assertEqual(swapped, self.t.swizzleRanks(["N", "M", "K", "J"]).getRoot())
+
+        flat = self.t.flattenRanks(depth=1).getRoot()
+        swapped = flat.swapRanks()
+
+        self.assertEqual(swapped.swapRanks(), flat)
+        self.assertEqual(swapped.getPayload((1, 2), 0), flat.getPayload(0, (1, 2)))
+
+    def test_tuple_coords(self):
+        """Test swizzling ranks with tuple coordinates"""
+
+        t = self.t.flattenRanks(depth=1)
+        t.setRankIds(["M", "NK", "J"])
+
+        s = t.swizzleRanks(["NK", "M", "J"])
+
+        self.assertEqual(s.getPayload((1, 2), 0), t.getPayload(0, (1, 2)))
+        self.assertEqual(s.swizzleRanks(["M", "NK", "J"]), t)
+
+    def test_columnar(self):
+        """Test the leaf fibers stay columnar"""
+
+        t = Tensor.fromRandom(["M", "K"], [20, 30], [0.9, 0.3], seed=1, columnar=True)
+
+        s = t.swizzleRanks(["K", "M"])
+
+        self.assertEqual(s, self.reference(t, ["K", "M"]))
+        self.assertTrue(s.ranks[-1].getFibers()[0].isColumnar())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+"""Tests of the binary trace format"""
+
+import os
+import unittest
+import yaml
+
+import numpy as np
+
+from fibertree import Metrics, Tensor
+from fibertree.core.trace_file import TraceWriter, readTrace, traceToCSV, writeTrace
+from fibertree.model import Compute, Format, Traffic
+
+
+class TestTraceFile(unittest.TestCase):
+
+    def setUp(self):
+        Metrics.endCollect()
+
+        # Make sure we have a tmp directory to write to
+        if not os.path.exists("tmp"):
+            os.makedirs("tmp")
+
+        self.A_MK = Tensor.fromRandom(["M", "K"], [6, 8], [1.0, 0.5], seed=0)
+        self.B_KN = Tensor.fromRandom(["K", "N"], [8, 7], [0.9, 0.5], seed=1)
+
+        for format_ in ["csv", "npy"]:
+            self.collect(format_)
+
+    def collect(self, format_):
+        """Trace Gustavson's matrix multiply into traces of `format_`"""
+
+        a_m = self.A_MK.getRoot()
+        b_k = self.B_KN.getRoot()
+
+        self.Z_MN = Tensor(rank_ids=["M", "N"], shape=[6, 7])
+        z_m = self.Z_MN.getRoot()
+
+        Metrics.beginCollect("tmp/test_trace_file_" + format_)
+        Metrics.setTraceFormat(format_)
+        Metrics.setNumCachedUses(4)
+
+        Metrics.trace("K", type_="intersect_0")
+        Metrics.trace("K", type_="intersect_1")
+        Metrics.trace("N", type_="populate_read_0")
+        Metrics.trace("N", type_="populate_write_0")
+
+        for m, (z_n, a_k) in z_m << a_m:
+            for k, (a_val, b_n) in a_k & b_k:
+                for n, (z_ref, b_val) in z_n << b_n:
+                    z_ref += a_val * b_val
+
+        Metrics.endCollect()
+
+    def traceFn(self, format_, rank, type_):
+        """Get the name of a trace file"""
+
+        return f"tmp/test_trace_file_{format_}-{rank}-{type_}.{format_}"
+
+    def test_same_traces(self):
+        """Test the binary traces hold the same uses as the CSV traces"""
+
+        for rank, type_ in [("K", "intersect_0"), ("K", "intersect_1"),
+                            ("N", "populate_read_0"), ("N", "populate_write_0")]:
+            with self.subTest(type_=type_):
+                (names, rows) = readTrace(self.traceFn("npy", rank, type_))
+                (csv_names, csv_rows) = readTrace(self.traceFn("csv", rank, type_))
+
+                self.assertEqual(names, csv_names)
+                np.testing.assert_array_equal(rows, csv_rows)
+                self.assertGreater(len(rows), 4)
+
+                # The binary trace is a plain structured array
+                values = np.load(self.traceFn("npy", rank, type_))
+                self.assertEqual(list(values.dtype.names), names)
+                np.testing.assert_array_equal(values[names[-1]], rows[:, -1])
+
+    def test_csv_export(self):
+        """Test exporting a binary trace to CSV"""
+
+        npy_fn = self.traceFn("npy", "K", "intersect_0")
+
+        csv_fn = traceToCSV(npy_fn, "tmp/test_trace_file_export.csv")
+
+        with open(csv_fn, "r") as f_test, \
+             open(self.traceFn("csv", "K", "intersect_0"), "r") as f_corr:
+            self.assertEqual(f_test.readlines(), f_corr.readlines())
+
+    def test_compute(self):
+        """Test counting intersections with binary traces"""
+
+        fns = {format_: (self.traceFn(format_, "K", "intersect_0"),
+                         self.traceFn(format_, "K", "intersect_1"))
+               for format_ in ["csv", "npy"]}
+
+        for count in [Compute.numIsectNaive, Compute.numIsectSkipAhead]:
+            with self.subTest(count=count.__name__):
+                self.assertEqual(count(*fns["npy"]), count(*fns["csv"]))
+
+        self.assertEqual(Compute.numIsectLeaderFollower(fns["npy"][0]),
+                         Compute.numIsectLeaderFollower(fns["csv"][0]))
+
+    def test_traffic(self):
+        """Test computing traffic with binary traces"""
+
+        formats = yaml.safe_load("""
+        M:
+            format: U
+            pbits: 32
+        N:
+            format: C
+            cbits: 32
+            pbits: 64
+        """)
+        formats = {"Z": Format(self.Z_MN, formats)}
+
+        bindings = yaml.safe_load("""
+        - tensor: Z
+          rank: N
+          type: payload
+        """)
+
+        bits = {}
+        for format_ in ["csv", "npy"]:
+            traces = {("Z", "N", "payload", "read"): self.traceFn(format_, "N", "populate_read_0"),
+                      ("Z", "N", "payload", "write"): self.traceFn(format_, "N", "populate_write_0")}
+
+            bits[format_] = Traffic.cacheTraffic(bindings, formats, traces, 12 * 32, 4 * 32)
+
+        self.assertEqual(bits["npy"], bits["csv"])
+
+        Traffic.filterTrace(self.traceFn("npy", "K", "intersect_1"),
+                            self.traceFn("npy", "K", "intersect_0"),
+                            "tmp/test_trace_file_filter.npy")
+        Traffic.filterTrace(self.traceFn("csv", "K", "intersect_1"),
+                            self.traceFn("csv", "K", "intersect_0"),
+                            "tmp/test_trace_file_filter.csv")
+
+        np.testing.assert_array_equal(readTrace("tmp/test_trace_file_filter.npy")[1],
+                                      readTrace("tmp/test_trace_file_filter.csv")[1])
+
+    def test_writer(self):
+        """Test writing a trace in chunks"""
+
+        names = ["K_pos", "K", "fiber_pos"]
+        rows = np.arange(30).reshape(10, 3)
+
+        writer = TraceWriter("tmp/test_trace_file_writer.npy", names, chunk_rows=4)
+
+        for row in rows.tolist():
+            writer.rows.extend(row)
+            if len(writer.rows) >= writer.chunk_len:
+                writer.flush()
+
+        self.assertEqual(writer.num_rows, 8)
+        writer.close()
+
+        (test_names, test_rows) = readTrace("tmp/test_trace_file_writer.npy")
+        self.assertEqual(test_names, names)
+        np.testing.assert_array_equal(test_rows, rows)
+
+        writeTrace("tmp/test_trace_file_writer.csv", names, rows[:0])
+        (_, empty) = readTrace("tmp/test_trace_file_writer.csv")
+        self.assertEqual(empty.shape, (0, 3))
+
+        writer = TraceWriter("tmp/test_trace_file_writer.npy", names)
+        writer.rows.extend([0, (1, 2), 3])
+
+        with self.assertRaises(TypeError):
+            writer.close()
+
+    def test_set_format(self):
+        """Test setting the trace format"""
+
+        with self.assertRaises(AssertionError):
+            Metrics.setTraceFormat("json")
+
+        Metrics.setTraceFormat("npy")
+        Metrics.endCollect()
+        self.assertEqual(Metrics.trace_format, "csv")
+
+
+if __name__ == '__main__':
+    unittest.main()
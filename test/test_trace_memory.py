@@ -0,0 +1,222 @@
+"""Tests of collecting traces in memory and using them in the models"""
+
+import os
+import unittest
+import yaml
+
+import numpy as np
+
+from fibertree import Metrics, Tensor
+from fibertree.core.trace_file import Trace, readTrace
+from fibertree.model import Compute, Format, Traffic
+
+
+class TestTraceMemory(unittest.TestCase):
+
+    def setUp(self):
+        Metrics.endCollect()
+
+        # Make sure we have a tmp directory to write to
+        if not os.path.exists("tmp"):
+            os.makedirs("tmp")
+
+        # Remove the traces spilled by earlier runs
+        for fn in os.listdir("tmp"):
+            if fn.startswith("test_trace_memory_memory"):
+                os.remove(os.path.join("tmp", fn))
+
+        self.A_MK = Tensor.fromRandom(["M", "K"], [6, 8], [1.0, 0.5], seed=0)
+        self.B_KN = Tensor.fromRandom(["K", "N"], [8, 7], [0.9, 0.5], seed=1)
+
+        self.files = self.collect("npy")
+
+        formats = yaml.safe_load("""
+        M:
+            format: U
+            pbits: 32
+        N:
+            format: C
+            cbits: 32
+            pbits: 64
+        """)
+        self.formats = {"Z": Format(self.Z_MN, formats)}
+
+    def tearDown(self):
+        Traffic.setMemoryBudget(1 << 30)
+
+    def collect(self, format_, max_bytes=None):
+        """Trace Gustavson's matrix multiply, returning the traces"""
+
+        a_m = self.A_MK.getRoot()
+        b_k = self.B_KN.getRoot()
+
+        self.Z_MN = Tensor(rank_ids=["M", "N"], shape=[6, 7])
+        z_m = self.Z_MN.getRoot()
+
+        Metrics.beginCollect("tmp/test_trace_memory_" + format_)
+        Metrics.setTraceFormat(format_)
+        Metrics.setNumCachedUses(4)
+
+        if max_bytes is not None:
+            Metrics.setTraceMemory(max_bytes)
+
+        Metrics.trace("K", type_="intersect_0")
+        Metrics.trace("K", type_="intersect_1")
+        Metrics.trace("N", type_="populate_read_0")
+        Metrics.trace("N", type_="populate_write_0")
+
+        for m, (z_n, a_k) in z_m << a_m:
+            for k, (a_val, b_n) in a_k & b_k:
+                for n, (z_ref, b_val) in z_n << b_n:
+                    z_ref += a_val * b_val
+
+        Metrics.endCollect()
+
+        return Metrics.dumpTraces()
+
+    def assertSameTraces(self, traces):
+        """Check the traces match the traces in files"""
+
+        self.assertEqual(traces.keys(), self.files.keys())
+
+        for key, trace in traces.items():
+            (names, rows) = readTrace(trace)
+            (file_names, file_rows) = readTrace(self.files[key])
+
+            self.assertEqual(names, file_names)
+            np.testing.assert_array_equal(rows, file_rows)
+
+    def traffic(self, traces):
+        """Get the buffet and cache traffic of Z"""
+
+        bindings = yaml.safe_load("""
+        - tensor: Z
+          rank: N
+          type: payload
+          evict-on: M
+        """)
+
+        trace_fns = {("Z", "N", "payload", "read"): traces["N", "populate_read_0"],
+                     ("Z", "N", "payload", "write"): traces["N", "populate_write_0"]}
+
+        return [Traffic.buffetTraffic(bindings, self.formats, trace_fns, 12 * 32, 4 * 32),
+                Traffic.cacheTraffic(bindings, self.formats, trace_fns, 12 * 32, 4 * 32)]
+
+    def test_memory(self):
+        """Test collecting the traces in memory"""
+
+        traces = self.collect("memory")
+
+        self.assertTrue(all(isinstance(trace, Trace) for trace in traces.values()))
+        self.assertFalse(os.path.exists("tmp/test_trace_memory_memory-K-intersect_0.npy"))
+
+        self.assertSameTraces(traces)
+
+        self.assertEqual(Compute.numIsectSkipAhead(traces["K", "intersect_0"],
+                                                   traces["K", "intersect_1"]),
+                         Compute.numIsectSkipAhead(self.files["K", "intersect_0"],
+                                                   self.files["K", "intersect_1"]))
+
+    def test_spill(self):
+        """Test traces that do not fit in memory are spilled to files"""
+
+        traces = self.collect("memory", max_bytes=1000)
+
+        spilled = [key for key, trace in traces.items() if not isinstance(trace, Trace)]
+
+        self.assertGreater(len(spilled), 0)
+        self.assertLess(len(spilled), len(traces))
+
+        for rank, type_ in spilled:
+            self.assertEqual(traces[rank, type_],
+                             f"tmp/test_trace_memory_memory-{rank}-{type_}.npy")
+
+        self.assertSameTraces(traces)
+
+        traces = self.collect("memory", max_bytes=0)
+
+        self.assertFalse(any(isinstance(trace, Trace) for trace in traces.values()))
+        self.assertSameTraces(traces)
+
+    def test_combine(self):
+        """Test combining traces in memory"""
+
+        read_fn = self.files["N", "populate_read_0"]
+        write_fn = self.files["N", "populate_write_0"]
+
+        for args in [{"read_fn": read_fn},
+                     {"write_fn": write_fn},
+                     {"read_fn": read_fn, "write_fn": write_fn}]:
+            with self.subTest(args=list(args)):
+                comb = Traffic._combineTraces(**args)
+
+                Traffic._combineTraces(comb_fn="tmp/test_trace_memory-comb.csv", **args)
+
+                with open("tmp/test_trace_memory-comb.csv", "r") as f:
+                    lines = f.read().replace("True", "1").replace("False", "0")
+
+                (head, *lines) = lines.splitlines()
+                rows = [[int(val) for val in line.split(",")] for line in lines]
+
+                self.assertEqual(head, ",".join(comb.names))
+                np.testing.assert_array_equal(comb.rows, rows)
+
+    def test_next_use(self):
+        """Test finding the next uses in memory"""
+
+        read_fn = self.files["N", "populate_read_0"]
+        write_fn = self.files["N", "populate_write_0"]
+
+        comb = Traffic._combineTraces(read_fn, write_fn)
+        Traffic._combineTraces(read_fn, write_fn, "tmp/test_trace_memory-comb.csv")
+
+        for elems_per_line in [1, 2, 3, 8]:
+            with self.subTest(elems_per_line=elems_per_line):
+                next_use = Traffic._buildNextUseTrace(["M", "N"], elems_per_line, comb)
+
+                Traffic._buildNextUseTrace(["M", "N"], elems_per_line,
+                                           "tmp/test_trace_memory-comb.csv",
+                                           "tmp/test_trace_memory-next.csv")
+
+                (names, rows) = Traffic._iterNextUseTrace(comb, next_use)
+                (corr_names, corr_rows) = Traffic._readNextUseTrace("tmp/test_trace_memory-next.csv")
+
+                self.assertEqual(names, corr_names)
+                self.assertEqual(list(rows), list(corr_rows))
+
+        # Points too large for a single key (or negative) are sorted by rank
+        next_use = Traffic._buildNextUseTrace(["M", "N"], 2, comb)
+        m_col = comb.names.index("M")
+
+        for scale in [1 << 60, -1]:
+            with self.subTest(scale=scale):
+                rows = comb.rows.copy()
+                rows[:, m_col] *= scale
+
+                np.testing.assert_array_equal(
+                    Traffic._buildNextUseTrace(["M", "N"], 2, Trace(comb.names, rows)),
+                    next_use)
+
+        empty = Trace(comb.names, comb.rows[:0])
+        self.assertEqual(len(Traffic._buildNextUseTrace(["M", "N"], 2, empty)), 0)
+
+    def test_traffic(self):
+        """Test the traffic with in-memory traces and with files"""
+
+        corr = self.traffic(self.files)
+
+        traces = self.collect("memory")
+
+        for budget in [1 << 30, 2000, 0]:
+            with self.subTest(budget=budget):
+                Traffic.setMemoryBudget(budget)
+
+                self.assertEqual(self.traffic(traces), corr)
+                self.assertEqual(self.traffic(self.files), corr)
+
+        # No intermediate files are left behind
+        self.assertFalse([fn for fn in os.listdir("tmp") if "-comb-" in fn or "-next-" in fn])
+
+
+if __name__ == '__main__':
+    unittest.main()
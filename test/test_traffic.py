@@ -530,3 +530,168 @@ class TestTraffic(unittest.TestCase):
         self.assertEqual(overflows, 4)
 
 
+
+    def streamTraces(self, name, reads, writes=(), tensor="A"):
+        """Write the read and write traces of a K fiber, given the
+        (stamp, position) of each access, and get its format"""
+        traces = {}
+        for access, uses in [("read", reads), ("write", writes)]:
+            if not uses:
+                continue
+
+            fn = "tmp/" + name + "-" + tensor + "-K-" + access + ".csv"
+            with open(fn, "w") as f:
+                f.write("K_pos,K,fiber_pos\n")
+                for stamp, pos in uses:
+                    f.write(f"{stamp},{pos},{pos}\n")
+
+            traces[tensor, "K", "payload", access] = fn
+
+        A_K = Tensor.fromUncompressed(["K"], [1] * 8)
+        formats = {tensor: Format(A_K, yaml.safe_load("""
+        K:
+            format: C
+            cbits: 32
+            pbits: 32
+        """))}
+
+        return formats, traces
+
+    def test_lruTraffic_compulsory(self):
+        """Test the LRU and FIFO traffic when everything fits"""
+        bindings = yaml.safe_load("""
+        - tensor: B
+          rank: K
+          type: payload
+
+        - tensor: B
+          rank: N
+          type: coord
+
+        - tensor: B
+          rank: N
+          type: payload
+        """)
+
+        traces = {
+            ("B", "K", "payload", "read"): "tmp/test_traffic_single_stage-K-intersect_1.csv",
+            ("B", "N", "coord", "read"): "tmp/test_traffic_single_stage-N-populate_1.csv",
+            ("B", "N", "payload", "read"): "tmp/test_traffic_single_stage-N-populate_1.csv"
+        }
+
+        corr = Traffic.cacheTraffic(bindings, self.formats, traces, 1024 * 4 * 32, 4 * 32)
+
+        for model in [Traffic.lruTraffic, Traffic.fifoTraffic]:
+            for ways in [None, 4]:
+                with self.subTest(model=model.__name__, ways=ways):
+                    self.assertEqual(model(bindings, self.formats, traces,
+                        1024 * 4 * 32, 4 * 32, ways=ways), corr)
+
+    def test_lruTraffic_replacement(self):
+        """Test the lines replaced by LRU and FIFO"""
+        bindings = yaml.safe_load("""
+        - tensor: A
+          rank: K
+          type: payload
+        """)
+
+        # Access lines 0, 1, 0, 2, 0
+        formats, traces = self.streamTraces("test_lruTraffic_replacement",
+            [(0, 0), (1, 1), (2, 0), (3, 2), (4, 0)])
+
+        bits, overflows = Traffic.lruTraffic(bindings, formats, traces, 2 * 32, 32)
+        self.assertEqual(bits, {"A": {"read": 3 * 32}})
+        self.assertEqual(overflows, 0)
+
+        bits, _ = Traffic.fifoTraffic(bindings, formats, traces, 2 * 32, 32)
+        self.assertEqual(bits, {"A": {"read": 4 * 32}})
+
+        # Lines 0 and 2 map to the same set of a direct-mapped cache
+        bits, _ = Traffic.lruTraffic(bindings, formats, traces, 2 * 32, 32, ways=1)
+        self.assertEqual(bits, {"A": {"read": 4 * 32}})
+
+    def test_lruTraffic_writes(self):
+        """Test the write-back and write-allocate policies"""
+        bindings = yaml.safe_load("""
+        - tensor: A
+          rank: K
+          type: payload
+        """)
+
+        # Read 0, write 0 twice, read 1, write 2 twice
+        formats, traces = self.streamTraces("test_lruTraffic_writes",
+            [(0, 0), (3, 1)], [(1, 0), (2, 0), (4, 2), (5, 2)])
+
+        for write_back, write_allocate, write in [(True, True, 2), (True, False, 3),
+                                                  (False, True, 4), (False, False, 4)]:
+            with self.subTest(write_back=write_back, write_allocate=write_allocate):
+                bits, _ = Traffic.lruTraffic(bindings, formats, traces, 32, 32,
+                    write_back=write_back, write_allocate=write_allocate)
+                self.assertEqual(bits, {"A": {"read": 2 * 32, "write": write * 32}})
+
+        # Writes that are written through or around only transfer the
+        # element written (positions 0 and 1 share a line of 64 bits)
+        for write_back, write_allocate, write in [(True, False, 64 + 2 * 32),
+                                                  (False, True, 4 * 32)]:
+            with self.subTest(write_back=write_back, write_allocate=write_allocate,
+                              line_sz=64):
+                bits, _ = Traffic.lruTraffic(bindings, formats, traces, 64, 64,
+                    write_back=write_back, write_allocate=write_allocate)
+                self.assertEqual(bits, {"A": {"read": 64, "write": write}})
+
+    def test_lruTraffic_sets(self):
+        """Test that the set of a line is given by its address"""
+        bindings = yaml.safe_load("""
+        - tensor: A
+          rank: K
+          type: payload
+        """)
+
+        A_MK = Tensor.fromUncompressed(["M", "K"], [[1] * 8] * 2)
+        formats = {"A": Format(A_MK, yaml.safe_load("""
+        M:
+            format: U
+        K:
+            format: C
+            cbits: 32
+            pbits: 32
+        """))}
+
+        # In a direct-mapped cache with two sets, line 0 of fiber 1 (at
+        # address 8) maps to the same set as line 0 of fiber 0, but line 1
+        # of fiber 1 does not
+        for name, k, read in [("same", 0, 3), ("other", 1, 2)]:
+            fn = "tmp/test_lruTraffic_sets-" + name + ".csv"
+            with open(fn, "w") as f:
+                f.write("M_pos,K_pos,M,K,fiber_pos\n")
+                for stamp, (m, pos) in enumerate([(0, 0), (1, k), (0, 0)]):
+                    f.write(f"{m},{stamp},{m},{pos},{pos}\n")
+
+            traces = {("A", "K", "payload", "read"): fn}
+            with self.subTest(name=name):
+                bits, _ = Traffic.lruTraffic(bindings, formats, traces,
+                    2 * 32, 32, ways=1)
+                self.assertEqual(bits, {"A": {"read": read * 32}})
+
+    def test_lruTraffic_order(self):
+        """Test that all reads go before all writes at the same point"""
+        bindings = yaml.safe_load("""
+        - tensor: B
+          rank: K
+          type: payload
+
+        - tensor: A
+          rank: K
+          type: payload
+        """)
+
+        # Read A and write B at the same point, then read A again
+        formats, traces = self.streamTraces("test_lruTraffic_order",
+            [(0, 0), (1, 0)])
+        B_formats, B_traces = self.streamTraces("test_lruTraffic_order",
+            [], [(0, 0)], tensor="B")
+        formats.update(B_formats)
+        traces.update(B_traces)
+
+        bits, _ = Traffic.lruTraffic(bindings, formats, traces, 32, 32)
+        self.assertEqual(bits, {"A": {"read": 2 * 32}, "B": {"write": 32}})
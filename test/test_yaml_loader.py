@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from fibertree import Fiber
+from fibertree import Tensor
+
+from fibertree.core.yaml_loader import loadYAML
+
+
+class TestYamlLoader(unittest.TestCase):
+
+    def test_fiber(self):
+        """Test loading a fiber matches loading the dictionaries"""
+
+        with open("./data/test_tensor-1.yaml") as stream:
+            ref = Fiber.dict2fiber(yaml.safe_load(stream)['tensor']['root'][0])
+
+        with open("./data/test_tensor-1.yaml") as stream:
+            doc = loadYAML(stream)
+
+        self.assertEqual(doc['tensor']['name'], "test_tensor-1")
+        self.assertEqual(doc['tensor']['rank_ids'], ["M", "K"])
+        self.assertEqual(doc['tensor']['root'][0], ref)
+
+    def test_scalars(self):
+        """Test scalars are loaded like yaml.safe_load()"""
+
+        text = "a: &x [1, 2]\n" \
+               "b: *x\n" \
+               "c: [0, 7, 010, 0x1f, 1_000, -3, '12', 1.5, 1e3, null, true, abc]\n"
+
+        self.assertEqual(loadYAML(text), yaml.safe_load(text))
+
+    def test_deep(self):
+        """Test loading a fibertree deeper than the recursion limit"""
+
+        depth = 2000
+
+        text = "fiber: {coords: [0], payloads: [" * depth \
+               + "5" + "]}" * depth
+
+        f = loadYAML(text)
+
+        self.assertIsInstance(f, Fiber)
+
+        for _ in range(depth - 1):
+            f = f.getPayload(0)
+
+        self.assertEqual(f.getPayload(0), 5)
+
+    def test_malformed(self):
+        """Test a fiber without payloads"""
+
+        with self.assertRaises(AssertionError):
+            loadYAML("fiber: {coords: [0, 1]}")
+
+    def test_max_depth(self):
+        """Test loading the top ranks of a tensor"""
+
+        t = Tensor.fromYAMLfile("./data/tensor_3d-0.yaml")
+
+        t2 = Tensor.fromYAMLfile("./data/tensor_3d-0.yaml", max_depth=2)
+
+        self.assertEqual(t2.getRankIds(), ["M", "N"])
+        self.assertEqual(t2.getShape(), [21, 51])
+
+        for m, n_fiber in t.getRoot():
+            for n, k_fiber in n_fiber:
+                self.assertEqual(t2.getPayload(m, n), len(k_fiber))
+
+        t1 = Tensor.fromYAMLfile("./data/tensor_3d-0.yaml", max_depth=1)
+
+        self.assertEqual(t1.getRankIds(), ["M"])
+
+        for m, n_fiber in t.getRoot():
+            self.assertEqual(t1.getPayload(m), n_fiber.countValues())
+
+        t3 = Tensor.fromYAMLfile("./data/tensor_3d-0.yaml", max_depth=3)
+
+        self.assertEqual(t3, t)
+
+    def test_fiber_max_depth(self):
+        """Test loading the top levels of a fiber"""
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "fiber.yaml")
+
+            f = Fiber.fromUncompressed([[1, 0, 2], [0, 0, 0], [3, 4, 5]])
+            f.dump(filename)
+
+            self.assertEqual(Fiber.fromYAMLfile(filename), f)
+            self.assertEqual(Fiber.fromYAMLfile(filename, max_depth=1),
+                             Fiber([0, 2], [2, 3]))
+
+
+if __name__ == '__main__':
+    unittest.main()